@@ -0,0 +1,572 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""Stub docker daemon and docker CLI for the MLC benchmarks.
+
+FakeDockerDaemon serves a small subset of the Docker Engine API on a unix socket, write_stub_docker_cli() writes a
+'docker' executable answering the docker CLI commands used by mlc. Both serve the same generated containers and
+count the requests they receive, so that benchmarks can verify how many docker calls a mlc command costs.
+"""
+
+import functools
+import hashlib
+import http.server
+import io
+import json
+import os
+import queue
+import re
+import socketserver
+import stat
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import urllib.parse
+
+
+def make_containers(count, user_name, user_id=1000, running_every=2):
+    """Generate API container summaries of mlc containers.
+
+    Args:
+        count (int): number of containers.
+        user_name (str): owner of the containers.
+        user_id (int, optional): user id used in the container tags. Defaults to 1000.
+        running_every (int, optional): every n-th container is running. Defaults to 2.
+
+    Returns:
+        list: container summaries like provided by /containers/json.
+    """
+    containers = []
+    for index in range(count):
+        running = index % running_every == 0
+        name = f"bench{index}"
+        containers.append({
+            "Id": f"{index:064x}",
+            "Names": [f"/{name}._.{user_id}"],
+            "Image": f"aimehub/pytorch-2.5.0-aime-cuda12.1.1:{name}._.{user_id}",
+            "State": "running" if running else "exited",
+            "Status": "Up 2 hours" if running else "Exited (0) 3 days ago",
+            "SizeRw": 1000000 * (index + 1),
+            "SizeRootFs": 20000000000,
+            "Labels": {
+                "aime.mlc": user_name,
+                "aime.mlc.NAME": name,
+                "aime.mlc.USER": user_name,
+                "aime.mlc.ARCH": "CUDA_ADA",
+                "aime.mlc.MLC_VERSION": "4",
+                "aime.mlc.WORK_MOUNT": f"/home/{user_name}/workspace",
+                "aime.mlc.DATA_MOUNT": "-",
+                "aime.mlc.MODELS_MOUNT": "-",
+                "aime.mlc.FRAMEWORK": "Pytorch-2.5.0",
+                "aime.mlc.GPUS": "all",
+            },
+        })
+    return containers
+
+
+def filter_containers(containers, filters, all_containers):
+    """Apply docker filters (label, name, status) to container summaries."""
+    selected = []
+    for container in containers:
+        if not all_containers and container["State"] != "running":
+            continue
+        labels = container["Labels"]
+        if any(
+            (label.split("=", 1)[0] not in labels) or ("=" in label and labels[label.split("=", 1)[0]] != label.split("=", 1)[1])
+            for label in filters.get("label", [])
+        ):
+            continue
+        if any(not re.search(name, container["Names"][0]) for name in filters.get("name", [])):
+            continue
+        if filters.get("status") and container["State"] not in filters["status"]:
+            continue
+        selected.append(container)
+    return selected
+
+
+@functools.lru_cache(maxsize=16)
+def image_layers(image, size):
+    """Build the layers of an image: a base layer shared by all tags of the repository and a layer of its own for tagged images.
+
+    Args:
+        image (str): reference of the image.
+        size (int): size of the base layer in bytes, the own layer has an eighth of it.
+
+    Returns:
+        tuple: (diff id, layer tar) tuples from the bottom to the top layer.
+    """
+    repository, _, tag = image.partition("@")[0].rpartition(":")
+    if not repository or "/" in tag:
+        repository, tag = image.partition("@")[0], "latest"
+    layers = []
+    for source, layer_size in [(repository, size)] + ([(image, size // 8)] if tag != "latest" else []):
+        block = hashlib.sha256(source.encode()).hexdigest().encode() * 32
+        data = b"".join(block[index % 64:] + bytes([index % 251]) * 64 for index in range(layer_size // (len(block) + 64) + 1))[:layer_size]
+        layers.append(("sha256:" + hashlib.sha256(data).hexdigest(), data))
+    return tuple(layers)
+
+
+def make_image_tar(image, size):
+    """Build the tar of docker image save (layout of docker 25) with the layers of image_layers().
+
+    Args:
+        image (str): reference of the image (RepoTags of the manifest).
+        size (int): size of the base layer in bytes.
+
+    Returns:
+        bytes: the tar.
+    """
+    layers = image_layers(image, size)
+    files = {f"blobs/sha256/{diff_id[len('sha256:'):]}": data for diff_id, data in layers}
+    files["config.json"] = json.dumps({"config": {"Labels": {}}, "rootfs": {"type": "layers", "diff_ids": [diff_id for diff_id, _ in layers]}}).encode()
+    files["manifest.json"] = json.dumps([{"Config": "config.json", "RepoTags": [image], "Layers": list(files)[:len(layers)]}]).encode()
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def read_loaded_image(data):
+    """Return the image reference of a tar of docker image save, None if the tar is invalid."""
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r") as tar:
+            return json.load(tar.extractfile("manifest.json"))[0]["RepoTags"][0]
+    except (tarfile.TarError, KeyError, ValueError, IndexError):
+        return None
+
+
+def container_inspect(container):
+    """Convert a container summary into the reply of /containers/{id}/json (docker container inspect)."""
+    return dict(
+        container,
+        Name="/" + container["Names"][0].lstrip("/"),
+        State={"Status": container["State"], "Running": container["State"] == "running", "Paused": container["State"] == "paused",
+               "ExitCode": 0, "StartedAt": container.get("StartedAt", "2026-01-01T00:00:00Z"),
+               "FinishedAt": container.get("FinishedAt", "2026-01-01T00:00:00Z")},
+        Config={"Labels": container["Labels"], "Image": container["Image"]},
+    )
+
+
+def container_event(container, action):
+    """Build the event of the docker event stream for an action on a container."""
+    now = time.time()
+    return {"Type": "container", "Action": action, "status": action, "id": container["Id"],
+            "Actor": {"ID": container["Id"], "Attributes": dict(container["Labels"], name=container["Names"][0].lstrip("/"))},
+            "time": int(now), "timeNano": int(now * 1e9)}
+
+
+class _DaemonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "unix"
+
+    def send_json(self, obj, status=200):
+        data = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def handle_request(self):
+        daemon = self.server.daemon
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        path = re.sub(r"^/v[0-9.]+", "", url.path)
+        with daemon.lock:
+            daemon.requests.append(f"{self.command} {path}")
+        if path == "/_ping":
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"OK")
+        elif path == "/containers/json":
+            filters = json.loads(query.get("filters", ["{}"])[0])
+            containers = filter_containers(daemon.containers, filters, query.get("all", ["0"])[0] == "1")
+            if query.get("size", ["0"])[0] != "1":
+                containers = [{key: value for key, value in container.items() if not key.startswith("Size")} for container in containers]
+            self.send_json(containers)
+        elif path == "/events":
+            self.stream_events(json.loads(query.get("filters", ["{}"])[0]))
+        elif self.command == "POST" and re.match(r"^/containers/[^/]+/(pause|unpause)$", path):
+            container_id, action = path[len("/containers/"):].split("/")
+            container = next((c for c in daemon.containers if container_id in (c["Id"], c["Names"][0].lstrip("/"))), None)
+            if container is None or container["State"] != ("running" if action == "pause" else "paused"):
+                self.send_json({"message": f"Container {container_id} can not be {action}d"}, 409)
+                return
+            container["State"] = "paused" if action == "pause" else "running"
+            daemon.publish_event(container_event(container, action))
+            self.send_empty(204)
+        elif self.command == "POST" and re.match(r"^/containers/[^/]+/(start|stop)$", path):
+            container_id, action = path[len("/containers/"):].split("/")
+            container = next((c for c in daemon.containers if container_id in (c["Id"], c["Names"][0].lstrip("/"))), None)
+            if container is None:
+                self.send_json({"message": f"No such container: {container_id}"}, 404)
+                return
+            if (container["State"] == "running") == (action == "start"):
+                self.send_empty(304)
+                return
+            time.sleep(daemon.stop_delay if action == "stop" else daemon.start_delay)
+            container["State"] = "running" if action == "start" else "exited"
+            container["Status"] = "Up 1 second" if action == "start" else "Exited (0) 1 second ago"
+            container["StartedAt" if action == "start" else "FinishedAt"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            daemon.publish_event(container_event(container, action))
+            self.send_empty(204)
+        elif self.command == "DELETE" and path.startswith("/containers/"):
+            container_id = urllib.parse.unquote(path[len("/containers/"):])
+            container = next((c for c in daemon.containers if container_id in (c["Id"], c["Names"][0].lstrip("/"))), None)
+            if container is None or container["State"] == "running":
+                self.send_json({"message": f"No such container: {container_id}" if container is None else "container is running"}, 404 if container is None else 409)
+                return
+            daemon.containers.remove(container)
+            daemon.publish_event(container_event(container, "destroy"))
+            self.send_empty(204)
+        elif path.startswith("/containers/") and path.endswith("/json"):
+            container_id = urllib.parse.unquote(path[len("/containers/"):-len("/json")])
+            container = next((c for c in daemon.containers if container_id in (c["Id"], c["Names"][0].lstrip("/"))), None)
+            if container and query.get("size", ["0"])[0] == "1":
+                time.sleep(daemon.size_delay)
+            elif container:
+                container = {key: value for key, value in container.items() if not key.startswith("Size")}
+            if container:
+                container = container_inspect(container)
+            self.send_json(container if container else {"message": f"No such container: {container_id}"}, 200 if container else 404)
+        elif path.endswith("/top"):
+            container_id = urllib.parse.unquote(path[len("/containers/"):-len("/top")])
+            container = next((c for c in daemon.containers if container_id in (c["Id"], c["Names"][0].lstrip("/"))), {})
+            titles = [title.upper() for title in query.get("ps_args", ["-o pid"])[0].split()[-1].split(",")]
+            processes = [process[:len(titles)] for process in container.get("Processes", [["1", "00:00:00"]])]
+            self.send_json({"Titles": titles, "Processes": processes})
+        elif path == "/info":
+            self.send_json({"DockerRootDir": daemon.root_dir})
+        elif self.command == "POST" and path == "/commit":
+            container = next((c for c in daemon.containers if query["container"][0] in (c["Id"], c["Names"][0].lstrip("/"))), None)
+            if container is None:
+                self.send_json({"message": "No such container"}, 404)
+                return
+            image = f"{query['repo'][0]}:{query['tag'][0]}"
+            daemon.images[image] = {"Id": "sha256:" + hashlib.sha256(image.encode()).hexdigest(), "Size": daemon.save_size}
+            self.send_json({"Id": daemon.images[image]["Id"]}, 201)
+        elif self.command == "POST" and path == "/images/load":
+            body = b""
+            while True:
+                try:
+                    chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+                except ValueError:
+                    # The client aborted the upload
+                    self.close_connection = True
+                    return
+                body += self.rfile.read(chunk_size)
+                self.rfile.readline()
+                if chunk_size == 0:
+                    break
+            image = read_loaded_image(body)
+            if image is None:
+                self.send_json({"message": "invalid tar"}, 500)
+                return
+            daemon.images[image] = {"Id": "sha256:" + hashlib.sha256(image.encode()).hexdigest(), "Size": len(body)}
+            data = (json.dumps({"stream": f"Loaded image: {image}\n"}) + "\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.command == "POST" and path.startswith("/images/") and path.endswith("/tag"):
+            image = daemon.images.get(urllib.parse.unquote(path[len("/images/"):-len("/tag")]))
+            if image is None:
+                self.send_json({"message": "No such image"}, 404)
+                return
+            daemon.images[f"{query['repo'][0]}:{query['tag'][0]}"] = dict(image)
+            self.send_empty(201)
+        elif path.startswith("/images/") and path.endswith("/get"):
+            image = urllib.parse.unquote(path[len("/images/"):-len("/get")])
+            if image not in daemon.images:
+                self.send_json({"message": "No such image"}, 404)
+                return
+            data = make_image_tar(image, daemon.save_size)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-tar")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif path == "/images/json":
+            labels = json.loads(query.get("filters", ["{}"])[0]).get("label", [])
+            images = [dict(image, RepoTags=[reference]) for reference, image in daemon.images.items()
+                      if all(label in (image.get("Labels") or {}) for label in labels)]
+            self.send_json(images)
+        elif self.command == "DELETE" and path.startswith("/images/"):
+            name = urllib.parse.unquote(path[len("/images/"):])
+            references = [reference for reference, image in daemon.images.items() if name in (reference, image.get("Id"))]
+            for reference in references:
+                del daemon.images[reference]
+            self.send_json([{"Deleted": name}] if references else {"message": "No such image"}, 200 if references else 404)
+        elif path.startswith("/images/") and path.endswith("/history"):
+            name = urllib.parse.unquote(path[len("/images/"):-len("/history")])
+            reference = next((reference for reference, image in daemon.images.items() if name in (reference, image.get("Id"))), None)
+            layers = image_layers(reference, daemon.save_size) if reference else []
+            self.send_json([{"Size": len(data)} for _, data in reversed(layers)] if reference else {"message": "No such image"}, 200 if reference else 404)
+        elif path.startswith("/images/") and path.endswith("/json"):
+            name = urllib.parse.unquote(path[len("/images/"):-len("/json")])
+            reference, image = next(((reference, image) for reference, image in daemon.images.items() if name in (reference, image.get("Id"))), (name, None))
+            if image is not None and "RootFS" not in image:
+                image = dict(image, RootFS={"Type": "layers", "Layers": [diff_id for diff_id, _ in image_layers(reference, daemon.save_size)]})
+            self.send_json(image if image else {"message": "No such image"}, 200 if image else 404)
+        elif path.startswith("/distribution/") and path.endswith("/json"):
+            digest = daemon.remote_digests.get(urllib.parse.unquote(path[len("/distribution/"):-len("/json")]))
+            self.send_json({"Descriptor": {"digest": digest}} if digest else {"message": "not found"}, 200 if digest else 404)
+        elif path == "/images/create":
+            self.stream_pull(query["fromImage"][0], query.get("tag", ["latest"])[0])
+        else:
+            self.send_json({"message": f"page not found: {path}"}, 404)
+
+    def stream_events(self, filters):
+        daemon = self.server.daemon
+        events = queue.Queue()
+        with daemon.lock:
+            daemon.event_queues.append(events)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while not daemon.stopped:
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if filters.get("container") and event["id"] not in filters["container"]:
+                    continue
+                if filters.get("type") and event["Type"] not in filters["type"]:
+                    continue
+                if any(label not in event["Actor"]["Attributes"] for label in filters.get("label", [])):
+                    continue
+                if filters.get("event") and event["Action"] not in filters["event"]:
+                    continue
+                data = (json.dumps(event) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            self.close_connection = True
+        except OSError:
+            pass
+        finally:
+            with daemon.lock:
+                daemon.event_queues.remove(events)
+
+    def stream_pull(self, repository, tag):
+        daemon = self.server.daemon
+        image = repository if tag == "latest" else f"{repository}:{tag}"
+        if "@" in repository:
+            # Pull by digest, the image is available if the registry has this digest
+            image, digest = repository, repository.partition("@")[2]
+            repository = repository.partition("@")[0]
+            if daemon.remote_digests.get(repository) == digest:
+                daemon.remote_digests[image] = digest
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if image in daemon.remote_digests:
+            events = [{"status": "Downloading", "id": f"layer{index}", "progressDetail": {"current": step * 1000000, "total": 4000000}}
+                      for index in range(3) for step in range(1, 5)]
+            events += [{"status": "Pull complete", "id": f"layer{index}"} for index in range(3)]
+            events.append({"status": f"Digest: {daemon.remote_digests[image]}"})
+            daemon.images[image] = {"Id": daemon.remote_digests[image], "RepoDigests": [f"{repository}@{daemon.remote_digests[image]}"], "Size": 12000000}
+        else:
+            events = [{"error": f"pull access denied for {repository}"}]
+        for event in events:
+            data = (json.dumps(event) + "\r\n").encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            time.sleep(daemon.pull_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+    do_GET = do_POST = do_DELETE = handle_request
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeDockerDaemon:
+    """Docker Engine API stub on a unix socket, usable as context manager.
+
+    Args:
+        containers (list): container summaries to serve.
+        socket_path (str, optional): path of the socket. Defaults to a temporary path.
+        images (dict, optional): local images {reference: image inspect dict}. Defaults to no images.
+        remote_digests (dict, optional): digests of the images available in the registry {reference: digest}.
+    """
+
+    def __init__(self, containers, socket_path=None, images=None, remote_digests=None):
+        self.containers = containers
+        self.images = images if images is not None else {}
+        self.remote_digests = remote_digests or {}
+        self.root_dir = tempfile.gettempdir()
+        self.pull_delay = 0.01
+        self.size_delay = 0.05
+        self.stop_delay = 0.2
+        self.start_delay = 0.1
+        self.save_size = 32 * 1024 * 1024
+        self.event_queues = []
+        self.stopped = False
+        self.socket_path = socket_path or os.path.join(tempfile.mkdtemp(prefix="mlc-bench-"), "docker.sock")
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def docker_host(self):
+        return f"unix://{self.socket_path}"
+
+    def __enter__(self):
+        self.server = _UnixServer(self.socket_path, _DaemonHandler)
+        self.server.daemon = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def publish_event(self, event):
+        """Send an event to all clients of /events."""
+        with self.lock:
+            for events in self.event_queues:
+                events.put(event)
+
+    def __exit__(self, *exc):
+        self.stopped = True
+        self.server.shutdown()
+        self.server.server_close()
+        os.unlink(self.socket_path)
+
+
+STUB_CLI = r'''#!{python}
+# Stub docker CLI generated by benchmarks/docker_stub.py
+import fcntl, json, re, sys
+sys.path.insert(0, {bench_dir!r})
+from docker_stub import container_inspect, filter_containers
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(" ".join(args) + "\n")
+lock = open({containers!r} + ".lock", "w")
+fcntl.flock(lock, fcntl.LOCK_EX)
+with open({containers!r}) as f:
+    containers = json.load(f)
+if args[:2] in (["container", "ps"], ["container", "ls"]) or args[:1] == ["ps"]:
+    filters = {{}}
+    for index, arg in enumerate(args):
+        value = args[index + 1] if arg == "--filter" else arg.split("=", 1)[1] if arg.startswith("--filter=") else None
+        if value:
+            key, _, val = value.partition("=")
+            filters.setdefault(key, []).append(val)
+    selected = filter_containers(containers, filters, "-a" in args)
+    fmt = args[args.index("--format") + 1] if "--format" in args else "{{{{.Names}}}}"
+    for c in selected:
+        if "(.Label" in fmt:
+            labels = {{label: c["Labels"].get(label, "") for label in re.findall(r'\.Label "([^"]+)"', fmt)}}
+            row = dict(ID=c["Id"], Names=c["Names"][0].lstrip("/"), Image=c["Image"], State=c["State"], Status=c["Status"], Labels=labels)
+            if ".Size" in fmt:
+                row["Size"] = "0B"
+            print(json.dumps(row))
+        elif "json" in fmt:
+            row = dict(ID=c["Id"][:12], Names=c["Names"][0].lstrip("/"), Image=c["Image"], State=c["State"], Status=c["Status"],
+                       Labels=",".join(f"{{k}}={{v}}" for k, v in c["Labels"].items()), Size="0B")
+            print(json.dumps(row))
+        elif ".Image" in fmt:
+            print(c["Image"])
+        else:
+            print(c["Names"][0].lstrip("/"))
+elif args[:2] == ["container", "inspect"]:
+    container = next((c for c in containers if args[-1] in (c["Id"], c["Names"][0].lstrip("/"))), None)
+    if container is None:
+        sys.exit(f"Error: No such container: {{args[-1]}}")
+    if "--format" not in args:
+        print(json.dumps([container_inspect(container)]))
+    elif "ExitCode" in args[-2]:
+        print(0)
+    elif "ExecIDs" in args[-2]:
+        print(json.dumps(container.get("ExecIDs")), json.dumps(container.get("StartedAt", "2026-01-01T00:00:00Z")))
+    else:
+        print(container["SizeRw"], container["SizeRootFs"])
+elif args[:2] in (["container", "start"], ["container", "stop"], ["container", "rm"], ["container", "pause"]):
+    container = next((c for c in containers if args[-1] in (c["Id"], c["Names"][0].lstrip("/"))), None)
+    if container is None or (args[1] == "rm" and container["State"] == "running"):
+        sys.exit(f"Error response from daemon: cannot {{args[1]}} container {{args[-1]}}")
+    if args[1] == "rm":
+        containers.remove(container)
+    else:
+        container["State"] = {{"start": "running", "stop": "exited", "pause": "paused"}}[args[1]]
+    with open({containers!r}, "w") as f:
+        json.dump(containers, f)
+    print(args[-1])
+elif args[:1] == ["create"]:
+    name = args[args.index("--name") + 1]
+    labels = dict(arg.split("=", 1) for previous, arg in zip(args, args[1:]) if previous == "--label")
+    containers.append({{"Id": f"{{len(containers) + 1000:064x}}", "Names": ["/" + name], "Image": args[args.index("bash") - 1],
+                       "State": "created", "Status": "Created", "Labels": labels}})
+    with open({containers!r}, "w") as f:
+        json.dump(containers, f)
+    print(containers[-1]["Id"])
+elif args[:2] == ["container", "commit"]:
+    print("sha256:" + "0" * 64)
+elif args[:2] == ["image", "save"]:
+    from docker_stub import make_image_tar
+    sys.stdout.buffer.write(make_image_tar(args[-1], 32 * 1024 * 1024))
+elif args[:2] == ["image", "load"]:
+    from docker_stub import read_loaded_image
+    image = read_loaded_image(sys.stdin.buffer.read())
+    if image is None:
+        sys.exit("Error: invalid tar")
+    print(f"Loaded image: {{image}}")
+elif args[:2] in (["image", "tag"], ["image", "rm"]):
+    pass
+elif args[:1] == ["exec"]:
+    print("exec", " ".join(args[1:]))
+elif args[:1] == ["top"]:
+    container = next((c for c in containers if args[1] in (c["Id"], c["Names"][0].lstrip("/"))), {{}})
+    titles = args[-1].upper().split(",") if "-o" in args else ["PID"]
+    print(" ".join(titles))
+    for process in container.get("Processes", [["1", "00:00:00"]]):
+        print(" ".join(process[:len(titles)]))
+'''
+
+
+def write_stub_docker_cli(containers, directory=None):
+    """Write a 'docker' executable answering the CLI commands used by mlc.
+
+    Args:
+        containers (list): container summaries to serve.
+        directory (str, optional): directory of the executable. Defaults to a temporary directory.
+
+    Returns:
+        str, str: directory to be prepended to PATH and the path of the invocation log (one line per call).
+    """
+    directory = directory or tempfile.mkdtemp(prefix="mlc-bench-")
+    containers_file = os.path.join(directory, "containers.json")
+    log_file = os.path.join(directory, "docker-calls.log")
+    with open(containers_file, "w") as f:
+        json.dump(containers, f)
+    open(log_file, "w").close()
+    docker_path = os.path.join(directory, "docker")
+    with open(docker_path, "w") as f:
+        f.write(STUB_CLI.format(
+            python=sys.executable,
+            bench_dir=os.path.dirname(os.path.abspath(__file__)),
+            log=log_file,
+            containers=containers_file,
+        ))
+    os.chmod(docker_path, os.stat(docker_path).st_mode | stat.S_IEXEC)
+    return directory, log_file
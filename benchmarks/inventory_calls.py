@@ -0,0 +1,86 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""Count the docker calls of the container selection of mlc remove/start/stop for a growing number of containers.
+
+The container state is read from a single inventory snapshot, so the number of docker calls has to stay constant.
+
+Usage:
+    python3 benchmarks/inventory_calls.py [--counts 1 10 40 160]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import pwd
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from docker_stub import FakeDockerDaemon, make_containers, write_stub_docker_cli
+
+# mlc resolves the login name at import time, which needs a controlling terminal
+os.getlogin = lambda: pwd.getpwuid(os.getuid()).pw_name
+
+import mlc
+
+
+def run_mlc(argv):
+    """Run mlc.main() in-process with a fresh module state and return the wall time in ms."""
+    importlib.reload(mlc)
+    sys.argv = ["mlc.py"] + argv
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            mlc.main()
+        except SystemExit:
+            pass
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 40, 160], help="numbers of containers")
+    parser.add_argument("--command", default="stop", choices=["remove", "start", "stop"], help="mlc command to measure")
+    args = parser.parse_args()
+
+    user_name = pwd.getpwuid(os.getuid()).pw_name
+    # A not existing container name in script mode stops the command right after the container selection
+    mlc_argv = [args.command, "not-existing", "-s"]
+
+    print(f"{'containers':>10}  {'api calls':>9}  {'api ms':>8}  {'cli spawns':>10}  {'cli ms':>8}")
+    results = []
+    for count in args.counts:
+        containers = make_containers(count, user_name, os.getuid())
+
+        with FakeDockerDaemon(containers) as daemon:
+            os.environ["DOCKER_HOST"] = daemon.docker_host
+            os.environ.pop("MLC_DOCKER_API", None)
+            api_ms = run_mlc(mlc_argv)
+            api_calls = len([request for request in daemon.requests if request != "GET /_ping"])
+
+        stub_dir, log_file = write_stub_docker_cli(containers)
+        os.environ["MLC_DOCKER_API"] = "0"
+        os.environ["PATH"] = stub_dir + os.pathsep + os.environ["PATH"]
+        cli_ms = run_mlc(mlc_argv)
+        with open(log_file) as f:
+            cli_calls = len(f.readlines())
+        os.environ["PATH"] = os.environ["PATH"].split(os.pathsep, 1)[1]
+
+        results.append((api_calls, cli_calls))
+        print(f"{count:>10}  {api_calls:>9}  {api_ms:>8.1f}  {cli_calls:>10}  {cli_ms:>8.1f}")
+
+    constant = len(set(results)) == 1
+    print(f"\ndocker calls {'constant' if constant else 'GROWING'} with the number of containers")
+    sys.exit(0 if constant else 1)
+
+
+if __name__ == "__main__":
+    main()
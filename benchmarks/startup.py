@@ -0,0 +1,107 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""Measure the start latency of mlc commands against a stub docker daemon and a stub docker CLI.
+
+Every command is run through the bash wrapper mlc in a new process, like from a shell prompt. The best and the median
+wall time of the runs are reported, the overhead is the best wall time minus the best start of an empty python
+interpreter and the import time is the sum of all module imports reported by python -X importtime during the command.
+Commands whose overhead exceeds the latency budget are marked and make the script exit with 1.
+
+Usage:
+    python3 benchmarks/startup.py [--runs 10] [--containers 20]
+"""
+
+import argparse
+import os
+import pwd
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from docker_stub import FakeDockerDaemon, make_containers, write_stub_docker_cli
+
+# The bash wrapper, started the same way as by the user
+mlc_wrapper = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mlc")
+
+# Latency budget in ms on top of the python interpreter start, per command line. Commands querying the docker daemon
+# include the import of http.client (with ssl and email, about 30 ms), which mlc loads only for the first API request.
+# mlc list is called by shell prompts and tab completion, so it has the tightest budget of them.
+startup_budget_ms = {
+    "-v": 50,
+    "list": 90,
+    "list -a": 90,
+    "stop not-existing -s": 100,
+    "start not-existing -s": 100,
+    "open not-existing -s": 100,
+    "create -h": 80,
+}
+
+
+def run_command(command, env):
+    """Run a command once and return its wall time in ms and its stderr."""
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return (time.perf_counter() - start) * 1000, result.stderr
+
+
+def import_time_ms(command, env):
+    """Sum of the self times of all imports of a command in ms."""
+    _, stderr = run_command(command, dict(env, PYTHONPROFILEIMPORTTIME="1"))
+    total_us = 0
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            total_us += int(line.split("|")[0].split(":")[1])
+    return total_us / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="runs per command")
+    parser.add_argument("--containers", type=int, default=20, help="number of containers served by the stub daemon")
+    args = parser.parse_args()
+
+    user_name = pwd.getpwuid(os.getuid()).pw_name
+    containers = make_containers(args.containers, user_name, os.getuid())
+    stub_dir, _ = write_stub_docker_cli(containers)
+
+    with FakeDockerDaemon(containers) as daemon:
+        env = dict(
+            os.environ,
+            DOCKER_HOST=daemon.docker_host,
+            PATH=stub_dir + os.pathsep + os.environ["PATH"],
+            XDG_CACHE_HOME=tempfile.mkdtemp(prefix="mlc-bench-"),
+        )
+        env.pop("MLC_DOCKER_API", None)
+        # mlc relies on the bytecode cache in __pycache__
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+        baseline_ms = min(run_command(["python3", "-c", "pass"], env)[0] for _ in range(args.runs))
+        print(f"python start: {baseline_ms:.1f} ms\n")
+        print(f"{'command':<24}  {'best ms':>8}  {'median':>8}  {'overhead':>8}  {'imports':>8}  {'budget':>6}")
+
+        over_budget = []
+        for command_line, budget_ms in startup_budget_ms.items():
+            command = [mlc_wrapper] + command_line.split()
+            # The first run writes the compiled bytecode to __pycache__
+            run_command(command, env)
+            wall_times = [run_command(command, env)[0] for _ in range(args.runs)]
+            overhead_ms = min(wall_times) - baseline_ms
+            status = "" if overhead_ms <= budget_ms else "  OVER BUDGET"
+            if status:
+                over_budget.append(command_line)
+            print(f"{command_line:<24}  {min(wall_times):>8.1f}  {statistics.median(wall_times):>8.1f}  {overhead_ms:>8.1f}  {import_time_ms(command, env):>8.1f}  {budget_ms:>6}{status}")
+
+    print(f"\n{len(over_budget)} of {len(startup_budget_ms)} commands over budget")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
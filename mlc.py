@@ -11,19 +11,42 @@ import os            # OS interactions
 import subprocess    # Run external commands
 import argparse      # Parse CLI arguments
 import json          # Handle JSON data
-import pathlib       # File system paths
-import csv           # Read/write CSV files
 import re            # Regular expressions
-
-from collections import defaultdict
+import threading     # Thread local docker API connections
+import types         # Read-only views of the container inventory
+import time          # Refresh intervals and timings
+import pwd           # User name without a controlling terminal
+import io            # Read streamed image tars with tarfile
+# Modules needed by single commands only (pathlib, csv, hashlib, shutil, queue, fnmatch, fcntl, calendar, sqlite3) are imported
+# inside the functions using them, to keep the start of frequent commands like mlc list fast (see benchmarks/startup.py).
+# The Docker Engine API client imports http.client, socket and urllib.parse on its first request: http.client alone
+# (with ssl and email) takes about half of the start time of mlc, commands not talking to the daemon do not need it.
+
+from collections import defaultdict, namedtuple
 
 # Set Default values  AIME mlc
 mlc_container_version = 4     # Version number of AIME MLC setup (mlc create). In version 4: data and models directories included
 mlc_version = "2.2.0"         # Version number of AIME MLC
 
+# Files used to detect the host gpu architecture and to validate its cached value
+dpkg_status_file = "/var/lib/dpkg/status"
+gpu_driver_version_files = ["/proc/driver/nvidia/version", "/sys/module/amdgpu/version", "/opt/rocm/.info/version"]
+
+def get_user_name():
+    """Return the login name of the user, or the name of the current uid without a controlling terminal (cron, ssh commands, ...).
+
+    Returns:
+        str: user name.
+    """
+    try:
+        return os.getlogin()
+    except OSError:
+        return pwd.getpwuid(os.getuid()).pw_name
+
+
 # Obtain user and group id, user name for different tasks by create, open,...
 user_id = os.getuid()
-user_name = os.getlogin()
+user_name = get_user_name()
 group_id = os.getgid()      
 
 # Coloring the frontend (ANSI escape codes) and i/o 
@@ -54,7 +77,7 @@ aime_copyright_claim = f"""{AIME_LOGO}
 # Customization of the argument parser
 class CustomArgumentParser(argparse.ArgumentParser):
     def error(self, message):
-        print(f"\n{ERROR}Please provide one of the following valid commands:{RESET}\ncreate, list, open, remove, start, stats, stop, update-sys\n")
+        print(f"\n{ERROR}Please provide one of the following valid commands:{RESET}\ncreate, data, export, gc, import, list, models, open, prefetch, prune-layers, remove, start, stats, stop, update-sys, warm, watchdog\n")
         exit(1)
 
 
@@ -68,7 +91,7 @@ def get_flags():
     parser = CustomArgumentParser(
         #ToDo: improve the description using a customized class
         description=f'{aime_copyright_claim}{AIME_LOGO}AIME Machine Learning Container management system.\nEasily install, run and manage Docker containers\nfor Pytorch and Tensorflow deep learning frameworks.{RESET}',
-        usage = f"\nmlc [-h] [-v] <command> [-h]",
+        usage = "\nmlc [-h] [-v] <command> [-h]",
         formatter_class = argparse.RawTextHelpFormatter  
     )
     
@@ -77,18 +100,45 @@ def get_flags():
         action = 'version',
         version = f'{INPUT}AIME MLC version: {mlc_version}{RESET}'
     )
+    parser.add_argument(
+        '--trace',
+        action='store_true',
+        help="Record every docker call with its duration, exit code and output size, write them as Chrome trace events\n"
+             "to MLC_TRACE or mlc-trace-<time>.json and print a summary at exit. Accepted at any position."
+    )
     
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest='command', required=False, help='Sub-command to execute.')
 
-    # Parser for the "create" command
+    # Only the parser of the requested command is built, the parsers of all commands only for the general help and unknown commands
+    requested_command = next((arg for arg in sys.argv[1:] if not arg.startswith('-')), None)
+    show_general_help = requested_command is None and ('-h' in sys.argv or '--help' in sys.argv)
+    for command, add_command_parser in command_parsers.items():
+        if command == requested_command or show_general_help or (requested_command is not None and requested_command not in command_parsers):
+            add_command_parser(subparsers)
+
+    # Parse arguments
+    args = parser.parse_args()
+         
+    return args
+
+
+def add_create_parser(subparsers):
+    """Add the parser of the "create" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
     parser_create = subparsers.add_parser(
         'create',
         description= "Create a new container.",
         help='Create a new container.',
         usage = f"\n{INPUT}mlc create <container_name> <framework_name> <framework_version> "
                 f"\n    -w <workspace_directory> -d <data_directory> -m <models_directory>"
-                f"\n    -s -arch <gpu_architecture> -ng <number of gpus> {RESET}", 
+                f"\n    -s -arch <gpu_architecture> -ng <number of gpus> --allocate-gpus"
+                f"\n    --cpus <cores> --memory <size> --ipc <host|private> --shm-size <size> --cpuset <cpu list|auto>"
+                f"\n    --data-cache <cache_directory> --data-cache-size <size>"
+                f"\n\n    mlc create --from <manifest.json|manifest.yaml> [-j <jobs>] [-s]{RESET}", 
         formatter_class = argparse.RawTextHelpFormatter
     ) 
     parser_create.add_argument(
@@ -113,11 +163,31 @@ def get_flags():
         '-arch', '--architecture', 
         type=str,
         metavar='', 
-        help=f"Set the gpu architecture to be used. Default: host gpu architecture (auto-detected)."
-             f"\nThere are 2 options to change the default value:"
-             f"\n  1.-using the -arch flag."  
-             f"\n  2.-adding the environment variable MLC_ARCH, with export MLC_ARCH=gpu_arch."
-             f"\nThe flag -arch overrides MLC_ARCH and MLC_ARCH overrides the default value."
+        help="Set the gpu architecture to be used. Default: host gpu architecture (auto-detected)."
+             "\nThere are 2 options to change the default value:"
+             "\n  1.-using the -arch flag."  
+             "\n  2.-adding the environment variable MLC_ARCH, with export MLC_ARCH=gpu_arch."
+             "\nThe flag -arch overrides MLC_ARCH and MLC_ARCH overrides the default value."
+    )
+    parser_create.add_argument(
+        '--allocate-gpus',
+        action='store_true',
+        default=allocate_gpus_default,
+        help="Assign specific GPUs which are not held by running containers, the number of GPUs is set with -g."
+             "\nGPUs connected by NVLink/XGMI are preferred. Default: on if MLC_ALLOCATE_GPUS=1 is set."
+    )
+    parser_create.add_argument(
+        '--cpus',
+        type=str,
+        metavar='',
+        help='Number of cpu cores the container may use, for example 8 or 7.5. Default: no limit.'
+    )
+    parser_create.add_argument(
+        '--cpuset',
+        type=str,
+        metavar='',
+        help="Cores the container runs on, for example 0-15,32-47, or 'auto' for the cores and memory"
+             "\nof the NUMA nodes local to the GPUs of the container. Default: all cores."
     )
     parser_create.add_argument(
         '-d', '--data_dir', 
@@ -125,6 +195,20 @@ def get_flags():
         metavar='',
         help='Location of the data directory.'
     )
+    parser_create.add_argument(
+        '--data-cache',
+        type=str,
+        metavar='',
+        help="Directory on a local disk for a read-through cache of the data directory, for example /nvme/mlc-cache."
+             "\nFiles read by the container are copied into the cache and read from there the next time."
+             f"\n/data is read-only then, the data directory is mounted read-write as {data_cache_origin}."
+    )
+    parser_create.add_argument(
+        '--data-cache-size',
+        type=str,
+        metavar='',
+        help="Maximal size of the data cache, for example 500G. Files not used for the longest time are evicted first."
+    )
     parser_create.add_argument(
         '-g', '--num_gpus', 
         type=str, 
@@ -137,6 +221,23 @@ def get_flags():
         action='store_true',
         help='Show the available AI frameworks and versions (default: interactive mode).'
     )
+    parser_create.add_argument(
+        '--from', 
+        dest='manifest',
+        type=str,
+        metavar='', 
+        help="Create the containers described in a json or yaml manifest, for example:"
+             "\n  {\"defaults\": {\"framework\": \"Pytorch\", \"version\": \"2.8.0\", \"workspace_dir\": \"~/workspace\"},"
+             "\n   \"containers\": [{\"name\": \"alice\"}, {\"name\": \"bob\", \"data_dir\": \"/data\"}]}"
+             f"\nValid keys of the entries: {', '.join(create_manifest_keys)}."
+    )
+    parser_create.add_argument(
+        '-j', '--jobs', 
+        type=int,
+        default=4,
+        metavar='', 
+        help='Maximal number of parallel pulls and container setups with --from. Default: 4.'
+    )
     parser_create.add_argument(
         '-m', '--models_dir', 
         type=str,
@@ -144,10 +245,44 @@ def get_flags():
         help='Location of the models directory.'
     )
     parser_create.add_argument(
-        '-s', '--script', 
+        '--memory',
+        type=str,
+        metavar='',
+        help='Memory limit of the container, for example 64g. Default: no limit.'
+    )
+    parser_create.add_argument(
+        '--no-watchdog',
+        action='store_true',
+        help='Never stop or pause the container by mlc watchdog, even if it is idle.'
+    )
+    parser_create.add_argument(
+        '-s', '--script',
         action='store_true',
         help='Enable script mode (default: interactive mode).'
     )
+    parser_create.add_argument(
+        '--refresh-arch', 
+        action='store_true',
+        help='Detect the host gpu architecture again instead of using the cached result.'
+    )
+    parser_create.add_argument(
+        '--shm-size',
+        type=str,
+        metavar='',
+        help='Size of /dev/shm, used by the data loader workers, for example 16g. Needs --ipc private.'
+    )
+    parser_create.add_argument(
+        '--ipc',
+        choices=['host', 'private'],
+        default=None,
+        help="IPC namespace of the container. Default: host, the container shares /dev/shm with the host (NCCL, data loaders)."
+             "\nprivate gives the container its own /dev/shm, sized with --shm-size."
+    )
+    parser_create.add_argument(
+        '--rebuild-layer', 
+        action='store_true',
+        help='Set up the user in the base image again instead of reusing the prepared user setup layer.'
+    )
     parser_create.add_argument(
         '-w', '--workspace_dir', 
         default=None, 
@@ -155,11 +290,227 @@ def get_flags():
         metavar='',
         help='Location of the workspace directory. Default: /home/$USER/workspace.'
     )
-  
-    # Parser for the "list" command
+
+
+def add_data_parser(subparsers):
+    """Add the parser of the "data" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_data = subparsers.add_parser(
+        'data',
+        usage = f"\n{INPUT}mlc data warm container_name [-f <file_list>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Manage the data cache of containers created with mlc create --data-cache.",
+        help="Manage the data cache of containers.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    data_subparsers = parser_data.add_subparsers(dest='data_command', required=True, metavar='warm')
+    parser_warm = data_subparsers.add_parser(
+        'warm',
+        usage = f"\n{INPUT}mlc data warm container_name [-f <file_list>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Copy files of the data directory into the data cache of a container in advance.",
+        help="Copy files into the data cache in advance.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_warm.add_argument(
+        'container_name',
+        nargs='?',
+        type=str,
+        help="Name of the container."
+    )
+    parser_warm.add_argument(
+        '-f', '--files',
+        type=str,
+        metavar='',
+        help="File with one path per line, relative to /data or below /data, '-' reads the list from stdin."
+             "\nThe files are copied in the order of the list as long as they fit into the cache. Default: all files."
+    )
+    parser_warm.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=8,
+        metavar='',
+        help="Number of parallel readers. Default: 8."
+    )
+    parser_warm.add_argument(
+        '-s', '--script',
+        action='store_true',
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_export_parser(subparsers):
+    """Add the parser of the "export" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_export = subparsers.add_parser(
+        'export',
+        usage = f"\n{INPUT}mlc export container_name [-o <archive>] [-j <jobs>] [-l <level>] [--delta] [-f|--force] [-s|--script]{RESET}",
+        description= "Export a container with its content and labels into a compressed archive, which mlc import restores on another machine.",
+        help="Export a container into a compressed archive.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_export.add_argument(
+        'container_name',
+        nargs='?',
+        type=str,
+        help="Name of the container to be exported."
+    )
+    parser_export.add_argument(
+        '--delta',
+        action='store_true',
+        help="Leave the layers of the base image out of the archive. mlc import pulls the base image if it is missing."
+    )
+    parser_export.add_argument(
+        '-f', '--force',
+        action='store_true',
+        help="Overwrite an existing archive."
+    )
+    parser_export.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar='',
+        help="Number of compression threads. Default: number of cpu cores."
+    )
+    parser_export.add_argument(
+        '-l', '--level',
+        type=int,
+        default=6,
+        choices=range(1, 10),
+        metavar='',
+        help="Compression level from 1 (fastest) to 9 (smallest). Default: 6."
+    )
+    parser_export.add_argument(
+        '-o', '--output',
+        type=str,
+        metavar='',
+        help="Path of the archive. Default: <container_name>.mlc.tar.gz in the current directory."
+    )
+    parser_export.add_argument(
+        '-s', '--script',
+        action='store_true',
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_gc_parser(subparsers):
+    """Add the parser of the "gc" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_gc = subparsers.add_parser(
+        'gc',
+        usage = f"\n{INPUT}mlc gc [--older-than <days>] [--keep-latest <n>] [--bases] [--all-users] [-j <jobs>] [--dry-run] [-s|--script]{RESET}",
+        description= "Remove the images and containers mlc no longer needs: images of removed containers, images of interrupted exports,\nstale user setup layers, setup containers of interrupted creates and with --bases unused base images.\nImages used by a container or by an image built on top of them are never removed.",
+        help="Remove the images and containers mlc no longer needs.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_gc.add_argument(
+        '--older-than',
+        type=float,
+        default=user_layer_max_age_days,
+        metavar='',
+        help=f"Age in days after which unused user setup layers and base images are removed. Default: {user_layer_max_age_days}."
+    )
+    parser_gc.add_argument(
+        '--keep-latest',
+        type=int,
+        default=0,
+        metavar='',
+        help="Keep the n newest unused user setup layers of every base image and base images of every framework. Default: 0."
+    )
+    parser_gc.add_argument(
+        '--bases',
+        action='store_true',
+        help="Remove unused base images of the image catalog as well."
+    )
+    parser_gc.add_argument(
+        '--all-users',
+        action='store_true',
+        help="Include the containers and images of other users (default: only the ones of the current user)."
+    )
+    parser_gc.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Only list what would be removed and the reclaimable space."
+    )
+    parser_gc.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=4,
+        metavar='',
+        help="Number of parallel removals. Default: 4."
+    )
+    parser_gc.add_argument(
+        '-s', '--script',
+        action='store_true',
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_import_parser(subparsers):
+    """Add the parser of the "import" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_import = subparsers.add_parser(
+        'import',
+        usage = f"\n{INPUT}mlc import <archive> [container_name] -w <workspace_directory> -d <data_directory> -m <models_directory> [-s|--script]{RESET}",
+        description= "Create a container from an archive of mlc export. An interrupted import continues where it stopped when it is run again.",
+        help="Create a container from an archive of mlc export.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_import.add_argument(
+        'archive',
+        type=str,
+        help="Archive written by mlc export."
+    )
+    parser_import.add_argument(
+        'container_name',
+        nargs='?',
+        type=str,
+        help="Name of the new container. Default: name of the exported container."
+    )
+    parser_import.add_argument(
+        '-d', '--data_dir',
+        type=str,
+        metavar='',
+        help="Location of the data directory. Default: data directory of the exported container."
+    )
+    parser_import.add_argument(
+        '-m', '--models_dir',
+        type=str,
+        metavar='',
+        help="Location of the models directory. Default: models directory of the exported container."
+    )
+    parser_import.add_argument(
+        '-s', '--script',
+        action='store_true',
+        help="Enable script mode (default: interactive mode)."
+    )
+    parser_import.add_argument(
+        '-w', '--workspace_dir',
+        type=str,
+        metavar='',
+        help="Location of the workspace directory. Default: workspace directory of the exported container."
+    )
+
+
+def add_list_parser(subparsers):
+    """Add the parser of the "list" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
     parser_list = subparsers.add_parser(
         'list',
-        usage= f"\n{INPUT}mlc list [-a|--all]{RESET}",
+        usage= f"\n{INPUT}mlc list [-a|--all] [-au|--all_users] [-r|--resources] [-s|--size] [--fresh] [--format table|json|jsonl|csv] [--fields <field,...>]{RESET}",
         description = "List of created containers.",
         help="List of created containers."
     )
@@ -183,11 +534,35 @@ def get_flags():
         action = "store_true", 
         help='Show the data directories info of the created container/s.'
     )   
+    parser_list.add_argument(
+        '--fields', 
+        type=str,
+        metavar='', 
+        help=f"Comma separated fields of the json, jsonl and csv output. Available: {', '.join(container_list_fields)}."
+             f"\nDefault: {','.join(container_list_default_fields)} (and size with -a or -s)."
+    )
+    parser_list.add_argument(
+        '--fresh', 
+        action = "store_true", 
+        help='Compute the sizes of the container/s now instead of showing the cached sizes (slow).'
+    )
+    parser_list.add_argument(
+        '--format', 
+        choices=['table', 'json', 'jsonl', 'csv'],
+        default='table',
+        metavar='', 
+        help="Output format: table, json, jsonl (one json object per line, printed as soon as it is read) or csv. Default: table."
+    )
     parser_list.add_argument(
         '-m', '--models', 
         action = "store_true", 
         help='Show the models directories info of the created container/s.'
     )      
+    parser_list.add_argument(
+        '-r', '--resources', 
+        action = "store_true", 
+        help='Show the cpu, memory and cpuset settings of the created container/s.'
+    )
     parser_list.add_argument(
         '-s', '--size', 
         action = "store_true", 
@@ -198,13 +573,97 @@ def get_flags():
         action = "store_true", 
         help='Show the workspace directories info of the created container/s.'
     )        
-       
-    # Parser for the "open" command
+
+
+def add_models_parser(subparsers):
+    """Add the parser of the "models" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_models = subparsers.add_parser(
+        'models',
+        usage = f"\n{INPUT}mlc models dedup|du|verify [models_directory ...] [--all-users] [--min-size <size>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Share identical model files of the models directories through a content addressed store.",
+        help="Deduplicate the models directories of the containers.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    models_subparsers = parser_models.add_subparsers(dest='models_command', required=True, metavar='dedup|du|verify')
+    parser_dedup = models_subparsers.add_parser(
+        'dedup',
+        usage = f"\n{INPUT}mlc models dedup [models_directory ...] [--all-users] [--min-size <size>] [--link auto|reflink|hardlink] [--dry-run] [-j <jobs>] [-s|--script]{RESET}",
+        description= f"Replace identical model files by reflinks or hardlinks of one copy in the store {models_store_dir}.\nHardlinked files become read-only.",
+        help="Replace identical model files by links of one copy.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_du = models_subparsers.add_parser(
+        'du',
+        usage = f"\n{INPUT}mlc models du [models_directory ...] [--all-users] [--min-size <size>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Show the size of the models directories, the space saved by shared files and the space a dedup would free.",
+        help="Show the saved and the reclaimable space.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_verify = models_subparsers.add_parser(
+        'verify',
+        usage = f"\n{INPUT}mlc models verify [models_directory ...] [--all-users] [--min-size <size>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Hash the model files and the store objects again and report the ones whose content does not match.",
+        help="Check the content of the model files and the store.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    for parser in (parser_dedup, parser_du, parser_verify):
+        parser.add_argument(
+            'models_dirs',
+            nargs='*',
+            metavar='models_directory',
+            help="Models directories. Default: the models directories of the containers."
+        )
+        parser.add_argument(
+            '--all-users',
+            action='store_true',
+            help="Include the models directories of the containers of other users (default: only the ones of the current user)."
+        )
+        parser.add_argument(
+            '--min-size',
+            type=str,
+            metavar='',
+            help="Smaller files are left out, for example 100M or 1Gi. Default: 1Mi."
+        )
+        parser.add_argument(
+            '-j', '--jobs',
+            type=int,
+            default=4,
+            metavar='',
+            help="Number of files hashed in parallel. Default: 4."
+        )
+        parser.add_argument(
+            '-s', '--script',
+            action='store_true',
+            help="Enable script mode (default: interactive mode)."
+        )
+    parser_dedup.add_argument(
+        '--link',
+        choices=['auto', 'reflink', 'hardlink'],
+        default='auto',
+        help="Reflinks need btrfs or xfs, hardlinks make the files read-only. Default: auto (reflink if supported, otherwise hardlink)."
+    )
+    parser_dedup.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Only show what would be linked and the space it would free."
+    )
+
+
+def add_open_parser(subparsers):
+    """Add the parser of the "open" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
     parser_open = subparsers.add_parser(
         'open', 
         description= "Open an existing and no running container.",
         help="Open an existing and no running container.", 
-        usage = f"\n{INPUT}mlc open container_name -s{RESET}",
+        usage = f"\n{INPUT}mlc open container_name [-s|--script] [-t|--timing]{RESET}",
         formatter_class = argparse.RawTextHelpFormatter
     )
     parser_open.add_argument(
@@ -218,93 +677,317 @@ def get_flags():
         action='store_true', 
         help="Enable script mode (default: interactive mode)."
     )
-    
-    # Parser for the "remove" command
-    parser_remove = subparsers.add_parser(
-        'remove',
-        usage=f"\n{INPUT}mlc remove <container_name> [-s|--script] [-f|--force]{RESET}",
-        description="Remove an existing and no running machine learning container.",
-        help="Remove an existing and no running machine learning container."
-    )
-    parser_remove.add_argument(
-        'container_name', 
-        nargs = '?', 
-        type=str, 
-        help='Name of the container to be removed.'
-    )
-    parser_remove.add_argument(
-        '-f', '--force', 
-        action = "store_true", 
-        help='Force to remove the container without asking the user.'
-    )
-    parser_remove.add_argument(
-        '-s', '--script', 
+    parser_open.add_argument(
+        '-t', '--timing', 
         action='store_true', 
-        help="Enable script mode (default: interactive mode)."
+        help="Show the time needed from the invocation of mlc open until the first prompt of the shell."
     )
-    
-    # Parser for the "start" command
-    parser_start = subparsers.add_parser(
-        'start', 
-        usage = f"\n{INPUT}mlc start [execute command] [-d|--detach] [-s|--script]{RESET}",
-        description= "Start an existing and not running container and execute the given command in the container.",
-        help="Start an existing and no running container."
+
+
+def add_prefetch_parser(subparsers):
+    """Add the parser of the "prefetch" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_prefetch = subparsers.add_parser(
+        'prefetch',
+        usage = f"\n{INPUT}mlc prefetch [framework] [version_glob] [-arch <gpu_architecture>] [-j <jobs>] [--disk-budget <size>] [-s|--script]{RESET}",
+        description= "Pull the container images of the available frameworks in advance, so that mlc create does not have to wait for the download.",
+        help="Pull the container images of the available frameworks in advance.",
+        formatter_class = argparse.RawTextHelpFormatter
     )
-    parser_start.add_argument(
-        'container_name', 
-        nargs = '?', 
+    parser_prefetch.add_argument(
+        'framework', 
+        nargs='?', 
         type=str, 
-        help="Name of the container to be started."
+        help="Framework (or glob pattern) whose images are pulled. Default: all frameworks."
     )
-    parser_start.add_argument(
-        'execute_command', 
+    parser_prefetch.add_argument(
+        'version', 
         nargs='?', 
         type=str, 
-        help='Command to execute incontainer when started sucessful'
+        help="Version glob pattern, for example '2.8*'. Default: all versions."
     )
-    parser_start.add_argument(
-        '-d', '--detach', 
+    parser_prefetch.add_argument(
+        '-arch', '--architecture', 
+        type=str,
+        metavar='', 
+        help="GPU architecture of the images. Default: MLC_ARCH or the host gpu architecture (auto-detected)."
+    )
+    parser_prefetch.add_argument(
+        '-j', '--jobs', 
+        type=int, 
+        default=2,
+        metavar='', 
+        help="Maximal number of parallel pulls. Default: 2."
+    )
+    parser_prefetch.add_argument(
+        '--disk-budget', 
+        type=str, 
+        metavar='', 
+        help="Maximal disk space to be consumed by the pulls, for example 200G. No new pulls are started once it is used up."
+    )
+    parser_prefetch.add_argument(
+        '--dry-run', 
         action='store_true', 
-        help="Suppress output of executed command and start detached (default: show output)."
+        help="Only list the images which would be pulled."
     )
-    parser_start.add_argument(
+    parser_prefetch.add_argument(
         '-s', '--script', 
         action='store_true', 
-        help="Enable script mode (default: interactive mode)."
+        help="Enable script mode for cron jobs: no questions, one output line per image (default: interactive mode)."
     )
-    
-    # Parser for the "stats" command
-    parser_stats = subparsers.add_parser(
-        'stats',
-        usage = f"\n{INPUT}mlc stats{RESET}",
-        description= "Show the most important statistics of the running containers.",
-        help="Show the most important statistics of the running containers."
+
+
+def add_prune_layers_parser(subparsers):
+    """Add the parser of the "prune-layers" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_prune_layers = subparsers.add_parser(
+        'prune-layers',
+        usage = f"\n{INPUT}mlc prune-layers [--older-than <days>] [--all] [--all-users] [--dry-run] [-s|--script]{RESET}",
+        description= "Remove the stale user setup layers created by mlc create. Layers used by a container are never removed.\nUnused layers are stale if their base image was updated or removed, or if they are older than the given age.",
+        help="Remove the stale user setup layers created by mlc create.",
+        formatter_class = argparse.RawTextHelpFormatter
     )
-    
-    # Parser for the "stop" command
+    parser_prune_layers.add_argument(
+        '--older-than', 
+        type=float, 
+        default=user_layer_max_age_days,
+        metavar='', 
+        help=f"Age in days after which unused layers are removed. Default: {user_layer_max_age_days}."
+    )
+    parser_prune_layers.add_argument(
+        '--all', 
+        action='store_true', 
+        help="Remove all unused layers."
+    )
+    parser_prune_layers.add_argument(
+        '--all-users', 
+        action='store_true', 
+        help="Include the layers of other users (default: only the layers of the current user)."
+    )
+    parser_prune_layers.add_argument(
+        '--dry-run', 
+        action='store_true', 
+        help="Only list the layers which would be removed."
+    )
+    parser_prune_layers.add_argument(
+        '-s', '--script', 
+        action='store_true', 
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_remove_parser(subparsers):
+    """Add the parser of the "remove" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_remove = subparsers.add_parser(
+        'remove',
+        usage=f"\n{INPUT}mlc remove <container_name...> [-a|--all] [--filter <key=value>] [-j|--jobs <jobs>] [-s|--script] [-f|--force]{RESET}",
+        description="Remove existing and no running machine learning containers.",
+        help="Remove an existing and no running machine learning container.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_remove.add_argument(
+        'container_name', 
+        nargs = '*', 
+        type=str, 
+        help='Name of the container to be removed. Several containers are removed in parallel.'
+    )
+    parser_remove.add_argument(
+        '-a', '--all', 
+        action = "store_true", 
+        help='Remove all no running containers of the current user.'
+    )
+    parser_remove.add_argument(
+        '-f', '--force', 
+        action = "store_true", 
+        help='Force to remove the container without asking the user.'
+    )
+    parser_remove.add_argument(
+        '--filter', 
+        action = "append",
+        metavar='', 
+        help=bulk_filter_help
+    )
+    parser_remove.add_argument(
+        '-j', '--jobs', 
+        type=int,
+        default=4,
+        metavar='', 
+        help="Maximal number of containers removed in parallel. Default: 4."
+    )
+    parser_remove.add_argument(
+        '-s', '--script', 
+        action='store_true', 
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_start_parser(subparsers):
+    """Add the parser of the "start" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_start = subparsers.add_parser(
+        'start', 
+        usage = f"\n{INPUT}mlc start [container_name[,container_name...]] [execute command] [-a|--all] [--filter <key=value>] [-j|--jobs <jobs>] [-d|--detach] [-w|--warm] [-s|--script]{RESET}",
+        description= "Start an existing and not running container and execute the given command in the container.",
+        help="Start an existing and no running container.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_start.add_argument(
+        'container_name', 
+        nargs = '?', 
+        type=str, 
+        help="Name of the container to be started. Several containers separated by ',' are started in parallel."
+    )
+    parser_start.add_argument(
+        'execute_command', 
+        nargs='?', 
+        type=str, 
+        help='Command to execute incontainer when started sucessful'
+    )
+    parser_start.add_argument(
+        '-a', '--all', 
+        action = "store_true", 
+        help='Start all no running containers of the current user.'
+    )
+    parser_start.add_argument(
+        '-d', '--detach', 
+        action='store_true', 
+        help="Suppress output of executed command and start detached (default: show output)."
+    )
+    parser_start.add_argument(
+        '--filter', 
+        action = "append",
+        metavar='', 
+        help=bulk_filter_help
+    )
+    parser_start.add_argument(
+        '-w', '--warm',
+        action='store_true',
+        default=warm_on_start_default,
+        help="Read the files of /models and /data into the page cache while the container starts, within the budget of mlc warm"
+             "\n(default: MLC_WARM_ON_START=1 enables it)."
+    )
+    parser_start.add_argument(
+        '-j', '--jobs', 
+        type=int,
+        default=4,
+        metavar='', 
+        help="Maximal number of containers started in parallel. Default: 4."
+    )
+    parser_start.add_argument(
+        '-s', '--script', 
+        action='store_true', 
+        help="Enable script mode (default: interactive mode)."
+    )
+
+
+def add_stats_parser(subparsers):
+    """Add the parser of the "stats" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_stats = subparsers.add_parser(
+        'stats',
+        usage = f"\n{INPUT}mlc stats [-w|--watch] [-i|--interval <seconds>] [-b|--backend auto|cgroup|docker]{RESET}",
+        description= "Show the most important statistics of the running containers.",
+        help="Show the most important statistics of the running containers."
+    )
+    parser_stats.add_argument(
+        '-w', '--watch', 
+        action='store_true', 
+        help="Keep showing the stats and update them continuously until Ctrl+C is pressed."
+    )
+    parser_stats.add_argument(
+        '-i', '--interval', 
+        type=float, 
+        metavar='', 
+        help="Refresh interval in seconds of the watch mode (default: 1) and sampling interval"
+             "\nof the CPU usage read from the cgroups (default: 0.5)."
+    )
+    parser_stats.add_argument(
+        '-b', '--backend', 
+        choices=['auto', 'cgroup', 'docker'],
+        default='auto',
+        help="Source of the stats. auto: read the cgroups (cgroup v2) of the mlc containers directly,"
+             "\nwith docker stats as fallback. Default: auto."
+    )
+
+
+def add_stop_parser(subparsers):
+    """Add the parser of the "stop" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
     parser_stop = subparsers.add_parser(
         'stop',
-        usage= f"\n{INPUT}mlc stop <container_name> [-f|--force] [-s|--script]{RESET}",
-        description = "Stop an existing an running container.",
-        help="Stop an existing an running container."
+        usage= f"\n{INPUT}mlc stop <container_name...> [-a|--all] [--filter <key=value>] [-j|--jobs <jobs>] [-t|--time <seconds>] [-f|--force] [-s|--script]{RESET}",
+        description = "Stop existing and running containers.",
+        help="Stop an existing an running container.",
+        formatter_class = argparse.RawTextHelpFormatter
     )
     parser_stop.add_argument(
         'container_name', 
-        nargs = '?', 
+        nargs = '*', 
         type=str, 
-        help="Name of the container to be stopped."
+        help="Name of the container to be stopped. Several containers are stopped in parallel."
+    )
+    parser_stop.add_argument(
+        '-a', '--all', 
+        action = "store_true", 
+        help='Stop all running containers of the current user.'
     )
     parser_stop.add_argument(
         '-f', '--force', 
         action = "store_true", 
         help="Force to stop the container without asking the user."
     ) 
+    parser_stop.add_argument(
+        '--filter', 
+        action = "append",
+        metavar='', 
+        help=bulk_filter_help
+    )
+    parser_stop.add_argument(
+        '-j', '--jobs', 
+        type=int,
+        default=4,
+        metavar='', 
+        help="Maximal number of containers stopped in parallel. Default: 4."
+    )
     parser_stop.add_argument(
         '-s', '--script', 
         action='store_true', 
         help="Enable script mode (default: interactive mode)."
     )
-    # Parser for the "update-sys" command
+    parser_stop.add_argument(
+        '-t', '--time', 
+        type=int,
+        default=10,
+        metavar='', 
+        help="Seconds to wait for the processes of the container to exit before they are killed. Default: 10."
+    )
+
+
+def add_update_sys_parser(subparsers):
+    """Add the parser of the "update-sys" command.
+
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
     parser_update_sys = subparsers.add_parser(
         'update-sys',
         usage= f"\n{INPUT}mlc update-sys [-f|--force]{RESET}",
@@ -316,2068 +999,9626 @@ def get_flags():
         action = "store_true", 
         help="Force to update directly without asking user."
     ) 
-            
-    # Extract subparser names
-    subparser_names = subparsers.choices.keys()
-    # ToDo: check if needed
-    #available_commands = list(subparser_names)
 
-    # Parse arguments
-    args = parser.parse_args()
-         
-    return args
 
+def add_warm_parser(subparsers):
+    """Add the parser of the "warm" command.
 
-################################################################################################################################################
+    Args:
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_warm = subparsers.add_parser(
+        'warm',
+        usage = f"\n{INPUT}mlc warm container_name [path_or_glob ...] [-b <budget>] [-j <jobs>] [-s|--script]{RESET}",
+        description= "Read the data and model files of a container into the page cache of the host before a run.",
+        help="Read data and model files into the page cache.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_warm.add_argument(
+        'container_name',
+        nargs='?',
+        type=str,
+        help="Name of the container."
+    )
+    parser_warm.add_argument(
+        'patterns',
+        nargs='*',
+        metavar='path_or_glob',
+        help="Paths or globs in the container like /models/llama or /data/train/**/*.tar, or relative to /data and /models."
+             "\nDefault: all files of /models and /data."
+    )
+    parser_warm.add_argument(
+        '-b', '--budget',
+        type=str,
+        metavar='',
+        help="Maximal bytes read, for example 100G. The files are read in the order of the paths as long as they fit."
+             "\nDefault: MLC_WARM_BUDGET or half of the available memory."
+    )
+    parser_warm.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=warm_jobs,
+        metavar='',
+        help=f"Number of parallel readers. Default: {warm_jobs}."
+    )
+    parser_warm.add_argument(
+        '-s', '--script',
+        action='store_true',
+        help="Enable script mode (default: interactive mode)."
+    )
 
 
-def are_you_sure(selected_container_name, command, script = False):
-    """Ask the user for a confirmation before an action is started.
+def add_watchdog_parser(subparsers):
+    """Add the parser of the "watchdog" command.
 
     Args:
-        selected_container_name (str): name of the container.
-        command (str): type of the command (create, open, remove,...). The command is used only for printing a message.
-        script (bool, optional): script mode is provided. Defaults to False.
-    """   
-    
-    if not script:        
-        if command == "create":            
-            print(f"\n{WARNING}Verify if the provided setup is correct. The creation of a container may take a little time.{RESET}")
-            printed_verb = command + "d"
-            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(Y/n)?: {RESET}"
-            yes_answers = ["y", "yes", ""]
-            no_answers = ["n", "no"]
-        elif command == "remove":            
-            print(f"\n{WARNING}Caution: After your selection, there is no option to recover the container.{RESET}")            
-            printed_verb = command + "d"
-            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
-            yes_answers = ["y", "yes"]
-            no_answers = ["n", "no", ""]          
-        elif command == "stop":            
-            print(f"\n{WARNING}Caution: All running processes of the selected container will be terminated.{RESET}")
-            printed_verb = command + "ped"
-            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
-            yes_answers = ["y", "yes"]
-            no_answers = ["n", "no", ""]           
-        else:
-            exit(1)            
-        
-        while True:
-            are_you_sure_answer = input(prompt).strip().lower()            
-            
-            if are_you_sure_answer in yes_answers: 
-                break            
-            elif are_you_sure_answer in no_answers:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}will not be {printed_verb}.\n{RESET}")                
-                exit(0)                
-            else:                
-                print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}") 
-                
+        subparsers (argparse._SubParsersAction): subparsers of the mlc parser.
+    """
+    parser_watchdog = subparsers.add_parser(
+        'watchdog',
+        usage= f"\n{INPUT}mlc watchdog [--idle <minutes>] [--action stop|pause] [--cpu-threshold <percent>] [--all-users] [--dry-run]"
+               f"\n    [-w|--watch] [-i|--interval <seconds>] [--log <file>]{RESET}",
+        description = "Stop or pause running containers which are idle, for example to free their GPUs."
+                      "\nA container is active while it uses more CPU than the threshold, starts new processes or gets new"
+                      "\nshells (mlc open). Containers created with 'mlc create --no-watchdog' are never stopped or paused."
+                      "\nRun it once (for example by cron) or with --watch as long-running service.",
+        help="Stop or pause idle containers.",
+        formatter_class = argparse.RawTextHelpFormatter
+    )
+    parser_watchdog.add_argument(
+        '--action', 
+        choices=['stop', 'pause'],
+        default='stop',
+        metavar='', 
+        help="Action for idle containers: stop, or pause (freezes the processes, the GPU memory stays allocated). Default: stop."
+    )
+    parser_watchdog.add_argument(
+        '--all-users', 
+        action = "store_true", 
+        help="Watch the containers of all users (default: only the containers of the current user)."
+    )
+    parser_watchdog.add_argument(
+        '--cpu-threshold', 
+        type=float,
+        default=1.0,
+        metavar='', 
+        help="CPU usage in percent of one core above which a container is active. Default: 1.0."
+    )
+    parser_watchdog.add_argument(
+        '--dry-run', 
+        action = "store_true", 
+        help="Only show the idle containers."
+    )
+    parser_watchdog.add_argument(
+        '--idle', 
+        type=float,
+        default=60,
+        metavar='', 
+        help="Minutes a container has to be idle before it is stopped or paused. Default: 60."
+    )
+    parser_watchdog.add_argument(
+        '-i', '--interval', 
+        type=float,
+        default=300,
+        metavar='', 
+        help="Seconds between two samples with --watch. Default: 300."
+    )
+    parser_watchdog.add_argument(
+        '--log', 
+        type=str,
+        metavar='', 
+        help="Log of the stopped and paused containers. Default: ~/.cache/aime-mlc/watchdog.log."
+    )
+    parser_watchdog.add_argument(
+        '-w', '--watch', 
+        action = "store_true", 
+        help="Keep running and sample the containers every interval until Ctrl+C is pressed."
+    )
 
-# ToDo: improve this function using run_docker_command
-def check_container_exists(name):
-    """Check if a container with the provided tag already exists.
 
-    Args:
-        name (str): name of the container tag.
+# Parser builders of the mlc commands, used by get_flags()
+command_parsers = {
+    'create': add_create_parser,
+    'data': add_data_parser,
+    'export': add_export_parser,
+    'gc': add_gc_parser,
+    'import': add_import_parser,
+    'list': add_list_parser,
+    'models': add_models_parser,
+    'open': add_open_parser,
+    'prefetch': add_prefetch_parser,
+    'prune-layers': add_prune_layers_parser,
+    'remove': add_remove_parser,
+    'start': add_start_parser,
+    'stats': add_stats_parser,
+    'stop': add_stop_parser,
+    'update-sys': add_update_sys_parser,
+    'warm': add_warm_parser,
+    'watchdog': add_watchdog_parser,
+}
 
-    Returns:
-        str: name of the container .
+
+################################################################################################################################################
+# Tracing
+#
+# With MLC_TRACE=<file> or --trace every external process (docker CLI, git, dpkg, ...) and every Docker Engine API request is
+# recorded as a span with its command, duration, exit code and bytes of output. The processes are traced by replacing
+# subprocess.Popen, which subprocess.run and subprocess.check_output use as well, the API requests by the DockerAPIClient. At exit
+# the spans are written as Chrome trace events (chrome://tracing, https://ui.perfetto.dev) and summarized on stderr. Without
+# tracing nothing is replaced and the spans are not recorded. Tracing is enabled by main(), processes importing mlc without
+# running a command (data cache daemons) are not traced.
+
+trace_file = os.environ.get("MLC_TRACE", "")   # Trace file, --trace without MLC_TRACE writes mlc-trace-<time>.json
+trace_command_length = 300                      # Characters of a command kept in the trace
+trace_summary_rows = 15                         # Rows of the summary table printed at exit
+# Docker commands with subcommands, their spans are grouped by the first two words (docker container start)
+trace_docker_management_commands = ("builder", "container", "image", "network", "system", "volume")
+# Helpers of the docker calls, the span names the function calling them
+trace_wrapper_functions = (
+    "__init__", "request", "open_stream", "run_docker_command", "run_docker_command_popen", "run_docker_pull_image", "docker_api_request",
+    "get_docker_api_client", "docker_api_list_containers", "docker_api_stream_containers"
+)
+
+trace_enabled = False
+trace_spans = []
+trace_running_spans = set()     # Spans of processes not waited for yet
+trace_lock = threading.Lock()
+trace_origin = time.perf_counter()
+
+
+class TraceSpan:
+    """Span of an external process or API request, recorded when it ends if tracing is enabled.
+
+    Args:
+        category (str): process or api.
+        name (str): command line or HTTP method and path.
     """
-    
-    result = subprocess.run(['docker', 'container', 'ps', '-a', '--filter', f'name={name}', '--filter', 'label=aime.mlc', '--format', '{{.Names}}'], capture_output=True, text=True)
-    return result.stdout.strip()
 
+    __slots__ = ("category", "name", "start", "duration", "exit_code", "output_bytes", "thread", "caller")
 
-def check_container_running(container_tag):
-    """Check if the container with the provided container tag is running.
+    def __init__(self, category, name):
+        self.category = category
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = None
+        self.exit_code = None
+        self.output_bytes = 0
+        self.thread = threading.get_ident()
+        self.caller = get_trace_caller() if trace_enabled else None
 
-    Args:
-        container_tag (str): provided container tag.
+    def __enter__(self):
+        return self
 
-    Returns:
-        str: name of the container tag associated to the provided container tag.
-    """   
-    
-    docker_command = f'docker container ps --filter=name=^/{container_tag}$ --filter=label=aime.mlc --format "{{{{.Names}}}}"'
-    output, _, _ = run_docker_command(docker_command)
-    return output
-       
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+        return False
 
-def display_gpu_architectures(architectures):
-    """Display the available gpu architectures located in the file ml_images.repo.
+    def finish(self):
+        """End the span, a span is recorded only once."""
+        if self.duration is None and trace_enabled:
+            self.duration = time.perf_counter() - self.start
+            with trace_lock:
+                trace_spans.append(self)
+                trace_running_spans.discard(self)
 
-    Args:
-        architectures (list): available gpu architectures.
-    """
-    
-    print(f"\n{INFO}Available gpu architectures:{RESET}")
 
-    for i, architecture in enumerate(architectures, start=1):
-        print(f"{i}) {architecture}")
-    
-    
-def display_frameworks(frameworks_dict):
-    """Display the available AI frameworks.
+def get_trace_caller():
+    """Return the name of the mlc function which started the traced call."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_globals.get("__name__") in (__name__, "mlc") and frame.f_code.co_name not in trace_wrapper_functions:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return None
 
-    Args:
-        frameworks_dict (dict): dictionary whose keys are the available frameworks.
 
-    Returns:
-        list: return a list with the available frameworks.
-    """ 
-     
-    print(f"\n{REQUEST}Select a framework:{RESET}")
-    framework_list = list(frameworks_dict.keys())
+class TraceCountingStream:
+    """Pipe of a traced process or streamed API response which counts the bytes read from it."""
 
-    for i, framework in enumerate(framework_list, start=1):
-        print(f"{i}) {framework}")
-    return framework_list
+    def __init__(self, stream, span):
+        self.stream = stream
+        self.span = span
+        self.counting = True
 
+    def count(self, data):
+        if self.counting and data:
+            self.span.output_bytes += len(data.encode(errors="replace")) if isinstance(data, str) else len(data)
+        return data
 
-def display_versions(framework, versions):
-    """Display the corresponding versions to a provided framework.
+    def read(self, *args):
+        return self.count(self.stream.read(*args))
 
-    Args:
-        framework (str): predefined framework.
-        versions (tuple): tuple containing (version(str), image(str)).
-    """    
-    
-    print(f"\n{INFO}Available versions for {framework}:{RESET}")
-    for i, (version, _) in enumerate(versions, start=1):
-        print(f"{i}) {version}")
+    def read1(self, *args):
+        return self.count(self.stream.read1(*args))
 
+    def readline(self, *args):
+        return self.count(self.stream.readline(*args))
 
-def extract_from_ml_images(filename, filter_architecture = None):
-    """Extract the information from the file corresponding to the supported frameworks, versions, cuda architectures and docker images.
+    def readlines(self, *args):
+        return [self.count(line) for line in self.stream.readlines(*args)]
+
+    def readinto(self, buffer):
+        size = self.stream.readinto(buffer)
+        if self.counting and size:
+            self.span.output_bytes += size
+        return size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.count(next(self.stream))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class TracedPopen(subprocess.Popen):
+    """subprocess.Popen recording a span from the start until the exit status of the process is known."""
+
+    def __init__(self, args, *popen_args, **popen_kwargs):
+        self.trace_span = TraceSpan("process", format_trace_command(args))
+        try:
+            super().__init__(args, *popen_args, **popen_kwargs)
+        except Exception as e:
+            self.trace_span.exit_code = f"not started: {e.__class__.__name__}"
+            self.trace_span.finish()
+            raise
+        with trace_lock:
+            trace_running_spans.add(self.trace_span)
+        if self.stdout is not None:
+            self.stdout = TraceCountingStream(self.stdout, self.trace_span)
+        if self.stderr is not None:
+            self.stderr = TraceCountingStream(self.stderr, self.trace_span)
+
+    def communicate(self, *args, **kwargs):
+        # communicate reads the pipes from their file descriptors, the output is counted from the result
+        for stream in (self.stdout, self.stderr):
+            if isinstance(stream, TraceCountingStream):
+                stream.counting = False
+        stdout, stderr = super().communicate(*args, **kwargs)
+        for output in (stdout, stderr):
+            if output:
+                self.trace_span.output_bytes += len(output.encode(errors="replace")) if isinstance(output, str) else len(output)
+        self.finish_trace_span()
+        return stdout, stderr
+
+    def wait(self, *args, **kwargs):
+        returncode = super().wait(*args, **kwargs)
+        self.finish_trace_span()
+        return returncode
+
+    def poll(self):
+        returncode = super().poll()
+        self.finish_trace_span()
+        return returncode
+
+    def finish_trace_span(self):
+        if self.returncode is not None and self.trace_span.duration is None:
+            self.trace_span.exit_code = self.returncode
+            self.trace_span.finish()
+
+
+def format_trace_command(args):
+    """Return the command line of a process as string, shortened to trace_command_length characters."""
+    if isinstance(args, (list, tuple)):
+        command = " ".join(str(arg) for arg in args)
+    else:
+        command = os.fsdecode(args) if isinstance(args, bytes) else str(args)
+    return command if len(command) <= trace_command_length else command[:trace_command_length - 3] + "..."
+
+
+def get_trace_group(span):
+    """Return the group of a span in the summary, for example docker container start or POST /containers/{id}/start."""
+    if span.category == "api":
+        method, _, path = span.name.partition(" ")
+        path = re.sub(r"^(/v[\d.]+)?/(containers|images|exec|networks|volumes)/(?!json$|create$|prune$)[^/]+", r"\1/\2/{id}", path.split("?")[0])
+        return f"{method} {path}"
+    words = span.name.split()
+    if not words:
+        return span.name
+    group = [os.path.basename(words[0])]
+    for word in words[1:]:
+        if word.startswith("-"):
+            continue
+        group.append(word)
+        if group[-1] not in trace_docker_management_commands or group[0] != "docker":
+            break
+    return " ".join(group)
+
+
+def write_trace():
+    """Write the recorded spans as Chrome trace events and print a summary table to stderr. Registered with atexit."""
+    end = time.perf_counter()
+    with trace_lock:
+        # Processes still running at exit, for example detached daemons, end with the trace
+        for span in trace_running_spans:
+            span.duration = end - span.start
+            span.exit_code = "running"
+        spans = trace_spans + sorted(trace_running_spans, key=lambda span: span.start)
+    pid = os.getpid()
+    events = [{
+        "name": " ".join(["mlc"] + sys.argv[1:])[:trace_command_length], "cat": "mlc", "ph": "X", "pid": pid, "tid": threading.main_thread().ident,
+        "ts": 0, "dur": round((end - trace_origin) * 1e6)
+    }]
+    for span in spans:
+        events.append({
+            "name": get_trace_group(span), "cat": span.category, "ph": "X", "pid": pid, "tid": span.thread,
+            "ts": round((span.start - trace_origin) * 1e6), "dur": round(span.duration * 1e6),
+            "args": {"command": span.name, "exit_code": span.exit_code, "output_bytes": span.output_bytes, "caller": span.caller}
+        })
+    try:
+        with open(trace_file, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    except OSError as e:
+        print(f"\n{ERROR}The trace could not be written to {trace_file}: {e}{RESET}", file=sys.stderr)
+
+    groups = defaultdict(lambda: [0, 0.0, 0.0, 0, 0])
+    for span in spans:
+        group = groups[(span.category, get_trace_group(span))]
+        group[0] += 1
+        group[1] += span.duration
+        group[2] = max(group[2], span.duration)
+        group[3] += span.output_bytes
+        group[4] += span.exit_code not in (0, 200, 201, 204, 304, "running")
+    total = end - trace_origin
+    print(f"\n{INFO_HEADER}{'TRACED CALL':<50}{'CALLS':>7}{'TOTAL':>10}{'MAX':>10}{'OUTPUT':>10}{'FAILED':>8}{RESET}", file=sys.stderr)
+    for (category, group_name), (calls, duration, max_duration, output_bytes, failed) in sorted(groups.items(), key=lambda item: -item[1][1])[:trace_summary_rows]:
+        print(f"{group_name[:49]:<50}{calls:>7}{duration:>9.2f}s{max_duration:>9.2f}s{format_size(output_bytes):>10}{failed:>8}", file=sys.stderr)
+    print(f"\n{INFO}{len(spans)} calls traced, mlc ran {total:.2f} s. Trace written to {trace_file}{RESET}\n", file=sys.stderr)
+
+
+def enable_tracing(file=None):
+    """Record the spans of all processes and API requests and write them at exit.
 
     Args:
-        filename (str): name of the file where the framework, version, cuda archicture and docker image name are provided.
-        filter_architecture (str, optional): the cuda architecture, for example, "CUDA_ADA". Defaults to None.
+        file (str, optional): trace file, by default MLC_TRACE or mlc-trace-<time>.json. Defaults to None.
+    """
+    import atexit
+
+    global trace_enabled, trace_file
+
+    if trace_enabled:
+        return
+    trace_file = file or trace_file or time.strftime("mlc-trace-%Y%m%d-%H%M%S.json")
+    trace_enabled = True
+    subprocess.Popen = TracedPopen
+    atexit.register(write_trace)
+
+
+################################################################################################################################################
+# Docker Engine API client
+#
+# Talks HTTP/1.1 to the docker daemon over its unix socket (or the tcp endpoint given by DOCKER_HOST) using a single kept-alive
+# connection per thread, so that state queries do not fork a docker CLI process. If the daemon socket is not reachable, or
+# MLC_DOCKER_API=0 is set, the helpers below fall back to the docker CLI.
+
+docker_default_host = "unix:///var/run/docker.sock"
+docker_api_timeout = 30     # Seconds to wait for a reply of the docker daemon
+
+
+class DockerAPIError(Exception):
+    """Raised when the docker daemon can not be reached or answers with an unexpected reply."""
+
+
+unix_http_connection_class = None
+
+
+def get_unix_http_connection_class():
+    """Return the class of HTTP connections over a unix domain socket, defined on first use since it imports http.client.
 
     Returns:
-        dict, list: provides a dictionary and a list of the available frameworks.
+        type: UnixHTTPConnection, a subclass of http.client.HTTPConnection taking the socket path instead of the host.
     """
-    if filter_architecture is None:
-        _, filter_architecture, _ = get_host_gpu_architecture()
-        
-    frameworks_dict = {}
-    headers = ['framework', 'version', 'architecture', 'docker image']
-    separator = ";"
-    with open(filename, mode='r') as file:
-        reader = csv.DictReader(file, fieldnames=headers)
-        for row in reader:
-            stripped_row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items() }
-            framework = stripped_row['framework']
-            version = stripped_row['version']            
-            architecture = stripped_row['architecture'].strip("[]").split(separator)
-            docker_image = stripped_row['docker image']
-            if filter_architecture in architecture:
-
-                if framework not in frameworks_dict:
-                    frameworks_dict[framework] = []
-                    frameworks_dict[framework].append((version, docker_image))
-                else:
-                    frameworks_dict[framework].append((version, docker_image)) 
-    return frameworks_dict
+    global unix_http_connection_class
 
+    if unix_http_connection_class is None:
+        import http.client
+        import socket
 
-def existing_user_containers(user_name, mlc_command):
-    """Provide 2 lists of existing containers and corresponding container tags created previously by the current user.
+        class UnixHTTPConnection(http.client.HTTPConnection):
+            """HTTP connection over a unix domain socket."""
 
-    Args:
-        user_name (str): current user name.
-        mlc_command (str): current mlc command.
-    Returns:
-        list, list: returns 2 lists with existing containers and corresponding container tags.
-    """    
- 
-    # List all containers with the 'aime.mlc' label owned by the current user
-    docker_command = f"docker container ps -a --filter=label=aime.mlc.USER={user_name} --format '{{{{.Names}}}}'"
-    output, _,_ = run_docker_command(docker_command)
-    container_tags = output.splitlines()
-    
-    # check that at least 1 container has been created previously
-    if not container_tags and mlc_command != 'create':
-        print(f"\n{ERROR}Create at least one container. If not, mlc {mlc_command} does not work.{RESET}\n")
-        exit(0)
+            def __init__(self, socket_path, timeout=docker_api_timeout):
+                super().__init__("localhost", timeout=timeout)
+                self.socket_path = socket_path
 
-    # Extract base names from full container names
-    container_names = [re.match(r"^(.*?)(?:\._\.\w+)?$", container).group(1) for container in container_tags]
+            def connect(self):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                try:
+                    sock.connect(self.socket_path)
+                except OSError:
+                    sock.close()
+                    raise
+                self.sock = sock
 
-    return container_names, container_tags
+        unix_http_connection_class = UnixHTTPConnection
+    return unix_http_connection_class
 
 
-def filter_by_state(state, running_containers, *lists):
-    """Filters multiple lists based on the provided state (True/False).
+class DockerAPIClient:
+    """Minimal client of the Docker Engine API.
 
     Args:
-        state (bool): the state to filter by (True for running, False for not running).
-        running_containers (list): A list of boolean values indicating running status.
-        *lists: variable number of lists to filter based on the running_containers.
-    Returns:
-        list: a list of filtered lists.
+        docker_host (str, optional): address of the docker daemon, for example unix:///var/run/docker.sock or tcp://127.0.0.1:2375.
+            Defaults to the DOCKER_HOST environment variable or the default docker socket.
+        timeout (int, optional): timeout in seconds of every request. Defaults to docker_api_timeout.
+
+    Raises:
+        DockerAPIError: if the scheme of the docker host is not supported (for example ssh:// or tls).
     """
-    
-    return [
-        [item for item, running in zip(lst, running_containers) if running == state]
-        for lst in lists
-    ]
 
+    def __init__(self, docker_host=None, timeout=docker_api_timeout):
+        import urllib.parse
+
+        self.docker_host = docker_host or os.environ.get("DOCKER_HOST") or docker_default_host
+        self.timeout = timeout
+        parsed_host = urllib.parse.urlparse(self.docker_host)
+        if parsed_host.scheme == "unix":
+            self.socket_path = parsed_host.path
+            self.address = None
+        elif parsed_host.scheme in ("tcp", "http") and not os.environ.get("DOCKER_TLS_VERIFY"):
+            self.socket_path = None
+            self.address = (parsed_host.hostname, parsed_host.port or 2375)
+        else:
+            raise DockerAPIError(f"Unsupported docker host: {self.docker_host}")
+        self.connection = None
+
+    def new_connection(self, timeout=None):
+        """Open a new connection to the docker daemon.
+
+        Args:
+            timeout (float, optional): timeout in seconds, None uses the timeout of the client.
+
+        Returns:
+            http.client.HTTPConnection: connection to the docker daemon.
+        """
+        import http.client
+
+        timeout = self.timeout if timeout is None else timeout
+        if self.socket_path:
+            return get_unix_http_connection_class()(self.socket_path, timeout=timeout)
+        return http.client.HTTPConnection(*self.address, timeout=timeout)
+
+    @staticmethod
+    def build_url(path, query=None):
+        """Append the url encoded query parameters to the path. Dicts and lists are encoded as JSON as expected by the API.
+
+        Args:
+            path (str): API endpoint, for example /containers/json.
+            query (dict, optional): query parameters, entries with value None are skipped.
+
+        Returns:
+            str: url of the request.
+        """
+        import urllib.parse
+
+        if not query:
+            return path
+        params = {}
+        for key, value in query.items():
+            if value is None:
+                continue
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            elif isinstance(value, bool):
+                value = "1" if value else "0"
+            params[key] = value
+        return f"{path}?{urllib.parse.urlencode(params)}" if params else path
+
+    def request(self, method, path, query=None, body=None):
+        """Send a request over the kept-alive connection and return the decoded reply.
+
+        A connection closed by the daemon between two requests is reopened once.
+
+        Args:
+            method (str): HTTP method (GET, POST, DELETE).
+            path (str): API endpoint, for example /containers/json.
+            query (dict, optional): query parameters.
+            body (dict, optional): JSON body of the request.
+
+        Raises:
+            DockerAPIError: if the daemon can not be reached.
+
+        Returns:
+            int, object: HTTP status code and the decoded JSON reply (None if the reply is empty, str if it is no JSON).
+        """
+        import http.client
+
+        url = self.build_url(path, query)
+        headers = {"Host": "docker"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        with TraceSpan("api", f"{method} {url}") as span:
+            for attempt in range(2):
+                if self.connection is None:
+                    self.connection = self.new_connection()
+                try:
+                    self.connection.request(method, url, body=payload, headers=headers)
+                    response = self.connection.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                    # The daemon closed the idle connection, reconnect once
+                    self.close()
+                    if attempt:
+                        span.exit_code = f"error: {e.__class__.__name__}"
+                        raise DockerAPIError(str(e)) from e
+                except (OSError, http.client.HTTPException) as e:
+                    self.close()
+                    span.exit_code = f"error: {e.__class__.__name__}"
+                    raise DockerAPIError(str(e)) from e
+            span.exit_code = response.status
+            span.output_bytes = len(data)
+
+        if response.will_close:
+            self.close()
+        if not data:
+            return response.status, None
+        try:
+            return response.status, json.loads(data)
+        except ValueError:
+            return response.status, data.decode(errors="replace").strip()
+
+    def open_stream(self, method, path, query=None, body=None, timeout=None):
+        """Send a request on a dedicated connection and return the response without reading it, for long-lived streams
+        like events, stats or pull progress.
+
+        Args:
+            method (str): HTTP method (GET, POST).
+            path (str): API endpoint.
+            query (dict, optional): query parameters.
+            body (dict, optional): JSON body of the request.
+            timeout (float, optional): read timeout in seconds. Defaults to the timeout of the client.
+
+        Raises:
+            DockerAPIError: if the daemon can not be reached.
+
+        Returns:
+            http.client.HTTPResponse: the unread response. The caller has to close it.
+        """
+        import http.client
+
+        connection = self.new_connection(timeout)
+        headers = {"Host": "docker"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        # The span of a stream ends with the response headers, the stream itself is read by the caller
+        url = self.build_url(path, query)
+        with TraceSpan("api", f"{method} {url} (stream)") as span:
+            try:
+                connection.request(method, url, body=payload, headers=headers)
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                span.exit_code = f"error: {e.__class__.__name__}"
+                raise DockerAPIError(str(e)) from e
+            span.exit_code = response.status
+        # The bytes of the stream are added to the span while the caller reads it
+        return TraceCountingStream(response, span) if trace_enabled else response
+
+    def close(self):
+        """Close the kept-alive connection."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
 
-def filter_running_containers(running_containers, *lists):
-    """Filters multiple lists (e.g., running_containers and running_container_tags) 
-    based on the running_containers_state list, using filter_by_state.
 
-    Args:
-        running_containers (list): a list of boolean values indicating running status.
-        *lists: variable number of lists to filter based on running_containers.
+# Clients are kept per thread, since a http.client connection must not be shared between threads
+docker_api_clients = threading.local()
+docker_api_available = None
+
+
+def get_docker_api_client():
+    """Provide the Docker Engine API client of the current thread.
+
     Returns:
-        tuple: a flattened tuple of no_running and running filtered lists and lengths of the lists.
+        DockerAPIClient: the client, or None if the API is disabled (MLC_DOCKER_API=0) or the daemon is not reachable.
     """
-    
-    no_running_results = filter_by_state(False, running_containers, *lists) 
-    running_results = filter_by_state(True, running_containers, *lists) 
-    
-    # Calculate lengths
-    no_running_length = len(no_running_results[0])  
-    running_length = len(running_results[0])  
+    global docker_api_available
 
-    # Return a flattened tuple with no_running followed by running results
-    return (*no_running_results, no_running_length, *running_results, running_length)
+    if docker_api_available is False or os.environ.get("MLC_DOCKER_API", "1") == "0":
+        return None
+    client = getattr(docker_api_clients, "client", None)
+    if client is None:
+        try:
+            client = DockerAPIClient()
+            if docker_api_available is None:
+                status, _ = client.request("GET", "/_ping")
+                if status != 200:
+                    raise DockerAPIError(f"Docker daemon ping failed with status {status}")
+        except DockerAPIError:
+            docker_api_available = False
+            return None
+        docker_api_available = True
+        docker_api_clients.client = client
+    return client
+
+
+def docker_api_request(method, path, query=None, body=None):
+    """Send a request to the Docker Engine API if available.
+
+    Args:
+        method (str): HTTP method (GET, POST, DELETE).
+        path (str): API endpoint.
+        query (dict, optional): query parameters.
+        body (dict, optional): JSON body of the request.
+
+    Returns:
+        int, object: HTTP status code and decoded reply, or None, None if the API is not available and the docker CLI has to be used.
+    """
+    client = get_docker_api_client()
+    if client is None:
+        return None, None
+    try:
+        return client.request(method, path, query, body)
+    except DockerAPIError:
+        return None, None
 
 
-def format_container_stats(container_stats_dict):
-    """Format the container info provided by the stats.
+def docker_api_list_containers(filters, all_containers=True, size=False):
+    """List containers using the Docker Engine API (equivalent to docker container ps).
 
     Args:
-        container_stats_dict (dict): dictionay containing the whole stats of a container.
+        filters (dict): docker filters, for example {"label": ["aime.mlc"]}.
+        all_containers (bool, optional): include not running containers. Defaults to True.
+        size (bool, optional): compute the container sizes (slow). Defaults to False.
 
     Returns:
-        list: stats line representing the columns of the output.
-    """  
+        list: list of container summaries of the API, or None if the docker CLI has to be used.
+    """
+    status, containers = docker_api_request(
+        "GET", 
+        "/containers/json", 
+        {"all": all_containers, "size": size or None, "filters": filters}
+    )
+    if status != 200 or not isinstance(containers, list):
+        return None
+    return containers
 
-    #ToDo: check if labels_string is needed  
-    # Extract the 'Labels' field
-    #labels_string = container_stats_dict.get('Labels', {})
-    # Retrieve the value for 'aime.mlc.USER'
-    container_name = container_stats_dict["Name"].split('._.')[0]
-    cpu_usage_perc = container_stats_dict["CPUPerc"]
-    memory_usage = container_stats_dict["MemUsage"]
-    memory_usage_perc = container_stats_dict["MemPerc"]
-    processes_active = container_stats_dict["PIDs"]
-    stats_line_to_be_printed = [f"[{container_name}]", cpu_usage_perc, memory_usage, memory_usage_perc, processes_active]
 
-    return stats_line_to_be_printed
+def iter_json_array(response, chunk_size=65536):
+    """Yield the elements of a JSON array while it is read, without waiting for the end of the reply.
+
+    Args:
+        response (http.client.HTTPResponse): response whose body is a JSON array. It is closed at the end.
+        chunk_size (int, optional): maximal number of bytes read at once. Defaults to 65536.
 
+    Raises:
+        ValueError: if the body is not a valid JSON array.
+    """
+    import codecs
 
-def get_gpu_architectures(filename):
-    """Get current gpu architectures from repo file.
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    array_started = False
+    end_of_data = False
+    try:
+        while True:
+            buffer = buffer.lstrip()
+            if not array_started and buffer:
+                if buffer[0] != "[":
+                    raise ValueError("JSON array expected")
+                array_started = True
+                buffer = buffer[1:].lstrip()
+            if array_started and buffer[:1] == ",":
+                buffer = buffer[1:].lstrip()
+            if array_started and buffer[:1] == "]":
+                return
+            if array_started and buffer:
+                try:
+                    element, end = decoder.raw_decode(buffer)
+                except ValueError:
+                    if end_of_data:
+                        raise
+                else:
+                    buffer = buffer[end:]
+                    yield element
+                    continue
+            if end_of_data:
+                raise ValueError("Incomplete JSON array")
+            chunk = response.read1(chunk_size)
+            end_of_data = not chunk
+            buffer += text_decoder.decode(chunk, final=end_of_data)
+    finally:
+        response.close()
+
+
+def docker_api_stream_containers(filters, all_containers=True, size=False):
+    """List containers using the Docker Engine API, the container summaries are provided while the reply is read.
 
     Args:
-        filename (str): name of the file where the framework, version, gpu architecture and docker image name are provided.
+        filters (dict): docker filters, for example {"label": ["aime.mlc"]}.
+        all_containers (bool, optional): include not running containers. Defaults to True.
+        size (bool, optional): compute the container sizes (slow). Defaults to False.
 
     Returns:
-        list: provides a list of the available gpu architectures.
+        iterator: container summaries of the API, or None if the docker CLI has to be used.
     """
-    
-    # Creating a set to keep only unique items
-    unique_architectures = set() 
-    
-    headers = ['framework', 'version', 'architecture', 'docker image']
-    separator = ";"
-    with open(filename, mode='r') as file:
-        reader = csv.DictReader(file, fieldnames=headers)
-        for row in reader:
-            stripped_row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items()}
-            architecture = stripped_row['architecture'].strip("[]").split(separator)
-            unique_architectures.update(architecture)
-
-    available_architectures = list(unique_architectures)
-    if not available_architectures:
-        print(f"{ERROR}No gpu architectures found.{RESET}")
-        exit(1)
-    
-    return available_architectures   
+    client = get_docker_api_client()
+    if client is None:
+        return None
+    try:
+        response = client.open_stream("GET", "/containers/json", {"all": all_containers, "size": size or None, "filters": filters})
+    except DockerAPIError:
+        return None
+    if response.status != 200:
+        response.close()
+        return None
+    return iter_json_array(response)
 
 
-def get_user_selection(prompt, max_value):
-    """The user provides a position in the list corresponding to a desire.
+def docker_api_container_name(container_summary):
+    """Return the container name of an API container summary, without the leading '/'.
 
     Args:
-        prompt (str): prompt with the request.
-        max_value (int): maximal value of the list corresponding to the available options.
+        container_summary (dict): container summary provided by /containers/json.
 
     Returns:
-        int: positive integer of the selected position.
-    """   
-        
-    while True:
-        try:
-            selection = int(input(prompt))
-            if 1 <= selection <= max_value:
-                return selection
-            else:
-                print(f"{ERROR}Please enter a number between 1 and {max_value}.{RESET}")
-        except ValueError:
-            print(f"{ERROR}Invalid input. Please enter a valid number.{RESET}")
-        
+        str: name of the container.
+    """
+    names = container_summary.get("Names") or [""]
+    return names[0].lstrip("/")
 
-def get_container_image(container_tag):
-    """Get the image of the container corresponding to a provided container tag.  
+
+def format_size(size_bytes):
+    """Format a size in bytes the way the docker CLI does (decimal units, 3 significant digits).
 
     Args:
-        container_tag (str): container tag.
+        size_bytes (int): size in bytes.
+
     Returns:
-        str: image corresponding to a provided container tag.
-    """    
-    
-   # Get the image associated with the container
-    docker_command_get_image = [
-        'docker', 
-        'container', 
-        'ps', 
-        '-a', 
-        '--filter', f'name={container_tag}', 
-        '--filter', 'label=aime.mlc', 
-        '--format', '{{.Images}}'
-        ]    
-    output, _, _ = run_docker_command(docker_command_get_image)
-    return output
+        str: human readable size, for example 1.23GB.
+    """
+    units = ["B", "kB", "MB", "GB", "TB", "PB"]
+    size = float(size_bytes or 0)
+    unit_index = 0
+    while size >= 1000 and unit_index < len(units) - 1:
+        size /= 1000
+        unit_index += 1
+    return f"{size:.3g}{units[unit_index]}"
 
 
-def get_container_name(container_name, user_name, command, script=False):
-    """Get and check whether a container name is provided, and in this case, check that the container name contains valid characters. 
+def container_summary_to_cli_format(container_summary):
+    """Convert an API container summary into the row format of 'docker container ls --format {{json .}}'.
 
     Args:
-        container_name (str): name of the container.
-        user_name (str): name of the user.
-        command (str): mlc command used.
-        script (bool, optional): script mode on=True or off=False. Defaults to False.
+        container_summary (dict): container summary provided by /containers/json.
 
     Returns:
-        str: returns a validated container name
-    """    
-
-    # ToDo: customize i/o usign user_name. 
+        dict: container info with the fields used by mlc (ID, Names, Image, State, Status, Size, Labels). Labels is a dict.
+    """
+    size = ""
+    if "SizeRootFs" in container_summary:
+        size = format_container_size(container_summary.get("SizeRw", 0), container_summary.get("SizeRootFs", 0))
+    return {
+        "ID": container_summary.get("Id", ""),
+        "Names": docker_api_container_name(container_summary),
+        "Image": container_summary.get("Image", ""),
+        "State": container_summary.get("State", ""),
+        "Status": container_summary.get("Status", ""),
+        "Size": size,
+        "Labels": container_summary.get("Labels") or {},
+    }
 
-    if script and not container_name:
-        print(f"\n{ERROR}Container name is missing.{RESET}\n")
-        exit(1)
-    elif not script and container_name:
-        while True:
-            try:                 
-                return validate_container_name(container_name, command, script)            
-            except ValueError as e:
-                print(e)
-                container_name = input(f"\n{REQUEST}Enter a container name (valid characters: a-z, A-Z, 0-9, _,-,#): {RESET}")
-    elif not script and not container_name:   
-        while True:                           
-            container_name = input(f"\n{REQUEST}Enter a container name (valid characters: a-z, A-Z, 0-9, _,-,#): {RESET}")
-            try:
-                return validate_container_name(container_name, command, script)
-            except ValueError as e:
-                print(e)
-    else:
-        return validate_container_name(container_name, command, script) 
-    
 
-def get_docker_image(version, images):
-    """Get the docker image corresponding to the provided version.
+################################################################################################################################################
+# Container inventory
+#
+# A single docker query provides the state of all mlc containers. The resulting snapshot is shared by all helpers during a
+# command, so that listing, validating and selecting containers does not cost one docker call per container.
+
+ContainerInfo = namedtuple("ContainerInfo", ["id", "name", "tag", "state", "status", "image", "size", "labels", "size_time"], defaults=(None,))
+
+# docker create flag and aime.mlc label of every resource setting (see Resources)
+container_resource_options = {
+    "cpus": ("--cpus", "aime.mlc.CPUS"),
+    "memory": ("--memory", "aime.mlc.MEMORY"),
+    "shm_size": ("--shm-size", "aime.mlc.SHM_SIZE"),
+    "ipc": ("--ipc", "aime.mlc.IPC"),
+    "cpuset_cpus": ("--cpuset-cpus", "aime.mlc.CPUSET"),
+    "cpuset_mems": ("--cpuset-mems", "aime.mlc.CPUSET_MEMS"),
+}
+
+# Labels set by mlc create. The docker CLI fallback reads them one by one, since 'docker container ps' only provides all
+# labels joined by ',' which can not be split again when a value (for example a mount path) contains a ','.
+container_labels = [
+    "aime.mlc",
+    "aime.mlc.NAME",
+    "aime.mlc.USER",
+    "aime.mlc.ARCH",
+    "aime.mlc.MLC_VERSION",
+    "aime.mlc.WORK_MOUNT",
+    "aime.mlc.DATA_MOUNT",
+    "aime.mlc.MODELS_MOUNT",
+    "aime.mlc.FRAMEWORK",
+    "aime.mlc.GPUS",
+    *(label for _, label in container_resource_options.values()),
+    "aime.mlc.WATCHDOG",
+    "aime.mlc.DATA_CACHE",
+    "aime.mlc.DATA_CACHE_SIZE",
+]
+
+
+def container_ps_format(with_size=False):
+    """Return the go template for 'docker container ps --format' providing one JSON row per container with structured labels.
 
     Args:
-        version (str): selected version. Example: 2.4.0.
-        images (list of tuples): list containing tuples, which contains version and the docker image location. Example: [('2.4.0', 'aimehub/pytorch-2.4.0-cuda12.1'),...].
-
-    Raises:
-        ValueError: if the user provides an unavailable version.
+        with_size (bool, optional): include the size, the docker CLI computes the sizes as soon as the template uses it. Defaults to False.
 
     Returns:
-        str: _description_
+        str: the template.
     """
+    fields = ",".join(f'"{field}":{{{{json .{field}}}}}' for field in ["ID", "Names", "Image", "State", "Status"] + (["Size"] if with_size else []))
+    labels = ",".join(f'"{label}":{{{{json (.Label "{label}")}}}}' for label in container_labels)
+    return f'{{{fields},"Labels":{{{labels}}}}}'
 
-    for tup in images:
-        if tup[0] == version:
-            return tup[1]
-        
-    # Raise an exception if no matching tuple is found              
-    raise ValueError("No version available") 
 
+class ContainerInventory:
+    """Immutable snapshot of all containers labelled aime.mlc.
 
-def get_host_gpu_architecture():
-    """Detects the GPU architecture (CUDA or ROCm) installed on the host system.
+    Args:
+        containers (iterable): ContainerInfo entries, ordered like docker container ps (newest first).
+        with_size (bool, optional): the sizes of the containers were computed. Defaults to False.
+    """
 
-    This function uses the `apt list --installed` command to inspect installed packages
-    and determine whether a CUDA or ROCm driver is present. It extracts the version 
-    information and maps it to a specific GPU architecture string.
+    __slots__ = ("containers", "by_tag", "with_size")
 
-    Returns:
-        tuple: A tuple containing:
-            - The detected driver type ('CUDA' or 'ROCM')
-            - The corresponding architecture string (e.g., 'CUDA_AMPERE', 'ROCM6')
-            - The version number (float for CUDA, string for ROCm)
+    def __init__(self, containers, with_size=False):
+        containers = tuple(containers)
+        object.__setattr__(self, "containers", containers)
+        object.__setattr__(self, "by_tag", types.MappingProxyType({container.tag: container for container in containers}))
+        object.__setattr__(self, "with_size", with_size)
 
-    """    
-    
-    try:
-        # Run the apt command to get installed packages
-        cuda_version_command = [
-            "apt", 
-            "list", 
-            "--installed"
-        ]
-        apt_result = subprocess.run(cuda_version_command, capture_output=True, text=True)
+    def __setattr__(self, name, value):
+        raise AttributeError("ContainerInventory is immutable")
 
-        if apt_result.returncode != 0:
-            print(f"\n{ERROR}Host GPU architecture detection: Failed to execute 'apt list --installed'.{RESET}\n")
-            exit(1)
+    def __iter__(self):
+        return iter(self.containers)
 
-        apt_output = apt_result.stdout
+    def __len__(self):
+        return len(self.containers)
 
-        # Group lines containing CUDA or ROCm into buckets. Every new key starts with an empty list
-        lines_by_type = defaultdict(list)
+    def get(self, container_tag):
+        """Return the ContainerInfo of the container tag or None if the container does not exist."""
+        return self.by_tag.get(container_tag)
 
-        for line in apt_output.split("\n"):
-            if "cuda-" in line:
-                lines_by_type["cuda"].append(line)
-            elif "rocm" in line:
-                lines_by_type["rocm"].append(line)
-        
-        if lines_by_type["cuda"]:
-            cuda_lines = "\n".join(lines_by_type["cuda"])
-            match = re.search(r'cuda-(\d+\-\d+(\-\d+)?)', cuda_lines)
-            if not match:
-                match = re.search(r'cuda-toolkit-(\d+\-\d+(\-\d+)?)', cuda_lines)
-            
-            if match:
-                version_str = match.group(1)  # e.g. '12-3-1'
-                parts = version_str.split("-")
-                host_cuda_version = float(".".join(parts[:2]))  # e.g. 12.3
-                
-                if host_cuda_version <= 11.8:
-                    return "CUDA", "CUDA_AMPERE", host_cuda_version
-                elif 12.8 <= host_cuda_version:
-                    return "CUDA", "CUDA_BLACKWELL", host_cuda_version
-                elif 12.0 <= host_cuda_version:
-                    return "CUDA", "CUDA_ADA", host_cuda_version
-                else:
-                    print(f"\n{ERROR}Unknown CUDA architecture. {RESET}\n")
-                    exit(1)
-            else:
-                print(f"\n{ERROR}CUDA driver version not found. {RESET}\n")
-                exit(1)               
-                    
-        elif lines_by_type["rocm"]:
-            rocm_lines = "\n".join(lines_by_type["rocm"])
-            match = re.search(r'rocm-dev/[^\s]+\s+(\d+\.\d+\.\d+)', rocm_lines)
-            
-            if match:
-                version_str = match.group(1)  # e.g. '6.3.3'
-                host_rocm_version = int(version_str.split(".")[0])
-                return "ROCM", f"ROCM{host_rocm_version}", version_str 
-            else:
-                print(f"\n{ERROR}ROCm driver version not found. {RESET}\n")
-                exit(1)  
-        else:
-            print(f"\n{ERROR}Neither CUDA nor ROCm were found among the installed APT packages. {RESET}\n")
-            exit(1)
+    def is_running(self, container_tag):
+        """Return True if the container with the provided container tag is running."""
+        container = self.by_tag.get(container_tag)
+        return container is not None and container.state == "running"
 
-    
-    except Exception as e:
-        print(f"\n{ERROR}Failed to detect host GPU architecture.{RESET}\n")
-        exit(1)  
+    def running_states(self, container_tags):
+        """Return a list of booleans with the running state of each provided container tag."""
+        return [self.is_running(container_tag) for container_tag in container_tags]
 
+    def user_containers(self, user_name):
+        """Return the containers created by the provided user."""
+        return [container for container in self.containers if container.labels.get("aime.mlc.USER") == user_name]
 
-def is_container_active(container_name):
-    """Check if the container is active by inspecting its processes.
+
+def container_info_from_row(row):
+    """Build a ContainerInfo from a container row (API summary in the docker CLI format, see container_summary_to_cli_format).
 
     Args:
-        container_name (str): name of the container.
+        row (dict): container row with the fields ID, Names, State, Status, Image, Size and Labels (dict).
 
     Returns:
-        boolean: True, if the container is active (number of processes is higher as 2 with a successfull exit code of the docker command).
-    """    
-
-    docker_command = f'docker top {container_name} -o pid'
-    output, _, exit_code = run_docker_command(docker_command)
-    process_count = len(output.splitlines())
-    if exit_code == 0 and 2 < process_count:
-        return "True"
-    else:
-        return "False"
+        ContainerInfo: the container info.
+    """
+    container_tag = row.get("Names", "")
+    state = row.get("State") or ("running" if row.get("Status", "").startswith("Up") else "exited")
+    return ContainerInfo(
+        id=row.get("ID", ""),
+        name=re.match(r"^(.*?)(?:\._\.\w+)?$", container_tag).group(1),
+        tag=container_tag,
+        state=state,
+        status=row.get("Status", ""),
+        image=row.get("Image", ""),
+        size=row.get("Size", ""),
+        labels=types.MappingProxyType(dict(row.get("Labels") or {})),
+    )
 
 
-def print_existing_container_list(container_list):
-    """Print an ordered list with the existing containers.
+def query_container_inventory(with_size=False):
+    """Query the state of all mlc containers with a single docker call.
 
     Args:
-        container_list (list): a list containing the available containers.
-    """    
-    
-    for index, container in enumerate(container_list, start=1):
-        print(f"{index}) {container}")
+        with_size (bool, optional): compute the container sizes (slow). Defaults to False.
 
+    Returns:
+        ContainerInventory: snapshot of all containers labelled aime.mlc.
+    """
+    return ContainerInventory(iter_containers(with_size), with_size)
 
-def print_info_header(command):
-    """Print an info header depending on the used mlc command.
+
+def iter_containers(with_size=False):
+    """Query all mlc containers with a single docker call and provide them while the reply is read.
 
     Args:
-        command (str): mlc command used by the user.
-    """ 
-    
-    if command == "create":
-        print(
-            "\n" \
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Create a new MLC container \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc create <container_name> <framework_name> <framework_version> -w <workspace_directory> -d <data_directory> -m <models_directory> -s -arch <gpu_architecture> -ng <number of gpus> \
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc create pt250 Pytorch 2.5.0 -w /home/$USER/workspace -d /data -m /models\n" 
-        ) 
-                
-    if command == "open":
-        print(
-            "\n"\
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Open an existing machine learning container  \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc open <container_name> [-s|--script]\
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc open pt231aime -s\n"
-        )
-        
-    if command == "remove":
-        print(
-            "\n"\
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Remove an existing and no running machine learning container  \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc remove <container_name> [-s|--script] [-f|--force]\
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc remove pt231aime -s -f \n"
-        )   
+        with_size (bool, optional): compute the container sizes (slow). Defaults to False.
 
-    if command == "start":        
-        print(
-            "\n"\
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Start an existing machine learning container  \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc start <container_name> [execute_command] [-d|--detach] [-s|--script] \
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc start pt231aime -s\n"
-        )
+    Yields:
+        ContainerInfo: the containers labelled aime.mlc, newest first.
+    """
+    # A fresh state store answers without asking docker, it does not know the sizes
+    stored_containers = None if with_size else read_state_store()
+    if stored_containers is not None:
+        now = time.time()
+        for container in stored_containers:
+            yield container_info_from_inspect(container, now)
+        return
+
+    containers = docker_api_stream_containers({"label": ["aime.mlc"]}, size=with_size)
+    if containers is not None:
+        for container in containers:
+            yield container_info_from_row(container_summary_to_cli_format(container))
+        return
+
+    docker_command_ls = ["docker", "container", "ps", "-a", "--no-trunc", "--filter", "label=aime.mlc", "--format", container_ps_format(with_size)]
+    if with_size:
+        docker_command_ls.insert(4, "--size")
+    process = subprocess.Popen(docker_command_ls, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip():
+            row = json.loads(line)
+            row["Labels"] = {label: value for label, value in row["Labels"].items() if value}
+            yield container_info_from_row(row)
+    if process.wait() != 0:
+        print(f"{ERROR}Error:{RESET}\n{process.stderr.read()}")
+        exit(1)
 
-    if command == "stop":        
-        print(
-            "\n"\
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Stop an existing machine learning container  \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc stop <container_name> [-s|--script] [-f|--force] \
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc stop pt231aime -s -f\n"
-        )  
 
-    if command == "update-sys":
-        print(
-            "\n"\
-            f"    {INFO_HEADER}Info{RESET}: \
-            \n    Update the system  \
-            \n\n    {INFO_HEADER}How to use{RESET}: \
-            \n    mlc update-sys [-f|--force]\
-            \n\n    {INFO_HEADER}Example{RESET}: \
-            \n    mlc update-sys -f \n"
-        )  
+container_inventory = None
+container_inventory_changed = False     # This command changed a container, the state store may not have seen the change yet
 
 
-def run_docker_command(docker_command):
-    """Run a shell command and return its output usign subprocess.run().
+def get_container_inventory(with_size=False):
+    """Provide the container inventory of the current command, the docker daemon is queried only once.
 
     Args:
-        docker_command (str): docker command to be executed.
+        with_size (bool, optional): the sizes of the containers are needed. Defaults to False.
 
     Returns:
-        str, str, int: standard output and error file handle and returncode.
-    """    
- 
-    result = subprocess.run(
-        docker_command, 
-        shell=True, 
-        text=True, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE)
-    return result.stdout.strip(), result.stderr.strip(), result.returncode
+        ContainerInventory: snapshot of all containers labelled aime.mlc.
+    """
+    global container_inventory
 
+    if container_inventory is None or (with_size and not container_inventory.with_size):
+        container_inventory = query_container_inventory(with_size)
+    return container_inventory
 
-def run_docker_command_popen(command):
-    """Run a shell command and return its output using subprocess.Popen().
 
-    Args:
-        command (str): docker command to be executed.
+def invalidate_container_inventory():
+    """Drop the container inventory after the state of a container has been changed. Docker is queried directly for the rest of the command."""
+    global container_inventory, container_inventory_changed
+    container_inventory = None
+    container_inventory_changed = True
 
-    Returns:
-        str, int: standard error file handle and returncode.
-    """    
-    process = subprocess.Popen(
-        command, 
-        shell=False,
-        text=True,
-        stderr=subprocess.PIPE,
-    )
-    stderr = process.communicate()  # Communicate handles interactive input/output
-    return stderr, process.returncode
 
-def run_docker_pull_image(docker_command):
-    """Pull a docker image and return its output usign subprocess.run().
+################################################################################################################################################
+# Container state store
+#
+# With MLC_STATE_STORE=1 the containers labelled aime.mlc are kept in a SQLite database in the mlc cache directory. A detached follower
+# process subscribes to the docker event stream, fills the store with a full query and then applies every container event. While the
+# follower is in sync it writes a heartbeat, commands use the store only as long as the heartbeat is recent. Whenever the event stream
+# ends the store is marked stale and rebuilt from scratch, so events missed during the gap can not leave outdated entries. The follower
+# exits when the store has not been read for state_store_idle_exit seconds. The store needs the Docker Engine API.
 
-    Args:
-        docker_command (str): docker pull command to be executed.
+state_store_heartbeat = 5       # Seconds between two heartbeats of the follower
+state_store_max_age = 15        # Seconds after the last heartbeat until the store is stale
+state_store_idle_exit = 3600    # Seconds without a read after which the follower exits, also the read timeout of the event stream
+state_store_events = ["create", "destroy", "die", "pause", "rename", "restart", "start", "stop", "unpause", "update"]
 
-    """ 
-    # Run the command and print output in real-time
-    result = subprocess.run(
-        docker_command, 
-        text=True,
-        capture_output=False,  
-    )
 
-    returncode = result.returncode
+def state_store_enabled():
+    """Return True if the state store is enabled (MLC_STATE_STORE=1) and the Docker Engine API is not disabled."""
+    return os.environ.get("MLC_STATE_STORE", "0") == "1" and os.environ.get("MLC_DOCKER_API", "1") != "0"
 
-    if returncode == 0:
-        print(f"\n{INFO}Docker image pulled successfully.{RESET}")
-    else:
-        print(f"\n{ERROR}Docker pull image failed. Try mlc create again.{RESET}")
-    #    exit(1)
 
+def get_docker_host_id():
+    """Return a short id of the docker daemon in use. Cache files are kept per daemon, the cache directory may be shared by several hosts.
 
-def set_framework(framework_version_docker_sorted):
-    """Display the available frameworks and set the framework by interactive selection.
+    Returns:
+        str: 12 hex digits.
+    """
+    import hashlib
 
-    Args:
-        framework_version_docker_sorted (dict): the content is a dict providing the availables frameworks, versions, gpu architecture and docker images.
+    docker_host = f"{os.uname().nodename} {os.environ.get('DOCKER_HOST') or docker_default_host}"
+    return hashlib.sha256(docker_host.encode()).hexdigest()[:12]
 
-    Returns:
-        str: selected framework.
-    """ 
-    
-    framework_list = display_frameworks(framework_version_docker_sorted)
-    framework_num = get_user_selection(f"{REQUEST}Enter the number of the desired framework: {RESET}", len(framework_list))
-    
-    return framework_list[framework_num - 1]
-    
-    
-def set_version(framework, version_images):
-    """Display the available versions of the preselected framework and set a framework version.
 
-    Args:
-        framework (str): name of the preselected framework.
-        version_images (list): list including tuples with the format (version, image).
-    Returns:
-        tuple(str, str): returns the version and the corresponding docker image. 
-    """    
-                    
-    display_versions(framework, version_images)
-    version_number = get_user_selection(f"{REQUEST}Enter the number of your version: {RESET}", len(version_images))
-    return version_images[version_number - 1]
+def get_state_store_file():
+    """Return the path of the state store database of the docker daemon in use."""
+    return os.path.join(get_mlc_cache_dir(), f"state-{get_docker_host_id()}.sqlite")
 
 
-# ToDo: try to combine select_container() with get_user_selection(prompt, max_value).
-def select_container(container_list):
-    """Prompts the user to select a container from the list.
+def open_state_store(file_name):
+    """Open the state store database and create its tables.
 
     Args:
-        container_list (list): a list of containers (running, no running)
+        file_name (str): path of the database.
 
     Returns:
-        str, int: selected container, position in the list
-    """    
+        sqlite3.Connection: the connection.
+    """
+    import sqlite3
 
-    while True:
-        try:
-            selection = int(input(f"\n{REQUEST}Select the number of the container: {RESET}"))
-            container_list_length = len(container_list)
-            if 1 <= selection <= container_list_length:
-                return container_list[selection - 1], selection
-            else:
-                print(f"\n{ERROR}Invalid selection. Please choose a valid number.{RESET}")
-        except ValueError:
-            print(f"\n{ERROR}Invalid input. Please enter a number.{RESET}")
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    connection = sqlite3.connect(file_name, timeout=docker_api_timeout)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE IF NOT EXISTS containers (id TEXT PRIMARY KEY, created REAL, container TEXT)")
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+    connection.commit()
+    return connection
 
 
-def select_container_to_be_ed(containers):
-    """Print a list of existing containers and provide a selected container name and its position in a list.
-    
-    Options: 
-    select_container_to_be_opened/removed/start/stopped
-    
+def reduce_container_inspect(container):
+    """Keep the fields of a docker inspect reply needed by mlc.
+
     Args:
-        containers (list): list of container which can be opened/removed/start/stopped
+        container (dict): reply of docker container inspect.
 
     Returns:
-        str, int: selected container, position in the list
+        dict: Id, Name, Created, State (Status, Running, Paused, ExitCode, StartedAt, FinishedAt) and Config (Image, Labels).
     """
+    state = container.get("State") or {}
+    config = container.get("Config") or {}
+    return {
+        "Id": container["Id"],
+        "Name": container.get("Name", ""),
+        "Created": container.get("Created", ""),
+        "State": {key: state.get(key) for key in ["Status", "Running", "Paused", "ExitCode", "StartedAt", "FinishedAt"]},
+        "Config": {"Image": config.get("Image", ""), "Labels": config.get("Labels") or {}},
+    }
 
-    print_existing_container_list(containers)
-    selected_container_name, selected_container_position = select_container(containers)    
-    return selected_container_name, selected_container_position
 
+def format_docker_duration(seconds):
+    """Format a duration the way docker does in the status of a container.
 
-def show_container_stats():  
-    """Fetch docker container stats.
-    """    
-  
-    command = [
-        "docker",
-        "stats",
-        "--no-stream",
-        "--format",'{{json .}}'
-    ]
-    process = subprocess.Popen(
-        command, 
-        shell=False,
-        text=True, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE
-        )
+    Args:
+        seconds (float): the duration.
 
-    stdout_data, stderr_data = process.communicate()
+    Returns:
+        str: for example "Less than a second", "About a minute", "5 hours" or "3 weeks".
+    """
+    if seconds < 1:
+        return "Less than a second"
+    if seconds < 60:
+        return "1 second" if int(seconds) == 1 else f"{int(seconds)} seconds"
+    minutes = int(seconds / 60)
+    if minutes < 60:
+        return "About a minute" if minutes == 1 else f"{minutes} minutes"
+    hours = int(seconds / 3600 + 0.5)
+    if hours == 1:
+        return "About an hour"
+    if hours < 48:
+        return f"{hours} hours"
+    if hours < 24 * 7 * 2:
+        return f"{hours // 24} days"
+    if hours < 24 * 30 * 2:
+        return f"{hours // 24 // 7} weeks"
+    if hours < 24 * 365 * 2:
+        return f"{hours // 24 // 30} months"
+    return f"{int(seconds / 3600) // 24 // 365} years"
+
+
+def container_status_text(state, now=None):
+    """Build the status shown by docker container ps from the state of a container.
 
-    # If no stdout_data is received
-    if not stdout_data:
-        process.terminate()
-        print(f"\n{ERROR}There are no running containers. Start or open a container to show the stats.{RESET}\n")
-        exit(0)
-    else:        
-        # Print the final processed output
-        # Define an output format string with specified widths
-        format_string = "{:<30}{:<10}{:<25}{:<10}{:<15}"
-        print(f"\n{INFO}Current stats of the running containers:{RESET}")
-        titles = ["CONTAINER", "CPU %", "MEM USAGE / LIMIT", "MEM %", "PROCESSES (PIDs)"]
-                  
-        # Split into individual lines and process them as JSON objects
-        output_lines = []
-        
-        # Split by newlines and parse each line as JSON
-        json_lines = stdout_data.split('\n')
-        containers_stats = [json.loads(line) for line in json_lines if line]
+    Args:
+        state (dict): State of the docker inspect reply.
+        now (float, optional): current unix time. Defaults to time.time().
 
-        # Apply formatting to all containers' info
-        output_lines = list(map(format_container_stats, containers_stats))
-        print(format_string.format(*titles))
-        print("\n".join(format_string.format(*info) for info in output_lines)+"\n")
-    
-    # Exit after processing one time in non-streaming mode
-    process.terminate()        
+    Returns:
+        str: for example "Up 2 hours", "Up 5 minutes (Paused)" or "Exited (137) 3 days ago".
+    """
+    now = time.time() if now is None else now
+    status = state.get("Status") or ""
+    if status in ("running", "paused"):
+        uptime = format_docker_duration(now - parse_image_created(state.get("StartedAt")))
+        return f"Up {uptime} (Paused)" if status == "paused" else f"Up {uptime}"
+    if status in ("exited", "restarting") and parse_image_created(state.get("StartedAt")) > 0:
+        since_exit = format_docker_duration(now - parse_image_created(state.get("FinishedAt")))
+        return f"{status.capitalize()} ({state.get('ExitCode') or 0}) {since_exit} ago"
+    return {"exited": "Created", "created": "Created", "removing": "Removal In Progress", "dead": "Dead"}.get(status, status)
 
 
-def short_home_path(provided_path):
-    """Replace the home directory with "~" if present
+def container_info_from_inspect(container, now=None):
+    """Build a ContainerInfo from a (reduced) docker inspect reply.
 
     Args:
-        provided_path (str): path to be modify
+        container (dict): the inspect reply, see reduce_container_inspect.
+        now (float, optional): current unix time used for the status. Defaults to time.time().
 
     Returns:
-        str: path with "~" if needed
-    """  
-    home_directory = os.path.expanduser("~")
-    
-    if provided_path == "-":
-        return "-"
-    elif provided_path == home_directory:
-        return provided_path
-    else:        
-        shortened_path = provided_path.replace(home_directory, "~", 1)
-        return shortened_path
+        ContainerInfo: the container info.
+    """
+    return container_info_from_row({
+        "ID": container["Id"],
+        "Names": container["Name"].lstrip("/"),
+        "Image": container["Config"]["Image"],
+        "State": container["State"]["Status"],
+        "Status": container_status_text(container["State"], now),
+        "Labels": container["Config"]["Labels"],
+    })
 
 
-def show_container_info(**kwargs):
-    """Print container info
+def read_state_store():
+    """Read the containers from the state store. A stale store starts the follower, so that later commands can use it.
 
-    Args:
-        flags (str): flag arguments provided by the user
+    Returns:
+        list: the containers in the reduced inspect format (see reduce_container_inspect), newest first. None if the store is
+            disabled or stale, or if this command changed a container, docker has to be queried then.
     """
-    
-    # Adapt the filter to the selected flags
-    filter_aime_mlc_user =  "label=aime.mlc" if kwargs == {} or kwargs["all_users"] else f"label=aime.mlc={user_name}"
-    docker_command_ls = [
-        "docker", "container", 
-        "ls", 
-        "-a", 
-        "--filter", filter_aime_mlc_user, 
-        "--format", '{{json .}}'    
-    ]
+    if container_inventory_changed or not state_store_enabled():
+        return None
+    import sqlite3
 
-    # Initialize Popen to run the docker command with JSON output
-    process = subprocess.Popen(
-        docker_command_ls, 
-        shell=False,
-        text=True,
-        stdout=subprocess.PIPE,  # Capture stdout
-        stderr=subprocess.PIPE    # Capture stderr
-    )
-    
-    # Communicate with the process to get output and errors
-    stdout_data, stderr_data = process.communicate()   
-       
-    # Check for any errors
-    if process.returncode != 0:
-        print(f"{ERROR}Error:{RESET}\n{stderr_data}")
-        exit(1)
+    file_name = get_state_store_file()
+    containers = None
+    if os.path.exists(file_name):
+        try:
+            connection = sqlite3.connect(file_name, timeout=1)
+            try:
+                heartbeat = connection.execute("SELECT value FROM meta WHERE key = 'heartbeat'").fetchone()
+                if heartbeat is not None and time.time() - heartbeat[0] < state_store_max_age:
+                    containers = [json.loads(container) for container, in connection.execute("SELECT container FROM containers ORDER BY created DESC")]
+            finally:
+                connection.close()
+        except (sqlite3.Error, ValueError):
+            containers = None
+
+    if containers is None:
+        start_state_store_follower(file_name)
     else:
-        # If no stdout_data is received
-        if not stdout_data:
-            process.terminate()
-            print(f"\n{ERROR}There are no containers. Create the first one using:{RESET}\n{HINT}mlc create container_name{RESET}\n")
-            exit(0)    
-                
-        stdout_data_stripped = stdout_data.strip()
-        
-        # Titels  extracted from the kwargs
-        kwarg_keys_to_be_deleted = ["command", "all", "all_users"]
-        kwarg_titles = {key: key.upper() for key in kwargs if key not in kwarg_keys_to_be_deleted}
-        kwarg_titles["all_users"] = "USER"
-                
-        # Default columns to display
-        default_titles_to_display = ["CONTAINER", "FRAMEWORK", "STATUS"]
-        
-        # Columns when flag --all is set up:
-        titles_when_all_is_set = [ "USER", "SIZE", "ARCHITECTURE", "WORKSPACE", "DATA", "MODELS"]
+        # The follower exits when the store is no longer read, the modification time of its lock file marks the last read
+        try:
+            if time.time() - os.stat(f"{file_name}.lock").st_mtime > 60:
+                os.utime(f"{file_name}.lock")
+        except OSError:
+            pass
+    return containers
 
-        # Add additional columns based on flags
-        if kwargs.get("all"):  
-            default_titles_to_display.extend(titles_when_all_is_set)
-        else:
-            default_titles_to_display.extend(kwarg_titles[key] for key in kwargs if key in kwarg_titles and kwargs[key] is True)        
-        
-        # Titles to be display on the top of the columns
-        titles_to_display = default_titles_to_display        
 
-        columns_transcription = {
-            "CONTAINER": "aime.mlc.NAME",
-            "FRAMEWORK": "aime.mlc.FRAMEWORK", 
-            "STATUS": "Status",
-            "USER": "aime.mlc.USER",
-            "SIZE": "Size",
-            "ARCHITECTURE":"aime.mlc.ARCH",
-            "WORKSPACE": "aime.mlc.WORK_MOUNT",
-            "DATA": "aime.mlc.DATA_MOUNT",
-            "MODELS": "aime.mlc.MODELS_MOUNT"
-        }
-        # Select the values which can be written with '~' 
-        reduce_the_path = ["WORKSPACE", "DATA", "MODELS"]  
-              
-        # Values which can be written with '~' 
-        values_to_be_reduced = [columns_transcription[key] for key in reduce_the_path if key in columns_transcription]
-        
-        # Split by newlines and parse each line as JSON
-        json_lines = stdout_data_stripped.split('\n')
+def start_state_store_follower(file_name):
+    """Start the follower in a detached process, unless it is already running.
 
-        # List of all fields with info of the available containers
-        containers_info = [json.loads(line)for line in json_lines if line]
-        
-        # Flatten the dicts and apply short_home_path for keys in values_to_be_reduced
-        flattened_container_infos = [
-            {
-                **{key: short_home_path(value) if key in values_to_be_reduced 
-                   else f"[{value}]" if key == columns_transcription["CONTAINER"] 
-                   else value 
-                   for key, value in 
-                (pair.split('=', 1) for pair in container_dict["Labels"].split(','))},
-                **{key: value for key, value in container_dict.items() if key != "Labels"}
-            }
-            for container_dict in containers_info
-        ]
-      
-        # Assess the column widths for printing with a correct format
-        column_widths = {
-            key: max(len(key), *(len(container.get(columns_transcription[key], "")) for container in flattened_container_infos)) 
-            for key in titles_to_display
-        }
-        
-        # Build the format string dynamically
-        format_string = "".join(f"{{:<{column_widths[col]+2}}}" for col in titles_to_display)
+    Args:
+        file_name (str): path of the state store database.
+    """
+    import fcntl
 
-        # Print the titles
-        print("")
-        print(format_string.format(*(titles_to_display)))
-        
-        # Print the rows
-        for container in flattened_container_infos:
-            print(format_string.format(*(container.get(columns_transcription[key], '') for key in titles_to_display if key in columns_transcription)))
-        print("")
-        
-        
-def show_frameworks_versions(ml_images_content):
-    """Print the available frameworks and versions by mlc create
+    try:
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(f"{file_name}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+    follower = "import sys; sys.path[0] = sys.argv[1]; import mlc; mlc.run_state_store_follower()"
+    try:
+        subprocess.Popen(
+            [sys.executable, "-c", follower, os.path.dirname(os.path.abspath(__file__))],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+    except OSError:
+        pass
+
+
+def store_container(connection, container_id):
+    """Update the entry of a container in the state store from docker. A removed container is deleted from the store.
 
     Args:
-        architecture (str): current gpu architecture
-        ml_images_content (dict): dict containing as keys the frameworks and as values tuples (version, docker image)
-    """    
+        connection (sqlite3.Connection): connection to the state store.
+        container_id (str): id of the container.
 
-    frameworks = list(ml_images_content.keys())
-    print(f"{INFO}\nAvailable frameworks and versions:{RESET}")
-    for framework in frameworks:
-        version_images = ml_images_content[framework]
-        print(f"\n{HINT}{framework}:{RESET} \n{', '.join([version[0] for version in version_images])}")
-    print(" ")
-    exit(0)
+    Raises:
+        DockerAPIError: if the docker daemon can not be reached.
+    """
+    status, container = docker_api_request("GET", f"/containers/{container_id}/json")
+    if status is None:
+        raise DockerAPIError(f"Container {container_id} could not be inspected")
+    with connection:
+        if status == 200 and "aime.mlc" in ((container.get("Config") or {}).get("Labels") or {}):
+            container = reduce_container_inspect(container)
+            connection.execute(
+                "INSERT OR REPLACE INTO containers VALUES (?, ?, ?)",
+                (container["Id"], parse_image_created(container["Created"]), json.dumps(container))
+            )
+        else:
+            connection.execute("DELETE FROM containers WHERE id = ?", (container_id,))
 
 
-def validate_container_name(container_name, command, script=False):
-    """Validate the container name provided by the user
+def rebuild_state_store(connection):
+    """Replace the content of the state store with the current containers of docker.
 
     Args:
-        container_name (str): name of the container provided by the user
-        command (str): mlc command
-        script (boolean): script mode (on: True, off: False) .Default: false.
+        connection (sqlite3.Connection): connection to the state store.
 
     Raises:
-        ValueError: The container name should contain at least one character.
-        ValueError: The container name contains invalid characters.
-        ValueError: The container name already exists.
+        DockerAPIError: if the docker daemon can not be reached.
+    """
+    summaries = docker_api_list_containers({"label": ["aime.mlc"]})
+    if summaries is None:
+        raise DockerAPIError("The containers could not be listed")
+    containers = []
+    for summary in summaries:
+        status, container = docker_api_request("GET", f"/containers/{summary['Id']}/json")
+        if status is None:
+            raise DockerAPIError(f"Container {summary['Id']} could not be inspected")
+        if status == 200:
+            containers.append(reduce_container_inspect(container))
+    with connection:
+        connection.execute("DELETE FROM containers")
+        connection.executemany(
+            "INSERT OR REPLACE INTO containers VALUES (?, ?, ?)",
+            [(container["Id"], parse_image_created(container["Created"]), json.dumps(container)) for container in containers]
+        )
 
-    Returns:
-        str, str: container name and associated container tag
+
+def run_state_store_follower():
+    """Entry point of the follower process keeping the state store current. Only one follower runs per store, later ones exit immediately.
+
+    The event stream is read by a thread, the main thread writes the heartbeat while the store is in sync and exits when the store
+    has not been read for state_store_idle_exit seconds.
     """
+    import fcntl
 
-    _ , available_user_container_tags = existing_user_containers(user_name, command) 
-    
-    pattern = re.compile(r'^[a-zA-Z0-9_\-#]*$')
+    file_name = get_state_store_file()
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(f"{file_name}.lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return
+        os.utime(lock_file.name)
+        in_sync = threading.Event()
+        sync_lock = threading.Lock()
+
+        def mark_stale(connection):
+            with sync_lock, connection:
+                in_sync.clear()
+                connection.execute("DELETE FROM meta WHERE key = 'heartbeat'")
+
+        def write_heartbeat(connection, sync=False):
+            with sync_lock, connection:
+                if sync:
+                    in_sync.set()
+                if in_sync.is_set():
+                    connection.execute("INSERT OR REPLACE INTO meta VALUES ('heartbeat', ?)", (time.time(),))
+
+        def follow_events():
+            connection = open_state_store(file_name)
+            while True:
+                client = get_docker_api_client()
+                try:
+                    if client is None:
+                        raise DockerAPIError("The docker daemon is not reachable")
+                    # Subscribe before the full query, events of containers changed meanwhile are applied afterwards
+                    events = client.open_stream(
+                        "GET", "/events", {"filters": {"type": ["container"], "label": ["aime.mlc"], "event": state_store_events}},
+                        timeout=state_store_idle_exit
+                    )
+                    try:
+                        if events.status != 200:
+                            raise DockerAPIError(f"The event stream failed with status {events.status}")
+                        rebuild_state_store(connection)
+                        write_heartbeat(connection, sync=True)
+                        for line in events:
+                            if line.strip():
+                                event = json.loads(line)
+                                store_container(connection, (event.get("Actor") or {}).get("ID") or event["id"])
+                    finally:
+                        events.close()
+                except (DockerAPIError, OSError, ValueError, KeyError):
+                    pass
+                # The stream ended, events may be missed until the store is rebuilt
+                mark_stale(connection)
+                time.sleep(1)
+
+        threading.Thread(target=follow_events, daemon=True).start()
+        connection = open_state_store(file_name)
+        while time.time() - os.stat(lock_file.name).st_mtime < state_store_idle_exit:
+            time.sleep(state_store_heartbeat)
+            write_heartbeat(connection)
+        mark_stale(connection)
 
-    if container_name == "":        
-        raise ValueError(f"\n{ERROR}The container name should contain at least one character.{RESET}")    
-    elif not pattern.match(container_name):
-        invalid_chars = [char for char in container_name if not re.match(r'[a-zA-Z0-9_\-#]', char)]
-        invalid_chars_str = ''.join(invalid_chars)
-        if script:
-            print(f"\n{INPUT}[{container_name}]{RESET} contains {ERROR}invalid{RESET} characters: {ERROR}{invalid_chars_str}{RESET}\n")
-            exit(1)
-        else:
-            raise ValueError(f"\n{INPUT}[{container_name}]{RESET} contains {ERROR}invalid{RESET} characters: {ERROR}{invalid_chars_str}{RESET}\n")
-    else:
-        # Generate a unique container tag
-        provided_container_tag = f"{container_name}._.{user_id}"        
-        if provided_container_tag in available_user_container_tags:
-            if script:
-                print(f'\n{INPUT}[{container_name}]{RESET} {ERROR}already exists. Provide a new container name.{RESET}\n')
-                exit(1)
-            else:
-                raise ValueError(f'\n{INPUT}[{container_name}]{RESET} {ERROR}already exists. Provide a new container name.{RESET}')        
-        return container_name, provided_container_tag
 
+################################################################################################################################################
+# Container sizes
+#
+# Computing the size of a container makes docker walk its whole writable layer, which takes seconds per container. mlc list
+# therefore shows the sizes stored in a per-host cache together with their age, and refreshes outdated entries in a detached
+# background process with a bounded number of parallel size computations. mlc list --fresh computes the sizes before printing.
 
-def get_docker_env():                 
-    # Set environment variables to pass to the Docker container
-    set_env = f"-e DISPLAY={os.environ.get('DISPLAY')}"
-    
-    # If the NCCL_P2P_LEVEL environment variable is set, include it in the environment settings
-    if 'NCCL_P2P_LEVEL' in os.environ:
-        set_env += f" -e NCCL_P2P_LEVEL={os.environ.get('NCCL_P2P_LEVEL')}"   
+container_size_max_age = 600         # Seconds after which a cached container size is refreshed in the background
+container_size_jobs = 4              # Maximal number of parallel size computations
 
-    return set_env
 
+def format_container_size(size_rw, size_root_fs):
+    """Format the size of a container like 'docker container ps --size' does.
 
-def build_docker_run_command(    
-        architecture, 
-        workspace_dir, 
-        workspace, 
-        container_tag,
-        num_gpus, 
-        selected_docker_image, 
-        validated_container_name,
-        user_name, 
-        user_id, 
-        group_id,
-        dir_to_be_added
-    ):
-    """Constructs a 'docker run' command based on the host GPU architecture and user setup.
+    Args:
+        size_rw (int): size of the writable layer in bytes.
+        size_root_fs (int): size of all layers (virtual size) in bytes.
+
+    Returns:
+        str: the size, for example 12.3MB (virtual 20.1GB).
+    """
+    return f"{format_size(size_rw)} (virtual {format_size(size_root_fs)})"
 
-    This function assembles the appropriate `docker run` command with volume mappings,
-    user configurations, GPU-specific options (for CUDA or ROCm), and an embedded
-    bash script for setting up the container environment.
+
+def format_age(seconds):
+    """Format the age of a cached value.
 
     Args:
-        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
-        workspace_dir (str): Path on the host to be mounted into the container.
-        workspace (str): Path inside the container where the workspace will be mounted.
-        container_tag (str): Tag to assign to the running container.
-        num_gpus (str): Number of GPUs to allocate (used only for CUDA).
-        selected_docker_image (str): Base Docker image to use.
-        validated_container_name (str): Display name used in the bash prompt inside the container.
-        user_name (str): Username to be created inside the container.
-        user_id (int): User ID to assign.
-        group_id (int): Group ID to assign.
+        seconds (float): age in seconds.
 
     Returns:
-        list: A list representing the full Docker command to run in subprocess or shell.
+        str: the age, for example 'just now', '5 min ago' or '2 d ago'.
+    """
+    if seconds < 60:
+        return "just now"
+    for unit, unit_seconds in (("d", 86400), ("h", 3600), ("min", 60)):
+        if seconds >= unit_seconds:
+            return f"{int(seconds // unit_seconds)} {unit} ago"
 
-    Raises:
-        ValueError: If the provided architecture is not supported ('CUDA' or 'ROCM').
+
+def get_container_size_cache_file():
+    """Return the size cache file of the docker daemon in use, the cache directory may be shared by several hosts.
+
+    Returns:
+        str: path of the cache file.
     """
-    
-    # Shared base command
-    base_docker_cmd = [
-        'docker', 'run',
-        '-v', f'{workspace_dir}:{workspace}',
-        '-w', workspace,
-        '--name', container_tag,
-        '--tty',
-        '--privileged',
-        '--network', 'host',
-        '--device', '/dev/snd',
-        '--ipc', 'host',
-        '--ulimit', 'memlock=-1',
-        '--ulimit', 'stack=67108864',
-        '-v', '/tmp/.X11-unix:/tmp/.X11-unix',
-    ]
+    return os.path.join(get_mlc_cache_dir(), f"container-sizes-{get_docker_host_id()}.json")
 
-    cuda_extras = [
-        '--gpus', num_gpus,
-        '--device', '/dev/video0',
-    ]
 
-    rocm_extras = [
-        '-u', 'root',
-        '--device', '/dev/kfd',
-        '--device', '/dev/dri',
-        '--cap-add', 'SYS_PTRACE',
-        '--security-opt', 'seccomp=unconfined',
-        '--shm-size', '8G'
-    ]
+def read_container_size_cache():
+    """Read the cached container sizes.
 
-    # Shared bash command part
-    bash_lines = [
-        f'echo "export PATH=\\"{dir_to_be_added}:\\$PATH\\"" >> /etc/skel/.bashrc;'
-        f"echo \"export PS1='[{validated_container_name}] \\$(whoami)@\\$(hostname):\\${{PWD#*}}$ '\" >> /etc/skel/.bashrc;",
-        "apt-get update -y > /dev/null;",
-        "apt-get install sudo git -q -y > /dev/null;",
-        f"addgroup --gid {group_id} {user_name} > /dev/null;",
-        f"adduser --uid {user_id} --gid {group_id} {user_name} --disabled-password --gecos aime > /dev/null;",
-        f"passwd -d {user_name};",
-        f"echo \"{user_name} ALL=(ALL) NOPASSWD: ALL\" > /etc/sudoers.d/{user_name}_no_password;",
-    ]
+    Returns:
+        dict: {container id: {"size": str, "time": float}}, empty if there is no valid cache.
+    """
+    try:
+        with open(get_container_size_cache_file()) as cache_file:
+            sizes = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return sizes if isinstance(sizes, dict) else {}
 
-    # Add ROCm-specific line if needed
-    if 'ROCM' in architecture:
-        bash_lines.append(f"echo \"export ROCM_PATH=/opt/rocm\" >> ~/.bashrc;")
 
-    bash_lines.extend([
-        f"chmod 440 /etc/sudoers.d/${user_name}_no_password;",
-        "exit"
-    ])      
+def update_container_size_cache(sizes, existing_container_ids=None):
+    """Merge computed sizes into the cache file. The file is replaced atomically, concurrent writers are serialized by a lock.
 
-    bash_command = ' '.join(bash_lines)
+    Args:
+        sizes (dict): {container id: {"size": str, "time": float}}.
+        existing_container_ids (iterable, optional): ids of all existing containers, entries of other containers are dropped.
+            Defaults to None (keep all entries).
+    """
+    import fcntl
+
+    cache_file_name = get_container_size_cache_file()
+    os.makedirs(os.path.dirname(cache_file_name), exist_ok=True)
+    with open(f"{cache_file_name}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        cached_sizes = read_container_size_cache()
+        cached_sizes.update(sizes)
+        if existing_container_ids is not None:
+            existing_container_ids = set(existing_container_ids)
+            cached_sizes = {container_id: size for container_id, size in cached_sizes.items() if container_id in existing_container_ids}
+        temporary_file_name = f"{cache_file_name}.{os.getpid()}.tmp"
+        with open(temporary_file_name, "w") as cache_file:
+            json.dump(cached_sizes, cache_file)
+        os.replace(temporary_file_name, cache_file_name)
+
+
+def compute_container_size(container_id):
+    """Let docker compute the size of a container.
 
-    # Assemble full command
-    if 'CUDA' in architecture:
-        docker_cmd = base_docker_cmd + cuda_extras + [
-            f'{selected_docker_image}', 'bash', '-c', bash_command
-        ]
-    elif 'ROCM' in architecture:
-        docker_cmd = base_docker_cmd + rocm_extras + [
-            selected_docker_image, 'bash', '-c', bash_command
-        ]
-    else:
-        raise ValueError(f"Unsupported architecture: {architecture}")
+    Args:
+        container_id (str): id of the container.
 
-    return docker_cmd
+    Returns:
+        str: the formatted size, or None if the container does not exist anymore or docker failed.
+    """
+    status, container = docker_api_request("GET", f"/containers/{container_id}/json", {"size": True})
+    if status == 200:
+        return format_container_size(container.get("SizeRw", 0), container.get("SizeRootFs", 0))
+    if status is not None:
+        return None
+
+    docker_command_inspect = ["docker", "container", "inspect", "--size", "--format", "{{json .SizeRw}} {{json .SizeRootFs}}", container_id]
+    process = subprocess.run(docker_command_inspect, capture_output=True, text=True)
+    if process.returncode != 0:
+        return None
+    size_rw, size_root_fs = (json.loads(value) for value in process.stdout.split())
+    return format_container_size(size_rw, size_root_fs)
 
-def build_docker_create_command(
-        user_name, 
-        user_id, 
-        group_id,   
-        architecture,
-        selected_docker_image,
-        selected_framework,
-        selected_version,
-        mlc_container_version,
-        validated_container_name,
-        container_label,
-        container_tag,
-        workspace,
-        workspace_dir, 
-        data_dir,
-        models_dir,
-        dir_to_be_added,
-        num_gpus,
-        volumes                
-    ):
-    """Constructs a 'docker create' command customized for a machine learning container environment.
 
-    This function prepares a Docker container creation command with appropriate flags, volume
-    mounts, GPU-specific configurations (CUDA or ROCm), and user-specific labels. It embeds a bash
-    startup sequence that configures the shell prompt, environment paths, and device permissions.
+def refresh_container_sizes(container_ids, jobs=container_size_jobs, existing_container_ids=None):
+    """Compute the sizes of containers in parallel and store them in the cache.
 
     Args:
-        user_name (str): Name of the user to be created inside the container.
-        user_id (int): User ID to assign.
-        group_id (int): Group ID to assign.
-        architecture (str): Target GPU architecture ('CUDA' or 'ROCM').
-        selected_docker_image (str): Base Docker image name.
-        selected_framework (str): Deep learning framework (e.g., 'tensorflow', 'pytorch').
-        selected_version (str): Version of the framework.
-        mlc_container_version (str): Version identifier for the container environment.
-        validated_container_name (str): Checked name for bash prompt.
-        container_label (str): Label to add to the container.
-        container_tag (str): Tag to assign to the container.
-        workspace (str): Path inside the container where the workspace will be mounted.
-        workspace_dir (str): Host path for the workspace.
-        data_dir (str): Host path for the dataset directory.
-        models_dir (str): Host path for the models directory.
-        dir_to_be_added (str): Directory path to add to the container's PATH.
-        num_gpus (str): Number of GPUs to assign (used with CUDA).
-        volumes (list): Additional volume mount strings to include.
+        container_ids (list): ids of the containers to be refreshed.
+        jobs (int, optional): maximal number of parallel size computations. Defaults to container_size_jobs.
+        existing_container_ids (iterable, optional): ids of all existing containers, see update_container_size_cache.
 
     Returns:
-        list: A list representing the full 'docker create' command.
+        dict: {container id: {"size": str, "time": float}} of the containers whose size could be computed.
+    """
+    import queue
 
-    Raises:
-        ValueError: If the provided architecture is not supported.
+    pending_container_ids = queue.Queue()
+    for container_id in container_ids:
+        pending_container_ids.put(container_id)
+    sizes = {}
+
+    def worker():
+        while True:
+            try:
+                container_id = pending_container_ids.get_nowait()
+            except queue.Empty:
+                return
+            size = compute_container_size(container_id)
+            if size is not None:
+                sizes[container_id] = {"size": size, "time": time.time()}
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, len(container_ids))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    update_container_size_cache(sizes, existing_container_ids)
+    return sizes
+
+
+def run_container_size_refresher(container_ids, existing_container_ids):
+    """Entry point of the background refresher. Only one refresher runs at a time, later ones exit immediately.
+
+    Args:
+        container_ids (list): ids of the containers to be refreshed.
+        existing_container_ids (list): ids of all existing containers.
+    """
+    import fcntl
+
+    cache_file_name = get_container_size_cache_file()
+    os.makedirs(os.path.dirname(cache_file_name), exist_ok=True)
+    with open(f"{cache_file_name}.refresh.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return
+        refresh_container_sizes(container_ids, existing_container_ids=existing_container_ids)
+
+
+def start_container_size_refresher(container_ids, existing_container_ids):
+    """Refresh container sizes in a detached process, which keeps running after mlc exits.
+
+    Args:
+        container_ids (list): ids of the containers to be refreshed.
+        existing_container_ids (list): ids of all existing containers.
+    """
+    refresher = "import sys, json; sys.path[0] = sys.argv[1]; import mlc; mlc.run_container_size_refresher(*json.loads(sys.argv[2]))"
+    try:
+        subprocess.Popen(
+            [sys.executable, "-c", refresher, os.path.dirname(os.path.abspath(__file__)), json.dumps([container_ids, existing_container_ids])],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+    except OSError:
+        pass
+
+
+def add_cached_container_sizes(containers, fresh=False):
+    """Add the sizes to containers. The cached sizes are used without waiting, missing and outdated ones are refreshed in the
+    background for the next call.
+
+    Args:
+        containers (iterable): ContainerInfo of the containers.
+        fresh (bool, optional): compute all sizes before returning. Defaults to False.
+
+    Returns:
+        list: the ContainerInfo of the containers with size and size_time (unix time of the computation) taken from the cache,
+            both are None if the size is not cached yet.
+    """
+    containers = list(containers)
+    container_ids = [container.id for container in containers]
+    existing_container_ids = [container.id for container in get_container_inventory()]
+    if fresh:
+        cached_sizes = refresh_container_sizes(container_ids, existing_container_ids=existing_container_ids)
+    else:
+        cached_sizes = read_container_size_cache()
+        now = time.time()
+        outdated_container_ids = [
+            container_id for container_id in container_ids
+            if container_id not in cached_sizes or now - cached_sizes[container_id].get("time", 0) > container_size_max_age
+        ]
+        if outdated_container_ids:
+            start_container_size_refresher(outdated_container_ids, existing_container_ids)
+
+    return [
+        container._replace(size=cached_sizes.get(container.id, {}).get("size"), size_time=cached_sizes.get(container.id, {}).get("time"))
+        for container in containers
+    ]
+
+
+################################################################################################################################################
+# Image catalog
+#
+# The ml_images.repo file is parsed once into an index by gpu architecture, framework and version. The compiled index is cached
+# next to the repo file (or in the mlc cache directory if the repo directory is not writable) and rebuilt when the repo file changes.
+
+ml_images_repo_headers = ['framework', 'version', 'architecture', 'docker image']
+ml_images_repo_separator = ";"
+
+
+def version_sort_key(version):
+    """Sort key of framework versions like 2.7.1, 2.7.1-aime, 1.14.0a-nvidia or 2.11.0-nvidia.
+
+    The numeric components are compared as numbers, a trailing letter marks a pre-release (1.14.0a < 1.14.0) and
+    build variants (-aime, -nvidia) are ordered after the plain version.
+
+    Args:
+        version (str): framework version.
+
+    Returns:
+        tuple: sort key.
+    """
+    match = re.match(r"^(\d+(?:\.\d+)*)([a-zA-Z]*)(?:-(.*))?$", version)
+    if not match:
+        return ((), 0, "", version)
+    numbers = tuple(int(number) for number in match.group(1).split("."))
+    pre_release = match.group(2)
+    return (numbers, 0 if pre_release else 1, pre_release, match.group(3) or "")
+
+
+class ImageCatalog:
+    """Index of the available docker images by gpu architecture, framework and version.
+
+    Args:
+        index (dict): {architecture: {framework: {version: docker image}}}, frameworks sorted by name and versions newest first.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def parse(cls, filename):
+        """Parse a ml_images.repo file.
+
+        Args:
+            filename (str): name of the file where the framework, version, gpu architecture and docker image name are provided.
+
+        Returns:
+            ImageCatalog: the catalog.
+        """
+        import csv
+
+        entries = defaultdict(lambda: defaultdict(dict))
+        with open(filename, mode='r') as file:
+            reader = csv.DictReader(file, fieldnames=ml_images_repo_headers)
+            for row in reader:
+                stripped_row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items()}
+                framework = stripped_row['framework']
+                version = stripped_row['version']
+                docker_image = stripped_row['docker image']
+                if not framework or not version or not docker_image:
+                    continue
+                for architecture in stripped_row['architecture'].strip("[]").split(ml_images_repo_separator):
+                    # The first entry of a version wins
+                    entries[architecture.strip()][framework].setdefault(version, docker_image)
+
+        index = {
+            architecture: {
+                framework: dict(sorted(versions.items(), key=lambda item: version_sort_key(item[0]), reverse=True))
+                for framework, versions in sorted(frameworks.items())
+            }
+            for architecture, frameworks in sorted(entries.items())
+        }
+        return cls(index)
+
+    def architectures(self):
+        """Return the sorted list of the available gpu architectures."""
+        return list(self.index)
+
+    def frameworks(self, architecture):
+        """Return the frameworks available for a gpu architecture.
+
+        Args:
+            architecture (str): gpu architecture, for example CUDA_ADA.
+
+        Returns:
+            dict: {framework: {version: docker image}}, sorted by framework name and newest version first.
+        """
+        return self.index.get(architecture, {})
+
+    def image(self, architecture, framework, version):
+        """Return the docker image of a framework version for a gpu architecture, None if not available."""
+        return self.index.get(architecture, {}).get(framework, {}).get(version)
+
+
+def image_catalog_cache_files(filename):
+    """Return the candidate locations of the compiled catalog: next to the repo file, then in the mlc cache directory."""
+    import hashlib
+
+    repo_path = os.path.abspath(filename)
+    cache_name = f"{os.path.basename(repo_path)}.cache"
+    path_hash = hashlib.sha1(repo_path.encode()).hexdigest()[:12]
+    return [
+        os.path.join(os.path.dirname(repo_path), cache_name),
+        os.path.join(get_mlc_cache_dir(), f"{path_hash}-{cache_name}"),
+    ]
+
+
+image_catalogs = {}
+
+
+def load_image_catalog(filename):
+    """Provide the image catalog of a repo file, using the compiled cache if the repo file did not change.
+
+    Args:
+        filename (str): name of the ml_images.repo file.
+
+    Returns:
+        ImageCatalog: the catalog.
     """
+    repo_path = os.path.abspath(filename)
+    if repo_path in image_catalogs:
+        return image_catalogs[repo_path]
+
+    repo_status = os.stat(repo_path)
+    cache_key = {"source": repo_path, "mtime_ns": repo_status.st_mtime_ns, "size": repo_status.st_size}
+    cache_files = image_catalog_cache_files(repo_path)
+
+    catalog = None
+    for cache_file in cache_files:
+        try:
+            with open(cache_file) as file:
+                cached = json.load(file)
+            if cached.get("key") == cache_key:
+                catalog = ImageCatalog(cached["index"])
+                break
+        except (OSError, ValueError, AttributeError, KeyError):
+            continue
+
+    if catalog is None:
+        catalog = ImageCatalog.parse(repo_path)
+        for cache_file in cache_files:
+            try:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(temporary_file, "w") as file:
+                    json.dump({"key": cache_key, "index": catalog.index}, file)
+                os.replace(temporary_file, cache_file)
+                break
+            except OSError:
+                continue
+
+    image_catalogs[repo_path] = catalog
+    return catalog
+
+
+################################################################################################################################################
+
+
+def are_you_sure(selected_container_name, command, script = False):
+    """Ask the user for a confirmation before an action is started.
+
+    Args:
+        selected_container_name (str): name of the container.
+        command (str): type of the command (create, open, remove,...). The command is used only for printing a message.
+        script (bool, optional): script mode is provided. Defaults to False.
+    """   
     
-    # Shared base command
-    base_docker_cmd = [
-        'docker', 'create',
-        '-it',
-        '-w', workspace,
-        '--name', container_tag,
-        '--label', f'{container_label}={user_name}',
-        '--label', f'{container_label}.NAME={validated_container_name}',
-        '--label', f'{container_label}.USER={user_name}',
-        '--label', f'{container_label}.ARCH={architecture}',
-        '--label', f'{container_label}.MLC_VERSION={mlc_container_version}',
-        '--label', f'{container_label}.WORK_MOUNT={workspace_dir}',
-        '--label', f'{container_label}.DATA_MOUNT={data_dir}',
-        '--label', f'{container_label}.MODELS_MOUNT={models_dir}',
-        '--label', f'{container_label}.FRAMEWORK={selected_framework}-{selected_version}',
-        '--label', f'{container_label}.GPUS={num_gpus}',
-        '--user', f'{user_id}:{group_id}',
-        '--tty',
-        '--privileged',
-        '--interactive',
-        '--network', 'host',
-        '--device', '/dev/snd',
-        '--ipc', 'host',
-        '--ulimit', 'memlock=-1',
-        '--ulimit', 'stack=67108864',
-        '-v', '/tmp/.X11-unix:/tmp/.X11-unix',
-        '--group-add', 'video'
-    ]   
+    if not script:        
+        if command == "create":            
+            print(f"\n{WARNING}Verify if the provided setup is correct. The creation of a container may take a little time.{RESET}")
+            printed_verb = command + "d"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(Y/n)?: {RESET}"
+            yes_answers = ["y", "yes", ""]
+            no_answers = ["n", "no"]
+        elif command == "remove":            
+            print(f"\n{WARNING}Caution: After your selection, there is no option to recover the container.{RESET}")            
+            printed_verb = command + "d"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
+            yes_answers = ["y", "yes"]
+            no_answers = ["n", "no", ""]          
+        elif command == "prefetch":            
+            print(f"\n{WARNING}Pulling images may take a long time and needs a lot of disk space.{RESET}")
+            printed_verb = "pulled"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(Y/n)?: {RESET}"
+            yes_answers = ["y", "yes", ""]
+            no_answers = ["n", "no"]
+        elif command == "gc":
+            print(f"\n{WARNING}Caution: Removed images have to be pulled or set up again when they are needed.{RESET}")
+            printed_verb = "removed"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
+            yes_answers = ["y", "yes"]
+            no_answers = ["n", "no", ""]
+        elif command == "prune-layers":            
+            print(f"\n{WARNING}Caution: Removed layers have to be set up again by the next mlc create.{RESET}")            
+            printed_verb = "removed"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
+            yes_answers = ["y", "yes"]
+            no_answers = ["n", "no", ""]          
+        elif command == "stop":            
+            print(f"\n{WARNING}Caution: All running processes of the selected container will be terminated.{RESET}")
+            printed_verb = command + "ped"
+            prompt = f"\n{INPUT}[{selected_container_name}]{RESET} {REQUEST}will be {printed_verb}. Are you sure(y/N)?: {RESET}"
+            yes_answers = ["y", "yes"]
+            no_answers = ["n", "no", ""]           
+        else:
+            exit(1)            
+        
+        while True:
+            are_you_sure_answer = input(prompt).strip().lower()            
+            
+            if are_you_sure_answer in yes_answers: 
+                break            
+            elif are_you_sure_answer in no_answers:                
+                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}will not be {printed_verb}.\n{RESET}")                
+                exit(0)                
+            else:                
+                print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}") 
+                
+
+def check_container_exists(name):
+    """Check if a container with the provided tag already exists.
+
+    Args:
+        name (str): name of the container tag.
+
+    Returns:
+        str: name of the container .
+    """
     
-    # Insert the volumes list at the correct position, after '-it'
-    base_docker_cmd[3:3] = volumes    
+    containers = docker_api_list_containers({"name": [name], "label": ["aime.mlc"]})
+    if containers is not None:
+        return "\n".join(docker_api_container_name(container) for container in containers)
+
+    result = subprocess.run(['docker', 'container', 'ps', '-a', '--filter', f'name={name}', '--filter', 'label=aime.mlc', '--format', '{{.Names}}'], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def check_container_running(container_tag):
+    """Check if the container with the provided container tag is running.
+
+    Args:
+        container_tag (str): provided container tag.
+
+    Returns:
+        str: name of the container tag associated to the provided container tag.
+    """   
+    
+    return container_tag if get_container_inventory().is_running(container_tag) else ""
        
-    cuda_extras = [
-        '--gpus', num_gpus,
-        '--device', '/dev/video0',
-        '--group-add', 'sudo'
-    ]
 
-    rocm_extras = [
-        '--device', '/dev/kfd',
-        '--device', '/dev/dri',
-        '--cap-add', 'SYS_PTRACE',
-        '--security-opt', 'seccomp=unconfined',
-        '--shm-size', '8G',
-        '--group-add', 'sudo'
-    ]
-    
-    # Shared bash command part
-    bash_lines = [
-    ]
-    
-    # Add ROCm-specific line if needed
-    if 'ROCM' in architecture:
-        bash_lines.append("sudo chown root:video /dev/kfd; sudo chown -R root:video /dev/dri;")
-    
-    bash_lines.append("bash")
-    
-    bash_command = ' '.join(bash_lines)
+def display_gpu_architectures(architectures):
+    """Display the available gpu architectures located in the file ml_images.repo.
+
+    Args:
+        architectures (list): available gpu architectures.
+    """
+    
+    print(f"\n{INFO}Available gpu architectures:{RESET}")
+
+    for i, architecture in enumerate(architectures, start=1):
+        print(f"{i}) {architecture}")
+    
+    
+def display_frameworks(frameworks_dict):
+    """Display the available AI frameworks.
+
+    Args:
+        frameworks_dict (dict): dictionary whose keys are the available frameworks.
+
+    Returns:
+        list: return a list with the available frameworks.
+    """ 
+     
+    print(f"\n{REQUEST}Select a framework:{RESET}")
+    framework_list = list(frameworks_dict.keys())
+
+    for i, framework in enumerate(framework_list, start=1):
+        print(f"{i}) {framework}")
+    return framework_list
+
+
+def display_versions(framework, versions):
+    """Display the corresponding versions to a provided framework.
+
+    Args:
+        framework (str): predefined framework.
+        versions (dict): dict mapping the versions to the docker images.
+    """    
+    
+    print(f"\n{INFO}Available versions for {framework}:{RESET}")
+    for i, version in enumerate(versions, start=1):
+        print(f"{i}) {version}")
+
+
+def extract_from_ml_images(filename, filter_architecture = None):
+    """Extract the information from the file corresponding to the supported frameworks, versions, cuda architectures and docker images.
+
+    Args:
+        filename (str): name of the file where the framework, version, cuda archicture and docker image name are provided.
+        filter_architecture (str, optional): the cuda architecture, for example, "CUDA_ADA". Defaults to None.
+
+    Returns:
+        dict: dictionary whose keys are the available frameworks (sorted) and whose values are dicts {version: docker image}, newest version first.
+    """
+    if filter_architecture is None:
+        _, filter_architecture, _ = get_host_gpu_architecture()
+        
+    return load_image_catalog(filename).frameworks(filter_architecture)
+
+
+def existing_user_containers(user_name, mlc_command):
+    """Provide 2 lists of existing containers and corresponding container tags created previously by the current user.
+
+    Args:
+        user_name (str): current user name.
+        mlc_command (str): current mlc command.
+    Returns:
+        list, list: returns 2 lists with existing containers and corresponding container tags.
+    """    
+ 
+    # List all containers with the 'aime.mlc' label owned by the current user
+    user_containers = get_container_inventory().user_containers(user_name)
+    container_tags = [container.tag for container in user_containers]
+    
+    # check that at least 1 container has been created previously
+    if not container_tags and mlc_command not in ('create', 'import'):
+        print(f"\n{ERROR}Create at least one container. If not, mlc {mlc_command} does not work.{RESET}\n")
+        exit(0)
+
+    # Base names of the full container names
+    container_names = [container.name for container in user_containers]
+
+    return container_names, container_tags
+
+
+def filter_by_state(state, running_containers, *lists):
+    """Filters multiple lists based on the provided state (True/False).
+
+    Args:
+        state (bool): the state to filter by (True for running, False for not running).
+        running_containers (list): A list of boolean values indicating running status.
+        *lists: variable number of lists to filter based on the running_containers.
+    Returns:
+        list: a list of filtered lists.
+    """
+    
+    return [
+        [item for item, running in zip(lst, running_containers) if running == state]
+        for lst in lists
+    ]
+
+
+def filter_running_containers(running_containers, *lists):
+    """Filters multiple lists (e.g., running_containers and running_container_tags) 
+    based on the running_containers_state list, using filter_by_state.
+
+    Args:
+        running_containers (list): a list of boolean values indicating running status.
+        *lists: variable number of lists to filter based on running_containers.
+    Returns:
+        tuple: a flattened tuple of no_running and running filtered lists and lengths of the lists.
+    """
+    
+    no_running_results = filter_by_state(False, running_containers, *lists) 
+    running_results = filter_by_state(True, running_containers, *lists) 
+    
+    # Calculate lengths
+    no_running_length = len(no_running_results[0])  
+    running_length = len(running_results[0])  
+
+    # Return a flattened tuple with no_running followed by running results
+    return (*no_running_results, no_running_length, *running_results, running_length)
+
+
+def format_container_stats(container_stats_dict):
+    """Format the container info provided by the stats.
+
+    Args:
+        container_stats_dict (dict): dictionay containing the whole stats of a container.
+
+    Returns:
+        list: stats line representing the columns of the output.
+    """  
+
+    #ToDo: check if labels_string is needed  
+    # Extract the 'Labels' field
+    #labels_string = container_stats_dict.get('Labels', {})
+    # Retrieve the value for 'aime.mlc.USER'
+    container_name = container_stats_dict["Name"].split('._.')[0]
+    cpu_usage_perc = container_stats_dict["CPUPerc"]
+    memory_usage = container_stats_dict["MemUsage"]
+    memory_usage_perc = container_stats_dict["MemPerc"]
+    processes_active = container_stats_dict["PIDs"]
+    stats_line_to_be_printed = [f"[{container_name}]", cpu_usage_perc, memory_usage, memory_usage_perc, processes_active]
+
+    return stats_line_to_be_printed
+
+
+def get_gpu_architectures(filename):
+    """Get current gpu architectures from repo file.
+
+    Args:
+        filename (str): name of the file where the framework, version, gpu architecture and docker image name are provided.
+
+    Returns:
+        list: provides a list of the available gpu architectures.
+    """
+    
+    available_architectures = load_image_catalog(filename).architectures()
+    if not available_architectures:
+        print(f"{ERROR}No gpu architectures found.{RESET}")
+        exit(1)
+    
+    return available_architectures   
+
+
+def get_user_selection(prompt, max_value):
+    """The user provides a position in the list corresponding to a desire.
+
+    Args:
+        prompt (str): prompt with the request.
+        max_value (int): maximal value of the list corresponding to the available options.
+
+    Returns:
+        int: positive integer of the selected position.
+    """   
+        
+    while True:
+        try:
+            selection = int(input(prompt))
+            if 1 <= selection <= max_value:
+                return selection
+            else:
+                print(f"{ERROR}Please enter a number between 1 and {max_value}.{RESET}")
+        except ValueError:
+            print(f"{ERROR}Invalid input. Please enter a valid number.{RESET}")
+        
+
+def get_container_image(container_tag):
+    """Get the image of the container corresponding to a provided container tag.  
+
+    Args:
+        container_tag (str): container tag.
+    Returns:
+        str: image corresponding to a provided container tag.
+    """    
+    
+    container = get_container_inventory().get(container_tag)
+    return container.image if container else ""
+
+
+def get_container_name(container_name, user_name, command, script=False):
+    """Get and check whether a container name is provided, and in this case, check that the container name contains valid characters. 
+
+    Args:
+        container_name (str): name of the container.
+        user_name (str): name of the user.
+        command (str): mlc command used.
+        script (bool, optional): script mode on=True or off=False. Defaults to False.
+
+    Returns:
+        str: returns a validated container name
+    """    
+
+    # ToDo: customize i/o usign user_name. 
+
+    if script and not container_name:
+        print(f"\n{ERROR}Container name is missing.{RESET}\n")
+        exit(1)
+    elif not script and container_name:
+        while True:
+            try:                 
+                return validate_container_name(container_name, command, script)            
+            except ValueError as e:
+                print(e)
+                container_name = input(f"\n{REQUEST}Enter a container name (valid characters: a-z, A-Z, 0-9, _,-,#): {RESET}")
+    elif not script and not container_name:   
+        while True:                           
+            container_name = input(f"\n{REQUEST}Enter a container name (valid characters: a-z, A-Z, 0-9, _,-,#): {RESET}")
+            try:
+                return validate_container_name(container_name, command, script)
+            except ValueError as e:
+                print(e)
+    else:
+        return validate_container_name(container_name, command, script) 
+    
+
+def get_docker_image(version, images):
+    """Get the docker image corresponding to the provided version.
+
+    Args:
+        version (str): selected version. Example: 2.4.0.
+        images (dict): dict mapping the versions to the docker image location. Example: {'2.4.0': 'aimehub/pytorch-2.4.0-cuda12.1',...}.
+
+    Raises:
+        ValueError: if the user provides an unavailable version.
+
+    Returns:
+        str: docker image of the provided version.
+    """
+
+    if version in images:
+        return images[version]
+        
+    # Raise an exception if no matching version is found              
+    raise ValueError("No version available") 
+
+
+def get_host_gpu_architecture(refresh=False):
+    """Detects the GPU architecture (CUDA or ROCm) installed on the host system.
+
+    The installed packages are read from the dpkg status file (with `apt list --installed` as fallback) to
+    determine whether a CUDA or ROCm driver is present. It extracts the version information and maps it to a
+    specific GPU architecture string. The result is cached on disk and reused as long as the dpkg status file
+    and the driver version files are unchanged.
+
+    Args:
+        refresh (bool, optional): ignore the cached result and detect the architecture again. Defaults to False.
+
+    Returns:
+        tuple: A tuple containing:
+            - The detected driver type ('CUDA' or 'ROCM')
+            - The corresponding architecture string (e.g., 'CUDA_AMPERE', 'ROCM6')
+            - The version number (float for CUDA, string for ROCm)
+
+    """    
+    
+    cache_key = host_gpu_architecture_cache_key()
+    if not refresh:
+        cached_result = read_host_gpu_architecture_cache(cache_key)
+        if cached_result:
+            return cached_result
+
+    try:
+        installed_packages = read_installed_packages()
+        result = detect_gpu_architecture(installed_packages)
+    except Exception:
+        print(f"\n{ERROR}Failed to detect host GPU architecture.{RESET}\n")
+        exit(1)  
+
+    write_host_gpu_architecture_cache(cache_key, result)
+    return result
+
+
+def detect_gpu_architecture(installed_packages):
+    """Map the installed CUDA or ROCm packages to a GPU architecture.
+
+    Args:
+        installed_packages (list): lines in the format of `apt list --installed`, for example 'cuda-12-3/now 12.3.1-1 amd64 [installed]'.
+
+    Returns:
+        tuple: driver type ('CUDA' or 'ROCM'), architecture string and version number, see get_host_gpu_architecture.
+    """
+
+    # Group lines containing CUDA or ROCm into buckets. Every new key starts with an empty list
+    lines_by_type = defaultdict(list)
+
+    for line in installed_packages:
+        if "cuda-" in line:
+            lines_by_type["cuda"].append(line)
+        elif "rocm" in line:
+            lines_by_type["rocm"].append(line)
+    
+    if lines_by_type["cuda"]:
+        cuda_lines = "\n".join(lines_by_type["cuda"])
+        match = re.search(r'cuda-(\d+\-\d+(\-\d+)?)', cuda_lines)
+        if not match:
+            match = re.search(r'cuda-toolkit-(\d+\-\d+(\-\d+)?)', cuda_lines)
+        
+        if match:
+            version_str = match.group(1)  # e.g. '12-3-1'
+            parts = version_str.split("-")
+            host_cuda_version = float(".".join(parts[:2]))  # e.g. 12.3
+            
+            if host_cuda_version <= 11.8:
+                return "CUDA", "CUDA_AMPERE", host_cuda_version
+            elif 12.8 <= host_cuda_version:
+                return "CUDA", "CUDA_BLACKWELL", host_cuda_version
+            elif 12.0 <= host_cuda_version:
+                return "CUDA", "CUDA_ADA", host_cuda_version
+            else:
+                print(f"\n{ERROR}Unknown CUDA architecture. {RESET}\n")
+                exit(1)
+        else:
+            print(f"\n{ERROR}CUDA driver version not found. {RESET}\n")
+            exit(1)               
+                
+    elif lines_by_type["rocm"]:
+        rocm_lines = "\n".join(lines_by_type["rocm"])
+        match = re.search(r'rocm-dev/[^\s]+\s+(\d+\.\d+\.\d+)', rocm_lines)
+        
+        if match:
+            version_str = match.group(1)  # e.g. '6.3.3'
+            host_rocm_version = int(version_str.split(".")[0])
+            return "ROCM", f"ROCM{host_rocm_version}", version_str 
+        else:
+            print(f"\n{ERROR}ROCm driver version not found. {RESET}\n")
+            exit(1)  
+    else:
+        print(f"\n{ERROR}Neither CUDA nor ROCm were found among the installed APT packages. {RESET}\n")
+        exit(1)
+
+
+def read_installed_packages(status_file=None):
+    """List the installed packages in the format of `apt list --installed`.
+
+    The dpkg status file is parsed directly, `apt list --installed` is only run if the status file can not be read.
+
+    Args:
+        status_file (str, optional): path of the dpkg status file. Defaults to dpkg_status_file.
+
+    Returns:
+        list: lines like 'cuda-12-3/now 12.3.1-1 amd64 [installed]'.
+    """
+    status_file = status_file or dpkg_status_file
+    try:
+        with open(status_file, encoding="utf-8", errors="replace") as file:
+            content = file.read()
+    except OSError:
+        # Run the apt command to get installed packages
+        cuda_version_command = [
+            "apt", 
+            "list", 
+            "--installed"
+        ]
+        apt_result = subprocess.run(cuda_version_command, capture_output=True, text=True)
+
+        if apt_result.returncode != 0:
+            print(f"\n{ERROR}Host GPU architecture detection: Failed to execute 'apt list --installed'.{RESET}\n")
+            exit(1)
+        return apt_result.stdout.split("\n")
+
+    installed_packages = []
+    for stanza in content.split("\n\n"):
+        fields = {}
+        for line in stanza.splitlines():
+            if line and not line[0].isspace() and ":" in line:
+                key, _, value = line.partition(":")
+                fields[key] = value.strip()
+        if fields.get("Package") and fields.get("Status", "").endswith(" installed"):
+            installed_packages.append(f"{fields['Package']}/now {fields.get('Version', '')} {fields.get('Architecture', '')} [installed]")
+    # Same order as apt list
+    return sorted(installed_packages)
+
+
+def host_gpu_architecture_cache_key():
+    """Build the key of the cached host gpu architecture.
+
+    The dpkg status file is identified by inode, modification time and size. The driver version files live partly
+    in /proc, whose timestamps are not stable, therefore their content is used.
+
+    Returns:
+        dict: key describing the current state of the installed packages and drivers.
+    """
+    key = {}
+    try:
+        status = os.stat(dpkg_status_file)
+        key[dpkg_status_file] = [status.st_ino, status.st_mtime_ns, status.st_size]
+    except OSError:
+        key[dpkg_status_file] = None
+    for version_file in gpu_driver_version_files:
+        try:
+            with open(version_file) as file:
+                key[version_file] = file.read().strip()
+        except OSError:
+            key[version_file] = None
+    return key
+
+
+def read_host_gpu_architecture_cache(cache_key):
+    """Read the cached host gpu architecture.
+
+    Args:
+        cache_key (dict): current cache key, see host_gpu_architecture_cache_key.
+
+    Returns:
+        tuple: the cached result of get_host_gpu_architecture or None if there is no valid cache entry.
+    """
+    try:
+        with open(host_gpu_architecture_cache_file()) as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != cache_key or len(cached.get("result") or []) != 3:
+        return None
+    return tuple(cached["result"])
+
+
+def write_host_gpu_architecture_cache(cache_key, result):
+    """Save the detected host gpu architecture. Failures are ignored, the cache is only an optimization.
+
+    Args:
+        cache_key (dict): current cache key, see host_gpu_architecture_cache_key.
+        result (tuple): result of the detection.
+    """
+    cache_file = host_gpu_architecture_cache_file()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as file:
+            json.dump({"key": cache_key, "result": list(result)}, file)
+        os.replace(temporary_file, cache_file)
+    except OSError:
+        pass
+
+
+def host_gpu_architecture_cache_file():
+    """Return the path of the cached host gpu architecture."""
+    return os.path.join(get_mlc_cache_dir(), "host_gpu_architecture.json")
+
+
+def get_mlc_cache_dir():
+    """Return the cache directory of mlc ($XDG_CACHE_HOME/aime-mlc, default: ~/.cache/aime-mlc)."""
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "aime-mlc")
+
+
+def is_container_active(container_name):
+    """Check if the container is active by inspecting its processes.
+
+    Args:
+        container_name (str): name of the container.
+
+    Returns:
+        boolean: True, if the container is active (number of processes is higher as 2 with a successfull exit code of the docker command).
+    """    
+
+    status, top = docker_api_request("GET", f"/containers/{container_name}/top", {"ps_args": "-o pid"})
+    if status is not None:
+        # Count the header line like the output of docker top
+        exit_code = 0 if status == 200 else 1
+        process_count = len(top.get("Processes") or []) + 1 if isinstance(top, dict) else 0
+    else:
+        docker_command = f'docker top {container_name} -o pid'
+        output, _, exit_code = run_docker_command(docker_command)
+        process_count = len(output.splitlines())
+    if exit_code == 0 and 2 < process_count:
+        return "True"
+    else:
+        return "False"
+
+
+def print_existing_container_list(container_list):
+    """Print an ordered list with the existing containers.
+
+    Args:
+        container_list (list): a list containing the available containers.
+    """    
+    
+    for index, container in enumerate(container_list, start=1):
+        print(f"{index}) {container}")
+
+
+def print_info_header(command):
+    """Print an info header depending on the used mlc command.
+
+    Args:
+        command (str): mlc command used by the user.
+    """ 
+    
+    if command == "create":
+        print(
+            "\n" \
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Create a new MLC container \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc create <container_name> <framework_name> <framework_version> -w <workspace_directory> -d <data_directory> -m <models_directory> -s -arch <gpu_architecture> -ng <number of gpus> \
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc create pt250 Pytorch 2.5.0 -w /home/$USER/workspace -d /data -m /models\n" 
+        ) 
+                
+    if command == "export":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Export a machine learning container into a compressed archive  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc export <container_name> [-o <archive>] [-j <jobs>] [-l <level>] [-f|--force] [-s|--script]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc export pt231aime -o /mnt/transfer/pt231aime.mlc.tar.gz\n"
+        )
+
+    if command == "data":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Fill the data cache of a machine learning container created with --data-cache  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc data warm <container_name> [-f <file_list>] [-j <jobs>] [-s|--script]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc data warm pt231aime -f train_files.txt\n"
+        )
+
+    if command == "models":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Share identical model files of the models directories through a content addressed store  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc models dedup|du|verify [models_directory ...] [--all-users] [--min-size <size>] [-j <jobs>] [-s|--script]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc models dedup --all-users --link hardlink\n"
+        )
+
+    if command == "open":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Open an existing machine learning container  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc open <container_name> [-s|--script]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc open pt231aime -s\n"
+        )
+        
+    if command == "remove":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Remove an existing and no running machine learning container  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc remove <container_name> [-s|--script] [-f|--force]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc remove pt231aime -s -f \n"
+        )   
+
+    if command == "start":        
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Start an existing machine learning container  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc start <container_name> [execute_command] [-d|--detach] [-s|--script] \
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc start pt231aime -s\n"
+        )
+
+    if command == "stop":        
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Stop an existing machine learning container  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc stop <container_name> [-s|--script] [-f|--force] \
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc stop pt231aime -s -f\n"
+        )  
+
+    if command == "update-sys":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Update the system  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc update-sys [-f|--force]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc update-sys -f \n"
+        )  
+
+    if command == "warm":
+        print(
+            "\n"\
+            f"    {INFO_HEADER}Info{RESET}: \
+            \n    Read the data and model files of a machine learning container into the page cache  \
+            \n\n    {INFO_HEADER}How to use{RESET}: \
+            \n    mlc warm <container_name> [path_or_glob ...] [-b <budget>] [-j <jobs>] [-s|--script]\
+            \n\n    {INFO_HEADER}Example{RESET}: \
+            \n    mlc warm pt231aime /models/llama-3-8b '/data/train/*.tar' -b 64G\n"
+        )
+
+
+def run_docker_command(docker_command):
+    """Run a shell command and return its output usign subprocess.run().
+
+    Args:
+        docker_command (str): docker command to be executed.
+
+    Returns:
+        str, str, int: standard output and error file handle and returncode.
+    """    
+ 
+    result = subprocess.run(
+        docker_command, 
+        shell=True, 
+        text=True, 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE)
+    return result.stdout.strip(), result.stderr.strip(), result.returncode
+
+
+def run_docker_command_popen(command):
+    """Run a shell command and return its output using subprocess.Popen().
+
+    Args:
+        command (str): docker command to be executed.
+
+    Returns:
+        str, int: standard error file handle and returncode.
+    """    
+    process = subprocess.Popen(
+        command, 
+        shell=False,
+        text=True,
+        stderr=subprocess.PIPE,
+    )
+    stderr = process.communicate()  # Communicate handles interactive input/output
+    return stderr, process.returncode
+
+def run_docker_pull_image(docker_command):
+    """Pull a docker image and return its output usign subprocess.run().
+
+    Args:
+        docker_command (str): docker pull command to be executed.
+
+    """ 
+    # Run the command and print output in real-time
+    result = subprocess.run(
+        docker_command, 
+        text=True,
+        capture_output=False,  
+    )
+
+    returncode = result.returncode
+
+    if returncode == 0:
+        print(f"\n{INFO}Docker image pulled successfully.{RESET}")
+    else:
+        print(f"\n{ERROR}Docker pull image failed. Try mlc create again.{RESET}")
+    #    exit(1)
+
+
+def set_framework(framework_version_docker_sorted):
+    """Display the available frameworks and set the framework by interactive selection.
+
+    Args:
+        framework_version_docker_sorted (dict): the content is a dict providing the availables frameworks, versions, gpu architecture and docker images.
+
+    Returns:
+        str: selected framework.
+    """ 
+    
+    framework_list = display_frameworks(framework_version_docker_sorted)
+    framework_num = get_user_selection(f"{REQUEST}Enter the number of the desired framework: {RESET}", len(framework_list))
+    
+    return framework_list[framework_num - 1]
+    
+    
+def set_version(framework, version_images):
+    """Display the available versions of the preselected framework and set a framework version.
+
+    Args:
+        framework (str): name of the preselected framework.
+        version_images (dict): dict mapping the versions to the docker images.
+    Returns:
+        tuple(str, str): returns the version and the corresponding docker image. 
+    """    
+                    
+    display_versions(framework, version_images)
+    version_number = get_user_selection(f"{REQUEST}Enter the number of your version: {RESET}", len(version_images))
+    return list(version_images.items())[version_number - 1]
+
+
+# ToDo: try to combine select_container() with get_user_selection(prompt, max_value).
+def select_container(container_list):
+    """Prompts the user to select a container from the list.
+
+    Args:
+        container_list (list): a list of containers (running, no running)
+
+    Returns:
+        str, int: selected container, position in the list
+    """    
+
+    while True:
+        try:
+            selection = int(input(f"\n{REQUEST}Select the number of the container: {RESET}"))
+            container_list_length = len(container_list)
+            if 1 <= selection <= container_list_length:
+                return container_list[selection - 1], selection
+            else:
+                print(f"\n{ERROR}Invalid selection. Please choose a valid number.{RESET}")
+        except ValueError:
+            print(f"\n{ERROR}Invalid input. Please enter a number.{RESET}")
+
+
+def select_container_to_be_ed(containers):
+    """Print a list of existing containers and provide a selected container name and its position in a list.
+    
+    Options: 
+    select_container_to_be_opened/removed/start/stopped
+    
+    Args:
+        containers (list): list of container which can be opened/removed/start/stopped
+
+    Returns:
+        str, int: selected container, position in the list
+    """
+
+    print_existing_container_list(containers)
+    selected_container_name, selected_container_position = select_container(containers)    
+    return selected_container_name, selected_container_position
+
+
+# Root of the cgroup v2 hierarchy read by the cgroup stats backend of mlc stats (MLC_CGROUP_ROOT overrides it)
+cgroup_root = os.environ.get("MLC_CGROUP_ROOT", "/sys/fs/cgroup")
+
+
+def cgroup_v2_available(root=cgroup_root):
+    """Check if the unified cgroup v2 hierarchy is mounted.
+
+    Args:
+        root (str, optional): root of the cgroup hierarchy. Defaults to cgroup_root.
+
+    Returns:
+        bool: True if cgroup v2 is available.
+    """
+    return os.path.isfile(os.path.join(root, "cgroup.controllers"))
+
+
+def find_container_cgroup(container_id, root=cgroup_root):
+    """Find the cgroup directory of a docker container (systemd or cgroupfs cgroup driver, rootless docker).
+
+    Args:
+        container_id (str): full id of the container.
+        root (str, optional): root of the cgroup hierarchy. Defaults to cgroup_root.
+
+    Returns:
+        str: path of the cgroup directory, None if not found.
+    """
+    import pathlib
+
+    if not container_id:
+        return None
+    candidates = [
+        os.path.join(root, "system.slice", f"docker-{container_id}.scope"),
+        os.path.join(root, "docker", container_id),
+    ]
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return candidate
+    for pattern in (f"docker-{container_id}.scope", container_id):
+        matches = list(pathlib.Path(root).glob(f"**/{pattern}"))
+        if matches:
+            return str(matches[0])
+    return None
+
+
+def read_cgroup_file(cgroup_dir, file_name):
+    """Read a cgroup interface file.
+
+    Args:
+        cgroup_dir (str): cgroup directory.
+        file_name (str): name of the interface file, for example memory.current.
+
+    Returns:
+        str: stripped content of the file, None if it can not be read.
+    """
+    try:
+        with open(os.path.join(cgroup_dir, file_name)) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def read_cgroup_keyed_values(content):
+    """Parse the 'key value' lines of cgroup files like cpu.stat or memory.stat into a dict of integers."""
+    values = {}
+    for line in (content or "").splitlines():
+        key, _, value = line.partition(" ")
+        if value.strip().isdigit():
+            values[key] = int(value)
+    return values
+
+
+def read_container_cgroup_sample(cgroup_dir):
+    """Read the current CPU, memory, process and block io counters of a container cgroup.
+
+    Args:
+        cgroup_dir (str): cgroup directory of the container.
+
+    Returns:
+        dict: cpu_usec, memory, memory_limit (None if unlimited), pids, io_read and io_write in bytes.
+    """
+    cpu_stat = read_cgroup_keyed_values(read_cgroup_file(cgroup_dir, "cpu.stat"))
+    memory_stat = read_cgroup_keyed_values(read_cgroup_file(cgroup_dir, "memory.stat"))
+    memory_current = read_cgroup_file(cgroup_dir, "memory.current")
+    memory_max = read_cgroup_file(cgroup_dir, "memory.max")
+    pids_current = read_cgroup_file(cgroup_dir, "pids.current")
+
+    # Like docker stats, the inactive page cache is not counted as used memory
+    memory = int(memory_current) if memory_current and memory_current.isdigit() else 0
+    memory = max(memory - memory_stat.get("inactive_file", 0), 0)
+
+    io_read = io_write = 0
+    for line in (read_cgroup_file(cgroup_dir, "io.stat") or "").splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes" and value.isdigit():
+                io_read += int(value)
+            elif key == "wbytes" and value.isdigit():
+                io_write += int(value)
+
+    return {
+        "cpu_usec": cpu_stat.get("usage_usec", 0),
+        "memory": memory,
+        "memory_limit": int(memory_max) if memory_max and memory_max.isdigit() else None,
+        "pids": int(pids_current) if pids_current and pids_current.isdigit() else 0,
+        "io_read": io_read,
+        "io_write": io_write,
+    }
+
+
+def format_binary_size(size_bytes):
+    """Format a size in bytes with binary units the way docker stats does (4 significant digits).
+
+    Args:
+        size_bytes (int): size in bytes.
+
+    Returns:
+        str: human readable size, for example 8.516GiB.
+    """
+    units = ["B", "KiB", "MiB", "GiB", "TiB", "PiB"]
+    size = float(size_bytes or 0)
+    unit_index = 0
+    while size >= 1024 and unit_index < len(units) - 1:
+        size /= 1024
+        unit_index += 1
+    return f"{size:.4g}{units[unit_index]}"
+
+
+def cgroup_stats_to_docker_format(container, sample, previous_sample, elapsed_seconds):
+    """Build a stats dict with the fields of 'docker stats --format {{json .}}' from two cgroup samples.
+
+    Args:
+        container (ContainerInfo): the container.
+        sample (dict): current cgroup sample, see read_container_cgroup_sample.
+        previous_sample (dict): previous cgroup sample or None.
+        elapsed_seconds (float): time between both samples.
+
+    Returns:
+        dict: stats of the container (Name, ID, CPUPerc, MemUsage, MemPerc, PIDs, BlockIO).
+    """
+    if previous_sample is not None and elapsed_seconds > 0:
+        cpu_percent = f"{(sample['cpu_usec'] - previous_sample['cpu_usec']) / (elapsed_seconds * 1e6) * 100:.2f}%"
+    else:
+        cpu_percent = "--"
+
+    # An unlimited container is limited by the memory of the host
+    memory_limit = sample["memory_limit"] or os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    return {
+        "Name": container.tag,
+        "ID": container.id,
+        "CPUPerc": cpu_percent,
+        "MemUsage": f"{format_binary_size(sample['memory'])} / {format_binary_size(memory_limit)}",
+        "MemPerc": f"{sample['memory'] / memory_limit * 100:.2f}%" if memory_limit else "0.00%",
+        "PIDs": str(sample["pids"]),
+        "BlockIO": f"{format_size(sample['io_read'])} / {format_size(sample['io_write'])}",
+    }
+
+
+def poll_cgroup_stats(interval, root=cgroup_root):
+    """Read the stats of the running mlc containers directly from their cgroups.
+
+    The CPU usage is computed from two reads of cpu.stat, therefore the first frame is provided after one interval.
+    The running containers are queried on every read, so containers started or stopped meanwhile are followed.
+
+    Args:
+        interval (float): time in seconds between two reads.
+        root (str, optional): root of the cgroup hierarchy. Defaults to cgroup_root.
+
+    Yields:
+        list: stats dicts in the format of docker stats of all running mlc containers.
+    """
+    previous_samples = {}
+    previous_time = None
+    cgroup_dirs = {}
+
+    while True:
+        running_containers = [container for container in query_container_inventory() if container.state == "running"]
+        now = time.monotonic()
+        samples = {}
+        for container in running_containers:
+            if container.id not in cgroup_dirs:
+                cgroup_dirs[container.id] = find_container_cgroup(container.id, root)
+            if cgroup_dirs[container.id]:
+                samples[container.id] = read_container_cgroup_sample(cgroup_dirs[container.id])
+
+        if previous_time is not None:
+            yield [
+                cgroup_stats_to_docker_format(container, samples[container.id], previous_samples.get(container.id), now - previous_time)
+                for container in running_containers if container.id in samples
+            ]
+        previous_samples, previous_time = samples, now
+        time.sleep(interval)
+
+
+# Column layout of mlc stats
+stats_format_string = "{:<30}{:<10}{:<25}{:<10}{:<15}"
+stats_titles = ["CONTAINER", "CPU %", "MEM USAGE / LIMIT", "MEM %", "PROCESSES (PIDs)"]
+
+
+def read_docker_stats_stream(process):
+    """Split the output of a streaming 'docker stats --format {{json .}}' process into frames.
+
+    The docker CLI starts every refresh by moving the cursor to the home position, which marks the beginning of a new frame.
+
+    Args:
+        process (subprocess.Popen): running docker stats process with text stdout.
+
+    Yields:
+        list: stats dicts of all running containers of one refresh.
+    """
+    ansi_escape = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+    frame = None
+    for line in process.stdout:
+        if "\x1b[H" in line or "\x1b[2J" in line:
+            if frame is not None:
+                yield frame
+            frame = []
+        stripped_line = ansi_escape.sub("", line).strip()
+        if stripped_line.startswith("{"):
+            try:
+                stats = json.loads(stripped_line)
+            except ValueError:
+                continue
+            if frame is None:
+                frame = []
+            frame.append(stats)
+    if frame:
+        yield frame
+
+
+def use_cgroup_stats(backend):
+    """Decide whether the stats are read from the cgroups or from docker stats.
+
+    Args:
+        backend (str): selected backend: auto, cgroup or docker.
+
+    Returns:
+        bool: True if the cgroup backend is used.
+    """
+    if backend == "docker":
+        return False
+    if cgroup_v2_available():
+        return True
+    if backend == "cgroup":
+        print(f"\n{ERROR}cgroup v2 is not available on this host. Use the docker backend:{RESET}\n{HINT}mlc stats -b docker{RESET}\n")
+        exit(1)
+    return False
+
+
+def watch_container_stats(interval=1.0, backend="auto"):
+    """Show the stats of the running containers continuously.
+
+    The stats are polled from the cgroups of the mlc containers or read from a single long-lived docker stats process.
+    Only the rows which changed since the last refresh are redrawn. Containers started or stopped meanwhile are added or removed.
+
+    Args:
+        interval (float, optional): minimal time in seconds between two refreshes of the screen. Defaults to 1.0.
+        backend (str, optional): stats backend: auto, cgroup or docker. Defaults to auto.
+    """
+    process = None
+    if use_cgroup_stats(backend):
+        frames = poll_cgroup_stats(interval)
+    else:
+        command = [
+            "docker",
+            "stats",
+            "--format",'{{json .}}'
+        ]
+        process = subprocess.Popen(
+            command, 
+            shell=False,
+            text=True, 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.DEVNULL
+        )
+        frames = read_docker_stats_stream(process)
+
+    incremental = sys.stdout.isatty()
+    # Lines of the screen: 1 empty line, 1 info line, 1 title line, then the container rows
+    first_row = 4
+    displayed_lines = displayed_names = None
+    last_refresh = 0
+
+    try:
+        for frame in frames:
+            now = time.monotonic()
+            if now - last_refresh < interval:
+                continue
+            last_refresh = now
+
+            rows = sorted(map(format_container_stats, frame))
+            names = [row[0] for row in rows]
+            lines = [stats_format_string.format(*row) for row in rows] or [f"{NEUTRAL}There are no running containers.{RESET}"]
+            header = f"\n{INFO}Current stats of the running containers ({time.strftime('%H:%M:%S')}, Ctrl+C to quit):{RESET}"
+
+            if not incremental:
+                print(header)
+                print(stats_format_string.format(*stats_titles))
+                print("\n".join(lines), flush=True)
+            elif names != displayed_names:
+                # Containers were started or stopped: redraw the whole screen
+                sys.stdout.write("\x1b[2J\x1b[H" + header + "\n" + stats_format_string.format(*stats_titles) + "\n" + "\n".join(lines) + "\n")
+            else:
+                # Redraw only the changed rows and the time in the info line
+                output = [f"\x1b[2;1H{header.strip()}\x1b[K"]
+                for index, (line, displayed_line) in enumerate(zip(lines, displayed_lines)):
+                    if line != displayed_line:
+                        output.append(f"\x1b[{first_row + index};1H{line}\x1b[K")
+                output.append(f"\x1b[{first_row + len(lines)};1H")
+                sys.stdout.write("".join(output))
+            sys.stdout.flush()
+            displayed_lines, displayed_names = lines, names
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def show_container_stats(backend="auto", interval=0.5):  
+    """Fetch the container stats once, from the cgroups of the mlc containers or from docker stats.
+
+    Args:
+        backend (str, optional): stats backend: auto, cgroup or docker. Defaults to auto.
+        interval (float, optional): time in seconds between the two cgroup reads used to compute the CPU usage. Defaults to 0.5.
+    """    
+  
+    if use_cgroup_stats(backend):
+        containers_stats = next(poll_cgroup_stats(interval))
+        if not containers_stats:
+            print(f"\n{ERROR}There are no running containers. Start or open a container to show the stats.{RESET}\n")
+            exit(0)
+        print(f"\n{INFO}Current stats of the running containers:{RESET}")
+        print(stats_format_string.format(*stats_titles))
+        print("\n".join(stats_format_string.format(*info) for info in map(format_container_stats, containers_stats))+"\n")
+        print_data_cache_stats(get_container_inventory())
+        return
+
+    command = [
+        "docker",
+        "stats",
+        "--no-stream",
+        "--format",'{{json .}}'
+    ]
+    process = subprocess.Popen(
+        command, 
+        shell=False,
+        text=True, 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE
+        )
+
+    stdout_data, stderr_data = process.communicate()
+
+    # If no stdout_data is received
+    if not stdout_data:
+        process.terminate()
+        print(f"\n{ERROR}There are no running containers. Start or open a container to show the stats.{RESET}\n")
+        exit(0)
+    else:        
+        # Print the final processed output
+        format_string = stats_format_string
+        print(f"\n{INFO}Current stats of the running containers:{RESET}")
+        titles = stats_titles
+                  
+        # Split into individual lines and process them as JSON objects
+        output_lines = []
+        
+        # Split by newlines and parse each line as JSON
+        json_lines = stdout_data.split('\n')
+        containers_stats = [json.loads(line) for line in json_lines if line]
+
+        # Apply formatting to all containers' info
+        output_lines = list(map(format_container_stats, containers_stats))
+        print(format_string.format(*titles))
+        print("\n".join(format_string.format(*info) for info in output_lines)+"\n")
+        print_data_cache_stats(get_container_inventory())
+    
+    # Exit after processing one time in non-streaming mode
+    process.terminate()        
+
+
+def short_home_path(provided_path):
+    """Replace the home directory with "~" if present
+
+    Args:
+        provided_path (str): path to be modify
+
+    Returns:
+        str: path with "~" if needed
+    """  
+    home_directory = os.path.expanduser("~")
+    
+    if provided_path == "-":
+        return "-"
+    elif provided_path == home_directory:
+        return provided_path
+    else:        
+        shortened_path = provided_path.replace(home_directory, "~", 1)
+        return shortened_path
+
+
+def show_container_info(**kwargs):
+    """Print container info
+
+    Args:
+        flags (str): flag arguments provided by the user
+    """
+    
+    # Adapt the filter to the selected flags
+    all_users = kwargs == {} or kwargs["all_users"]
+    show_size = kwargs.get("all") or kwargs.get("size") or kwargs.get("fresh")
+
+    # The container inventory is shared by the whole command
+    containers = [container for container in get_container_inventory() if all_users or container.labels.get("aime.mlc") == user_name]
+
+    # Sizes are taken from the size cache together with their age
+    if show_size:
+        now = time.time()
+        containers = [
+            container._replace(size=f"{container.size}, {format_age(now - container.size_time)}" if container.size else "pending")
+            for container in add_cached_container_sizes(containers, kwargs.get("fresh"))
+        ]
+    containers_info = [
+        {
+            "Names": container.tag, "Image": container.image, "State": container.state, "Status": container.status, "Size": container.size,
+            "Resources": format_container_resources(container.labels), "Labels": container.labels
+        }
+        for container in containers
+    ]
+
+    # If no container is found
+    if not containers_info:
+        print(f"\n{ERROR}There are no containers. Create the first one using:{RESET}\n{HINT}mlc create container_name{RESET}\n")
+        exit(0)    
+    else:
+        # Titels  extracted from the kwargs
+        kwarg_keys_to_be_deleted = ["command", "all", "all_users", "format", "fields", "fresh"]
+        kwarg_titles = {key: key.upper() for key in kwargs if key not in kwarg_keys_to_be_deleted}
+        kwarg_titles["all_users"] = "USER"
+                
+        # Default columns to display
+        default_titles_to_display = ["CONTAINER", "FRAMEWORK", "STATUS"]
+        
+        # Columns when flag --all is set up:
+        titles_when_all_is_set = [ "USER", "SIZE", "ARCHITECTURE", "WORKSPACE", "DATA", "MODELS", "RESOURCES"]
+
+        # Add additional columns based on flags
+        if kwargs.get("all"):  
+            default_titles_to_display.extend(titles_when_all_is_set)
+        else:
+            default_titles_to_display.extend(kwarg_titles[key] for key in kwargs if key in kwarg_titles and kwargs[key] is True)        
+            if kwargs.get("fresh") and not kwargs.get("size"):
+                default_titles_to_display.append("SIZE")
+        
+        # Titles to be display on the top of the columns
+        titles_to_display = default_titles_to_display        
+
+        columns_transcription = {
+            "CONTAINER": "aime.mlc.NAME",
+            "FRAMEWORK": "aime.mlc.FRAMEWORK", 
+            "STATUS": "Status",
+            "USER": "aime.mlc.USER",
+            "SIZE": "Size",
+            "ARCHITECTURE":"aime.mlc.ARCH",
+            "WORKSPACE": "aime.mlc.WORK_MOUNT",
+            "DATA": "aime.mlc.DATA_MOUNT",
+            "MODELS": "aime.mlc.MODELS_MOUNT",
+            "RESOURCES": "Resources"
+        }
+        # Select the values which can be written with '~' 
+        reduce_the_path = ["WORKSPACE", "DATA", "MODELS"]  
+              
+        # Values which can be written with '~' 
+        values_to_be_reduced = [columns_transcription[key] for key in reduce_the_path if key in columns_transcription]
+        
+        # Flatten the dicts and apply short_home_path for keys in values_to_be_reduced
+        flattened_container_infos = [
+            {
+                **{key: short_home_path(value) if key in values_to_be_reduced 
+                   else f"[{value}]" if key == columns_transcription["CONTAINER"] 
+                   else value 
+                   for key, value in 
+                container_dict["Labels"].items()},
+                **{key: value for key, value in container_dict.items() if key != "Labels"}
+            }
+            for container_dict in containers_info
+        ]
+      
+        # Assess the column widths for printing with a correct format
+        column_widths = {
+            key: max(len(key), *(len(container.get(columns_transcription[key], "")) for container in flattened_container_infos)) 
+            for key in titles_to_display
+        }
+        
+        # Build the format string dynamically
+        format_string = "".join(f"{{:<{column_widths[col]+2}}}" for col in titles_to_display)
+
+        # Print the titles
+        print("")
+        print(format_string.format(*(titles_to_display)))
+        
+        # Print the rows
+        for container in flattened_container_infos:
+            print(format_string.format(*(container.get(columns_transcription[key], '') for key in titles_to_display if key in columns_transcription)))
+        print("")
+        
+        
+# Fields of the machine readable output of mlc list
+container_list_fields = {
+    "container": lambda container: container.labels.get("aime.mlc.NAME", container.name),
+    "tag": lambda container: container.tag,
+    "id": lambda container: container.id,
+    "image": lambda container: container.image,
+    "state": lambda container: container.state,
+    "status": lambda container: container.status,
+    "size": lambda container: container.size,
+    "size_time": lambda container: container.size_time,
+    "user": lambda container: container.labels.get("aime.mlc.USER"),
+    "framework": lambda container: container.labels.get("aime.mlc.FRAMEWORK"),
+    "architecture": lambda container: container.labels.get("aime.mlc.ARCH"),
+    "gpus": lambda container: container.labels.get("aime.mlc.GPUS"),
+    "workspace": lambda container: container.labels.get("aime.mlc.WORK_MOUNT"),
+    "data": lambda container: container.labels.get("aime.mlc.DATA_MOUNT"),
+    "models": lambda container: container.labels.get("aime.mlc.MODELS_MOUNT"),
+    "mlc_version": lambda container: container.labels.get("aime.mlc.MLC_VERSION"),
+    "cpus": lambda container: container.labels.get("aime.mlc.CPUS"),
+    "memory": lambda container: container.labels.get("aime.mlc.MEMORY"),
+    "shm_size": lambda container: container.labels.get("aime.mlc.SHM_SIZE"),
+    "ipc": lambda container: container.labels.get("aime.mlc.IPC", "host"),
+    "cpuset": lambda container: container.labels.get("aime.mlc.CPUSET"),
+    "cpuset_mems": lambda container: container.labels.get("aime.mlc.CPUSET_MEMS"),
+    "labels": lambda container: dict(container.labels),
+}
+container_list_default_fields = ["container", "framework", "status", "user", "architecture", "workspace", "data", "models"]
+
+
+def write_container_list(output_format, fields=None, all_users=False, with_size=False, fresh=False):
+    """Print the containers as json, jsonl or csv. Each container is printed as soon as it is read from docker (except the table).
+
+    Args:
+        output_format (str): json, jsonl or csv.
+        fields (list, optional): fields of container_list_fields to be printed. Defaults to container_list_default_fields.
+        all_users (bool, optional): print the containers of all users. Defaults to False (only the current user).
+        with_size (bool, optional): add the size to the default fields. Defaults to False.
+        fresh (bool, optional): compute the sizes instead of using the size cache. Defaults to False.
+
+    Raises:
+        ValueError: if a field is unknown.
+    """
+    if fields is None:
+        fields = container_list_default_fields + (["size"] if with_size else [])
+    unknown_fields = [field for field in fields if field not in container_list_fields]
+    if unknown_fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown_fields)}. Available fields: {', '.join(container_list_fields)}")
+
+    if output_format == "csv":
+        import csv
+
+        writer = csv.writer(sys.stdout)
+        writer.writerow(fields)
+    elif output_format == "json":
+        sys.stdout.write("[")
+
+    # Containers are printed while they are read, unless their sizes have to be looked up first
+    if "size" in fields or "size_time" in fields:
+        containers = add_cached_container_sizes(
+            [container for container in get_container_inventory() if all_users or container.labels.get("aime.mlc") == user_name], fresh
+        )
+    else:
+        containers = (container for container in iter_containers() if all_users or container.labels.get("aime.mlc") == user_name)
+
+    first_row = True
+    for container in containers:
+        row = {field: container_list_fields[field](container) for field in fields}
+        if output_format == "csv":
+            writer.writerow(json.dumps(value) if isinstance(value, dict) else value for value in row.values())
+        elif output_format == "json":
+            sys.stdout.write(("\n  " if first_row else ",\n  ") + json.dumps(row))
+        else:
+            sys.stdout.write(json.dumps(row) + "\n")
+        sys.stdout.flush()
+        first_row = False
+
+    if output_format == "json":
+        sys.stdout.write("]\n" if first_row else "\n]\n")
+
+
+def show_frameworks_versions(ml_images_content):
+    """Print the available frameworks and versions by mlc create
+
+    Args:
+        architecture (str): current gpu architecture
+        ml_images_content (dict): dict containing as keys the frameworks and as values dicts {version: docker image}
+    """    
+
+    frameworks = list(ml_images_content.keys())
+    print(f"{INFO}\nAvailable frameworks and versions:{RESET}")
+    for framework in frameworks:
+        version_images = ml_images_content[framework]
+        print(f"\n{HINT}{framework}:{RESET} \n{', '.join(version_images)}")
+    print(" ")
+    exit(0)
+
+
+def validate_container_name(container_name, command, script=False):
+    """Validate the container name provided by the user
+
+    Args:
+        container_name (str): name of the container provided by the user
+        command (str): mlc command
+        script (boolean): script mode (on: True, off: False) .Default: false.
+
+    Raises:
+        ValueError: The container name should contain at least one character.
+        ValueError: The container name contains invalid characters.
+        ValueError: The container name already exists.
+
+    Returns:
+        str, str: container name and associated container tag
+    """
+
+    _ , available_user_container_tags = existing_user_containers(user_name, command) 
+    
+    pattern = re.compile(r'^[a-zA-Z0-9_\-#]*$')
+
+    if container_name == "":        
+        raise ValueError(f"\n{ERROR}The container name should contain at least one character.{RESET}")    
+    elif not pattern.match(container_name):
+        invalid_chars = [char for char in container_name if not re.match(r'[a-zA-Z0-9_\-#]', char)]
+        invalid_chars_str = ''.join(invalid_chars)
+        if script:
+            print(f"\n{INPUT}[{container_name}]{RESET} contains {ERROR}invalid{RESET} characters: {ERROR}{invalid_chars_str}{RESET}\n")
+            exit(1)
+        else:
+            raise ValueError(f"\n{INPUT}[{container_name}]{RESET} contains {ERROR}invalid{RESET} characters: {ERROR}{invalid_chars_str}{RESET}\n")
+    else:
+        # Generate a unique container tag
+        provided_container_tag = f"{container_name}._.{user_id}"        
+        if provided_container_tag in available_user_container_tags:
+            if script:
+                print(f'\n{INPUT}[{container_name}]{RESET} {ERROR}already exists. Provide a new container name.{RESET}\n')
+                exit(1)
+            else:
+                raise ValueError(f'\n{INPUT}[{container_name}]{RESET} {ERROR}already exists. Provide a new container name.{RESET}')        
+        return container_name, provided_container_tag
+
+
+def get_docker_env():                 
+    """Provide the environment variables passed to docker exec.
+
+    Returns:
+        list: arguments of docker exec, for example ['-e', 'DISPLAY=:0'].
+    """
+    # Set environment variables to pass to the Docker container
+    set_env = ["-e", f"DISPLAY={os.environ.get('DISPLAY')}"]
+    
+    # If the NCCL_P2P_LEVEL environment variable is set, include it in the environment settings
+    if 'NCCL_P2P_LEVEL' in os.environ:
+        set_env += ["-e", f"NCCL_P2P_LEVEL={os.environ.get('NCCL_P2P_LEVEL')}"]
+
+    return set_env
+
+
+def build_user_setup_script(architecture, user_name, user_id, group_id, dir_to_be_added):
+    """Constructs the bash script which prepares the user inside a base image.
+
+    The script does not depend on the container name, so that the image committed from it can be shared by all
+    containers of the user created from the same base image. The container name is shown in the bash prompt
+    through the environment variable MLC_CONTAINER_NAME set by 'docker create'.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
+        user_name (str): Username to be created inside the container.
+        user_id (int): User ID to assign.
+        group_id (int): Group ID to assign.
+        dir_to_be_added (str): Directory path to add to the container's PATH.
+
+    Returns:
+        str: the bash script.
+    """
+    # Shared bash command part
+    bash_lines = [
+        f'echo "export PATH=\\"{dir_to_be_added}:\\$PATH\\"" >> /etc/skel/.bashrc;'
+        f"echo \"export PS1='[\\${{MLC_CONTAINER_NAME}}] \\$(whoami)@\\$(hostname):\\${{PWD#*}}$ '\" >> /etc/skel/.bashrc;",
+        "apt-get update -y > /dev/null;",
+        "apt-get install sudo git -q -y > /dev/null;",
+        f"addgroup --gid {group_id} {user_name} > /dev/null;",
+        f"adduser --uid {user_id} --gid {group_id} {user_name} --disabled-password --gecos aime > /dev/null;",
+        f"passwd -d {user_name};",
+        f"echo \"{user_name} ALL=(ALL) NOPASSWD: ALL\" > /etc/sudoers.d/{user_name}_no_password;",
+    ]
+
+    # Add ROCm-specific line if needed
+    if 'ROCM' in architecture:
+        bash_lines.append("echo \"export ROCM_PATH=/opt/rocm\" >> ~/.bashrc;")
+
+    bash_lines.extend([
+        f"chmod 440 /etc/sudoers.d/${user_name}_no_password;",
+        "exit"
+    ])      
+
+    return ' '.join(bash_lines)
+
+
+def build_docker_run_command(    
+        architecture, 
+        workspace_dir, 
+        workspace, 
+        container_tag,
+        num_gpus, 
+        selected_docker_image, 
+        bash_command
+    ):
+    """Constructs a 'docker run' command based on the host GPU architecture and user setup.
+
+    This function assembles the appropriate `docker run` command with volume mappings,
+    GPU-specific options (for CUDA or ROCm), and the bash script for setting up the
+    container environment.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
+        workspace_dir (str): Path on the host to be mounted into the container.
+        workspace (str): Path inside the container where the workspace will be mounted.
+        container_tag (str): Tag to assign to the running container.
+        num_gpus (str): Number of GPUs to allocate (used only for CUDA).
+        selected_docker_image (str): Base Docker image to use.
+        bash_command (str): Setup script, see build_user_setup_script().
+
+    Returns:
+        list: A list representing the full Docker command to run in subprocess or shell.
+
+    Raises:
+        ValueError: If the provided architecture is not supported ('CUDA' or 'ROCM').
+    """
+    
+    # Shared base command
+    base_docker_cmd = [
+        'docker', 'run',
+        '-v', f'{workspace_dir}:{workspace}',
+        '-w', workspace,
+        '--name', container_tag,
+        '--tty',
+        '--privileged',
+        '--network', 'host',
+        '--device', '/dev/snd',
+        '--ipc', 'host',
+        '--ulimit', 'memlock=-1',
+        '--ulimit', 'stack=67108864',
+        '-v', '/tmp/.X11-unix:/tmp/.X11-unix',
+    ]
+
+    cuda_extras = [
+        '--gpus', docker_gpus_option(num_gpus),
+        '--device', '/dev/video0',
+    ]
+
+    rocm_extras = [
+        '-u', 'root',
+        '--device', '/dev/kfd',
+        '--device', '/dev/dri',
+        '--cap-add', 'SYS_PTRACE',
+        '--security-opt', 'seccomp=unconfined',
+        '--shm-size', '8G'
+    ]
+
+    # Assemble full command
+    if 'CUDA' in architecture:
+        docker_cmd = base_docker_cmd + cuda_extras + [
+            f'{selected_docker_image}', 'bash', '-c', bash_command
+        ]
+    elif 'ROCM' in architecture:
+        docker_cmd = base_docker_cmd + rocm_extras + [
+            selected_docker_image, 'bash', '-c', bash_command
+        ]
+    else:
+        raise ValueError(f"Unsupported architecture: {architecture}")
+
+    return docker_cmd
+
+def build_docker_create_command(
+        user_name, 
+        user_id, 
+        group_id,   
+        architecture,
+        selected_docker_image,
+        selected_framework,
+        selected_version,
+        mlc_container_version,
+        validated_container_name,
+        container_label,
+        container_tag,
+        workspace,
+        workspace_dir, 
+        data_dir,
+        models_dir,
+        dir_to_be_added,
+        num_gpus,
+        volumes,
+        container_image,
+        labels=None,
+        resources=None
+    ):
+    """Constructs a 'docker create' command customized for a machine learning container environment.
+
+    This function prepares a Docker container creation command with appropriate flags, volume
+    mounts, GPU-specific configurations (CUDA or ROCm), and user-specific labels. It embeds a bash
+    startup sequence that configures the shell prompt, environment paths, and device permissions.
+
+    Args:
+        user_name (str): Name of the user to be created inside the container.
+        user_id (int): User ID to assign.
+        group_id (int): Group ID to assign.
+        architecture (str): Target GPU architecture ('CUDA' or 'ROCM').
+        selected_docker_image (str): Base Docker image name.
+        selected_framework (str): Deep learning framework (e.g., 'tensorflow', 'pytorch').
+        selected_version (str): Version of the framework.
+        mlc_container_version (str): Version identifier for the container environment.
+        validated_container_name (str): Checked name for bash prompt.
+        container_label (str): Label to add to the container.
+        container_tag (str): Tag to assign to the container.
+        workspace (str): Path inside the container where the workspace will be mounted.
+        workspace_dir (str): Host path for the workspace.
+        data_dir (str): Host path for the dataset directory.
+        models_dir (str): Host path for the models directory.
+        dir_to_be_added (str): Directory path to add to the container's PATH.
+        num_gpus (str): Number of GPUs to assign (used with CUDA).
+        volumes (list): Additional volume mount strings to include.
+        container_image (str): Image with the prepared user setup, see prepare_user_layer().
+        labels (dict, optional): Additional labels, for example {"aime.mlc.WATCHDOG": "off"}. Defaults to None.
+        resources (dict, optional): Resource settings, see resolve_container_resources(). Defaults to None.
+
+    Returns:
+        list: A list representing the full 'docker create' command.
+
+    Raises:
+        ValueError: If the provided architecture is not supported.
+    """
+    
+    # Shared base command
+    base_docker_cmd = [
+        'docker', 'create',
+        '-it',
+        '-w', workspace,
+        '--name', container_tag,
+        '--label', f'{container_label}={user_name}',
+        '--label', f'{container_label}.NAME={validated_container_name}',
+        '--label', f'{container_label}.USER={user_name}',
+        '--label', f'{container_label}.ARCH={architecture}',
+        '--label', f'{container_label}.MLC_VERSION={mlc_container_version}',
+        '--label', f'{container_label}.WORK_MOUNT={workspace_dir}',
+        '--label', f'{container_label}.DATA_MOUNT={data_dir}',
+        '--label', f'{container_label}.MODELS_MOUNT={models_dir}',
+        '--label', f'{container_label}.FRAMEWORK={selected_framework}-{selected_version}',
+        '--label', f'{container_label}.GPUS={num_gpus}',
+        '--env', f'MLC_CONTAINER_NAME={validated_container_name}',
+        '--user', f'{user_id}:{group_id}',
+        '--tty',
+        '--privileged',
+        '--interactive',
+        '--network', 'host',
+        '--device', '/dev/snd',
+        '--ipc', 'host',
+        '--ulimit', 'memlock=-1',
+        '--ulimit', 'stack=67108864',
+        '-v', '/tmp/.X11-unix:/tmp/.X11-unix',
+        '--group-add', 'video'
+    ]   
+    
+    # Insert the volumes list at the correct position, after '-it'
+    base_docker_cmd[3:3] = volumes    
+
+    # Additional labels of the container
+    for label, value in (labels or {}).items():
+        base_docker_cmd += ['--label', f'{label}={value}']
+
+    # Resource limits and cpu pinning, each stored as label to be shown by mlc list. Options of the base command (--ipc) are replaced.
+    for key, value in (resources or {}).items():
+        flag, label = container_resource_options[key]
+        if flag in base_docker_cmd:
+            base_docker_cmd[base_docker_cmd.index(flag) + 1] = value
+            base_docker_cmd += ['--label', f'{label}={value}']
+        else:
+            base_docker_cmd += [flag, value, '--label', f'{label}={value}']
+       
+    cuda_extras = [
+        '--gpus', docker_gpus_option(num_gpus),
+        '--device', '/dev/video0',
+        '--group-add', 'sudo'
+    ]
+
+    rocm_extras = [
+        '--device', '/dev/kfd',
+        '--device', '/dev/dri',
+        '--cap-add', 'SYS_PTRACE',
+        '--security-opt', 'seccomp=unconfined',
+        '--group-add', 'sudo'
+    ]
+    if 'shm_size' not in (resources or {}):
+        rocm_extras += ['--shm-size', '8G']
+
+    # Assigned ROCm GPUs: only their /dev/dri nodes are passed. The container is privileged and sees all device nodes anyway,
+    # ROCR_VISIBLE_DEVICES (host device indices) restricts the ROCm runtime to the assigned GPUs.
+    if 'ROCM' in architecture and num_gpus.startswith('device='):
+        devices = container_gpu_indices(architecture, num_gpus, len(list_gpu_numa_nodes(architecture)))
+        device_nodes = rocm_device_nodes(devices)
+        if device_nodes:
+            dri_position = rocm_extras.index('/dev/dri')
+            rocm_extras[dri_position - 1:dri_position + 1] = [option for node in device_nodes for option in ('--device', node)]
+        rocm_extras += ['--env', f"ROCR_VISIBLE_DEVICES={num_gpus[len('device='):]}"]
+    
+    # Shared bash command part
+    bash_lines = [
+    ]
+    
+    # Add ROCm-specific line if needed
+    if 'ROCM' in architecture:
+        bash_lines.append("sudo chown root:video /dev/kfd; sudo chown -R root:video /dev/dri;")
+    
+    bash_lines.append("bash")
+    
+    bash_command = ' '.join(bash_lines)
+
+    # Assemble full command
+    if 'CUDA' in architecture:
+        docker_cmd = base_docker_cmd + cuda_extras + [
+            container_image, 'bash', '-c', bash_command
+        ]
+    elif 'ROCM' in architecture:
+        docker_cmd = base_docker_cmd + rocm_extras + [
+            container_image, 'bash', '-c', bash_command
+        ]
+    else:
+        raise ValueError(f"Unsupported architecture: {architecture}")
+
+    return docker_cmd
+
+################################################################################################################################################
+# Resource limits and NUMA placement
+#
+# mlc create --cpus, --memory and --shm-size limit a container, --cpuset pins it to cpu cores. --shm-size needs --ipc private, by
+# default containers share the ipc namespace and /dev/shm of the host (used by NCCL). With --cpuset auto the cores and memory nodes
+# local to the GPUs of the container are read from sysfs: every GPU is a PCI device with a numa_node, every NUMA node lists its
+# cores in cpulist. The settings are stored as aime.mlc labels and shown by mlc list.
+
+# Root of the sysfs tree read for the NUMA placement (MLC_SYSFS_ROOT overrides it, for example with a copy of the tree of another host)
+sysfs_root = os.environ.get("MLC_SYSFS_ROOT", "/sys")
+
+gpu_pci_vendors = {"CUDA": "0x10de", "ROCM": "0x1002"}     # PCI vendor ids of NVIDIA and AMD
+
+
+def parse_cpu_list(cpu_list):
+    """Parse a cpu list like 0-3,8-11 (the format of sysfs and docker --cpuset-cpus).
+
+    Args:
+        cpu_list (str): the cpu list.
+
+    Raises:
+        ValueError: if the cpu list is not valid.
+
+    Returns:
+        list: sorted cpu numbers.
+    """
+    cpus = set()
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        match = re.match(r"^(\d+)(?:-(\d+))?$", part.strip())
+        if not match or (match.group(2) and int(match.group(2)) < int(match.group(1))):
+            raise ValueError(f"Invalid cpu list: {cpu_list}")
+        cpus.update(range(int(match.group(1)), int(match.group(2) or match.group(1)) + 1))
+    if not cpus:
+        raise ValueError(f"Invalid cpu list: {cpu_list}")
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    """Format cpu numbers as cpu list, for example [0, 1, 2, 3, 8] as 0-3,8.
+
+    Args:
+        cpus (iterable): cpu numbers.
+
+    Returns:
+        str: the cpu list.
+    """
+    ranges = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{first}-{last}" if last > first else str(first) for first, last in ranges)
+
+
+def read_sysfs_file(*path, root=sysfs_root):
+    """Read a file of the sysfs tree.
+
+    Args:
+        *path (str): path components below the sysfs root.
+        root (str, optional): root of the sysfs tree. Defaults to sysfs_root.
+
+    Returns:
+        str: the stripped content, None if the file can not be read.
+    """
+    try:
+        with open(os.path.join(root, *path)) as sysfs_file:
+            return sysfs_file.read().strip()
+    except OSError:
+        return None
+
+
+def list_gpu_numa_nodes(architecture, root=sysfs_root):
+    """List the GPUs of an architecture with their NUMA node, in PCI address order like the device indices of nvidia-smi and rocm-smi.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA_ADA', 'ROCM6').
+        root (str, optional): root of the sysfs tree. Defaults to sysfs_root.
+
+    Returns:
+        list: (PCI address, NUMA node) tuples, the node is -1 if the host has no NUMA information.
+    """
+    vendor = next((vendor for prefix, vendor in gpu_pci_vendors.items() if architecture.startswith(prefix)), None)
+    devices_dir = os.path.join(root, "bus", "pci", "devices")
+    if vendor is None or not os.path.isdir(devices_dir):
+        return []
+    gpus = []
+    for address in sorted(os.listdir(devices_dir)):
+        # Display controllers (class 0x03xxxx) of the vendor, audio and bridge functions of the GPU boards are skipped
+        device_class = read_sysfs_file("bus", "pci", "devices", address, "class", root=root) or ""
+        if read_sysfs_file("bus", "pci", "devices", address, "vendor", root=root) != vendor or not device_class.startswith("0x03"):
+            continue
+        numa_node = read_sysfs_file("bus", "pci", "devices", address, "numa_node", root=root)
+        gpus.append((address, int(numa_node) if numa_node and numa_node.lstrip("-").isdigit() else -1))
+    return gpus
+
+
+def select_gpu_indices(num_gpus, gpu_count):
+    """Return the device indices docker assigns for a --gpus value.
+
+    Args:
+        num_gpus (str): 'all', a number of GPUs or device=<index,...>.
+        gpu_count (int): number of GPUs of the host.
+
+    Returns:
+        list: the device indices.
+    """
+    num_gpus = str(num_gpus).strip().strip('"')
+    if num_gpus.startswith("device="):
+        return [int(index) for index in num_gpus[len("device="):].split(",") if index.strip().isdigit() and int(index) < gpu_count]
+    if num_gpus.isdigit():
+        return list(range(min(int(num_gpus), gpu_count)))
+    return list(range(gpu_count))
+
+
+def container_gpu_indices(architecture, num_gpus, gpu_count):
+    """Return the host indices of the GPUs of a container. GPUs assigned by --allocate-gpus (device=<index,...>) are used for both
+    vendors, otherwise a CUDA container gets the GPUs of its --gpus value and a ROCm container all GPUs.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA_ADA', 'ROCM6').
+        num_gpus (str): --gpus value of the container.
+        gpu_count (int): number of GPUs of the host.
+
+    Returns:
+        list: the device indices.
+    """
+    if architecture.startswith("ROCM") and not str(num_gpus).strip().strip('"').startswith("device="):
+        return list(range(gpu_count))
+    return select_gpu_indices(num_gpus, gpu_count)
+
+
+def numa_local_cpuset(architecture, num_gpus, root=sysfs_root):
+    """Find the cores and memory nodes local to the GPUs of a container.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA_ADA', 'ROCM6').
+        num_gpus (str): --gpus value of the container, see container_gpu_indices().
+        root (str, optional): root of the sysfs tree. Defaults to sysfs_root.
+
+    Raises:
+        ValueError: if the GPUs or their NUMA nodes can not be determined.
+
+    Returns:
+        str, str: cpu list and memory node list for --cpuset-cpus and --cpuset-mems.
+    """
+    gpus = list_gpu_numa_nodes(architecture, root)
+    if not gpus:
+        raise ValueError(f"No {architecture} GPUs found in {os.path.join(root, 'bus', 'pci', 'devices')}.")
+    indices = container_gpu_indices(architecture, num_gpus, len(gpus))
+    numa_nodes = sorted({gpus[index][1] for index in indices})
+    if not numa_nodes or -1 in numa_nodes:
+        raise ValueError("The host provides no NUMA node of its GPUs.")
+    cpus = []
+    for numa_node in numa_nodes:
+        cpu_list = read_sysfs_file("devices", "system", "node", f"node{numa_node}", "cpulist", root=root)
+        if not cpu_list:
+            raise ValueError(f"The cores of NUMA node {numa_node} are unknown.")
+        cpus += parse_cpu_list(cpu_list)
+    return format_cpu_list(cpus), format_cpu_list(numa_nodes)
+
+
+def resolve_container_resources(cpus=None, memory=None, shm_size=None, cpuset=None, architecture="", num_gpus="all", ipc=None):
+    """Validate the resource options of mlc create and resolve --cpuset auto.
+
+    Args:
+        cpus (str, optional): number of cores, for example 8 or 7.5. Defaults to None (no limit).
+        memory (str, optional): memory limit, for example 64g. Defaults to None (no limit).
+        shm_size (str, optional): size of /dev/shm, for example 16g. Defaults to None (docker default, 8G for ROCm).
+        cpuset (str, optional): cpu list or 'auto' for the cores local to the GPUs. Defaults to None (all cores).
+        architecture (str, optional): GPU architecture type, needed for 'auto'. Defaults to "".
+        num_gpus (str, optional): --gpus value of the container, needed for 'auto'. Defaults to "all".
+        ipc (str, optional): 'host' or 'private', the ipc namespace of the container. Defaults to None (host).
+
+    Raises:
+        ValueError: if an option is not valid, --shm-size is given without --ipc private or the NUMA placement can not be determined.
+
+    Returns:
+        dict: the settings of container_resource_options which are set.
+    """
+    resources = {}
+    if cpus is not None:
+        try:
+            if float(cpus) <= 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Invalid number of cpus: {cpus}") from None
+        resources["cpus"] = str(cpus)
+    for key, value in (("memory", memory), ("shm_size", shm_size)):
+        if value is not None:
+            if not re.match(r"^\d+(\.\d+)?[bkmg]?$", str(value), re.IGNORECASE):
+                raise ValueError(f"Invalid size: {value}. Use a number with the unit b, k, m or g, for example 64g.")
+            resources[key] = str(value).lower()
+    if ipc not in (None, "host", "private"):
+        raise ValueError(f"Invalid ipc namespace: {ipc}. Use host or private.")
+    # The /dev/shm of the host ipc namespace ignores --shm-size, containers relying on the shared memory of the host keep it
+    if "shm_size" in resources and ipc != "private":
+        raise ValueError("--shm-size needs --ipc private, with the ipc namespace of the host the container uses the /dev/shm of the host.")
+    if ipc == "private":
+        resources["ipc"] = ipc
+    if cpuset == "auto":
+        resources["cpuset_cpus"], resources["cpuset_mems"] = numa_local_cpuset(architecture, num_gpus)
+    elif cpuset is not None:
+        resources["cpuset_cpus"] = format_cpu_list(parse_cpu_list(cpuset))
+    return resources
+
+
+def container_resources_from_labels(labels):
+    """Read the resource settings of a container from its labels.
+
+    Args:
+        labels (dict): labels of the container.
+
+    Returns:
+        dict: the settings of container_resource_options which are set.
+    """
+    return {key: labels[label] for key, (_, label) in container_resource_options.items() if labels.get(label)}
+
+
+def format_container_resources(labels):
+    """Format the resource settings of a container for mlc list, for example 'cpus=8 mem=64g cpuset=0-15/0'.
+
+    Args:
+        labels (dict): labels of the container.
+
+    Returns:
+        str: the settings, '-' if the container has no limits.
+    """
+    resources = container_resources_from_labels(labels)
+    parts = [f"{name}={resources[key]}" for key, name in (("cpus", "cpus"), ("memory", "mem"), ("ipc", "ipc"), ("shm_size", "shm")) if key in resources]
+    if "cpuset_cpus" in resources:
+        parts.append(f"cpuset={resources['cpuset_cpus']}" + (f"/{resources['cpuset_mems']}" if "cpuset_mems" in resources else ""))
+    return " ".join(parts) or "-"
+
+
+################################################################################################################################################
+# GPU allocation
+#
+# mlc create --allocate-gpus assigns specific GPUs to a container instead of passing the number of GPUs to docker, which gives every
+# container the first GPUs of the host. The assignments of all users are recorded in a ledger of the host. GPUs held by running mlc
+# containers are skipped, among the free GPUs the group with the fastest links (NVLink, XGMI) is selected, read from the output of
+# nvidia-smi topo -m or rocm-smi --showtopotype. With MLC_GPU_TOPOLOGY (a file with this output) and MLC_SYSFS_ROOT the allocation
+# can be reproduced with the topology of another host.
+
+# Ledger of the GPU assignments, shared by all users of the host (MLC_GPU_LEDGER overrides it)
+gpu_ledger_file = os.environ.get("MLC_GPU_LEDGER", "/var/tmp/aime-mlc/gpu-ledger.json")
+gpu_topology_file = os.environ.get("MLC_GPU_TOPOLOGY")    # file with the topology output, read instead of running the smi tool
+allocate_gpus_default = os.environ.get("MLC_ALLOCATE_GPUS", "").lower() in ("1", "true", "yes")
+gpu_reservation_seconds = 600       # assignments of containers which are still being created are kept for this time
+gpu_reservation_refresh_seconds = 60    # the creating mlc renews the reservation at this interval, see hold_gpu_reservation()
+gpu_topology_commands = {"CUDA": ["nvidia-smi", "topo", "-m"], "ROCM": ["rocm-smi", "--showtopotype"]}
+
+# Rank of the links between two GPUs, NV<n> (n bonded NVLinks) ranks above all PCIe connections
+gpu_link_scores = {"XGMI": 100, "PIX": 4, "PXB": 3, "PHB": 2, "NODE": 1, "PCIE": 1, "SYS": 0}
+
+
+def read_gpu_topology(architecture):
+    """Read the GPU topology output of nvidia-smi topo -m or rocm-smi --showtopotype.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA_ADA', 'ROCM6').
+
+    Returns:
+        str: the output, None if it is not available.
+    """
+    if gpu_topology_file:
+        try:
+            with open(gpu_topology_file) as topology_file:
+                return topology_file.read()
+        except OSError:
+            return None
+    command = next((command for prefix, command in gpu_topology_commands.items() if architecture.startswith(prefix)), None)
+    if command is None:
+        return None
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return process.stdout if process.returncode == 0 else None
+
+
+def parse_gpu_topology(output):
+    """Parse the link matrix of nvidia-smi topo -m or rocm-smi --showtopotype.
+
+    Both print a header row with the GPU columns followed by one row per GPU, for example:
+
+        	GPU0	GPU1	GPU2	CPU Affinity
+        GPU0	 X 	NV12	SYS	0-15
+        GPU1	NV12	 X 	SYS	0-15
+
+    Args:
+        output (str): the topology output.
+
+    Returns:
+        int, dict: number of GPUs and {(gpu, gpu): link} with the link type of every pair (e.g. 'NV12', 'XGMI', 'SYS').
+    """
+    columns, links, gpus = None, {}, set()
+    for line in (output or "").splitlines():
+        cells = line.split()
+        if columns is None:
+            # The header row lists the GPU columns before further columns like CPU Affinity
+            if cells and re.match(r"^GPU\d+$", cells[0]) and not line.startswith("GPU"):
+                columns = [int(cell[3:]) for cell in cells if re.match(r"^GPU\d+$", cell)]
+            continue
+        if not cells or not re.match(r"^GPU\d+$", cells[0]):
+            continue
+        gpu = int(cells[0][3:])
+        gpus.add(gpu)
+        for other_gpu, link in zip(columns, cells[1:]):
+            if other_gpu != gpu:
+                links[(gpu, other_gpu)] = link.upper()
+    return len(gpus), links
+
+
+def gpu_link_score(link):
+    """Rank the link between two GPUs, faster links get higher scores.
+
+    Args:
+        link (str): link type of the topology output (e.g. 'NV12', 'XGMI', 'PIX', 'SYS').
+
+    Returns:
+        int: the score.
+    """
+    match = re.match(r"^NV(\d+)$", link or "")
+    if match:
+        return 100 + int(match.group(1))
+    return gpu_link_scores.get(link, 0)
+
+
+def select_gpu_group(candidates, count, links, loads=None):
+    """Select the group of GPUs with the fewest assignments and the fastest links between each other.
+
+    Starting from every candidate, the GPU with the fewest assignments and the best links to the group is added until the group is
+    complete. Ties are resolved by the lowest device index, without topology information the least assigned first candidates are selected.
+
+    Args:
+        candidates (list): device indices of the free GPUs.
+        count (int): number of GPUs to be selected.
+        links (dict): {(gpu, gpu): link}, see parse_gpu_topology().
+        loads (dict, optional): {device index: number of containers the GPU is assigned to}. Defaults to None.
+
+    Returns:
+        list: the sorted device indices of the group.
+    """
+    loads = loads or {}
+    candidates = sorted(candidates)
+    best_group, best_score = None, None
+    for first_gpu in candidates:
+        group = [first_gpu]
+        while len(group) < count:
+            next_gpu = max(
+                (gpu for gpu in candidates if gpu not in group),
+                key=lambda gpu: (-loads.get(gpu, 0), sum(gpu_link_score(links.get((gpu, member))) for member in group), -gpu)
+            )
+            group.append(next_gpu)
+        score = (
+            -sum(loads.get(gpu, 0) for gpu in group),
+            sum(gpu_link_score(links.get((gpu, other_gpu))) for gpu in group for other_gpu in group if gpu < other_gpu)
+        )
+        if best_score is None or score > best_score:
+            best_group, best_score = sorted(group), score
+    return best_group
+
+
+def format_gpu_devices(devices):
+    """Format assigned device indices as --gpus value, for example [0, 1] as device=0,1."""
+    return "device=" + ",".join(str(device) for device in sorted(devices))
+
+
+def docker_gpus_option(num_gpus):
+    """Return the value of docker --gpus, a device list with several devices has to be quoted since docker parses it as csv."""
+    return f'"{num_gpus}"' if num_gpus.startswith("device=") and "," in num_gpus else num_gpus
+
+
+def rocm_device_nodes(devices, root=sysfs_root):
+    """Find the /dev/dri nodes of ROCm GPUs.
+
+    Args:
+        devices (list): device indices in the order of rocm-smi (PCI address order).
+        root (str, optional): root of the sysfs tree. Defaults to sysfs_root.
+
+    Returns:
+        list: paths of the card and render nodes, empty if a GPU has no nodes in sysfs.
+    """
+    gpus = list_gpu_numa_nodes("ROCM", root)
+    nodes = []
+    for device in devices:
+        if device >= len(gpus):
+            return []
+        try:
+            drm_nodes = os.listdir(os.path.join(root, "bus", "pci", "devices", gpus[device][0], "drm"))
+        except OSError:
+            return []
+        gpu_nodes = sorted(f"/dev/dri/{node}" for node in drm_nodes if re.match(r"^(card|renderD)\d+$", node))
+        if not gpu_nodes:
+            return []
+        nodes += gpu_nodes
+    return nodes
+
+
+def held_gpu_devices(gpu_count, exclude_tag=None):
+    """Find the GPUs of running and paused mlc containers of all users.
+
+    Args:
+        gpu_count (int): number of GPUs of the host.
+        exclude_tag (str, optional): container tag to be ignored. Defaults to None.
+
+    Returns:
+        dict: {device index: ['container (user)', ...]}.
+    """
+    held_devices = defaultdict(list)
+    for container in get_container_inventory():
+        if container.state not in ("running", "paused") or container.tag == exclude_tag:
+            continue
+        # ROCm containers without assigned GPUs access all GPUs
+        num_gpus = container.labels.get("aime.mlc.GPUS") or "all"
+        if container.labels.get("aime.mlc.ARCH", "").startswith("ROCM") and not num_gpus.startswith("device="):
+            num_gpus = "all"
+        for device in select_gpu_indices(num_gpus, gpu_count):
+            held_devices[device].append(f"{container.name} ({container.labels.get('aime.mlc.USER', '-')})")
+    return held_devices
+
+
+def update_gpu_ledger(update):
+    """Read, change and write the ledger of the GPU assignments while holding its lock.
+
+    The ledger is shared by all users, it is created writable for everyone and rewritten in place, since the sticky temporary
+    directory does not allow to replace the file of another user.
+
+    Args:
+        update (callable): called with the assignments {container tag: {"devices": list, "user": str, "time": float}},
+            changes them in place and returns the value update_gpu_ledger passes on.
+
+    Returns:
+        The result of update.
+    """
+    import fcntl
+
+    ledger_dir = os.path.dirname(gpu_ledger_file)
+    if not os.path.isdir(ledger_dir):
+        os.makedirs(ledger_dir, exist_ok=True)
+        try:
+            os.chmod(ledger_dir, 0o1777)
+        except OSError:
+            pass
+    created = not os.path.exists(gpu_ledger_file)
+    with open(gpu_ledger_file, "a+") as ledger:
+        if created:
+            try:
+                os.chmod(gpu_ledger_file, 0o666)
+            except OSError:
+                pass
+        fcntl.flock(ledger, fcntl.LOCK_EX)
+        ledger.seek(0)
+        try:
+            assignments = json.loads(ledger.read() or "{}")
+        except ValueError:
+            assignments = {}
+        if not isinstance(assignments, dict):
+            assignments = {}
+        result = update(assignments)
+        ledger.seek(0)
+        ledger.truncate()
+        json.dump(assignments, ledger, indent=1, sort_keys=True)
+    return result
+
+
+def allocate_gpus(architecture, num_gpus, container_tag):
+    """Assign specific GPUs to a container and record them in the ledger.
+
+    GPUs held by running mlc containers are skipped. Among the free GPUs, the ones with the fewest assignments to other containers
+    are preferred, then the group with the fastest links.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA_ADA', 'ROCM6').
+        num_gpus (str): number of GPUs, 'all' assigns all free GPUs.
+        container_tag (str): tag of the container the GPUs are assigned to.
+
+    Raises:
+        ValueError: if the GPUs of the host are unknown or not enough GPUs are free.
+
+    Returns:
+        str: the --gpus value of the container, for example device=2,3.
+    """
+    num_gpus = str(num_gpus).strip()
+    if num_gpus != "all" and (not num_gpus.isdigit() or int(num_gpus) == 0):
+        raise ValueError(f"Invalid number of GPUs to be assigned: {num_gpus}. Use a number or all.")
+    gpu_count, links = parse_gpu_topology(read_gpu_topology(architecture))
+    gpu_count = gpu_count or len(list_gpu_numa_nodes(architecture))
+    if gpu_count == 0:
+        raise ValueError(f"No {architecture} GPUs found to be assigned.")
+    held_devices = held_gpu_devices(gpu_count, container_tag)
+    free_devices = [device for device in range(gpu_count) if device not in held_devices]
+    count = len(free_devices) if num_gpus == "all" else int(num_gpus)
+    if count == 0 or count > len(free_devices):
+        held = ", ".join(f"GPU{device}: {', '.join(containers)}" for device, containers in sorted(held_devices.items()))
+        raise ValueError(f"{len(free_devices)} of {gpu_count} GPUs are free, {num_gpus} requested. Held by running containers: {held}")
+    existing_tags = {container.tag for container in get_container_inventory()}
+
+    def assign(assignments):
+        # Assignments of removed containers are dropped, containers which are still being created keep their reservation
+        for tag in list(assignments):
+            if tag not in existing_tags and (tag == container_tag or time.time() - assignments[tag].get("time", 0) > gpu_reservation_seconds):
+                del assignments[tag]
+        loads = defaultdict(int)
+        for assignment in assignments.values():
+            for device in assignment.get("devices", []):
+                loads[device] += 1
+        group = select_gpu_group(free_devices, count, links, loads)
+        assignments[container_tag] = {"devices": group, "user": user_name, "time": time.time()}
+        return group
+
+    return format_gpu_devices(update_gpu_ledger(assign))
+
+
+def hold_gpu_reservation(container_tag):
+    """Renew the reservation of the GPUs assigned to a container while it is created, so that a slow image setup or data cache
+    preparation does not let the reservation expire and another mlc create assign the same GPUs.
+
+    Args:
+        container_tag (str): tag of the container.
+
+    Returns:
+        threading.Event: to be set when the container exists or its creation failed.
+    """
+    created = threading.Event()
+
+    def renew(assignments):
+        if container_tag in assignments:
+            assignments[container_tag]["time"] = time.time()
+
+    def refresh():
+        while not created.wait(gpu_reservation_refresh_seconds):
+            try:
+                update_gpu_ledger(renew)
+            except OSError:
+                pass
+
+    threading.Thread(target=refresh, daemon=True).start()
+    return created
+
+
+def release_gpus(container_tag):
+    """Remove the GPU assignment of a container from the ledger.
+
+    Args:
+        container_tag (str): tag of the container.
+    """
+    if not os.path.exists(gpu_ledger_file):
+        return
+    try:
+        update_gpu_ledger(lambda assignments: assignments.pop(container_tag, None))
+    except OSError:
+        pass
+
+
+def gpu_conflicts(container_tag, labels):
+    """Find running mlc containers holding the GPUs assigned to a container, checked before the container is started.
+
+    Args:
+        container_tag (str): tag of the container.
+        labels (dict): labels of the container.
+
+    Returns:
+        str: the GPUs held by other containers, for example 'GPU2: train (alice)', empty if the container has no assigned GPUs or they are free.
+    """
+    num_gpus = labels.get("aime.mlc.GPUS") or ""
+    if not num_gpus.startswith("device="):
+        return ""
+    gpu_count, _ = parse_gpu_topology(read_gpu_topology(labels.get("aime.mlc.ARCH", "")))
+    gpu_count = gpu_count or len(list_gpu_numa_nodes(labels.get("aime.mlc.ARCH", "")))
+    held_devices = held_gpu_devices(gpu_count, container_tag)
+    return ", ".join(
+        f"GPU{device}: {', '.join(held_devices[device])}" for device in select_gpu_indices(num_gpus, gpu_count) if device in held_devices
+    )
+
+
+################################################################################################################################################
+# Data cache
+#
+# mlc create --data-cache <dir> puts a read-through cache on a local disk between a network data directory and /data. The cache
+# holds a view of the data directory, which is mounted as /data (read-only): a file of the view is either the cached copy or a
+# symlink to the uncached file, the data directory itself is mounted read-write as /mlc-data-origin. The index keeps the mtime
+# of each directory, so mlc create and the start of the cache process only list the directories changed since the last sync.
+# While a container of the cache runs, a detached process watches with inotify which files are opened: a file opened through its
+# symlink is a miss and is copied into the view, a cached file opened is a hit. Files which are not used for the longest time
+# are replaced by their symlink again when the cache exceeds its size. The cached files, their last access and the hit and miss
+# counters are kept in an SQLite index in the cache directory, mlc stats shows the counters and mlc data warm fills the cache in
+# advance with parallel readers.
+
+data_cache_origin = "/mlc-data-origin"     # Mount point of the uncached data directory in the container
+data_cache_jobs = 4                         # Parallel copies of missed files
+data_cache_flush_interval = 5               # Seconds between two updates of the counters and access times in the index
+data_cache_check_interval = 10              # Seconds between two checks if a container of the cache is still running
+data_cache_tmp_suffix = ".mlc-tmp"          # File being copied into the view, its existence keeps other copiers away
+data_cache_stale_tmp_seconds = 3600         # Left over copies of interrupted copiers are removed after this time
+data_cache_copy_block_size = 8 * 1024 * 1024
+data_cache_stats_format_string = "{:<30}{:<20}{:<10}{:<12}{:<12}{:<12}{}"
+data_cache_stats_titles = ["CONTAINER", "USED / SIZE", "FILES", "HITS", "MISSES", "EVICTIONS", "HIT RATE"]
+
+
+class Inotify:
+    """Minimal inotify binding on top of ctypes, the data cache needs the open events of files.
+
+    Raises:
+        OSError: if the kernel provides no inotify instance.
+    """
+
+    IN_CLOSE_WRITE = 0x8
+    IN_OPEN = 0x20
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+
+    def __init__(self):
+        import ctypes
+
+        self.ctypes = ctypes
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask):
+        """Watch a directory and return the watch descriptor."""
+        watch_descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if watch_descriptor < 0:
+            errno = self.ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return watch_descriptor
+
+    def read_events(self, timeout):
+        """Wait up to timeout seconds for events and return them as (watch descriptor, mask, name) tuples."""
+        import select
+        import struct
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        data = os.read(self.fd, 1024 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            watch_descriptor, mask, _, name_length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + name_length].rstrip(b"\0")
+            events.append((watch_descriptor, mask, os.fsdecode(name)))
+            offset += 16 + name_length
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def get_data_cache_dir(cache_root, data_dir):
+    """Return the cache directory of a data directory. Each user has an own cache, the view belongs to the user of the container.
+
+    Args:
+        cache_root (str): directory given with --data-cache.
+        data_dir (str): the data directory.
+
+    Returns:
+        str: the cache directory.
+    """
+    import hashlib
+
+    data_dir_hash = hashlib.sha256(os.path.realpath(data_dir).encode()).hexdigest()[:16]
+    return os.path.join(os.path.realpath(cache_root), f"data-{user_id}-{data_dir_hash}")
+
+
+def open_data_cache_index(cache_dir):
+    """Open the index of a data cache and create its tables.
+
+    Args:
+        cache_dir (str): the cache directory.
+
+    Returns:
+        sqlite3.Connection: the connection.
+    """
+    import sqlite3
+
+    connection = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, access REAL)")
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+    # mtime of every directory of the data directory at the last sync of the view, NULL if it has to be listed again
+    connection.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER)")
+    connection.commit()
+    return connection
+
+
+def read_data_cache_meta(connection):
+    """Return the meta data of a data cache: origin (data directory), size_limit (bytes) and the counters hits, misses, warmed and evictions."""
+    meta = {"hits": 0, "misses": 0, "warmed": 0, "evictions": 0}
+    meta.update(connection.execute("SELECT key, value FROM meta").fetchall())
+    return meta
+
+
+def add_data_cache_counters(connection, **counters):
+    """Add to the counters of a data cache, for example add_data_cache_counters(connection, hits=3)."""
+    for name, value in counters.items():
+        if value:
+            connection.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", (name, value)
+            )
+    connection.commit()
+
+
+def data_cache_symlink(cache_dir, relative_path):
+    """Replace the view entry of a file by the symlink to the uncached file, atomically so that readers never miss the file.
+
+    Args:
+        cache_dir (str): the cache directory.
+        relative_path (str): path of the file relative to the data directory.
+    """
+    view_path = os.path.join(cache_dir, "view", relative_path)
+    temporary_link = f"{view_path}.{os.getpid()}{data_cache_tmp_suffix}-link"
+    os.symlink(os.path.join(data_cache_origin, relative_path), temporary_link)
+    os.replace(temporary_link, view_path)
+
+
+def sync_data_cache_view(cache_dir, data_dir, connection):
+    """Bring the view in line with the data directory: new files get a symlink, cached copies of changed or removed files are dropped.
+
+    The index keeps the mtime of every directory of the data directory, only directories changed since the last sync are listed
+    again, all others cost a single stat. Uncached files are symlinks and always current, cached copies are compared with their
+    file one by one.
+
+    Args:
+        cache_dir (str): the cache directory.
+        data_dir (str): the data directory.
+        connection (sqlite3.Connection): index of the cache.
+
+    Returns:
+        list: relative paths of all directories of the data directory.
+    """
+    import shutil
+
+    view_dir = os.path.join(cache_dir, "view")
+    cached_files = {path: (size, mtime) for path, size, mtime in connection.execute("SELECT path, size, mtime FROM files")}
+    known_dirs = dict(connection.execute("SELECT path, mtime_ns FROM dirs"))
+    known_subdirs = defaultdict(list)
+    for relative_dir in known_dirs:
+        if relative_dir:
+            known_subdirs[os.path.dirname(relative_dir)].append(relative_dir)
+
+    directories, pending_dirs, synced_dirs = [], [""], []
+    now_ns = time.time_ns()
+    while pending_dirs:
+        relative_dir = pending_dirs.pop()
+        try:
+            dir_mtime_ns = os.stat(os.path.join(data_dir, relative_dir)).st_mtime_ns
+        except OSError:
+            continue
+        directories.append(relative_dir)
+        if known_dirs.get(relative_dir) == dir_mtime_ns:
+            pending_dirs.extend(known_subdirs[relative_dir])
+            continue
+
+        # New or changed directory: removed files and directories leave the view, new files get a symlink
+        view_subdir = os.path.join(view_dir, relative_dir)
+        os.makedirs(view_subdir, exist_ok=True)
+        origin_files, origin_dirs = set(), set()
+        with os.scandir(os.path.join(data_dir, relative_dir)) as entries:
+            for entry in entries:
+                (origin_dirs if entry.is_dir(follow_symlinks=False) else origin_files).add(entry.name)
+        with os.scandir(view_subdir) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if data_cache_tmp_suffix in entry.name:
+                    # Left over copies of interrupted copiers
+                    try:
+                        if now_ns - entry.stat(follow_symlinks=False).st_mtime_ns > data_cache_stale_tmp_seconds * 10**9:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass
+                elif entry.is_dir(follow_symlinks=False):
+                    if entry.name not in origin_dirs:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        prefix = relative_path + os.sep
+                        connection.execute("DELETE FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+                elif entry.name not in origin_files:
+                    os.remove(entry.path)
+                    connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+        for file_name in origin_files:
+            if not os.path.lexists(os.path.join(view_subdir, file_name)):
+                data_cache_symlink(cache_dir, os.path.join(relative_dir, file_name))
+        # A directory changed within the mtime granularity of the file system is listed again by the next sync
+        synced_dirs.append((relative_dir, dir_mtime_ns if now_ns - dir_mtime_ns > 2 * 10**9 else None))
+        pending_dirs.extend(os.path.join(relative_dir, dir_name) for dir_name in origin_dirs)
+
+    connection.execute("DELETE FROM dirs")
+    synced = dict(synced_dirs)
+    connection.executemany(
+        "INSERT INTO dirs (path, mtime_ns) VALUES (?, ?)",
+        [(relative_dir, synced[relative_dir] if relative_dir in synced else known_dirs[relative_dir]) for relative_dir in directories]
+    )
+
+    # Cached copies of changed or removed files
+    for relative_path, cached in cached_files.items():
+        view_path = os.path.join(view_dir, relative_path)
+        try:
+            origin_stat = os.stat(os.path.join(data_dir, relative_path))
+        except FileNotFoundError:
+            if os.path.lexists(view_path):
+                os.remove(view_path)
+            connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+            continue
+        except OSError:
+            continue
+        if (origin_stat.st_size, origin_stat.st_mtime) != cached or not os.path.isfile(view_path) or os.path.islink(view_path):
+            data_cache_symlink(cache_dir, relative_path)
+            connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+    connection.commit()
+    return directories
+
+
+def prepare_data_cache(cache_root, data_dir, size_limit):
+    """Create or update the data cache of a data directory.
+
+    Args:
+        cache_root (str): directory given with --data-cache.
+        data_dir (str): the data directory.
+        size_limit (int): maximal size of the cached files in bytes.
+
+    Returns:
+        str: the cache directory.
+    """
+    cache_dir = get_data_cache_dir(cache_root, data_dir)
+    os.makedirs(os.path.join(cache_dir, "view"), exist_ok=True)
+    connection = open_data_cache_index(cache_dir)
+    try:
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('origin', ?)", (os.path.realpath(data_dir),))
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('size_limit', ?)", (size_limit,))
+        connection.commit()
+        sync_data_cache_view(cache_dir, os.path.realpath(data_dir), connection)
+    finally:
+        connection.close()
+    return cache_dir
+
+
+def check_data_cache_options(cache_root, cache_size):
+    """Validate --data-cache and --data-cache-size of mlc create.
+
+    Args:
+        cache_root (str): directory given with --data-cache, None without data cache.
+        cache_size (str): size given with --data-cache-size.
+
+    Raises:
+        ValueError: if an option is missing or not valid.
+
+    Returns:
+        int: the size of the cache in bytes, None without data cache.
+    """
+    if not cache_root:
+        if cache_size:
+            raise ValueError("--data-cache-size needs the directory of the cache, set with --data-cache.")
+        return None
+    if not cache_size:
+        raise ValueError("--data-cache needs the size of the cache, for example --data-cache-size 500G.")
+    if not os.path.isdir(os.path.expanduser(cache_root)):
+        raise ValueError(f"Data cache directory does not exist: {cache_root}")
+    return parse_size(cache_size)
+
+
+def copy_into_data_cache(cache_dir, data_dir, relative_path):
+    """Copy an uncached file into the view. Safe to be called by several threads and processes at the same time.
+
+    Args:
+        cache_dir (str): the cache directory.
+        data_dir (str): the data directory.
+        relative_path (str): path of the file relative to the data directory.
+
+    Returns:
+        tuple: size and mtime of the copied file, None if the file is cached already, being copied by another copier or gone.
+    """
+    view_path = os.path.join(cache_dir, "view", relative_path)
+    temporary_path = f"{view_path}{data_cache_tmp_suffix}"
+    if not os.path.islink(view_path):
+        return None
+    try:
+        # The copy is created exclusively before the data directory is read, a copier coming second leaves the file alone
+        temporary_fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        # Left over by an interrupted copier, it is replaced once it is old enough
+        try:
+            if time.time() - os.lstat(temporary_path).st_mtime <= data_cache_stale_tmp_seconds:
+                return None
+            os.remove(temporary_path)
+            temporary_fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except OSError:
+            return None
+    except OSError:
+        return None
+    try:
+        with os.fdopen(temporary_fd, "wb") as temporary_file, open(os.path.join(data_dir, relative_path), "rb") as origin_file:
+            origin_stat = os.fstat(origin_file.fileno())
+            for block in iter(lambda: origin_file.read(data_cache_copy_block_size), b""):
+                temporary_file.write(block)
+            # A file written while it was copied is left uncached, the writer is seen again when it closes the file
+            copied_stat = os.fstat(origin_file.fileno())
+            if (copied_stat.st_size, copied_stat.st_mtime_ns) != (origin_stat.st_size, origin_stat.st_mtime_ns):
+                raise OSError("The file changed while it was copied.")
+        os.utime(temporary_path, ns=(origin_stat.st_atime_ns, origin_stat.st_mtime_ns))
+        os.replace(temporary_path, view_path)
+    except OSError:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        return None
+    return origin_stat.st_size, origin_stat.st_mtime
+
+
+def record_data_cache_files(connection, copied_files):
+    """Add copied files to the index.
+
+    Args:
+        connection (sqlite3.Connection): index of the cache.
+        copied_files (list): (relative path, size, mtime) of the copied files.
+    """
+    now = time.time()
+    connection.executemany(
+        "INSERT OR REPLACE INTO files (path, size, mtime, access) VALUES (?, ?, ?, ?)",
+        [(relative_path, size, mtime, now) for relative_path, size, mtime in copied_files]
+    )
+    connection.commit()
+
+
+def evict_data_cache(cache_dir, connection):
+    """Replace the least recently used files by their symlinks until the cached files fit into the size of the cache.
+
+    Args:
+        cache_dir (str): the cache directory.
+        connection (sqlite3.Connection): index of the cache.
+
+    Returns:
+        int: number of evicted files.
+    """
+    size_limit = int(read_data_cache_meta(connection).get("size_limit") or 0)
+    used_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+    evicted_files = []
+    if used_size > size_limit:
+        for relative_path, size in connection.execute("SELECT path, size FROM files ORDER BY access").fetchall():
+            if used_size <= size_limit:
+                break
+            try:
+                data_cache_symlink(cache_dir, relative_path)
+            except OSError:
+                pass
+            evicted_files.append(relative_path)
+            used_size -= size
+    connection.executemany("DELETE FROM files WHERE path = ?", [(relative_path,) for relative_path in evicted_files])
+    add_data_cache_counters(connection, evictions=len(evicted_files))
+    return len(evicted_files)
+
+
+def read_data_cache_stats(cache_dir):
+    """Read the state of a data cache for mlc stats.
+
+    Args:
+        cache_dir (str): the cache directory.
+
+    Returns:
+        dict: size_limit, used, files, hits, misses, warmed and evictions, None if the cache does not exist.
+    """
+    import sqlite3
+
+    if not os.path.isfile(os.path.join(cache_dir, "index.sqlite")):
+        return None
+    try:
+        connection = open_data_cache_index(cache_dir)
+        try:
+            stats = read_data_cache_meta(connection)
+            stats["files"], stats["used"] = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return stats
+
+
+def data_cache_in_use(cache_dir):
+    """Return True if a running container uses the data cache."""
+    invalidate_container_inventory()
+    return any(
+        container.state in ("running", "paused") and container.labels.get("aime.mlc.DATA_CACHE") == cache_dir
+        for container in get_container_inventory()
+    )
+
+
+def run_data_cache(cache_dir):
+    """Serve a data cache while a container using it is running: copy missed files, count hits and misses and evict old files.
+
+    Only one process serves a cache, further calls return at once.
+
+    Args:
+        cache_dir (str): the cache directory.
+    """
+    import fcntl
+    import queue
+
+    lock_file = open(os.path.join(cache_dir, "cache.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+
+    connection = open_data_cache_index(cache_dir)
+    data_dir = read_data_cache_meta(connection)["origin"]
+    view_dir = os.path.join(cache_dir, "view")
+    directories = sync_data_cache_view(cache_dir, data_dir, connection)
+
+    # The data directory shows the misses and changes of the data, the view the hits
+    inotify = Inotify()
+    origin_mask = Inotify.IN_OPEN | Inotify.IN_CLOSE_WRITE | Inotify.IN_MOVED_TO | Inotify.IN_MOVED_FROM | Inotify.IN_CREATE | Inotify.IN_DELETE
+    watches = {}
+
+    def watch_directory(relative_dir):
+        try:
+            watches[inotify.add_watch(os.path.join(data_dir, relative_dir), origin_mask)] = ("origin", relative_dir)
+            watches[inotify.add_watch(os.path.join(view_dir, relative_dir), Inotify.IN_OPEN)] = ("view", relative_dir)
+        except OSError as e:
+            # Too many directories for fs.inotify.max_user_watches, files of the remaining directories are not cached on access
+            print(f"Data cache {cache_dir}: directory {relative_dir} not watched: {e}", flush=True)
+
+    for relative_dir in directories:
+        watch_directory(relative_dir)
+
+    pending_copies = queue.Queue()
+    copied_files = queue.Queue()
+    size_limit = int(read_data_cache_meta(connection).get("size_limit") or 0)
+
+    def copy_worker():
+        while True:
+            relative_path = pending_copies.get()
+            if relative_path is None:
+                return
+            copied = copy_into_data_cache(cache_dir, data_dir, relative_path)
+            if copied is not None:
+                copied_files.put((relative_path,) + copied)
+
+    workers = [threading.Thread(target=copy_worker, daemon=True) for _ in range(data_cache_jobs)]
+    for worker in workers:
+        worker.start()
+
+    hits, misses, accesses = 0, 0, {}
+    last_flush = last_check = time.monotonic()
+    while True:
+        for watch_descriptor, mask, name in inotify.read_events(1.0):
+            if watch_descriptor not in watches or not name or data_cache_tmp_suffix in name:
+                continue
+            kind, relative_dir = watches[watch_descriptor]
+            relative_path = os.path.join(relative_dir, name)
+            view_path = os.path.join(view_dir, relative_path)
+            try:
+                if mask & Inotify.IN_ISDIR:
+                    if kind == "origin" and mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                        os.makedirs(view_path, exist_ok=True)
+                        watch_directory(relative_path)
+                elif kind == "view":
+                    hits += 1
+                    accesses[relative_path] = time.time()
+                elif mask & Inotify.IN_OPEN:
+                    # Opened through the symlink, unless a copier (mlc data warm or this process) is reading it right now
+                    if os.path.islink(view_path) and not os.path.exists(f"{view_path}{data_cache_tmp_suffix}"):
+                        misses += 1
+                        if os.path.getsize(os.path.join(data_dir, relative_path)) <= size_limit:
+                            pending_copies.put(relative_path)
+                elif mask & (Inotify.IN_CLOSE_WRITE | Inotify.IN_MOVED_TO | Inotify.IN_CREATE):
+                    # New or changed file of the data directory, a cached copy is outdated
+                    if not os.path.islink(view_path):
+                        data_cache_symlink(cache_dir, relative_path)
+                        connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+                elif mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+                    if os.path.lexists(view_path):
+                        os.remove(view_path)
+                    connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+            except OSError:
+                # The file vanished in between, the next event or the next start of the cache brings the view in line
+                pass
+
+        now = time.monotonic()
+        if now - last_flush >= data_cache_flush_interval:
+            new_files = []
+            while not copied_files.empty():
+                new_files.append(copied_files.get())
+            record_data_cache_files(connection, new_files)
+            connection.executemany("UPDATE files SET access = ? WHERE path = ?", [(access, path) for path, access in accesses.items()])
+            add_data_cache_counters(connection, hits=hits, misses=misses)
+            evict_data_cache(cache_dir, connection)
+            size_limit = int(read_data_cache_meta(connection).get("size_limit") or 0)
+            hits, misses, accesses = 0, 0, {}
+            last_flush = now
+        if now - last_check >= data_cache_check_interval:
+            last_check = now
+            if not data_cache_in_use(cache_dir):
+                break
+
+    for _ in workers:
+        pending_copies.put(None)
+    for worker in workers:
+        worker.join()
+    new_files = []
+    while not copied_files.empty():
+        new_files.append(copied_files.get())
+    record_data_cache_files(connection, new_files)
+    add_data_cache_counters(connection, hits=hits, misses=misses)
+    evict_data_cache(cache_dir, connection)
+    connection.close()
+    inotify.close()
+
+
+def start_data_cache(labels):
+    """Start serving the data cache of a container in a detached process, which exits after the last container of the cache stopped.
+
+    Args:
+        labels (dict): labels of the container, nothing is started if it has no data cache.
+    """
+    cache_dir = (labels or {}).get("aime.mlc.DATA_CACHE")
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+    server = "import sys; sys.path[0] = sys.argv[1]; import mlc; mlc.run_data_cache(sys.argv[2])"
+    try:
+        with open(os.path.join(cache_dir, "cache.log"), "a") as log_file:
+            subprocess.Popen(
+                [sys.executable, "-c", server, os.path.dirname(os.path.abspath(__file__)), cache_dir],
+                stdin=subprocess.DEVNULL, stdout=log_file, stderr=log_file, start_new_session=True
+            )
+    except OSError:
+        pass
+
+
+def warm_data_cache(cache_dir, relative_paths, jobs=8, progress=None):
+    """Copy files into a data cache in advance with parallel readers, as long as they fit into the cache.
+
+    Args:
+        cache_dir (str): the cache directory.
+        relative_paths (iterable): paths of the files relative to the data directory.
+        jobs (int, optional): number of parallel readers. Defaults to 8.
+        progress (callable, optional): called with the number of files and bytes copied so far. Defaults to None.
+
+    Returns:
+        dict: copied, cached (already cached), skipped (missing or too large), bytes and seconds.
+    """
+    import queue
+
+    connection = open_data_cache_index(cache_dir)
+    meta = read_data_cache_meta(connection)
+    data_dir, size_limit = meta["origin"], int(meta.get("size_limit") or 0)
+    used_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+    result = {"copied": 0, "cached": 0, "skipped": 0, "bytes": 0, "seconds": 0.0}
+    start_time = time.monotonic()
+
+    # The files are copied in the order of the list until the cache is full, files warmed earlier are not evicted for them
+    pending_copies = queue.Queue()
+    for relative_path in relative_paths:
+        view_path = os.path.join(cache_dir, "view", relative_path)
+        if os.path.isfile(view_path) and not os.path.islink(view_path):
+            result["cached"] += 1
+            continue
+        try:
+            size = os.path.getsize(os.path.join(data_dir, relative_path))
+        except OSError:
+            result["skipped"] += 1
+            continue
+        if not os.path.islink(view_path) or used_size + size > size_limit:
+            result["skipped"] += 1
+            continue
+        used_size += size
+        pending_copies.put(relative_path)
+
+    copied_files = []
+    copied_lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                relative_path = pending_copies.get_nowait()
+            except queue.Empty:
+                return
+            copied = copy_into_data_cache(cache_dir, data_dir, relative_path)
+            with copied_lock:
+                if copied is None:
+                    result["skipped"] += 1
+                else:
+                    copied_files.append((relative_path,) + copied)
+                    result["copied"] += 1
+                    result["bytes"] += copied[0]
+                if progress:
+                    progress(result["copied"], result["bytes"])
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, pending_copies.qsize())))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    record_data_cache_files(connection, copied_files)
+    add_data_cache_counters(connection, warmed=len(copied_files))
+    evict_data_cache(cache_dir, connection)
+    connection.close()
+    result["seconds"] = time.monotonic() - start_time
+    return result
+
+
+def list_data_cache_files(cache_dir, file_list=None):
+    """List the files to be warmed, relative to the data directory.
+
+    Args:
+        cache_dir (str): the cache directory.
+        file_list (str, optional): file with one path per line ('-': stdin), relative to /data, below /data or below the data
+            directory of the host. Defaults to None (all files of the data directory).
+
+    Returns:
+        list: the relative paths.
+    """
+    connection = open_data_cache_index(cache_dir)
+    try:
+        data_dir = read_data_cache_meta(connection)["origin"]
+    finally:
+        connection.close()
+    if file_list is None:
+        return [
+            os.path.relpath(os.path.join(directory, file_name), data_dir)
+            for directory, _, file_names in os.walk(data_dir) for file_name in sorted(file_names)
+        ]
+    with (sys.stdin if file_list == "-" else open(file_list)) as list_file:
+        lines = [line.strip() for line in list_file if line.strip() and not line.startswith("#")]
+    relative_paths = []
+    for line in lines:
+        for prefix in (data_dir, "/data", data_cache_origin):
+            if line == prefix or line.startswith(prefix.rstrip("/") + "/"):
+                line = line[len(prefix):]
+                break
+        relative_path = os.path.normpath(line.lstrip("/"))
+        if relative_path != "." and not relative_path.startswith(".."):
+            relative_paths.append(relative_path)
+    return relative_paths
+
+
+def print_data_cache_stats(containers):
+    """Print the state of the data caches of running containers for mlc stats, nothing if no container has a data cache.
+
+    Args:
+        containers (iterable): ContainerInfo of the containers.
+    """
+    rows = []
+    for container in containers:
+        cache_dir = container.labels.get("aime.mlc.DATA_CACHE")
+        stats = read_data_cache_stats(cache_dir) if cache_dir and container.state == "running" else None
+        if stats is None:
+            continue
+        accesses = stats["hits"] + stats["misses"]
+        rows.append([
+            container.name,
+            f"{format_size(stats['used'])} / {format_size(int(stats.get('size_limit') or 0))}",
+            stats["files"],
+            stats["hits"],
+            stats["misses"],
+            stats["evictions"],
+            f"{100 * stats['hits'] / accesses:.1f}%" if accesses else "-",
+        ])
+    if rows:
+        print(f"{INFO}Data caches of the running containers:{RESET}")
+        print(data_cache_stats_format_string.format(*data_cache_stats_titles))
+        print("\n".join(data_cache_stats_format_string.format(*row) for row in rows) + "\n")
+
+
+################################################################################################################################################
+# Shared model store
+#
+# mlc models keeps one copy of identical model files of all mlc models directories. The files are hashed (sha256) in parallel from
+# mmap'ed reads, the hashes are cached in an SQLite index of the store keyed on device, inode, size and mtime, so a scan only reads
+# new and changed files. mlc models dedup adds every content to the host wide store, a directory of objects named by their hash, and
+# replaces the other copies by reflinks (copy-on-write clones, btrfs and xfs) or, where the file system has no reflinks, by
+# hardlinks to the store object. Hardlinked objects are read-only, since a change of one copy would change all of them. The store
+# has to be on the file system of the models directories. mlc models du reports the shared and the reclaimable space, mlc models
+# verify hashes all files and store objects again and reports the ones whose content no longer matches.
+
+# Store of the model files, shared by all users of the host (MLC_MODELS_STORE overrides it)
+models_store_dir = os.environ.get("MLC_MODELS_STORE", "/var/lib/aime-mlc/models-store")
+models_min_file_size = 1024 * 1024              # Smaller files (configs, tokenizers) are not deduplicated
+models_hash_block_size = 64 * 1024 * 1024       # Bytes of the mmap'ed file hashed at once
+models_ficlone = 0x40049409                     # ioctl FICLONE, clones the extents of a file (reflink)
+
+ModelFile = namedtuple("ModelFile", ["path", "device", "inode", "size", "mtime_ns", "hash", "linked"], defaults=(None, None))
+
+
+def list_models_dirs(all_users=False):
+    """List the models directories of the mlc containers.
+
+    Args:
+        all_users (bool, optional): include the containers of all users. Defaults to False.
+
+    Returns:
+        list: the existing models directories, without duplicates.
+    """
+    containers = get_container_inventory() if all_users else get_container_inventory().user_containers(user_name)
+    models_dirs = [container.labels.get("aime.mlc.MODELS_MOUNT") for container in containers]
+    return list(dict.fromkeys(os.path.realpath(models_dir) for models_dir in models_dirs if models_dir and os.path.isdir(models_dir)))
+
+
+def scan_model_files(models_dirs, min_size=models_min_file_size):
+    """List the regular files of models directories, symlinks are not followed.
+
+    Args:
+        models_dirs (list): the models directories.
+        min_size (int, optional): smaller files are left out. Defaults to models_min_file_size.
+
+    Returns:
+        list: ModelFile of the files, without hash.
+    """
+    import stat
+
+    files, seen_paths = [], set()
+    for models_dir in models_dirs:
+        for directory, _, file_names in os.walk(models_dir):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                try:
+                    file_stat = os.lstat(path)
+                except OSError:
+                    continue
+                if path in seen_paths or not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size < max(min_size, 1):
+                    continue
+                seen_paths.add(path)
+                files.append(ModelFile(path, file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns))
+    return files
+
+
+def make_shared_dir(directory):
+    """Create a directory of the store, writable for all users like /tmp (the sticky bit protects the entries of other users)."""
+    if os.path.isdir(directory):
+        return
+    os.makedirs(directory, exist_ok=True)
+    try:
+        os.chmod(directory, 0o1777)
+    except OSError:
+        pass
+
+
+def open_models_index():
+    """Open the index of the model store and create its tables.
+
+    The index is shared by all users, it uses the rollback journal since the WAL files would belong to the first user only.
+
+    Returns:
+        sqlite3.Connection: the connection.
+    """
+    import sqlite3
+
+    make_shared_dir(models_store_dir)
+    index_file = os.path.join(models_store_dir, "index.sqlite")
+    created = not os.path.exists(index_file)
+    connection = sqlite3.connect(index_file, timeout=60)
+    if created:
+        try:
+            os.chmod(index_file, 0o666)
+        except OSError:
+            pass
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, hash TEXT, linked TEXT)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS files_by_hash ON files (hash)")
+    connection.commit()
+    return connection
+
+
+def hash_file_mmap(path):
+    """Compute the sha256 of a file from mmap'ed reads. hashlib releases the GIL, so several files are hashed in parallel by threads.
+
+    Args:
+        path (str): the file.
+
+    Returns:
+        str: the hex digest.
+    """
+    import hashlib
+    import mmap
+
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as model_file:
+        size = os.fstat(model_file.fileno()).st_size
+        if size == 0:
+            return file_hash.hexdigest()
+        with mmap.mmap(model_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            if hasattr(mapped_file, "madvise"):
+                mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped_file) as mapped_view:
+                for offset in range(0, size, models_hash_block_size):
+                    file_hash.update(mapped_view[offset:offset + models_hash_block_size])
+    return file_hash.hexdigest()
+
+
+def hash_model_files(files, connection, jobs=4, rehash=False, progress=None):
+    """Add the sha256 to model files, cached hashes are used for files with unchanged device, inode, size and mtime.
+
+    Args:
+        files (list): ModelFile of the files.
+        connection (sqlite3.Connection): index of the store.
+        jobs (int, optional): number of files hashed in parallel. Defaults to 4.
+        rehash (bool, optional): hash all files again (mlc models verify). Defaults to False.
+        progress (callable, optional): called with the number of hashed files and bytes. Defaults to None.
+
+    Returns:
+        list, list: ModelFile of the hashed files and (ModelFile, error) of the files which could not be read.
+    """
+    import queue
+
+    cached_files = {
+        path: (device, inode, size, mtime_ns, file_hash, linked)
+        for path, device, inode, size, mtime_ns, file_hash, linked in connection.execute("SELECT * FROM files")
+    }
+    hashed_files, new_files, failed_files, pending_files = [], [], [], queue.Queue()
+    for model_file in files:
+        cached = cached_files.get(model_file.path)
+        if not rehash and cached and cached[:4] == (model_file.device, model_file.inode, model_file.size, model_file.mtime_ns):
+            hashed_files.append(model_file._replace(hash=cached[4], linked=cached[5]))
+        else:
+            # A rehashed file keeps its link state as long as it is the same file
+            linked = cached[5] if cached and cached[:4] == (model_file.device, model_file.inode, model_file.size, model_file.mtime_ns) else None
+            pending_files.put(model_file._replace(linked=linked))
+
+    results_lock = threading.Lock()
+    hashed_size = [0, 0]
+
+    def worker():
+        while True:
+            try:
+                model_file = pending_files.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = model_file._replace(hash=hash_file_mmap(model_file.path))
+            except (OSError, ValueError) as e:
+                with results_lock:
+                    failed_files.append((model_file, str(e)))
+                continue
+            with results_lock:
+                hashed_files.append(result)
+                new_files.append(result)
+                hashed_size[0] += 1
+                hashed_size[1] += model_file.size
+                if progress:
+                    progress(hashed_size[0], hashed_size[1])
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, pending_files.qsize())))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if not rehash:
+        record_model_files(connection, new_files)
+    return hashed_files, failed_files
+
+
+def record_model_files(connection, files):
+    """Store the hashes and link states of model files in the index."""
+    connection.executemany(
+        "INSERT OR REPLACE INTO files (path, device, inode, size, mtime_ns, hash, linked) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [tuple(model_file) for model_file in files]
+    )
+    connection.commit()
+
+
+def get_models_store_object(file_hash):
+    """Return the path of the store object of a content."""
+    return os.path.join(models_store_dir, "sha256", file_hash[:2], file_hash)
+
+
+def clone_file(source, destination):
+    """Create destination as reflink of source, the files share their extents until one of them is changed.
+
+    Args:
+        source (str): the existing file.
+        destination (str): the new file.
+
+    Raises:
+        OSError: if the file system does not support reflinks.
+    """
+    import fcntl
+
+    with open(source, "rb") as source_file:
+        destination_fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            fcntl.ioctl(destination_fd, models_ficlone, source_file.fileno())
+        except OSError:
+            os.close(destination_fd)
+            os.remove(destination)
+            raise
+        os.close(destination_fd)
+
+
+def check_model_file_unchanged(model_file):
+    """Check that a model file still has the inode, size and modification time it had when it was hashed.
+
+    Args:
+        model_file (ModelFile): the hashed file.
+
+    Raises:
+        OSError: if the file changed since it was hashed.
+
+    Returns:
+        os.stat_result: the current status of the file.
+    """
+    file_stat = os.lstat(model_file.path)
+    if (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns) != (model_file.inode, model_file.size, model_file.mtime_ns):
+        raise OSError("The file changed since it was hashed.")
+    return file_stat
+
+
+def link_model_file(model_file, object_path, link_mode):
+    """Replace a model file by a reflink or hardlink of its store object. The file keeps its name, the replacement is atomic.
+
+    Args:
+        model_file (ModelFile): the hashed file.
+        object_path (str): the store object with the same content.
+        link_mode (str): reflink, hardlink or auto (reflink if the file system supports it, otherwise hardlink).
+
+    Raises:
+        OSError: if the file changed since it was hashed or can not be linked.
+
+    Returns:
+        str: the link mode used.
+    """
+    import stat
+
+    file_stat = check_model_file_unchanged(model_file)
+    temporary_path = f"{model_file.path}.mlc-dedup"
+    used_mode = None
+    if link_mode in ("reflink", "auto"):
+        try:
+            clone_file(object_path, temporary_path)
+            os.chmod(temporary_path, stat.S_IMODE(file_stat.st_mode))
+            os.utime(temporary_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+            used_mode = "reflink"
+        except OSError:
+            if link_mode == "reflink":
+                raise
+    if used_mode is None:
+        os.link(object_path, temporary_path)
+        used_mode = "hardlink"
+    os.replace(temporary_path, model_file.path)
+    return used_mode
+
+
+def add_models_store_object(model_file, link_mode):
+    """Add the content of a model file to the store, unless the store has an object with this content.
+
+    Args:
+        model_file (ModelFile): the hashed file.
+        link_mode (str): reflink, hardlink or auto.
+
+    Raises:
+        OSError: if the object can not be created.
+
+    Returns:
+        str: path of the store object.
+    """
+    object_path = get_models_store_object(model_file.hash)
+    if os.path.exists(object_path):
+        return object_path
+    check_model_file_unchanged(model_file)
+    make_shared_dir(os.path.dirname(object_path))
+    temporary_path = f"{object_path}.{os.getpid()}.tmp"
+    try:
+        clone_file(model_file.path, temporary_path) if link_mode != "hardlink" else os.link(model_file.path, temporary_path)
+    except OSError:
+        if link_mode == "reflink":
+            raise
+        os.link(model_file.path, temporary_path)
+    try:
+        # An object with a content other than its hash would be linked into every copy
+        check_model_file_unchanged(model_file)
+    except OSError:
+        os.remove(temporary_path)
+        raise
+    # The object is read-only, for hardlinks this protects all copies sharing the inode
+    os.chmod(temporary_path, 0o444)
+    os.replace(temporary_path, object_path)
+    return object_path
+
+
+def summarize_model_files(files):
+    """Compute the space used by model files and the space a dedup would free.
+
+    Args:
+        files (list): hashed ModelFile of the files.
+
+    Returns:
+        dict: size (sum of all files), used (space on disk, shared copies counted once), saved (size - used) and reclaimable
+            (used - size of the distinct contents).
+    """
+    by_hash = defaultdict(list)
+    for model_file in files:
+        by_hash[model_file.hash].append(model_file)
+    summary = {"size": 0, "used": 0, "saved": 0, "reclaimable": 0}
+    for file_hash, copies in by_hash.items():
+        size = copies[0].size
+        # Hardlinks share their inode, the reflinks of a content share the extents of the store object
+        inodes = {(copy.device, copy.inode) for copy in copies if copy.linked != "reflink"}
+        units = len(inodes) + (1 if any(copy.linked == "reflink" for copy in copies) else 0)
+        summary["size"] += size * len(copies)
+        summary["used"] += size * units
+        summary["reclaimable"] += size * (units - 1)
+    summary["saved"] = summary["size"] - summary["used"]
+    return summary
+
+
+def dedup_model_files(files, connection, link_mode="auto", dry_run=False):
+    """Replace the duplicated model files by links of the store objects.
+
+    Args:
+        files (list): hashed ModelFile of the files.
+        connection (sqlite3.Connection): index of the store.
+        link_mode (str, optional): reflink, hardlink or auto. Defaults to auto.
+        dry_run (bool, optional): only compute what would be linked. Defaults to False.
+
+    Returns:
+        dict: linked (number of replaced files), freed (bytes), failed (list of (path, error)).
+    """
+    result = {"linked": 0, "freed": 0, "failed": []}
+    store_device = os.stat(models_store_dir).st_dev
+    by_hash = defaultdict(list)
+    for model_file in files:
+        by_hash[model_file.hash].append(model_file)
+
+    linked_files = []
+    for file_hash, copies in by_hash.items():
+        object_path = get_models_store_object(file_hash)
+        object_stat = os.stat(object_path) if os.path.exists(object_path) else None
+        if object_stat is None and len(copies) < 2:
+            continue
+        for model_file in copies:
+            if model_file.device != store_device:
+                result["failed"].append((model_file.path, f"not on the file system of the store {models_store_dir}"))
+                continue
+            if model_file.linked == "reflink" or (object_stat is not None and model_file.inode == object_stat.st_ino):
+                continue
+            if object_stat is None:
+                # The first copy becomes the store object, the copy keeps its content
+                if not dry_run:
+                    try:
+                        object_path = add_models_store_object(model_file, link_mode)
+                        object_stat = os.stat(object_path)
+                    except OSError as e:
+                        result["failed"].append((model_file.path, str(e)))
+                        break
+                    linked_files.append(model_file._replace(linked="hardlink" if object_stat.st_ino == model_file.inode else "reflink"))
+                    continue
+                object_stat = os.stat(model_file.path)
+                continue
+            if dry_run:
+                result["linked"] += 1
+                result["freed"] += model_file.size
+                continue
+            try:
+                used_mode = link_model_file(model_file, object_path, link_mode)
+            except OSError as e:
+                result["failed"].append((model_file.path, str(e)))
+                continue
+            new_stat = os.lstat(model_file.path)
+            linked_files.append(model_file._replace(inode=new_stat.st_ino, mtime_ns=new_stat.st_mtime_ns, linked=used_mode))
+            result["linked"] += 1
+            result["freed"] += model_file.size
+    if not dry_run:
+        record_model_files(connection, linked_files)
+    return result
+
+
+def prune_models_store(connection, dry_run=False):
+    """Remove store objects which are no longer used by any model file.
+
+    A hardlinked object is unused when the store holds its only link, a reflinked object when no indexed file with its content
+    is left.
+
+    Args:
+        connection (sqlite3.Connection): index of the store.
+        dry_run (bool, optional): only count the unused objects. Defaults to False.
+
+    Returns:
+        int, int: number and size of the removed objects.
+    """
+    removed, removed_size = 0, 0
+    objects_dir = os.path.join(models_store_dir, "sha256")
+    for directory, _, object_names in os.walk(objects_dir):
+        for object_name in object_names:
+            object_path = os.path.join(directory, object_name)
+            try:
+                object_stat = os.stat(object_path)
+            except OSError:
+                continue
+            if object_stat.st_nlink > 1:
+                continue
+            users = connection.execute("SELECT path, inode, mtime_ns FROM files WHERE hash = ?", (object_name,)).fetchall()
+            in_use = False
+            for path, inode, mtime_ns in users:
+                try:
+                    file_stat = os.lstat(path)
+                except OSError:
+                    continue
+                if (file_stat.st_ino, file_stat.st_mtime_ns) == (inode, mtime_ns):
+                    in_use = True
+                    break
+            if in_use:
+                continue
+            if not dry_run:
+                try:
+                    os.remove(object_path)
+                except OSError:
+                    continue
+            removed += 1
+            removed_size += object_stat.st_size
+    if not dry_run:
+        # Entries of files which no longer exist
+        missing_paths = [(path,) for (path,) in connection.execute("SELECT path FROM files") if not os.path.lexists(path)]
+        connection.executemany("DELETE FROM files WHERE path = ?", missing_paths)
+        connection.commit()
+    return removed, removed_size
+
+
+def verify_models_store(files, connection, jobs=4, progress=None):
+    """Hash model files and the store objects again and compare them with the index and the object names.
+
+    Args:
+        files (list): ModelFile of the files, without hash.
+        connection (sqlite3.Connection): index of the store.
+        jobs (int, optional): number of files hashed in parallel. Defaults to 4.
+        progress (callable, optional): called with the number of hashed files and bytes. Defaults to None.
+
+    Returns:
+        int, list: number of verified files and (path, problem) of the files which do not match.
+    """
+    cached_hashes = {path: (inode, size, mtime_ns, file_hash) for path, inode, size, mtime_ns, file_hash in connection.execute(
+        "SELECT path, inode, size, mtime_ns, hash FROM files"
+    )}
+    objects = []
+    for directory, _, object_names in os.walk(os.path.join(models_store_dir, "sha256")):
+        for object_name in object_names:
+            if re.match(r"^[0-9a-f]{64}$", object_name):
+                object_stat = os.stat(os.path.join(directory, object_name))
+                objects.append(ModelFile(os.path.join(directory, object_name), object_stat.st_dev, object_stat.st_ino, object_stat.st_size, object_stat.st_mtime_ns))
+
+    # Hardlinks of an object share its inode, they are hashed only once
+    object_inodes = {(model_file.device, model_file.inode) for model_file in objects}
+    files = [model_file for model_file in files if (model_file.device, model_file.inode) not in object_inodes]
+    hashed_files, failed_files = hash_model_files(objects + files, connection, jobs, rehash=True, progress=progress)
+
+    problems = [(model_file.path, f"not readable: {error}") for model_file, error in failed_files]
+    for model_file in hashed_files:
+        if model_file.path.startswith(os.path.join(models_store_dir, "sha256") + os.sep):
+            if model_file.hash != os.path.basename(model_file.path):
+                problems.append((model_file.path, "store object does not match its hash, all its hardlinks are affected"))
+            continue
+        cached = cached_hashes.get(model_file.path)
+        if cached and cached[:3] == (model_file.inode, model_file.size, model_file.mtime_ns) and cached[3] != model_file.hash:
+            problems.append((model_file.path, "content changed without a change of size and mtime"))
+    return len(hashed_files) + len(failed_files), problems
+
+
+################################################################################################################################################
+# Page cache warm-up
+#
+# The first epoch of a training and every model load are dominated by cold reads of /data and /models. mlc warm reads the files of
+# the data and models directories of a container into the page cache of the host in advance, with a pool of readers: every file is
+# mmap'ed, announced with MADV_WILLNEED so the kernel reads ahead in large requests, and touched page by page. The byte budget keeps
+# the warm-up from evicting the page cache of other jobs, mlc start --warm runs it while the container starts.
+
+warm_jobs = 8                                   # Parallel readers of mlc warm and mlc start --warm
+warm_chunk_size = 64 * 1024 * 1024              # Bytes of a mmap'ed file announced and touched at once
+# Budget of mlc warm and mlc start --warm, by default half of the available memory (MLC_WARM_BUDGET overrides it, e.g. 100G)
+warm_budget_default = os.environ.get("MLC_WARM_BUDGET", "")
+warm_on_start_default = os.environ.get("MLC_WARM_ON_START", "0") == "1"   # mlc start warms without --warm
+
+
+def read_available_memory():
+    """Return the memory available for new allocations and the page cache (MemAvailable of /proc/meminfo) in bytes, 0 if unknown."""
+    try:
+        with open("/proc/meminfo") as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def get_warm_budget(budget=None):
+    """Return the byte budget of a warm-up.
+
+    Args:
+        budget (str, optional): budget like 100G, by default MLC_WARM_BUDGET or half of the available memory. Defaults to None.
+
+    Raises:
+        ValueError: if the budget can not be parsed.
+
+    Returns:
+        int: the budget in bytes.
+    """
+    budget = budget or warm_budget_default
+    return parse_size(budget) if budget else read_available_memory() // 2
+
+
+def resolve_warm_files(labels, patterns=None):
+    """Resolve paths and globs of a container to the files on the host.
+
+    Patterns starting with /data or /models are resolved in the data and models directory of the container, other patterns are
+    matched relative to both directories. A directory includes all files below it, ** matches several directory levels.
+
+    Args:
+        labels (dict): labels of the container (aime.mlc.DATA_MOUNT and aime.mlc.MODELS_MOUNT).
+        patterns (list, optional): paths or globs, by default all files of the models and the data directory. Defaults to None.
+
+    Returns:
+        list: host paths of the regular files, in the order of the patterns and without duplicates.
+    """
+    import glob
+
+    mounts = [
+        (container_dir, labels.get(label))
+        for container_dir, label in (("/models", "aime.mlc.MODELS_MOUNT"), ("/data", "aime.mlc.DATA_MOUNT"))
+        if labels.get(label) and os.path.isdir(labels.get(label))
+    ]
+    host_patterns = []
+    for pattern in patterns or [container_dir for container_dir, _ in mounts]:
+        mount = next(((container_dir, host_dir) for container_dir, host_dir in mounts
+                      if pattern == container_dir or pattern.startswith(container_dir + "/")), None)
+        if mount:
+            host_patterns.append(mount[1] + pattern[len(mount[0]):])
+        elif not pattern.startswith("/"):
+            host_patterns.extend(os.path.join(host_dir, pattern) for _, host_dir in mounts)
+
+    files = {}
+    for host_pattern in host_patterns:
+        for path in sorted(glob.glob(host_pattern, recursive=True)):
+            if os.path.isdir(path):
+                for directory, _, file_names in sorted(os.walk(path)):
+                    for file_name in sorted(file_names):
+                        file_path = os.path.join(directory, file_name)
+                        if os.path.isfile(file_path):
+                            files.setdefault(file_path, None)
+            elif os.path.isfile(path):
+                files.setdefault(path, None)
+    return list(files)
+
+
+def touch_file_pages(path):
+    """Read a file into the page cache by touching every page of a mmap'ed view.
+
+    Args:
+        path (str): the file.
+
+    Returns:
+        int: the bytes read.
+    """
+    import mmap
+
+    with open(path, "rb") as warm_file:
+        size = os.fstat(warm_file.fileno()).st_size
+        if size == 0:
+            return 0
+        os.posix_fadvise(warm_file.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+        with mmap.mmap(warm_file.fileno(), size, access=mmap.ACCESS_READ) as mapped_file:
+            with memoryview(mapped_file) as mapped_view:
+                for offset in range(0, size, warm_chunk_size):
+                    length = min(warm_chunk_size, size - offset)
+                    if hasattr(mapped_file, "madvise"):
+                        mapped_file.madvise(mmap.MADV_WILLNEED, offset, length)
+                    # One byte of every page, the copy runs in C
+                    bytes(mapped_view[offset:offset + length:mmap.PAGESIZE])
+    return size
+
+
+def warm_page_cache(paths, budget, jobs=warm_jobs, progress=None):
+    """Read files into the page cache with parallel readers, in the order of the list as long as they fit into the budget.
+
+    Args:
+        paths (list): host paths of the files.
+        budget (int): maximal number of bytes read.
+        jobs (int, optional): number of parallel readers. Defaults to warm_jobs.
+        progress (callable, optional): called with the number of files and bytes read so far. Defaults to None.
+
+    Returns:
+        dict: warmed, skipped (missing, unreadable or not fitting into the budget), bytes and seconds.
+    """
+    import queue
+
+    result = {"warmed": 0, "skipped": 0, "bytes": 0, "seconds": 0.0}
+    start_time = time.monotonic()
+    pending_files, planned_size = queue.Queue(), 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            result["skipped"] += 1
+            continue
+        if planned_size + size > budget:
+            result["skipped"] += 1
+            continue
+        planned_size += size
+        pending_files.put(path)
+
+    result_lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                path = pending_files.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                size = touch_file_pages(path)
+            except (OSError, ValueError):
+                size = None
+            with result_lock:
+                if size is None:
+                    result["skipped"] += 1
+                else:
+                    result["warmed"] += 1
+                    result["bytes"] += size
+                if progress:
+                    progress(result["warmed"], result["bytes"])
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, pending_files.qsize())))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result["seconds"] = time.monotonic() - start_time
+    return result
+
+
+def print_warm_result(container_name, result):
+    """Print the summary of a warm-up."""
+    print(f"\n{INPUT}[{container_name}]{RESET} {NEUTRAL}warmed {result['warmed']} files ({format_size(result['bytes'])}) in {result['seconds']:.1f} s, "
+          f"{format_size(result['bytes'] / max(result['seconds'], 1e-3))}/s, {result['skipped']} skipped (missing or not fitting into the budget).{RESET}")
+
+
+################################################################################################################################################
+# Image prefetch
+#
+# mlc prefetch pulls the catalog images of the host gpu architecture in the background with a bounded number of parallel pulls,
+# so that mlc create does not have to wait for the image download.
+
+def parse_size(size_text):
+    """Parse a size like 500M, 200G, 1.5T or 100GiB into bytes.
+
+    Args:
+        size_text (str): size with an optional unit (K, M, G, T: powers of 1000, Ki, Mi, Gi, Ti: powers of 1024).
+
+    Raises:
+        ValueError: if the size can not be parsed.
+
+    Returns:
+        int: size in bytes.
+    """
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([KMGTP]?)(i?)B?\s*$", str(size_text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {size_text}")
+    number, unit, binary = match.groups()
+    base = 1024 if binary else 1000
+    exponent = " KMGTP".index(unit.upper()) if unit else 0
+    return int(float(number) * base ** exponent)
+
+
+def split_image_reference(image):
+    """Split a docker image reference into repository and tag.
+
+    Args:
+        image (str): image reference, for example aimehub/pytorch-2.8.0-cuda12.6.3 or registry:5000/image:tag.
+
+    Returns:
+        str, str: repository and tag (latest if no tag is given).
+    """
+    repository, _, tag = image.rpartition(":")
+    if not repository or "/" in tag:
+        return image, "latest"
+    return repository, tag
+
+
+def get_local_image_digests(image):
+    """Return the repo digests of a local image, None if the image is not present.
+
+    Args:
+        image (str): image reference.
+
+    Returns:
+        list: repo digests like aimehub/pytorch@sha256:..., None if the image is not available locally.
+    """
+    status, image_info = docker_api_request("GET", f"/images/{image}/json")
+    if status is not None:
+        if status != 200 or not isinstance(image_info, dict):
+            return None
+        return image_info.get("RepoDigests") or []
+    output, _, exit_code = run_docker_command(f"docker image inspect --format '{{{{json .RepoDigests}}}}' {image}")
+    if exit_code != 0:
+        return None
+    try:
+        return json.loads(output) or []
+    except ValueError:
+        return []
+
+
+def get_remote_image_digest(image):
+    """Ask the registry for the current digest of an image (only possible with the Docker Engine API).
+
+    Args:
+        image (str): image reference.
+
+    Returns:
+        str: digest like sha256:..., None if it can not be determined.
+    """
+    status, distribution = docker_api_request("GET", f"/distribution/{image}/json")
+    if status != 200 or not isinstance(distribution, dict):
+        return None
+    return (distribution.get("Descriptor") or {}).get("digest")
+
+
+def get_docker_root_dir():
+    """Return the data root directory of the docker daemon (default: /var/lib/docker)."""
+    status, info = docker_api_request("GET", "/info")
+    if status == 200 and isinstance(info, dict) and info.get("DockerRootDir"):
+        return info["DockerRootDir"]
+    output, _, exit_code = run_docker_command("docker info --format '{{.DockerRootDir}}'")
+    return output if exit_code == 0 and output else "/var/lib/docker"
+
+
+def get_free_disk_space(path):
+    """Return the free disk space of the filesystem containing path. Not accessible directories are replaced by their parent.
+
+    Args:
+        path (str): path on the filesystem.
+
+    Returns:
+        int: free space in bytes.
+    """
+    import shutil
+
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return shutil.disk_usage(path).free
+        except OSError:
+            if path == os.path.dirname(path):
+                raise
+            path = os.path.dirname(path)
+
+
+class PullProgress:
+    """Aggregated progress of parallel image pulls.
+
+    Args:
+        total_images (int): number of images to be processed.
+        interactive (bool): redraw a single status line, otherwise print one line per finished image.
+    """
+
+    def __init__(self, total_images, interactive):
+        self.total_images = total_images
+        self.interactive = interactive
+        self.layers = defaultdict(dict)
+        self.pulling = set()
+        self.results = {}
+        self.lock = threading.Lock()
+        self.last_draw = 0
+
+    def start(self, image):
+        with self.lock:
+            self.pulling.add(image)
+            self.draw()
+
+    def update(self, image, event):
+        """Account a progress event of the docker pull stream."""
+        layer_id = event.get("id")
+        if not layer_id:
+            return
+        status = event.get("status", "")
+        detail = event.get("progressDetail") or {}
+        with self.lock:
+            current, total = self.layers[image].get(layer_id, (0, 0))
+            if status == "Downloading" and detail.get("total"):
+                current, total = detail.get("current", 0), detail["total"]
+            elif status in ("Download complete", "Pull complete", "Already exists"):
+                current = total
+            self.layers[image][layer_id] = (current, total)
+            self.draw()
+
+    def finish(self, image, result, message=""):
+        """Record the result (pulled, up to date, skipped, failed) of an image."""
+        with self.lock:
+            self.pulling.discard(image)
+            self.results[image] = (result, message)
+            if self.interactive:
+                sys.stdout.write("\r\x1b[K")
+            color = ERROR if result == "failed" else INFO if result == "pulled" else NEUTRAL
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {color}{result:<10}{RESET} {image}{f' ({message})' if message else ''}", flush=True)
+            self.draw(force=True)
+
+    def draw(self, force=False):
+        if not self.interactive or (not force and time.monotonic() - self.last_draw < 0.2):
+            return
+        self.last_draw = time.monotonic()
+        current = sum(layer[0] for layers in self.layers.values() for layer in layers.values())
+        total = sum(layer[1] for layers in self.layers.values() for layer in layers.values())
+        sys.stdout.write(
+            f"\r\x1b[K{INFO}Prefetch:{RESET} {len(self.results)}/{self.total_images} images done, "
+            f"{len(self.pulling)} pulling, {format_size(current)} / {format_size(total)} downloaded"
+        )
+        sys.stdout.flush()
+
+
+def pull_docker_image(image, progress=None):
+    """Pull a docker image, using the streamed progress of the Docker Engine API or the docker CLI as fallback.
+
+    Args:
+        image (str): image reference.
+        progress (PullProgress, optional): receives the progress events of the pull.
+
+    Returns:
+        bool, str: True if the image was pulled successfully and an error message.
+    """
+    import http.client
+
+    client = get_docker_api_client()
+    if client is not None:
+        repository, tag = split_image_reference(image)
+        error = None
+        # A reference with digest (repository@sha256:...) is passed as a whole
+        query = {"fromImage": image} if "@" in image else {"fromImage": repository, "tag": tag}
+        try:
+            response = client.open_stream("POST", "/images/create", query, timeout=None)
+            try:
+                if response.status != 200:
+                    error = response.read().decode(errors="replace").strip()
+                else:
+                    for line in response:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        if event.get("error"):
+                            error = event["error"]
+                        elif progress is not None:
+                            progress.update(image, event)
+            finally:
+                response.close()
+        except (DockerAPIError, OSError, http.client.HTTPException) as e:
+            error = str(e)
+        # Credentials of private registries are only known by the docker CLI
+        if error is None or not re.search(r"unauthorized|denied|authentication", error, re.IGNORECASE):
+            return error is None, error or ""
+
+    try:
+        result = subprocess.run(["docker", "pull", "--quiet", image], capture_output=True, text=True)
+    except OSError as e:
+        return False, str(e)
+    return result.returncode == 0, result.stderr.strip()
+
+
+def prefetch_images(images, jobs=2, disk_budget=None, interactive=True):
+    """Pull images in parallel and skip images which are present and up to date.
+
+    New pulls are only started as long as the disk space consumed on the docker data root since the start stays below the budget.
+
+    Args:
+        images (list): image references.
+        jobs (int, optional): maximal number of parallel pulls. Defaults to 2.
+        disk_budget (int, optional): maximal disk space in bytes to be consumed. Defaults to None (no limit).
+        interactive (bool, optional): show a redrawn status line. Defaults to True.
+
+    Returns:
+        dict: {image: (result, message)} with result pulled, up to date, skipped or failed.
+    """
+    import queue
+
+    progress = PullProgress(len(images), interactive)
+    docker_root_dir = get_docker_root_dir()
+    initial_free_space = get_free_disk_space(docker_root_dir) if disk_budget is not None else None
+    pending_images = queue.Queue()
+    for image in images:
+        pending_images.put(image)
+
+    def worker():
+        while True:
+            try:
+                image = pending_images.get_nowait()
+            except queue.Empty:
+                return
+
+            local_digests = get_local_image_digests(image)
+            if local_digests:
+                remote_digest = get_remote_image_digest(image)
+                if remote_digest and any(digest.endswith(f"@{remote_digest}") for digest in local_digests):
+                    progress.finish(image, "up to date")
+                    continue
+
+            if initial_free_space is not None:
+                consumed = initial_free_space - get_free_disk_space(docker_root_dir)
+                if consumed >= disk_budget:
+                    progress.finish(image, "skipped", f"disk budget of {format_size(disk_budget)} used up")
+                    continue
+
+            progress.start(image)
+            start_time = time.monotonic()
+            try:
+                success, message = pull_docker_image(image, progress)
+            except Exception as e:
+                success, message = False, str(e)
+            if success:
+                progress.finish(image, "pulled", f"{time.monotonic() - start_time:.0f} s")
+            else:
+                progress.finish(image, "failed", message.splitlines()[-1] if message else "")
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, len(images))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if interactive:
+        sys.stdout.write("\r\x1b[K")
+    return progress.results
+
+
+def select_prefetch_images(catalog, architecture, framework_pattern=None, version_pattern=None):
+    """Select the catalog images of an architecture matching the framework and version globs.
+
+    Args:
+        catalog (ImageCatalog): the image catalog.
+        architecture (str): gpu architecture.
+        framework_pattern (str, optional): glob matched case-insensitively against the framework names. Defaults to all.
+        version_pattern (str, optional): glob matched against the versions. Defaults to all.
+
+    Returns:
+        list: unique image references, newest versions first.
+    """
+    import fnmatch
+
+    images = []
+    for framework, version_images in catalog.frameworks(architecture).items():
+        if framework_pattern and not fnmatch.fnmatch(framework.lower(), framework_pattern.lower()):
+            continue
+        for version, image in version_images.items():
+            if version_pattern and not fnmatch.fnmatch(version, version_pattern):
+                continue
+            if image not in images:
+                images.append(image)
+    return images
+
+
+################################################################################################################################################
+# User setup layers
+#
+# mlc create prepares the user inside the base image (apt-get update, sudo, git, adduser) and commits the result as image.
+# This layer is cached as image <repository>:mlc-layer-<key> and reused by later creates, the key is built from the base image id,
+# uid, gid, user name and the setup script. mlc prune-layers removes layers which are no longer used.
+
+user_layer_label = "aime.mlc.LAYER"     # Label of the layer images, value is the layer key
+user_layer_tag_prefix = "mlc-layer-"    # Tag prefix of the layer images
+user_layer_max_age_days = 30            # Unused layers older than this are stale
+
+# One lock per layer image, so that parallel creates build a layer only once
+user_layer_locks = defaultdict(threading.Lock)
+user_layer_locks_guard = threading.Lock()
+
+
+class ContainerSetupError(Exception):
+    """Setting up a container failed."""
+
+
+def get_image_id(image):
+    """Return the id of a local image.
+
+    Args:
+        image (str): image reference.
+
+    Returns:
+        str: image id like sha256:..., None if the image is not available locally.
+    """
+    status, image_info = docker_api_request("GET", f"/images/{image}/json")
+    if status is not None:
+        if status != 200 or not isinstance(image_info, dict):
+            return None
+        return image_info.get("Id")
+    output, _, exit_code = run_docker_command(f"docker image inspect --format '{{{{.Id}}}}' {image}")
+    if exit_code != 0 or not output:
+        return None
+    return output
+
+
+def user_layer_key(base_image_id, user_id, group_id, user_name, setup_script):
+    """Build the cache key of a user setup layer.
+
+    Args:
+        base_image_id (str): id of the base image.
+        user_id (int): user id.
+        group_id (int): group id.
+        user_name (str): user name.
+        setup_script (str): setup script, see build_user_setup_script().
+
+    Returns:
+        str: 16 hex digits.
+    """
+    import hashlib
+
+    setup_script_hash = hashlib.sha256(setup_script.encode()).hexdigest()
+    key_source = "\n".join([base_image_id, str(user_id), str(group_id), user_name, setup_script_hash])
+    return hashlib.sha256(key_source.encode()).hexdigest()[:16]
+
+
+def user_layer_image(base_image, layer_key):
+    """Return the image reference of a user setup layer.
+
+    Args:
+        base_image (str): base image reference.
+        layer_key (str): key of the layer, see user_layer_key().
+
+    Returns:
+        str: image reference <repository>:mlc-layer-<key>.
+    """
+    repository, _ = split_image_reference(base_image)
+    return f"{repository}:{user_layer_tag_prefix}{layer_key}"
+
+
+def is_user_layer_image(image):
+    """Check if an image reference belongs to a user setup layer.
+
+    Args:
+        image (str): image reference.
+
+    Returns:
+        bool: True for user setup layers.
+    """
+    return split_image_reference(image)[1].startswith(user_layer_tag_prefix)
+
+
+def prepare_user_layer(
+        architecture,
+        workspace_dir,
+        workspace,
+        container_tag,
+        num_gpus,
+        base_image,
+        user_name,
+        user_id,
+        group_id,
+        dir_to_be_added,
+        rebuild=False,
+        verbose=True
+    ):
+    """Return the image with the prepared user setup, build it only if no cached layer exists.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
+        workspace_dir (str): Path on the host to be mounted into the setup container.
+        workspace (str): Path inside the container where the workspace will be mounted.
+        container_tag (str): Name of the temporary setup container.
+        num_gpus (str): Number of GPUs to allocate (used only for CUDA).
+        base_image (str): Base Docker image, it has to be available locally.
+        user_name (str): Username to be created inside the container.
+        user_id (int): User ID to assign.
+        group_id (int): Group ID to assign.
+        dir_to_be_added (str): Directory path to add to the container's PATH.
+        rebuild (bool, optional): build the layer even if a cached one exists. Defaults to False.
+        verbose (bool, optional): print when a cached layer is reused. Defaults to True.
+
+    Returns:
+        str: image reference of the user setup layer.
+
+    Raises:
+        ContainerSetupError: if the base image is not available or the setup failed.
+    """
+    base_image_id = get_image_id(base_image)
+    if base_image_id is None:
+        raise ContainerSetupError(f"Container image not available: {base_image}")
+
+    setup_script = build_user_setup_script(architecture, user_name, user_id, group_id, dir_to_be_added)
+    layer_key = user_layer_key(base_image_id, user_id, group_id, user_name, setup_script)
+    layer_image = user_layer_image(base_image, layer_key)
+
+    with user_layer_locks_guard:
+        layer_lock = user_layer_locks[layer_image]
+    with layer_lock:
+        if not rebuild and get_image_id(layer_image) is not None:
+            if verbose:
+                print(f"\n{NEUTRAL}Reusing the prepared user setup:{RESET} {INPUT}{layer_image}{RESET}")
+            return layer_image
+        build_user_layer(architecture, workspace_dir, workspace, container_tag, num_gpus, base_image, base_image_id, user_name, setup_script, layer_key, layer_image)
+    return layer_image
+
+
+def build_user_layer(
+        architecture,
+        workspace_dir,
+        workspace,
+        container_tag,
+        num_gpus,
+        base_image,
+        base_image_id,
+        user_name,
+        setup_script,
+        layer_key,
+        layer_image
+    ):
+    """Run the setup script in the base image and commit the result as user setup layer.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
+        workspace_dir (str): Path on the host to be mounted into the setup container.
+        workspace (str): Path inside the container where the workspace will be mounted.
+        container_tag (str): Name of the temporary setup container.
+        num_gpus (str): Number of GPUs to allocate (used only for CUDA).
+        base_image (str): Base Docker image.
+        base_image_id (str): id of the base image.
+        user_name (str): Username created by the setup script.
+        setup_script (str): setup script, see build_user_setup_script().
+        layer_key (str): key of the layer, see user_layer_key().
+        layer_image (str): image reference of the layer.
+
+    Raises:
+        ContainerSetupError: if the setup or the commit failed.
+    """
+
+    # Generating the Docker command for running
+    docker_prepare_container = build_docker_run_command(
+        architecture,
+        workspace_dir,
+        workspace,
+        container_tag,
+        num_gpus,
+        base_image,
+        setup_script
+    )
+    result_run_cmd = subprocess.run(docker_prepare_container, capture_output=True, text=True)
+    if result_run_cmd.returncode != 0:
+        subprocess.run(['docker', 'rm', container_tag], capture_output=True, text=True)
+        raise ContainerSetupError(f"Setting up the container failed: {result_run_cmd.stderr.strip()}")
+
+    # Commit the container: saves the user setup as reusable image, labelled to be found by mlc prune-layers.
+    bash_command_commit = [
+        'docker', 'commit',
+        '--change', f'LABEL {user_layer_label}={layer_key}',
+        '--change', f'LABEL {user_layer_label}.USER={user_name}',
+        '--change', f'LABEL {user_layer_label}.BASE={base_image}',
+        '--change', f'LABEL {user_layer_label}.BASE_ID={base_image_id}',
+        container_tag, layer_image
+    ]
+    result_commit = subprocess.run(bash_command_commit, capture_output=True, text=True)
+
+    # Remove the container: cleans up the initial container to free up ressources.
+    subprocess.run(['docker', 'rm', container_tag], capture_output=True, text=True)
+
+    if result_commit.returncode != 0:
+        raise ContainerSetupError(f"Saving the user setup failed: {result_commit.stderr.strip()}")
+
+
+def setup_container(
+        architecture,
+        selected_docker_image,
+        selected_framework,
+        selected_version,
+        validated_container_name,
+        container_tag,
+        workspace_dir,
+        data_dir,
+        models_dir,
+        num_gpus,
+        rebuild_layer=False,
+        verbose=True,
+        labels=None,
+        resources=None,
+        data_cache=None
+    ):
+    """Create a container from a locally available image, reusing the prepared user setup layer.
+
+    Args:
+        architecture (str): GPU architecture type (e.g., 'CUDA', 'ROCM').
+        selected_docker_image (str): Base Docker image.
+        selected_framework (str): Deep learning framework (e.g., 'tensorflow', 'pytorch').
+        selected_version (str): Version of the framework.
+        validated_container_name (str): Checked container name.
+        container_tag (str): Tag of the container.
+        workspace_dir (str): Host path for the workspace.
+        data_dir (str): Host path for the dataset directory, '-' if not mounted.
+        models_dir (str): Host path for the models directory, '-' if not mounted.
+        num_gpus (str): Number of GPUs to assign (used with CUDA).
+        rebuild_layer (bool, optional): set up the user again instead of reusing the cached layer. Defaults to False.
+        verbose (bool, optional): print when a cached layer is reused. Defaults to True.
+        labels (dict, optional): additional labels of the container. Defaults to None.
+        resources (dict, optional): resource settings, see resolve_container_resources(). Defaults to None.
+        data_cache (tuple, optional): directory and size of the data cache, see prepare_data_cache(). Defaults to None.
+
+    Raises:
+        ContainerSetupError: if the user setup or the creation of the container failed.
+    """
+    container_label = "aime.mlc"
+    workspace = "/workspace"
+    data = "/data"
+    models = "/models"
+    dir_to_be_added = f'/home/{user_name}/.local/bin'
+
+    # Reuse the prepared user setup of the base image or build it
+    container_image = prepare_user_layer(
+        architecture,
+        workspace_dir,
+        workspace,
+        container_tag,
+        num_gpus,
+        selected_docker_image,
+        user_name,
+        user_id,
+        group_id,
+        dir_to_be_added,
+        rebuild_layer,
+        verbose
+    )
+
+    # Add the workspace volume
+    volumes = ['-v', f'{workspace_dir}:{workspace}'] 
+
+    # Add the data volume mapping if data_dir is set, with a data cache /data is the view of the cache
+    if data_dir != "-" and data_cache:
+        cache_dir, cache_size = data_cache
+        volumes += ['-v', f'{os.path.join(cache_dir, "view")}:{data}:ro', '-v', f'{data_dir}:{data_cache_origin}']
+        labels = dict(labels or {}, **{"aime.mlc.DATA_CACHE": cache_dir, "aime.mlc.DATA_CACHE_SIZE": cache_size})
+    elif data_dir != "-":
+        volumes +=  ['-v', f'{data_dir}:{data}']
+
+    # Add the models volume mapping if models_dir is set
+    if models_dir != "-":
+        volumes +=  ['-v', f'{models_dir}:{models}'] 
+
+    docker_create_cmd = build_docker_create_command(
+        user_name, 
+        user_id, 
+        group_id,   
+        architecture,
+        selected_docker_image,
+        selected_framework,
+        selected_version,
+        mlc_container_version,
+        validated_container_name,
+        container_label,
+        container_tag,
+        workspace,
+        workspace_dir, 
+        data_dir,
+        models_dir,
+        dir_to_be_added,
+        num_gpus,
+        volumes,
+        container_image,
+        labels,
+        resources
+    )
+    result_create_cmd = subprocess.run(docker_create_cmd, capture_output=True, text=True)
+    if result_create_cmd.returncode != 0:
+        raise ContainerSetupError(f"Creating the container failed: {result_create_cmd.stderr.strip()}")
+
+
+def parse_image_created(created):
+    """Convert the creation time of an image into a unix timestamp.
+
+    Args:
+        created (int or str): unix timestamp (API image list) or RFC 3339 time (docker image inspect).
+
+    Returns:
+        int: unix timestamp, 0 if unknown.
+    """
+    import calendar
+
+    if isinstance(created, (int, float)):
+        return int(created)
+    try:
+        return calendar.timegm(time.strptime(created[:19], "%Y-%m-%dT%H:%M:%S"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def list_user_layers():
+    """List the user setup layer images.
+
+    Returns:
+        list: dicts with the keys Id, RepoTags, Created (unix timestamp), Size and Labels.
+    """
+    status, images = docker_api_request("GET", "/images/json", {"filters": {"label": [user_layer_label]}})
+    if status is not None:
+        if status != 200 or not isinstance(images, list):
+            return []
+    else:
+        output, _, exit_code = run_docker_command(f"docker image ls --quiet --no-trunc --filter label={user_layer_label}")
+        image_ids = sorted(set(output.split()))
+        if exit_code != 0 or not image_ids:
+            return []
+        output, _, exit_code = run_docker_command("docker image inspect " + " ".join(image_ids))
+        try:
+            images = json.loads(output) if exit_code == 0 else []
+        except ValueError:
+            images = []
+        for image in images:
+            image["Labels"] = (image.get("Config") or {}).get("Labels")
+
+    return [
+        {
+            "Id": image.get("Id"),
+            "RepoTags": image.get("RepoTags") or [],
+            "Created": parse_image_created(image.get("Created")),
+            "Size": image.get("Size") or 0,
+            "Labels": image.get("Labels") or {},
+        }
+        for image in images
+    ]
+
+
+def get_used_images():
+    """Return the ids and references of the images used by any container.
+
+    Returns:
+        set: image ids and image references.
+    """
+    containers = docker_api_list_containers(None)
+    if containers is not None:
+        return {container.get(key) for container in containers for key in ("Image", "ImageID") if container.get(key)}
+    output, _, _ = run_docker_command("docker container ps --all --no-trunc --format '{{.Image}}'")
+    return set(output.split())
+
+
+def find_stale_user_layers(max_age_days=user_layer_max_age_days, all_layers=False, user_name=None):
+    """Find user setup layers which can be removed.
+
+    A layer is stale if no container uses it and its base image was updated or removed, or it is older than max_age_days.
+
+    Args:
+        max_age_days (float, optional): age of unused layers to become stale. Defaults to user_layer_max_age_days.
+        all_layers (bool, optional): every unused layer is stale. Defaults to False.
+        user_name (str, optional): only layers of this user. Defaults to all users.
+
+    Returns:
+        list: (layer, reason) tuples, layer as provided by list_user_layers().
+    """
+    used_images = get_used_images()
+    base_image_ids = {}
+    stale_layers = []
+    for layer in list_user_layers():
+        if user_name and layer["Labels"].get(f"{user_layer_label}.USER") != user_name:
+            continue
+        if layer["Id"] in used_images or used_images.intersection(layer["RepoTags"]):
+            continue
+        reason = user_layer_stale_reason(layer, base_image_ids, max_age_days, all_layers)
+        if reason:
+            stale_layers.append((layer, reason))
+    return stale_layers
+
+
+def user_layer_stale_reason(layer, base_image_ids, max_age_days=user_layer_max_age_days, all_layers=False):
+    """Check if an unused user setup layer is stale.
+
+    Args:
+        layer (dict): the layer with the keys Created and Labels, see list_user_layers().
+        base_image_ids (dict): cache of the ids of the base images {reference: id or None}, filled on demand.
+        max_age_days (float, optional): age of unused layers to become stale. Defaults to user_layer_max_age_days.
+        all_layers (bool, optional): every unused layer is stale. Defaults to False.
+
+    Returns:
+        str: the reason why the layer is stale, None if it is kept.
+    """
+    labels = layer["Labels"]
+    base_image = labels.get(f"{user_layer_label}.BASE")
+    if base_image not in base_image_ids:
+        base_image_ids[base_image] = get_image_id(base_image) if base_image else None
+    age_days = (time.time() - layer["Created"]) / 86400
+    if all_layers:
+        return "unused"
+    if base_image_ids[base_image] is None:
+        return "base image removed"
+    if base_image_ids[base_image] != labels.get(f"{user_layer_label}.BASE_ID"):
+        return "base image updated"
+    if age_days > max_age_days:
+        return f"unused, {int(age_days)} days old"
+    return None
+
+
+def remove_image(image):
+    """Remove a docker image.
+
+    Args:
+        image (str): image reference or id.
+
+    Returns:
+        bool: True if the image was removed.
+    """
+    status, _ = docker_api_request("DELETE", f"/images/{image}")
+    if status is not None:
+        return status == 200
+    _, _, exit_code = run_docker_command(f"docker image rm {image}")
+    return exit_code == 0
+
+################################################################################################################################################
+# Garbage collection
+#
+# mlc gc builds a reference graph of all containers and local images: containers use images, and an image needs every image whose layers
+# are its bottom layers (the aimehub base of a user setup layer). Images of removed containers, images left by interrupted exports, stale
+# user setup layers and, with --bases, unused catalog base images are collected, together with the setup containers a crashed mlc create
+# left behind. The reclaimable space counts every layer once, by its chain id, and only if no kept image has it.
+
+gc_container_tag_pattern = re.compile(r"^.+\._\.(\d+)$")    # Tags of the containers and container images of mlc
+gc_grace_seconds = 3600                                     # Younger images and containers may belong to a running mlc create
+gc_export_grace_seconds = 86400                             # Younger export images may belong to a running mlc export
+
+# Container or image removed by mlc gc, depth is the number of layers of an image (0 for containers)
+GarbageItem = namedtuple("GarbageItem", ["kind", "name", "id", "references", "size", "created", "reason", "depth"])
+
+
+def get_layer_chain_ids(diff_ids):
+    """Compute the chain ids of the layers of an image, docker shares a layer between images by its chain id.
+
+    Args:
+        diff_ids (list): diff ids of the layers from the bottom to the top layer.
+
+    Returns:
+        list: the chain ids.
+    """
+    import hashlib
+
+    chain_ids = []
+    for diff_id in diff_ids:
+        chain_ids.append(diff_id if not chain_ids else "sha256:" + hashlib.sha256(f"{chain_ids[-1]} {diff_id}".encode()).hexdigest())
+    return chain_ids
+
+
+def get_image_layer_sizes(image_id, layer_count):
+    """Return the sizes of the layers of an image from its history.
+
+    The history has an entry per build step, steps which did not create a layer have size 0. Entries with a size are assigned to the layers
+    from the bottom, layers of size 0 can not be told apart from such steps and get size 0.
+
+    Args:
+        image_id (str): id of the image.
+        layer_count (int): number of layers.
+
+    Returns:
+        list: size in bytes of every layer from the bottom to the top layer.
+    """
+    status, history = docker_api_request("GET", f"/images/{image_id}/history")
+    if status is not None:
+        sizes = [entry.get("Size") or 0 for entry in history] if status == 200 and isinstance(history, list) else []
+    else:
+        output, _, exit_code = run_docker_command(f"docker image history --no-trunc --human=false --format '{{{{.Size}}}}' {image_id}")
+        sizes = [int(size) for size in output.split() if size.isdigit()] if exit_code == 0 else []
+    # The history starts with the newest step
+    layer_sizes = [size for size in reversed(sizes) if size > 0][:layer_count]
+    return layer_sizes + [0] * (layer_count - len(layer_sizes))
+
+
+def list_local_images():
+    """List all local images with their layers.
+
+    Returns:
+        list: dicts with the keys Id, RepoTags, Created (unix timestamp), Size, Labels, Layers (chain ids) and LayerSizes.
+    """
+    status, images = docker_api_request("GET", "/images/json")
+    if status is not None:
+        if status != 200 or not isinstance(images, list):
+            return []
+        for image in images:
+            image_info = docker_api_request("GET", f"/images/{image.get('Id')}/json")[1]
+            image["RootFS"] = image_info.get("RootFS") if isinstance(image_info, dict) else None
+    else:
+        output, _, exit_code = run_docker_command("docker image ls --quiet --no-trunc")
+        image_ids = sorted(set(output.split()))
+        if exit_code != 0 or not image_ids:
+            return []
+        output, _, exit_code = run_docker_command("docker image inspect " + " ".join(image_ids))
+        try:
+            images = json.loads(output) if exit_code == 0 else []
+        except ValueError:
+            images = []
+        for image in images:
+            image["Labels"] = (image.get("Config") or {}).get("Labels")
+
+    local_images = []
+    for image in images:
+        layers = get_layer_chain_ids((image.get("RootFS") or {}).get("Layers") or [])
+        local_images.append({
+            "Id": image.get("Id"),
+            "RepoTags": [reference for reference in image.get("RepoTags") or [] if reference != "<none>:<none>"],
+            "Created": parse_image_created(image.get("Created")),
+            "Size": image.get("Size") or 0,
+            "Labels": image.get("Labels") or {},
+            "Layers": layers,
+            "LayerSizes": get_image_layer_sizes(image.get("Id"), len(layers)),
+        })
+    return local_images
+
+
+def list_all_containers():
+    """List all containers, including the ones not created by mlc.
+
+    Returns:
+        list: dicts with the keys Id, Name, Image (reference or id), ImageID (None with the docker CLI), State, Created and Labels.
+    """
+    containers = docker_api_list_containers(None)
+    if containers is not None:
+        return [
+            {
+                "Id": container.get("Id"),
+                "Name": docker_api_container_name(container),
+                "Image": container.get("Image"),
+                "ImageID": container.get("ImageID"),
+                "State": container.get("State"),
+                "Created": container.get("Created") or 0,
+                "Labels": container.get("Labels") or {},
+            }
+            for container in containers
+        ]
+    output, _, exit_code = run_docker_command("docker container ps --all --no-trunc --format '{{json .}}'")
+    all_containers = []
+    for line in output.splitlines() if exit_code == 0 else []:
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        all_containers.append({
+            "Id": row.get("ID"),
+            "Name": row.get("Names", "").split(",")[0],
+            "Image": row.get("Image"),
+            "ImageID": None,
+            "State": row.get("State"),
+            "Created": parse_image_created((row.get("CreatedAt") or "").replace(" ", "T", 1)),
+            "Labels": dict(label.split("=", 1) for label in (row.get("Labels") or "").split(",") if "=" in label),
+        })
+    return all_containers
+
+
+def image_group(image):
+    """Return the group of an image within which --keep-latest keeps the newest images.
+
+    Args:
+        image (dict): the image, see list_local_images().
+
+    Returns:
+        str: user and base repository for user setup layers, the repository without version for base images.
+    """
+    labels = image["Labels"]
+    if user_layer_label in labels:
+        return f"{labels.get(f'{user_layer_label}.USER')} {split_image_reference(labels.get(f'{user_layer_label}.BASE', ''))[0]}"
+    repository = split_image_reference((image["RepoTags"] or [image["Id"]])[0])[0]
+    return re.sub(r"-\d.*$", "", repository)
+
+
+def find_garbage(catalog_images, max_age_days=user_layer_max_age_days, keep_latest=0, include_bases=False, user_name=None, user_id=None):
+    """Find the containers and images mlc gc removes.
+
+    Args:
+        catalog_images (set): references of the images of the image catalog, these are base images.
+        max_age_days (float, optional): age of unused user setup layers and base images to be removed. Defaults to user_layer_max_age_days.
+        keep_latest (int, optional): number of the newest unused user setup layers and base images of every group kept. Defaults to 0.
+        include_bases (bool, optional): remove unused base images. Defaults to False.
+        user_name (str, optional): only layers of this user. Defaults to all users.
+        user_id (int, optional): only containers and container images of this user. Defaults to all users.
+
+    Returns:
+        list, int: GarbageItem of the containers and images, ordered so that containers and children come before the images they are
+            based on, and the reclaimable bytes.
+    """
+    now = time.time()
+    images = list_local_images()
+    containers = list_all_containers()
+    images_by_reference = {reference: image for image in images for reference in image["RepoTags"] + [image["Id"]]}
+    catalog_references = {"{}:{}".format(*split_image_reference(image)) for image in catalog_images}
+
+    def owner(tag):
+        # uid in the tag of a mlc container, None for other tags
+        match = gc_container_tag_pattern.match(tag)
+        return int(match.group(1)) if match else None
+
+    # Setup containers of crashed creates: named like mlc containers, but without the aime.mlc label
+    garbage = []
+    used_image_ids = set()
+    for container in containers:
+        image = images_by_reference.get(container["ImageID"] or container["Image"])
+        tag_owner = owner(container["Name"])
+        if (tag_owner is not None and "aime.mlc" not in container["Labels"] and container["State"] in ("exited", "created", "dead")
+                and now - container["Created"] > gc_grace_seconds and user_id in (None, tag_owner)):
+            garbage.append(GarbageItem(
+                "setup container", container["Name"], container["Id"], [], 0, container["Created"], "left by an interrupted mlc create", 0
+            ))
+        elif image is not None:
+            used_image_ids.add(image["Id"])
+
+    existing_container_tags = {container["Name"] for container in containers}
+    base_image_ids = {}
+    candidates = {}
+    for image in images:
+        if image["Id"] in used_image_ids:
+            continue
+        age = now - image["Created"]
+        tags = [split_image_reference(reference)[1] for reference in image["RepoTags"]]
+        references = {"{}:{}".format(*split_image_reference(reference)) for reference in image["RepoTags"]}
+        container_tags = [tag for tag in tags if owner(tag) is not None]
+        export_tags = [
+            tag[:-len(export_image_tag_suffix)]
+            for tag in tags
+            if tag.endswith(export_image_tag_suffix) and owner(tag[:-len(export_image_tag_suffix)]) is not None
+        ]
+        if export_tags and len(export_tags) == len(tags):
+            if age > gc_export_grace_seconds and user_id in (None, owner(export_tags[0])):
+                candidates[image["Id"]] = ("export image", "left by an interrupted mlc export")
+        elif container_tags and len(container_tags) == len(tags):
+            if (age > gc_grace_seconds and not existing_container_tags.intersection(container_tags)
+                    and user_id in (None, owner(container_tags[0]))):
+                candidates[image["Id"]] = ("container image", "container removed")
+        elif user_layer_label in image["Labels"]:
+            if age > gc_grace_seconds and user_name in (None, image["Labels"].get(f"{user_layer_label}.USER")):
+                reason = user_layer_stale_reason(image, base_image_ids, max_age_days)
+                if reason:
+                    candidates[image["Id"]] = ("user layer", reason)
+        elif include_bases and catalog_references.intersection(references) and age > max_age_days * 86400:
+            candidates[image["Id"]] = ("base image", f"unused, {int(age / 86400)} days old")
+
+    # The newest unused layers and base images of every group are kept
+    if keep_latest > 0:
+        groups = defaultdict(list)
+        for image in images:
+            if image["Id"] in candidates and candidates[image["Id"]][0] in ("user layer", "base image"):
+                groups[(candidates[image["Id"]][0], image_group(image))].append(image)
+        for group_images in groups.values():
+            for image in sorted(group_images, key=lambda image: image["Created"], reverse=True)[:keep_latest]:
+                del candidates[image["Id"]]
+
+    # An image is needed by every kept image built on top of it, repeated until no further image is dropped
+    images_by_id = {image["Id"]: image for image in images}
+    while True:
+        kept_chains = {chain_id for image in images if image["Id"] not in candidates for chain_id in image["Layers"]}
+        needed = [image_id for image_id in candidates if images_by_id[image_id]["Layers"] and images_by_id[image_id]["Layers"][-1] in kept_chains]
+        if not needed:
+            break
+        for image_id in needed:
+            del candidates[image_id]
+
+    # Children are removed before their base images, so order by the number of layers
+    for image_id in sorted(candidates, key=lambda image_id: len(images_by_id[image_id]["Layers"]), reverse=True):
+        image = images_by_id[image_id]
+        kind, reason = candidates[image_id]
+        garbage.append(GarbageItem(
+            kind, (image["RepoTags"] or [image_id])[0], image_id, image["RepoTags"], image["Size"], image["Created"], reason, len(image["Layers"])
+        ))
+    layer_sizes = {
+        chain_id: size
+        for image_id in candidates
+        for chain_id, size in zip(images_by_id[image_id]["Layers"], images_by_id[image_id]["LayerSizes"])
+        if chain_id not in kept_chains
+    }
+    return garbage, sum(layer_sizes.values())
+
+
+def remove_garbage_item(item):
+    """Remove a container or an image found by find_garbage. Every reference of an image is removed, the last one removes the image.
+
+    Args:
+        item (GarbageItem): the container or image.
+
+    Returns:
+        bool: True if it was removed.
+    """
+    if item.kind == "setup container":
+        status, _ = docker_api_request("DELETE", f"/containers/{item.id}")
+        if status is not None:
+            return status == 204
+        _, _, exit_code = run_docker_command(f"docker container rm {item.id}")
+        return exit_code == 0
+    return all([remove_image(reference) for reference in item.references or [item.id]])
+
+
+def remove_garbage(garbage, jobs=4):
+    """Remove the containers and images found by find_garbage in parallel.
+
+    Items of the same depth are removed in parallel, a deeper item before the images it is based on, so that docker does not refuse to
+    remove an image which still has children.
+
+    Args:
+        garbage (list): GarbageItem ordered by find_garbage.
+        jobs (int, optional): maximal number of parallel removals. Defaults to 4.
+
+    Returns:
+        dict: {id: True if removed}.
+    """
+    import itertools
+    import queue
+
+    results = {}
+    print_lock = threading.Lock()
+
+    def worker(pending_items):
+        while True:
+            try:
+                item = pending_items.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                removed = remove_garbage_item(item)
+            except Exception:
+                removed = False
+            results[item.id] = removed
+            with print_lock:
+                print(f"{INPUT}[{item.name}]{RESET} {NEUTRAL + 'removed' if removed else ERROR + 'could not be removed'}.{RESET}")
+
+    for _, items in itertools.groupby(garbage, key=lambda item: (item.kind == "setup container", item.depth)):
+        pending_items = queue.Queue()
+        for item in items:
+            pending_items.put(item)
+        threads = [threading.Thread(target=worker, args=(pending_items,), daemon=True) for _ in range(max(1, min(jobs, pending_items.qsize())))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    invalidate_container_inventory()
+    return results
+
+
+################################################################################################################################################
+# Batch creation
+#
+# mlc create --from <manifest> creates many containers described in one json or yaml manifest. All entries are validated first,
+# images shared by several entries are pulled once and the containers are set up in parallel.
+
+create_manifest_keys = [
+    "name", "framework", "version", "architecture", "workspace_dir", "data_dir", "models_dir", "num_gpus", "watchdog",
+    "cpus", "memory", "shm_size", "ipc", "cpuset", "allocate_gpus", "data_cache", "data_cache_size",
+]
+
+
+def load_create_manifest(manifest_file):
+    """Read the container entries of a create manifest.
+
+    The manifest is either a list of entries or a mapping with the optional key 'defaults' (values used by all entries)
+    and the key 'containers' (list of entries). Each entry may contain the keys of create_manifest_keys. Yaml manifests
+    need the python package PyYAML.
+
+    Args:
+        manifest_file (str): path of the .json, .yaml or .yml file.
+
+    Returns:
+        list: entries (dict) with the defaults applied.
+
+    Raises:
+        OSError: if the manifest can not be read.
+        ValueError: if the manifest is not valid.
+    """
+    with open(manifest_file, "r") as file:
+        content = file.read()
+
+    if manifest_file.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading yaml manifests needs the python package PyYAML (pip install pyyaml), use a json manifest instead.")
+        try:
+            manifest = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid yaml manifest: {e}")
+    else:
+        try:
+            manifest = json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"Invalid json manifest: {e}")
+
+    if isinstance(manifest, dict):
+        defaults = manifest.get("defaults") or {}
+        entries = manifest.get("containers")
+    else:
+        defaults = {}
+        entries = manifest
+    if not isinstance(defaults, dict) or not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("The manifest needs a list of containers, each container given as mapping.")
+
+    for entry in [defaults] + entries:
+        unknown_keys = set(entry) - set(create_manifest_keys)
+        if unknown_keys:
+            raise ValueError(f"Unknown keys in manifest: {', '.join(sorted(unknown_keys))}. Valid keys: {', '.join(create_manifest_keys)}")
+    return [dict(defaults, **entry) for entry in entries]
+
+
+def check_directory(directory, directory_type):
+    """Expand '~' in a directory to be mounted and check that it exists.
+
+    Args:
+        directory (str): path of the directory.
+        directory_type (str): Workspace, Data or Models, used in the error message.
+
+    Returns:
+        str: the expanded path.
+
+    Raises:
+        ValueError: if the directory does not exist.
+    """
+    expanded_directory = os.path.expanduser(str(directory))
+    if not os.path.isdir(expanded_directory):
+        raise ValueError(f"{directory_type} directory does not exist: {expanded_directory}")
+    return expanded_directory
+
+
+def plan_manifest_entry(entry, default_architecture, available_architectures, repo_file):
+    """Validate a manifest entry and resolve its image and directories.
+
+    Args:
+        entry (dict): manifest entry, see load_create_manifest().
+        default_architecture (str): gpu architecture of entries without architecture.
+        available_architectures (list): gpu architectures usable on the host.
+        repo_file (str): path of ml_images.repo.
+
+    Returns:
+        dict: the entry with the keys name, tag, architecture, framework, version, image, workspace_dir, data_dir, models_dir, num_gpus,
+            allocate_gpus, labels, resources and data_cache.
+
+    Raises:
+        ValueError: if the entry is not valid.
+    """
+    if not entry.get("name"):
+        raise ValueError("Container name is missing.")
+    name, tag = validate_container_name(str(entry["name"]), "create")
+
+    architecture = entry.get("architecture") or default_architecture
+    if architecture not in available_architectures:
+        raise ValueError(f"Unknown gpu architecture: {architecture}")
+
+    version_images = extract_from_ml_images(repo_file, architecture).get(entry.get("framework"))
+    if not version_images:
+        raise ValueError(f"Unknown framework: {entry.get('framework')}")
+    version = str(entry.get("version", ""))
+    if version not in version_images:
+        raise ValueError(f"Version is not available: {entry.get('framework')} {version or '-'}")
+
+    data_cache_size = check_data_cache_options(entry.get("data_cache"), entry.get("data_cache_size"))
+    if data_cache_size is not None and not entry.get("data_dir"):
+        raise ValueError("The data cache needs a data directory (data_dir).")
+
+    return {
+        "name": name,
+        "tag": tag,
+        "architecture": architecture,
+        "framework": entry["framework"],
+        "version": version,
+        "image": get_docker_image(version, version_images),
+        "workspace_dir": check_directory(entry["workspace_dir"], "Workspace") if entry.get("workspace_dir") else os.path.expanduser('~/workspace'),
+        "data_dir": check_directory(entry["data_dir"], "Data") if entry.get("data_dir") else "-",
+        "models_dir": check_directory(entry["models_dir"], "Models") if entry.get("models_dir") else "-",
+        "num_gpus": str(entry.get("num_gpus", "all")),
+        "allocate_gpus": bool(entry.get("allocate_gpus", allocate_gpus_default)),
+        "labels": {"aime.mlc.WATCHDOG": "off"} if entry.get("watchdog") is False else {},
+        "resources": resolve_container_resources(
+            entry.get("cpus"), entry.get("memory"), entry.get("shm_size"), entry.get("cpuset"), architecture, str(entry.get("num_gpus", "all")),
+            entry.get("ipc")
+        ),
+        "data_cache": (os.path.expanduser(entry["data_cache"]), data_cache_size, str(entry["data_cache_size"])) if data_cache_size else None,
+    }
+
+
+def create_containers_from_plans(plans, jobs=4, rebuild_layer=False, interactive=True):
+    """Pull the images of the planned containers once and set up the containers in parallel.
+
+    Args:
+        plans (list): validated entries, see plan_manifest_entry().
+        jobs (int, optional): maximal number of parallel pulls and parallel container setups. Defaults to 4.
+        rebuild_layer (bool, optional): set up the user again instead of reusing the cached layers. Defaults to False.
+        interactive (bool, optional): show a redrawn status line during the pulls. Defaults to True.
+
+    Returns:
+        dict: {container name: (result, message)} with result created or failed.
+    """
+    import queue
+
+    results = {}
+    print_lock = threading.Lock()
+
+    # Images shared by several containers are pulled only once
+    images = list(dict.fromkeys(plan["image"] for plan in plans))
+    print(f"\n{NEUTRAL}Acquiring {len(images)} container images ... {RESET}\n")
+    pull_results = prefetch_images(images, jobs, None, interactive)
+
+    pending_plans = queue.Queue()
+    for plan in plans:
+        pull_result, pull_message = pull_results.get(plan["image"], ("failed", ""))
+        if pull_result in ("failed", "skipped"):
+            results[plan["name"]] = ("failed", f"pull of {plan['image']} failed: {pull_message}")
+        else:
+            pending_plans.put(plan)
+
+    print(f"\n{NEUTRAL}Setting up {pending_plans.qsize()} containers ... {RESET}\n")
+
+    def worker():
+        while True:
+            try:
+                plan = pending_plans.get_nowait()
+            except queue.Empty:
+                return
+            start_time = time.monotonic()
+            gpu_reservation_held = None
+            try:
+                # GPUs are assigned one container after the other through the lock of the ledger, --cpuset auto follows them
+                num_gpus, resources = plan["num_gpus"], plan["resources"]
+                if plan["allocate_gpus"]:
+                    num_gpus = allocate_gpus(plan["architecture"], num_gpus, plan["tag"])
+                    gpu_reservation_held = hold_gpu_reservation(plan["tag"])
+                    if "cpuset_mems" in resources:
+                        resources = dict(resources)
+                        resources["cpuset_cpus"], resources["cpuset_mems"] = numa_local_cpuset(plan["architecture"], num_gpus)
+                data_cache = None
+                if plan["data_cache"]:
+                    cache_root, cache_size, cache_size_text = plan["data_cache"]
+                    data_cache = (prepare_data_cache(cache_root, plan["data_dir"], cache_size), cache_size_text)
+                setup_container(
+                    plan["architecture"],
+                    plan["image"],
+                    plan["framework"],
+                    plan["version"],
+                    plan["name"],
+                    plan["tag"],
+                    plan["workspace_dir"],
+                    plan["data_dir"],
+                    plan["models_dir"],
+                    num_gpus,
+                    rebuild_layer,
+                    verbose=False,
+                    labels=plan["labels"],
+                    resources=resources,
+                    data_cache=data_cache
+                )
+                result = ("created", f"{time.monotonic() - start_time:.0f} s" + (f", {num_gpus}" if plan["allocate_gpus"] else ""))
+            except Exception as e:
+                if plan["allocate_gpus"]:
+                    release_gpus(plan["tag"])
+                result = ("failed", str(e))
+            finally:
+                if gpu_reservation_held:
+                    gpu_reservation_held.set()
+            with print_lock:
+                results[plan["name"]] = result
+                print(f"{INPUT}[{plan['name']}]{RESET} {NEUTRAL if result[0] == 'created' else ERROR}{result[0]}{RESET} {result[1]}")
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, pending_plans.qsize())))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    invalidate_container_inventory()
+    return results
+
+
+################################################################################################################################################
+# Container export and import
+#
+# mlc export commits a container and streams the saved image through gzip compression on all cores into one archive, no intermediate
+# tar is written to disk. The stream is cut into chunks which are compressed in parallel into separate gzip members, so the archive is a
+# regular .tar.gz which docker load accepts as well. The tar starts with mlc-export.json, holding the aime.mlc labels of the container, and
+# the sha256 of the archive is written next to it in sha256sum format. mlc import checks the checksum while the archive is streamed into
+# docker load and records each finished step, an interrupted import continues with the first unfinished step when it is run again.
+#
+# mlc export --delta leaves the layers of the aimehub base image out of the archive and records the base image with its digest and layer
+# diff ids in mlc-export.json. docker load only registers layers which are not present yet, so a tar without the base layers loads on a
+# machine which has the base image. mlc import checks this before loading and pulls the base image by its digest if it is missing.
+
+export_metadata_file_name = "mlc-export.json"
+export_chunk_size = 16 * 1024 * 1024    # Bytes of the image tar compressed into one gzip member
+export_image_tag_suffix = "-export"     # Tag suffix of the image committed for the export
+archive_load_timeout = 1800             # Seconds docker may need to register the layers after the archive has been sent
+
+# Labels set by build_docker_create_command, all other aime.mlc labels of an exported container are passed on by mlc import
+container_create_labels = [
+    "aime.mlc",
+    "aime.mlc.NAME",
+    "aime.mlc.USER",
+    "aime.mlc.ARCH",
+    "aime.mlc.MLC_VERSION",
+    "aime.mlc.WORK_MOUNT",
+    "aime.mlc.DATA_MOUNT",
+    "aime.mlc.MODELS_MOUNT",
+    "aime.mlc.FRAMEWORK",
+    "aime.mlc.GPUS",
+    *(label for _, label in container_resource_options.values()),
+    # The data cache is a directory of the exporting host, the imported container mounts its data directory directly
+    "aime.mlc.DATA_CACHE",
+    "aime.mlc.DATA_CACHE_SIZE",
+]
+
+
+class ContainerArchiveError(Exception):
+    """Exporting or importing a container archive failed."""
+
+
+def commit_container(container, image):
+    """Commit a container into an image. The container is paused while it is committed.
+
+    Args:
+        container (ContainerInfo): the container.
+        image (str): reference of the new image.
+
+    Raises:
+        ContainerArchiveError: if docker failed.
+    """
+    repository, tag = split_image_reference(image)
+    status, reply = docker_api_request("POST", "/commit", {"container": container.id, "repo": repository, "tag": tag, "comment": "mlc export"})
+    if status is not None:
+        if status != 201:
+            raise ContainerArchiveError(f"Committing the container failed: {reply.get('message', '') if isinstance(reply, dict) else reply}")
+        return
+    _, stderr, exit_code = run_docker_command(f"docker container commit --message 'mlc export' {container.tag} {image}")
+    if exit_code != 0:
+        raise ContainerArchiveError(f"Committing the container failed: {stderr}")
+
+
+def iter_image_save(image, chunk_size=export_chunk_size):
+    """Stream the tar of an image (docker image save) in chunks.
+
+    Args:
+        image (str): image reference.
+        chunk_size (int, optional): bytes per chunk. Defaults to export_chunk_size.
+
+    Yields:
+        bytes: the next chunk of the tar.
+
+    Raises:
+        ContainerArchiveError: if docker failed.
+    """
+    import http.client
+    import urllib.parse
+
+    client = get_docker_api_client()
+    if client is not None:
+        try:
+            response = client.open_stream("GET", f"/images/{urllib.parse.quote(image, safe='')}/get")
+        except DockerAPIError as e:
+            raise ContainerArchiveError(f"Saving the image failed: {e}") from e
+        try:
+            if response.status != 200:
+                raise ContainerArchiveError(f"Saving the image failed: {response.read().decode(errors='replace').strip()}")
+            while True:
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        except (OSError, http.client.HTTPException) as e:
+            raise ContainerArchiveError(f"Saving the image failed: {e}") from e
+        finally:
+            response.close()
+
+    process = subprocess.Popen(["docker", "image", "save", image], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise ContainerArchiveError(f"Saving the image failed: {process.stderr.read().decode(errors='replace').strip()}")
+
+
+def build_tar_entry(file_name, data):
+    """Build a tar entry (header and padded content) which can be put in front of another tar stream.
+
+    Args:
+        file_name (str): name of the file in the tar.
+        data (bytes): content of the file.
+
+    Returns:
+        bytes: the entry.
+    """
+    import tarfile
+
+    tar_info = tarfile.TarInfo(file_name)
+    tar_info.size = len(data)
+    tar_info.mtime = int(time.time())
+    tar_info.mode = 0o644
+    return tar_info.tobuf() + data + b"\0" * (-len(data) % tarfile.BLOCKSIZE)
+
+
+def get_image_layers(image):
+    """Return the diff ids of the layers of a local image, from the bottom to the top layer.
+
+    Args:
+        image (str): image reference or id.
+
+    Returns:
+        list: diff ids like sha256:..., None if the image is not available locally.
+    """
+    status, image_info = docker_api_request("GET", f"/images/{image}/json")
+    if status is not None:
+        if status != 200 or not isinstance(image_info, dict):
+            return None
+        return (image_info.get("RootFS") or {}).get("Layers") or []
+    output, _, exit_code = run_docker_command(f"docker image inspect --format '{{{{json .RootFS.Layers}}}}' {image}")
+    if exit_code != 0:
+        return None
+    try:
+        return json.loads(output) or []
+    except ValueError:
+        return []
+
+
+def get_image_labels(image):
+    """Return the labels of a local image.
+
+    Args:
+        image (str): image reference or id.
+
+    Returns:
+        dict: the labels, empty if the image is not available locally.
+    """
+    status, image_info = docker_api_request("GET", f"/images/{image}/json")
+    if status is not None:
+        return ((image_info.get("Config") or {}).get("Labels") or {}) if status == 200 and isinstance(image_info, dict) else {}
+    output, _, exit_code = run_docker_command(f"docker image inspect --format '{{{{json .Config.Labels}}}}' {image}")
+    try:
+        return (json.loads(output) or {}) if exit_code == 0 else {}
+    except ValueError:
+        return {}
+
+
+def find_export_base_image(container, image):
+    """Find the base image of the committed image of a container.
+
+    The base image is the one recorded in the user setup layer of mlc create, containers of older mlc versions use the repository of their
+    image. It is only accepted if its layers are the bottom layers of the committed image.
+
+    Args:
+        container (ContainerInfo): the exported container.
+        image (str): reference of the committed image.
+
+    Raises:
+        ContainerArchiveError: if no base image is found.
+
+    Returns:
+        dict: the base image with image (reference), id, digest (repo digest, None for images which were not pulled) and layers (diff ids).
+    """
+    image_layers = get_image_layers(image) or []
+    candidates = [get_image_labels(container.image).get(f"{user_layer_label}.BASE"), split_image_reference(container.image)[0]]
+    for base_image in dict.fromkeys(candidate for candidate in candidates if candidate):
+        base_layers = get_image_layers(base_image)
+        if base_layers and len(base_layers) < len(image_layers) and image_layers[:len(base_layers)] == base_layers:
+            repository = split_image_reference(base_image)[0]
+            repo_digests = get_local_image_digests(base_image) or []
+            digest = next((repo_digest for repo_digest in repo_digests if repo_digest.startswith(f"{repository}@")), None)
+            return {
+                "image": base_image,
+                "id": get_image_id(base_image),
+                "digest": digest or (repo_digests[0] if repo_digests else None),
+                "layers": base_layers,
+            }
+    raise ContainerArchiveError(f"The base image of {container.image} is not available locally, export without --delta.")
+
+
+class ChunkReader(io.RawIOBase):
+    """Read-only file reading from an iterable of byte chunks, used to parse a streamed tar with tarfile."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b""
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def iter_rechunked(pieces, chunk_size=export_chunk_size):
+    """Join byte pieces of any size into chunks of chunk_size bytes, the last chunk may be smaller.
+
+    Args:
+        pieces (iterable): the byte pieces.
+        chunk_size (int, optional): bytes per chunk. Defaults to export_chunk_size.
+
+    Yields:
+        bytes: the next chunk.
+    """
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_delta_image_save(image, base_layers, spool_dir, omitted_layers, chunk_size=export_chunk_size):
+    """Stream the tar of an image without the files of the base layers.
+
+    docker image save of docker 25 and newer names the layers blobs/sha256/<diff id>, these are left out by their name. Older versions write
+    <v1 id>/layer.tar, which is spooled to a temporary file in spool_dir while its sha256 is computed and left out if it is a base layer.
+
+    Args:
+        image (str): image reference.
+        base_layers (list): diff ids of the base layers.
+        spool_dir (str): directory of the temporary files.
+        omitted_layers (list): receives the diff ids of the omitted layers.
+        chunk_size (int, optional): bytes per chunk. Defaults to export_chunk_size.
+
+    Yields:
+        bytes: the next piece of the tar.
+
+    Raises:
+        ContainerArchiveError: if docker failed or the tar can not be read.
+    """
+    import hashlib
+    import tarfile
+    import tempfile
+
+    base_layers = set(base_layers)
+    try:
+        with tarfile.open(fileobj=ChunkReader(iter_image_save(image, chunk_size)), mode="r|") as tar:
+            for entry in tar:
+                blob_dir, _, blob_digest = entry.name.rpartition("/")
+                if entry.isfile() and blob_dir == "blobs/sha256" and f"sha256:{blob_digest}" in base_layers:
+                    omitted_layers.append(f"sha256:{blob_digest}")
+                    continue
+                header = entry.tobuf()
+                padding = b"\0" * (-entry.size % tarfile.BLOCKSIZE) if entry.isfile() else b""
+                if not entry.isfile():
+                    yield header
+                elif entry.name.endswith("/layer.tar"):
+                    with tempfile.TemporaryFile(dir=spool_dir) as spool_file:
+                        checksum = hashlib.sha256()
+                        data_file = tar.extractfile(entry)
+                        for data in iter(lambda: data_file.read(chunk_size), b""):
+                            checksum.update(data)
+                            spool_file.write(data)
+                        if f"sha256:{checksum.hexdigest()}" in base_layers:
+                            omitted_layers.append(f"sha256:{checksum.hexdigest()}")
+                            continue
+                        spool_file.seek(0)
+                        yield header
+                        yield from iter(lambda: spool_file.read(chunk_size), b"")
+                        yield padding
+                else:
+                    yield header
+                    data_file = tar.extractfile(entry)
+                    yield from iter(lambda: data_file.read(chunk_size), b"")
+                    yield padding
+        yield b"\0" * (2 * tarfile.BLOCKSIZE)
+    except tarfile.TarError as e:
+        raise ContainerArchiveError(f"Reading the saved image failed: {e}") from e
+
+
+def write_compressed_archive(chunks, archive_file, jobs, level=6, progress=None):
+    """Compress chunks in parallel into gzip members and write them to the archive in their original order.
+
+    zlib releases the GIL while compressing, so the worker threads use all cores. At most 2 * jobs chunks are held in memory.
+
+    Args:
+        chunks (iterable): the uncompressed chunks, read by a separate thread.
+        archive_file (file): binary file the archive is written to.
+        jobs (int): number of compression threads.
+        level (int, optional): gzip compression level 1-9. Defaults to 6.
+        progress (callable, optional): called with the number of read and written bytes after every chunk. Defaults to None.
+
+    Returns:
+        int, int, str: uncompressed size, archive size and sha256 hex digest of the archive.
+    """
+    import hashlib
+    import queue
+    import zlib
+
+    pending_chunks = queue.Queue(maxsize=2 * jobs)    # (chunk, slot of its compressed data) to be compressed
+    ordered_slots = queue.Queue(maxsize=2 * jobs)     # (chunk size, slot) in archive order, None at the end, an exception on errors
+
+    def compress():
+        while True:
+            item = pending_chunks.get()
+            if item is None:
+                return
+            chunk, slot = item
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            slot.put(compressor.compress(chunk) + compressor.flush())
+
+    def read():
+        try:
+            for chunk in chunks:
+                slot = queue.Queue(maxsize=1)
+                ordered_slots.put((len(chunk), slot))
+                pending_chunks.put((chunk, slot))
+            ordered_slots.put(None)
+        except Exception as e:
+            ordered_slots.put(e)
+        finally:
+            for _ in range(jobs):
+                pending_chunks.put(None)
+
+    threads = [threading.Thread(target=compress, daemon=True) for _ in range(jobs)] + [threading.Thread(target=read, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    checksum = hashlib.sha256()
+    read_size = written_size = 0
+    while True:
+        item = ordered_slots.get()
+        if item is None:
+            break
+        if isinstance(item, Exception):
+            raise item
+        chunk_size, slot = item
+        data = slot.get()
+        archive_file.write(data)
+        checksum.update(data)
+        read_size += chunk_size
+        written_size += len(data)
+        if progress:
+            progress(read_size, written_size)
+    return read_size, written_size, checksum.hexdigest()
+
+
+def export_container(container, archive_name, jobs, level=6, progress=None, delta=False):
+    """Export a container into a compressed archive and write its checksum file.
+
+    The archive is written to archive_name.part first and renamed when it is complete.
+
+    Args:
+        container (ContainerInfo): the container.
+        archive_name (str): path of the archive.
+        jobs (int): number of compression threads.
+        level (int, optional): gzip compression level 1-9. Defaults to 6.
+        progress (callable, optional): see write_compressed_archive. Defaults to None.
+        delta (bool, optional): leave the layers of the base image out of the archive. Defaults to False.
+
+    Raises:
+        ContainerArchiveError: if committing or saving the container failed or the base image of a delta export is not available.
+
+    Returns:
+        int, int, str, dict: uncompressed size, archive size, sha256 hex digest of the archive and for delta exports the base image (see
+            find_export_base_image) with the diff ids of the omitted layers in omitted_layers, otherwise None.
+    """
+    image = f"{split_image_reference(container.image)[0]}:{container.tag}{export_image_tag_suffix}"
+    metadata = {
+        "name": container.name,
+        "image": image,
+        "labels": {label: value for label, value in container.labels.items() if label.startswith("aime.mlc")},
+        "user_id": user_id,
+        "group_id": group_id,
+        "mlc_version": mlc_version,
+        "exported": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    omitted_layers = []
+
+    def chunks():
+        yield build_tar_entry(export_metadata_file_name, json.dumps(metadata, indent=2).encode())
+        if delta:
+            yield from iter_rechunked(iter_delta_image_save(image, metadata["base"]["layers"], os.path.dirname(os.path.abspath(archive_name)), omitted_layers))
+        else:
+            yield from iter_image_save(image)
+
+    commit_container(container, image)
+    partial_archive_name = f"{archive_name}.part"
+    try:
+        if delta:
+            metadata["base"] = find_export_base_image(container, image)
+        with open(partial_archive_name, "wb") as archive_file:
+            sizes = write_compressed_archive(chunks(), archive_file, jobs, level, progress)
+        os.replace(partial_archive_name, archive_name)
+    except OSError as e:
+        raise ContainerArchiveError(f"Writing the archive failed: {e}") from e
+    finally:
+        if os.path.exists(partial_archive_name):
+            os.remove(partial_archive_name)
+        remove_image(image)
+    with open(f"{archive_name}.sha256", "w") as checksum_file:
+        checksum_file.write(f"{sizes[2]}  {os.path.basename(archive_name)}\n")
+    base = dict(metadata["base"], omitted_layers=omitted_layers) if delta else None
+    return (*sizes, base)
+
+
+def read_export_metadata(archive_name):
+    """Read the metadata at the start of an archive of mlc export.
+
+    Args:
+        archive_name (str): path of the archive.
+
+    Raises:
+        ContainerArchiveError: if the file is no archive of mlc export.
+
+    Returns:
+        dict: the metadata with name, image, labels, user_id, group_id, mlc_version, exported and base for delta exports.
+    """
+    import gzip
+    import tarfile
+
+    try:
+        with gzip.open(archive_name) as archive_file, tarfile.open(fileobj=archive_file, mode="r|") as tar:
+            entry = tar.next()
+            if entry is None or entry.name != export_metadata_file_name:
+                raise ContainerArchiveError(f"{archive_name} is no archive of mlc export.")
+            return json.load(tar.extractfile(entry))
+    except (OSError, EOFError, ValueError, tarfile.TarError) as e:
+        raise ContainerArchiveError(f"{archive_name} can not be read: {e}") from e
+
+
+def read_archive_checksum(archive_name):
+    """Read the expected sha256 of an archive from its checksum file.
+
+    Args:
+        archive_name (str): path of the archive.
+
+    Returns:
+        str: the sha256 hex digest, None if there is no checksum file.
+    """
+    try:
+        with open(f"{archive_name}.sha256") as checksum_file:
+            return checksum_file.read().split()[0].lower()
+    except (OSError, IndexError):
+        return None
+
+
+def iter_decompressed_archive(archive_name, checksum, progress=None, chunk_size=export_chunk_size):
+    """Read an archive, decompress its gzip members and feed the compressed data into a checksum.
+
+    Args:
+        archive_name (str): path of the archive.
+        checksum (hashlib object): updated with the compressed data.
+        progress (callable, optional): called with the number of read bytes of the archive. Defaults to None.
+        chunk_size (int, optional): bytes read at once. Defaults to export_chunk_size.
+
+    Yields:
+        bytes: decompressed data.
+
+    Raises:
+        ContainerArchiveError: if the archive is damaged or truncated.
+    """
+    import zlib
+
+    decompressor = None
+    read_size = 0
+    with open(archive_name, "rb") as archive_file:
+        while True:
+            data = archive_file.read(chunk_size)
+            if not data:
+                break
+            checksum.update(data)
+            read_size += len(data)
+            # Every chunk of mlc export is a gzip member of its own, the next member starts behind the end of the current one
+            while data:
+                if decompressor is None:
+                    decompressor = zlib.decompressobj(31)
+                try:
+                    yield decompressor.decompress(data)
+                except zlib.error as e:
+                    raise ContainerArchiveError(f"{archive_name} is damaged: {e}") from e
+                if not decompressor.eof:
+                    break
+                data = decompressor.unused_data
+                decompressor = None
+            if progress:
+                progress(read_size)
+    if decompressor is not None:
+        raise ContainerArchiveError(f"{archive_name} is truncated.")
+
+
+def load_image_archive(archive_name, progress=None):
+    """Stream an archive into docker image load and verify its checksum on the way.
+
+    Args:
+        archive_name (str): path of the archive.
+        progress (callable, optional): see iter_decompressed_archive. Defaults to None.
+
+    Raises:
+        ContainerArchiveError: if the archive is damaged, docker failed or the checksum does not match. A loaded image is removed
+            again if the checksum does not match.
+
+    Returns:
+        str: reference of the loaded image.
+    """
+    import hashlib
+    import http.client
+
+    checksum = hashlib.sha256()
+    expected_checksum = read_archive_checksum(archive_name)
+    chunks = iter_decompressed_archive(archive_name, checksum, progress)
+
+    client = get_docker_api_client()
+    if client is not None:
+        connection = client.new_connection(archive_load_timeout)
+        try:
+            connection.request(
+                "POST", "/images/load?quiet=1", body=chunks, headers={"Host": "docker", "Content-Type": "application/x-tar"}, encode_chunked=True
+            )
+            response = connection.getresponse()
+            # The reply is a stream of json messages like {"stream": "Loaded image: ..."} or {"error": "..."}
+            messages = [json.loads(line) for line in response.read().decode(errors="replace").splitlines() if line.strip()]
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            raise ContainerArchiveError(f"Loading the image failed: {e}") from e
+        finally:
+            connection.close()
+        output = "".join(message.get("error") or message.get("stream") or message.get("message", "") for message in messages)
+        failed = response.status != 200 or any("error" in message for message in messages)
+    else:
+        process = subprocess.Popen(["docker", "image", "load"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except ContainerArchiveError:
+            process.kill()
+            raise
+        finally:
+            process.stdin.close()
+        output = process.stdout.read().decode(errors="replace")
+        failed = process.wait() != 0
+
+    loaded_image = re.search(r"Loaded image(?: ID)?: (\S+)", output)
+    if failed or loaded_image is None:
+        raise ContainerArchiveError(f"Loading the image failed: {output.strip()}")
+    if expected_checksum is not None and checksum.hexdigest() != expected_checksum:
+        remove_image(loaded_image.group(1))
+        raise ContainerArchiveError(f"The checksum of {archive_name} does not match {archive_name}.sha256, the archive is damaged.")
+    return loaded_image.group(1)
+
+
+def get_import_state_file(archive_name):
+    """Return the file recording the finished steps of the import of an archive.
+
+    The file name is derived from the path, size and modification time of the archive, a replaced archive is imported from scratch.
+
+    Args:
+        archive_name (str): path of the archive.
+
+    Returns:
+        str: path of the state file.
+    """
+    import hashlib
+
+    archive_stat = os.stat(archive_name)
+    archive_id = f"{os.path.realpath(archive_name)} {archive_stat.st_size} {archive_stat.st_mtime_ns}"
+    return os.path.join(get_mlc_cache_dir(), f"import-{hashlib.sha256(archive_id.encode()).hexdigest()[:12]}.json")
+
+
+def read_import_state(archive_name):
+    """Read the finished steps of an interrupted import.
+
+    Args:
+        archive_name (str): path of the archive.
+
+    Returns:
+        dict: {"image": reference of the loaded image}, empty if the import has not been started.
+    """
+    try:
+        with open(get_import_state_file(archive_name)) as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def write_import_state(archive_name, state):
+    """Record the finished steps of an import, None removes the record after the import is complete.
+
+    Args:
+        archive_name (str): path of the archive.
+        state (dict): the finished steps, see read_import_state.
+    """
+    state_file_name = get_import_state_file(archive_name)
+    if state is None:
+        if os.path.exists(state_file_name):
+            os.remove(state_file_name)
+        return
+    os.makedirs(os.path.dirname(state_file_name), exist_ok=True)
+    with open(state_file_name, "w") as state_file:
+        json.dump(state, state_file)
+
+
+def tag_image(image, new_image):
+    """Add a reference to an image.
+
+    Args:
+        image (str): reference or id of the image.
+        new_image (str): the new reference.
+
+    Returns:
+        bool: True if the image was tagged.
+    """
+    repository, tag = split_image_reference(new_image)
+    status, _ = docker_api_request("POST", f"/images/{image}/tag", {"repo": repository, "tag": tag})
+    if status is not None:
+        return status == 201
+    _, _, exit_code = run_docker_command(f"docker image tag {image} {new_image}")
+    return exit_code == 0
+
+
+def ensure_base_image(base):
+    """Make sure the base image of a delta archive is available locally, pull it by its digest if it is missing.
+
+    Args:
+        base (dict): the base image recorded by mlc export --delta, see find_export_base_image.
+
+    Raises:
+        ContainerArchiveError: if the base image can not be pulled or its layers differ from the recorded ones.
+
+    Returns:
+        bool: True if the base image was pulled.
+    """
+    if base.get("id") and get_image_layers(base["id"]) == base["layers"]:
+        return False
+    if get_image_layers(base["image"]) == base["layers"]:
+        return False
+
+    pull_image = base.get("digest") or base["image"]
+    pulled, error = pull_docker_image(pull_image)
+    if not pulled:
+        raise ContainerArchiveError(f"The base image {pull_image} is not available and pulling it failed: {error}")
+    if get_image_layers(pull_image) != base["layers"]:
+        raise ContainerArchiveError(f"The layers of the pulled base image {pull_image} differ from the base image of the archive.")
+    # An image pulled by its digest has no tag, it is tagged like on the exporting machine if that reference is free
+    if pull_image != base["image"] and get_image_id(base["image"]) is None:
+        tag_image(pull_image, base["image"])
+    return True
+
+
+def import_container(archive_name, metadata, container_name, container_tag, workspace_dir, data_dir, models_dir, progress=None):
+    """Load the image of an archive and create the container with the labels of the exported container.
+
+    Args:
+        archive_name (str): path of the archive.
+        metadata (dict): metadata of the archive, see read_export_metadata.
+        container_name (str): validated name of the new container.
+        container_tag (str): tag of the new container.
+        workspace_dir (str): host path of the workspace.
+        data_dir (str): host path of the data directory, '-' if not mounted.
+        models_dir (str): host path of the models directory, '-' if not mounted.
+        progress (callable, optional): see iter_decompressed_archive. Defaults to None.
+
+    Raises:
+        ContainerArchiveError: if the base image of a delta archive is missing and can not be pulled, loading the image or creating the
+            container failed. The finished steps are kept for the next run.
+
+    Returns:
+        bool: True if the image had already been loaded by an interrupted import.
+    """
+    state = read_import_state(archive_name)
+    resumed = bool(state.get("image")) and get_image_id(state["image"]) is not None
+    if not resumed:
+        if metadata.get("base"):
+            ensure_base_image(metadata["base"])
+        state["image"] = load_image_archive(archive_name, progress)
+        write_import_state(archive_name, state)
+
+    # The image is tagged like the images of mlc create, so that mlc remove deletes it together with the container
+    labels = metadata["labels"]
+    container_image = f"{split_image_reference(metadata['image'])[0]}:{container_tag}"
+    if not tag_image(state["image"], container_image):
+        raise ContainerArchiveError(f"Tagging the image {state['image']} as {container_image} failed.")
+
+    workspace = "/workspace"
+    volumes = ['-v', f'{workspace_dir}:{workspace}']
+    if data_dir != "-":
+        volumes += ['-v', f'{data_dir}:/data']
+    if models_dir != "-":
+        volumes += ['-v', f'{models_dir}:/models']
+    framework, _, version = labels.get("aime.mlc.FRAMEWORK", "").partition("-")
+    # The GPUs assigned on the exporting host are not assigned here, the container gets the same number of GPUs
+    num_gpus = labels.get("aime.mlc.GPUS", "all")
+    if num_gpus.startswith("device="):
+        num_gpus = str(len(num_gpus[len("device="):].split(",")))
+    docker_create_cmd = build_docker_create_command(
+        user_name,
+        user_id,
+        group_id,
+        labels.get("aime.mlc.ARCH", ""),
+        container_image,
+        framework,
+        version,
+        labels.get("aime.mlc.MLC_VERSION", mlc_container_version),
+        container_name,
+        "aime.mlc",
+        container_tag,
+        workspace,
+        workspace_dir,
+        data_dir,
+        models_dir,
+        f'/home/{user_name}/.local/bin',
+        num_gpus,
+        volumes,
+        container_image,
+        {label: value for label, value in labels.items() if label not in container_create_labels},
+        # The cores of the exporting host do not exist on every host, --cpuset is not restored
+        {key: value for key, value in container_resources_from_labels(labels).items() if not key.startswith("cpuset")}
+    )
+    result_create_cmd = subprocess.run(docker_create_cmd, capture_output=True, text=True)
+    if result_create_cmd.returncode != 0:
+        remove_image(container_image)
+        raise ContainerArchiveError(f"Creating the container failed: {result_create_cmd.stderr.strip()}")
+    invalidate_container_inventory()
+
+    # Drop the reference of the loaded image, an image loaded without reference is only known by its id
+    if state["image"] != container_image and not state["image"].startswith("sha256:"):
+        remove_image(state["image"])
+    write_import_state(archive_name, None)
+    return resumed
+
+
+################################################################################################################################################
+# Opening containers
+#
+# mlc open <name> resolves the container with a single inspect of its tag instead of listing all containers. A stopped container is
+# started while its start event is awaited on the docker event stream, then the shell is opened with docker exec. With --timing the
+# time from the invocation of mlc until the first prompt of the shell is reported.
+
+container_start_timeout = 30    # Seconds to wait for the start event of a container
+
+
+def get_process_start_time():
+    """Return the time the mlc process was invoked. The mlc wrapper execs python, so the process start is the invocation.
+
+    Returns:
+        float: unix time of the process start, the current time if /proc is not available.
+    """
+    try:
+        with open("/proc/self/stat") as stat_file:
+            start_ticks = int(stat_file.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return time.time()
+    return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+def inspect_container(container_tag):
+    """Inspect a container.
+
+    Args:
+        container_tag (str): tag (docker name) or id of the container.
+
+    Returns:
+        dict: the inspect reply of docker (reduced to the fields of reduce_container_inspect if the state store is used), None if the
+            container does not exist.
+    """
+    stored_containers = read_state_store()
+    if stored_containers is not None:
+        return next((container for container in stored_containers if container_tag in (container["Name"].lstrip("/"), container["Id"])), None)
+    status, container = docker_api_request("GET", f"/containers/{container_tag}/json")
+    if status is not None:
+        return container if status == 200 else None
+    output, _, exit_code = run_docker_command(f"docker container inspect {container_tag}")
+    return json.loads(output)[0] if exit_code == 0 else None
+
+
+def start_container_and_wait(container_id, timeout=container_start_timeout):
+    """Start a container and wait until docker reports it running.
+
+    The event stream is subscribed before the start is requested, so the start event can not be missed.
+
+    Args:
+        container_id (str): id of the container.
+        timeout (float, optional): seconds to wait for the start event. Defaults to container_start_timeout.
+
+    Returns:
+        bool, str: True if the container is running, otherwise False and the error message.
+    """
+    client = get_docker_api_client()
+    if client is None:
+        # docker container start returns when the container is running
+        _, stderr, exit_code = run_docker_command(f"docker container start {container_id}")
+        return exit_code == 0, stderr
+
+    try:
+        events = client.open_stream(
+            "GET", "/events", {"filters": {"container": [container_id], "type": ["container"], "event": ["start"]}}, timeout=timeout
+        )
+    except DockerAPIError as e:
+        return False, str(e)
+    try:
+        status, reply = client.request("POST", f"/containers/{container_id}/start")
+        if status == 304:
+            return True, ""
+        if status != 204:
+            return False, reply.get("message", "") if isinstance(reply, dict) else str(reply)
+        for line in events:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event.get("Action", event.get("status")) == "start":
+                return True, ""
+        return False, "The event stream of docker closed before the container was started."
+    except DockerAPIError as e:
+        return False, str(e)
+    except OSError:
+        return False, f"The container was not started within {timeout} s."
+    finally:
+        events.close()
+
+
+def build_open_shell_command(container_tag, open_start_time=None):
+    """Build the docker exec command opening an interactive shell as the current user.
+
+    Args:
+        container_tag (str): tag of the container.
+        open_start_time (float, optional): invocation time of mlc open. If set, the shell prints the time until its first prompt.
+
+    Returns:
+        list: the docker exec command.
+    """
+    set_env = get_docker_env()
+    if open_start_time is not None:
+        # Evaluated by bash right before the first prompt, the container shares the clock of the host
+        set_env += [
+            "-e", f"MLC_OPEN_START_NS={int(open_start_time * 1e9)}",
+            "-e", 'PROMPT_COMMAND=echo "time to first prompt: $(( ($(date +%s%N) - MLC_OPEN_START_NS) / 1000000 )) ms"; '
+                  'unset PROMPT_COMMAND MLC_OPEN_START_NS',
+        ]
+    return ["docker", "exec", "-it", *set_env, "--user", f"{user_id}:{group_id}", container_tag, "bash"]
+
+
+################################################################################################################################################
+# Bulk operations
+#
+# mlc start, stop and remove accept several container names, --all and --filter. The selected containers are processed in
+# parallel by a bounded number of workers and the result of every container is reported in one table.
+
+bulk_container_filter_keys = ["label", "name", "status"]
+bulk_operation_results = {"start": "started", "stop": "stopped", "remove": "removed"}
+bulk_filter_help = (
+    "Select containers of the current user, can be repeated. Filters: label=<key>[=<value>], name=<glob>,"
+    "\nstatus=<running|exited|created|paused>."
+)
+
+
+def parse_container_filters(filter_texts):
+    """Parse the --filter arguments of the bulk operations.
+
+    Args:
+        filter_texts (list): filters like label=<key>[=<value>], name=<glob> or status=<running|exited|created|paused>.
+
+    Raises:
+        ValueError: if a filter has an unknown key or no value.
+
+    Returns:
+        list: (key, value) tuples.
+    """
+    filters = []
+    for filter_text in filter_texts or []:
+        key, _, value = filter_text.partition("=")
+        key = "status" if key == "state" else key
+        if key not in bulk_container_filter_keys or not value:
+            raise ValueError(f"Invalid filter: {filter_text}. Use {', '.join(f'{key}=...' for key in bulk_container_filter_keys)}.")
+        filters.append((key, value))
+    return filters
+
+
+def container_matches_filters(container, filters):
+    """Check if a container matches all filters.
+
+    Args:
+        container (ContainerInfo): the container.
+        filters (list): (key, value) tuples provided by parse_container_filters.
+
+    Returns:
+        bool: True if all filters match.
+    """
+    import fnmatch
+
+    for key, value in filters:
+        if key == "label":
+            label, has_value, label_value = value.partition("=")
+            if label not in container.labels or (has_value and container.labels[label] != label_value):
+                return False
+        elif key == "name" and not fnmatch.fnmatch(container.name, value):
+            return False
+        elif key == "status" and container.state != value:
+            return False
+    return True
+
+
+def select_bulk_containers(container_names, all_containers, filters):
+    """Select the containers of the current user processed by a bulk operation.
+
+    Args:
+        container_names (list): names of the containers.
+        all_containers (bool): select all containers of the current user.
+        filters (list): (key, value) tuples provided by parse_container_filters.
+
+    Returns:
+        list, list: selected ContainerInfo and the names of not existing containers.
+    """
+    user_containers = get_container_inventory().user_containers(user_name)
+    containers_by_name = {container.name: container for container in user_containers}
+    unknown_container_names = [container_name for container_name in container_names if container_name not in containers_by_name]
+    if container_names:
+        candidates = [containers_by_name[container_name] for container_name in dict.fromkeys(container_names) if container_name in containers_by_name]
+    elif all_containers or filters:
+        candidates = user_containers
+    else:
+        candidates = []
+    return [container for container in candidates if container_matches_filters(container, filters)], unknown_container_names
+
+
+def stop_container(container, stop_timeout):
+    """Stop a container and read its exit code.
+
+    Args:
+        container (ContainerInfo): the container.
+        stop_timeout (int): seconds to wait for the container to exit before it is killed.
+
+    Returns:
+        int, str: exit status of the stop (0: stopped) and details, like the exit code of the container.
+    """
+    import http.client
+
+    client = get_docker_api_client()
+    if client is not None:
+        try:
+            response = client.open_stream("POST", f"/containers/{container.id}/stop", {"t": stop_timeout}, timeout=stop_timeout + docker_api_timeout)
+            try:
+                reply = response.read().decode(errors="replace").strip()
+            finally:
+                response.close()
+        except (DockerAPIError, OSError, http.client.HTTPException) as e:
+            return 1, str(e)
+        if response.status not in (204, 304):
+            return 1, reply
+        status, inspect = docker_api_request("GET", f"/containers/{container.id}/json")
+        exit_code = inspect.get("State", {}).get("ExitCode") if status == 200 else None
+    else:
+        stop_stdout, stop_stderr, stop_exit_code = run_docker_command(f"docker container stop -t {stop_timeout} {container.tag}")
+        if stop_exit_code != 0:
+            return stop_exit_code, stop_stderr or stop_stdout
+        exit_code_text, _, _ = run_docker_command(f"docker container inspect --format '{{{{.State.ExitCode}}}}' {container.tag}")
+        exit_code = int(exit_code_text) if exit_code_text.isdigit() else None
+
+    if exit_code in (137, -1):
+        return 0, f"container exit code {exit_code}, killed after {stop_timeout} s"
+    return 0, f"container exit code {exit_code}" if exit_code is not None else ""
+
+
+def start_container(container):
+    """Start a container.
+
+    Args:
+        container (ContainerInfo): the container.
+
+    Returns:
+        int, str: exit status of the start (0: started) and details.
+    """
+    conflicts = gpu_conflicts(container.tag, container.labels)
+    status, reply = docker_api_request("POST", f"/containers/{container.id}/start")
+    if status is not None:
+        if status not in (204, 304):
+            return 1, (reply or {}).get("message", "") if isinstance(reply, dict) else str(reply)
+    else:
+        stdout, stderr, exit_code = run_docker_command(f"docker container start {container.tag}")
+        if exit_code != 0:
+            return exit_code, stderr or stdout
+    start_data_cache(container.labels)
+    return 0, f"GPUs in use: {conflicts}" if conflicts else ""
+
+
+def delete_container(container):
+    """Remove a container and its image. User setup layers are shared and kept for the next mlc create.
+
+    Args:
+        container (ContainerInfo): the container.
+
+    Returns:
+        int, str: exit status of the removal (0: removed) and details.
+    """
+    status, reply = docker_api_request("DELETE", f"/containers/{container.id}")
+    if status is not None:
+        if status != 204:
+            return 1, (reply or {}).get("message", "") if isinstance(reply, dict) else str(reply)
+    else:
+        stdout, stderr, exit_code = run_docker_command(f"docker container rm {container.tag}")
+        if exit_code != 0:
+            return exit_code, stderr or stdout
+
+    release_gpus(container.tag)
+    if is_user_layer_image(container.image):
+        return 0, ""
+    return 0, "" if remove_image(container.image) else f"image {container.image} could not be removed"
+
+
+def run_bulk_operation(operation, containers, jobs=4, stop_timeout=10):
+    """Start, stop or remove containers in parallel. Containers which are already in the requested state are skipped.
+
+    Args:
+        operation (str): start, stop or remove.
+        containers (list): ContainerInfo of the containers.
+        jobs (int, optional): maximal number of parallel operations. Defaults to 4.
+        stop_timeout (int, optional): seconds to wait for a container to exit before it is killed by mlc stop. Defaults to 10.
+
+    Returns:
+        dict: {container name: (result, exit status, seconds, details)} with result started, stopped, removed, skipped or failed.
+    """
+    import queue
+
+    pending_containers = queue.Queue()
+    for container in containers:
+        pending_containers.put(container)
+    results = {}
+    print_lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                container = pending_containers.get_nowait()
+            except queue.Empty:
+                return
+
+            start_time = time.monotonic()
+            running = container.state in ("running", "paused", "restarting")
+            if operation == "start" and running:
+                result = ("skipped", 0, "already running")
+            elif operation == "stop" and not running:
+                result = ("skipped", 0, "not running")
+            elif operation == "remove" and running:
+                result = ("skipped", 0, "running, stop it first")
+            else:
+                try:
+                    if operation == "start":
+                        exit_status, details = start_container(container)
+                    elif operation == "stop":
+                        exit_status, details = stop_container(container, stop_timeout)
+                    else:
+                        exit_status, details = delete_container(container)
+                except Exception as e:
+                    exit_status, details = 1, str(e)
+                result = (bulk_operation_results[operation] if exit_status == 0 else "failed", exit_status, details.splitlines()[-1] if details else "")
+
+            results[container.name] = (result[0], result[1], time.monotonic() - start_time, result[2])
+            with print_lock:
+                print(f"{INPUT}[{container.name}]{RESET} {ERROR if result[0] == 'failed' else NEUTRAL}{result[0]}{RESET}")
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(jobs, len(containers))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    invalidate_container_inventory()
+    return results
+
+
+def run_bulk_command(args, container_names):
+    """Run mlc start, stop or remove for several containers and print the result table. Exits with 1 if an operation failed.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+        container_names (list): names of the containers provided by the user.
+    """
+    try:
+        filters = parse_container_filters(args.filter)
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+
+    containers, unknown_container_names = select_bulk_containers(container_names, args.all, filters)
+    for container_name in unknown_container_names:
+        print(f"\n{INPUT}[{container_name}]{RESET} {ERROR}does not exist.{RESET}")
+    if not containers:
+        print(f"\n{ERROR}No containers of the current user match the selection.{RESET}\n")
+        exit(1)
+
+    print(f"\n{INFO}Containers to be {bulk_operation_results[args.command]}:{RESET}")
+    print(", ".join(f"{INPUT}[{container.name}]{RESET}" for container in containers))
+    if args.command != "start" and not args.force:
+        are_you_sure(f"{len(containers)} containers", args.command, args.script)
+    print("")
+    results = run_bulk_operation(args.command, containers, args.jobs, getattr(args, "time", 10))
+
+    # Print a summary ordered like the selection
+    print(f"\n{INFO_HEADER}{'CONTAINER':<30}{'RESULT':<10}{'EXIT':<6}{'TIME':<9}DETAILS{RESET}")
+    for container in containers:
+        result, exit_status, seconds, details = results[container.name]
+        print(f"{container.name:<30}{ERROR if result == 'failed' else NEUTRAL}{result:<10}{RESET}{exit_status:<6}{f'{seconds:.1f} s':<9}{details}")
+    for container_name in unknown_container_names:
+        print(f"{container_name:<30}{ERROR}{'missing':<10}{RESET}{1:<6}{'-':<9}does not exist")
+    failed = sum(1 for result, *_ in results.values() if result == "failed")
+    print(f"\n{INFO}{len(results) - failed} of {len(results) + len(unknown_container_names)} containers done.{RESET}\n")
+    exit(1 if failed or unknown_container_names else 0)
+
+
+################################################################################################################################################
+# Idle container watchdog
+#
+# mlc watchdog samples the CPU time, the processes and the exec sessions of the running containers. A container is active when
+# it used more CPU than the threshold since the last sample, started new processes or got a new exec session (mlc open). Containers
+# idle for longer than the threshold are stopped or paused. The samples are kept in the mlc cache directory, so that a one-shot
+# watchdog run by cron continues where the last run stopped. Containers created with --no-watchdog are never touched.
+
+watchdog_label = "aime.mlc.WATCHDOG"
+
+
+def get_watchdog_state_file():
+    """Return the file with the last samples of the watchdog."""
+    return os.path.join(get_mlc_cache_dir(), "watchdog.json")
+
+
+def read_watchdog_state():
+    """Read the samples of the last watchdog run.
+
+    Returns:
+        dict: {container id: sample}, see sample_container_activity. Empty if there are no samples.
+    """
+    try:
+        with open(get_watchdog_state_file()) as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def write_watchdog_state(state):
+    """Replace the samples of the watchdog atomically.
+
+    Args:
+        state (dict): {container id: sample}.
+    """
+    state_file_name = get_watchdog_state_file()
+    temporary_file_name = f"{state_file_name}.{os.getpid()}.tmp"
+    with open(temporary_file_name, "w") as state_file:
+        json.dump(state, state_file)
+    os.replace(temporary_file_name, state_file_name)
+
+
+def parse_ps_time(time_text):
+    """Convert the cumulated CPU time printed by ps ([DD-]HH:MM:SS or MM:SS) into seconds."""
+    days, _, clock = time_text.rpartition("-")
+    seconds = 0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds + int(days or 0) * 86400
+
+
+def sample_container_activity(container, cgroup_dirs):
+    """Read the activity counters of a running container.
+
+    Args:
+        container (ContainerInfo): the container.
+        cgroup_dirs (dict): cache of the cgroup directories {container id: path}, filled by this function.
+
+    Returns:
+        dict: time, cpu_seconds (cumulated CPU time), pids, exec_ids and started_at of the container, None if the container
+            is not running anymore.
+    """
+    status, top = docker_api_request("GET", f"/containers/{container.id}/top", {"ps_args": "-o pid,time"})
+    if status is not None:
+        if status != 200 or not isinstance(top, dict):
+            return None
+        processes = top.get("Processes") or []
+        status, inspect = docker_api_request("GET", f"/containers/{container.id}/json")
+        if status != 200:
+            return None
+        exec_ids, started_at = inspect.get("ExecIDs") or [], inspect.get("State", {}).get("StartedAt", "")
+    else:
+        output, _, exit_code = run_docker_command(f"docker top {container.tag} -o pid,time")
+        if exit_code != 0:
+            return None
+        processes = [line.split() for line in output.splitlines()[1:]]
+        output, _, exit_code = run_docker_command(f"docker container inspect --format '{{{{json .ExecIDs}}}} {{{{json .State.StartedAt}}}}' {container.tag}")
+        if exit_code != 0:
+            return None
+        exec_ids_json, _, started_at_json = output.partition(" ")
+        exec_ids, started_at = json.loads(exec_ids_json) or [], json.loads(started_at_json)
+
+    # The cgroup counts the CPU time of exited processes as well, ps only the time of the current processes
+    if cgroup_v2_available():
+        if container.id not in cgroup_dirs:
+            cgroup_dirs[container.id] = find_container_cgroup(container.id)
+    cgroup_dir = cgroup_dirs.get(container.id)
+    if cgroup_dir:
+        cpu_seconds = read_container_cgroup_sample(cgroup_dir)["cpu_usec"] / 1e6
+    else:
+        cpu_seconds = sum(parse_ps_time(process[1]) for process in processes if len(process) > 1)
+
+    return {
+        "time": time.time(),
+        "cpu_seconds": cpu_seconds,
+        "pids": sorted(process[0] for process in processes if process),
+        "exec_ids": exec_ids,
+        "started_at": started_at,
+    }
+
+
+def evaluate_container_activity(sample, previous_sample, cpu_threshold):
+    """Compare two samples of a container.
+
+    Args:
+        sample (dict): current sample, see sample_container_activity.
+        previous_sample (dict): sample of the last run or None.
+        cpu_threshold (float): CPU usage in percent of one core above which the container is active.
+
+    Returns:
+        float, str: the time the container was active the last time and the observed activity ('' if idle).
+    """
+    if previous_sample is None or previous_sample.get("started_at") != sample["started_at"]:
+        return sample["time"], "first sample"
+
+    elapsed_seconds = max(sample["time"] - previous_sample["time"], 1e-3)
+    cpu_percent = (sample["cpu_seconds"] - previous_sample["cpu_seconds"]) / elapsed_seconds * 100
+    if cpu_percent > cpu_threshold:
+        return sample["time"], f"CPU {cpu_percent:.1f}%"
+    if set(sample["exec_ids"]) - set(previous_sample["exec_ids"]):
+        return sample["time"], "new exec session"
+    if set(sample["pids"]) - set(previous_sample["pids"]):
+        return sample["time"], "new processes"
+    return previous_sample.get("last_active", previous_sample["time"]), ""
+
+
+def pause_container(container):
+    """Pause (freeze) all processes of a container.
+
+    Args:
+        container (ContainerInfo): the container.
+
+    Returns:
+        int, str: exit status of the pause (0: paused) and details.
+    """
+    status, reply = docker_api_request("POST", f"/containers/{container.id}/pause")
+    if status is not None:
+        return (0, "") if status == 204 else (1, (reply or {}).get("message", "") if isinstance(reply, dict) else str(reply))
+    stdout, stderr, exit_code = run_docker_command(f"docker container pause {container.tag}")
+    return exit_code, "" if exit_code == 0 else stderr or stdout
+
+
+def write_watchdog_log(log_file_name, message):
+    """Append a line with the current time to the watchdog log.
+
+    Args:
+        log_file_name (str): path of the log file.
+        message (str): message to be logged.
+    """
+    line = f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}"
+    print(line)
+    try:
+        with open(log_file_name, "a") as log_file:
+            log_file.write(line + "\n")
+    except OSError as e:
+        print(f"{ERROR}The watchdog log {log_file_name} can not be written: {e}{RESET}")
+
+
+def run_watchdog_pass(state, idle_seconds, action, cpu_threshold, all_users, dry_run, log_file_name, cgroup_dirs):
+    """Sample the running containers once and stop or pause the idle ones.
+
+    Args:
+        state (dict): samples of the last pass {container id: sample}.
+        idle_seconds (float): idle time after which a container is stopped or paused.
+        action (str): stop or pause.
+        cpu_threshold (float): CPU usage in percent of one core above which a container is active.
+        all_users (bool): watch the containers of all users instead of the current user only.
+        dry_run (bool): only report the idle containers.
+        log_file_name (str): path of the log file.
+        cgroup_dirs (dict): cache of the cgroup directories of the containers.
+
+    Returns:
+        dict, list: the samples of this pass and rows (container, user, idle minutes, activity or action) of the watched containers.
+    """
+    new_state, rows = {}, []
+    for container in query_container_inventory():
+        if container.state != "running" or not (all_users or container.labels.get("aime.mlc.USER") == user_name):
+            continue
+        sample = sample_container_activity(container, cgroup_dirs)
+        if sample is None:
+            continue
+        sample["last_active"], activity = evaluate_container_activity(sample, state.get(container.id), cpu_threshold)
+        idle_minutes = (sample["time"] - sample["last_active"]) / 60
+        container_name = container.labels.get("aime.mlc.NAME", container.name)
+        container_user = container.labels.get("aime.mlc.USER", "")
+
+        if activity or sample["time"] - sample["last_active"] < idle_seconds:
+            result = activity or "idle"
+        elif container.labels.get(watchdog_label) == "off":
+            result = "idle, watchdog disabled"
+        elif dry_run:
+            result = f"idle, would be {'stopped' if action == 'stop' else 'paused'}"
+        else:
+            exit_status, details = stop_container(container, 10) if action == "stop" else pause_container(container)
+            result = ("stopped" if action == "stop" else "paused") if exit_status == 0 else f"{action} failed"
+            write_watchdog_log(
+                log_file_name,
+                f"{result} {container_name} (user {container_user}, gpus {container.labels.get('aime.mlc.GPUS', '-')}, idle for {idle_minutes:.0f} min)"
+                + (f": {details}" if exit_status != 0 and details else "")
+            )
+            if exit_status == 0:
+                rows.append((container_name, container_user, idle_minutes, result))
+                continue
+        new_state[container.id] = sample
+        rows.append((container_name, container_user, idle_minutes, result))
+    return new_state, rows
+
+
+def run_watchdog(idle_minutes=60, action="stop", cpu_threshold=1.0, all_users=False, dry_run=False, watch=False, interval=300, log_file_name=None):
+    """Run the watchdog once or, in watch mode, every interval seconds until Ctrl+C is pressed.
+
+    Args:
+        idle_minutes (float, optional): idle time after which a container is stopped or paused. Defaults to 60.
+        action (str, optional): stop or pause. Defaults to stop.
+        cpu_threshold (float, optional): CPU usage in percent of one core above which a container is active. Defaults to 1.0.
+        all_users (bool, optional): watch the containers of all users. Defaults to False.
+        dry_run (bool, optional): only report the idle containers. Defaults to False.
+        watch (bool, optional): keep running. Defaults to False.
+        interval (float, optional): seconds between two passes in watch mode. Defaults to 300.
+        log_file_name (str, optional): path of the log. Defaults to watchdog.log in the mlc cache directory.
+    """
+    import fcntl
+
+    os.makedirs(get_mlc_cache_dir(), exist_ok=True)
+    log_file_name = log_file_name or os.path.join(get_mlc_cache_dir(), "watchdog.log")
+
+    # Only one watchdog at a time, a cron run overlapping with the service is skipped
+    lock_file = open(os.path.join(get_mlc_cache_dir(), "watchdog.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"\n{NEUTRAL}Another mlc watchdog is already running.{RESET}\n")
+        exit(0)
+
+    state = read_watchdog_state()
+    cgroup_dirs = {}
+    while True:
+        state, rows = run_watchdog_pass(state, idle_minutes * 60, action, cpu_threshold, all_users, dry_run, log_file_name, cgroup_dirs)
+        write_watchdog_state(state)
+        if not watch:
+            break
+        time.sleep(interval)
+
+    if not rows:
+        print(f"\n{NEUTRAL}There are no running containers.{RESET}\n")
+        return
+    print(f"\n{INFO_HEADER}{'CONTAINER':<30}{'USER':<15}{'IDLE':<10}ACTIVITY{RESET}")
+    for container_name, container_user, idle_minutes_of_container, result in rows:
+        print(f"{container_name:<30}{container_user:<15}{f'{idle_minutes_of_container:.0f} min':<10}{result}")
+    print("")
+
+
+################################################################################################################################################
+# Command handlers
+#
+# One function per mlc command, called by main() through command_handlers.
+
+def command_create(args):
+    """Run the mlc create command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    import pathlib
+
+    # Set the file with frameworks, versions, gpu architectures and images
+    repo_name = "ml_images.repo" 
+
+    # Read and save content of ml_images.repo
+    repo_file = pathlib.Path(__file__).parent / repo_name
+
+    #Get the existing gpu architecture    
+    architectures = get_gpu_architectures(repo_file)
+
+    # Get the MLC_ARCH environment variable:
+    mlc_repo_env_var = os.environ.get('MLC_ARCH')  
+
+    cuda_or_rocm, host_gpu_architecture, host_gpu_driver_version = get_host_gpu_architecture(args.refresh_arch)
+
+    # Set the gpu architecture based on a flag, an environment variable or the gpu architecture of the host (default value detected automatically)
+    architecture = args.architecture or mlc_repo_env_var or host_gpu_architecture
+    available_host_gpu_architectures = [architecture for architecture in architectures if cuda_or_rocm in architecture]
+
+    # Create the containers of a manifest
+    if args.manifest:
+        try:
+            entries = load_create_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"\n{ERROR}{e}{RESET}\n")
+            exit(1)
+
+        # Validate all entries before anything is pulled or created
+        plans, results, entry_names = [], {}, []
+        for position, entry in enumerate(entries, 1):
+            entry_name = str(entry.get("name") or f"entry {position}")
+            if entry_name in entry_names:
+                entry_name = f"{entry_name} (entry {position})"
+                entry_names.append(entry_name)
+                results[entry_name] = ("invalid", "The container name is used by several entries.")
+                continue
+            entry_names.append(entry_name)
+            try:
+                plans.append(plan_manifest_entry(entry, architecture, available_host_gpu_architectures, repo_file))
+            except ValueError as e:
+                results[entry_name] = ("invalid", str(e).strip())
+
+        print(f"\n{INFO}Containers to be created:{RESET}")
+        for plan in plans:
+            print(f"{INPUT}[{plan['name']}]{RESET} {plan['framework']} {plan['version']} ({plan['architecture']}), workspace: {plan['workspace_dir']}")
+        for entry_name, (_, message) in results.items():
+            print(f"{INPUT}[{entry_name}]{RESET} {ERROR}invalid:{RESET} {message}")
+        if plans:
+            are_you_sure(f"{len(plans)} containers", args.command, args.script)
+            results.update(create_containers_from_plans(plans, args.jobs, args.rebuild_layer, not args.script and sys.stdout.isatty()))
+
+        # Print a summary of all entries
+        print(f"\n{INFO_HEADER}{'CONTAINER':<30}{'RESULT':<10}DETAILS{RESET}")
+        for entry_name in entry_names:
+            result, message = results[entry_name]
+            print(f"{entry_name:<30}{NEUTRAL if result == 'created' else ERROR}{result:<10}{RESET}{message}")
+        created = sum(1 for result, _ in results.values() if result == "created")
+        print(f"\n{INFO}{created} of {len(entry_names)} containers created.{RESET}\n")
+        exit(0 if created == len(entry_names) else 1)
+
+    # Check gpu architecture
+    if args.script:
+        if architecture not in available_host_gpu_architectures:
+            print(f"\n{ERROR}Unknown gpu architecture:{RESET} {INPUT}{architecture}{RESET} \n\n{INFO}Available gpu architectures:{RESET}\n{', '.join(available_host_gpu_architectures)}\n")
+            exit(1)
+    else:
+        while architecture not in available_host_gpu_architectures:
+            print(f"\n{ERROR}Unknown gpu architecture:{RESET} {INPUT}{architecture}{RESET}")
+            display_gpu_architectures(available_host_gpu_architectures)
+            architecture_number = get_user_selection(f"{REQUEST}Enter the number of the desired architecture: {RESET}", len(available_host_gpu_architectures))
+            architecture = available_host_gpu_architectures[architecture_number - 1]            
+
+    # Validate the resource limits, --cpuset auto selects the cores local to the GPUs, and the data cache
+    try:
+        resources = resolve_container_resources(args.cpus, args.memory, args.shm_size, args.cpuset, architecture, args.num_gpus, args.ipc)
+        data_cache_size = check_data_cache_options(args.data_cache, args.data_cache_size)
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+
+    # Extract framework, version and docker image from the ml_images.repo file
+    framework_version_docker_sorted = extract_from_ml_images(repo_file, architecture)
+
+    # Check if the user requests more info about available gpu architecture, framework and version 
+    if args.info:
+        print(f"\n{INFO}Available gpu architectures ({INPUT}currently used{RESET}{INFO}):{RESET}\n" + ', '.join(f"{INPUT}{arch}{RESET}" if arch == architecture else arch for arch in available_host_gpu_architectures))
+        show_frameworks_versions(framework_version_docker_sorted)
+
+    # List existing containers/container_tags of the current user
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+
+    # Set the variables to know if the workspace, data and models directories should be asked 
+    workspace_dir_be_asked = data_dir_be_asked = models_dir_be_asked = False
+
+    # Print an info header only when the positional arguments (container name, frameworl and version) are not provided 
+    if args.container_name is None and args.framework is None and args.version is None:
+        print_info_header(args.command)
+        workspace_dir_be_asked = data_dir_be_asked = models_dir_be_asked = True            
+
+    if args.script:
+        # Set the container name and its validation        
+        validated_container_name, validated_container_tag = get_container_name(args.container_name, user_name, args.command, args.script)
+
+        # Set the framework:
+        if args.framework is None: 
+            print(f"\n{ERROR}Framework is needed.{RESET}\n")
+            exit(1)
+        else:
+            if not framework_version_docker_sorted.get(args.framework):
+                print(f"\n{ERROR}Unknown framework:{RESET} {INPUT}{args.framework}{RESET}\n\n{REQUEST}Available AI frameworks:{RESET}\n{', '.join(framework_version_docker_sorted.keys())}\n")
+                exit(1)
+            else:
+                selected_framework = args.framework
+
+        # Set the version:
+        version_images = framework_version_docker_sorted[selected_framework]
+
+        if args.version is None:
+            print(f"\n{ERROR}Version is needed.{RESET}\n")
+            exit(1)
+        else:                     
+            if args.version in version_images:
+                selected_docker_image = get_docker_image(args.version, version_images)
+                selected_version = args.version
+            else:
+                print(f"\n{ERROR}Version is not available:{RESET} {INPUT}{args.version}{RESET}\n")
+                exit(1)                      
+    else:                
+        if args.framework is None:    
+            while args.framework is None:
+                args.framework = set_framework(framework_version_docker_sorted)
+        else:
+            while True:                    
+                if not framework_version_docker_sorted.get(args.framework):
+                    print(f"\n{ERROR}Unknown framework:{RESET} {INPUT}{args.framework}{RESET}")
+                    args.framework = set_framework(framework_version_docker_sorted) 
+                else:
+                    break
+        selected_framework = args.framework 
+
+        # Set the version:
+        version_images = framework_version_docker_sorted[selected_framework] 
+
+        if args.version is None:
+            #print(f"\n{ERROR}Version is needed.{RESET}")                    
+            while args.version is None:
+                args.version, selected_docker_image = set_version(selected_framework, version_images)                        
+        else:                                   
+            while True:
+                if args.version in version_images:
+                    selected_docker_image = get_docker_image(args.version, version_images)
+                    break
+                else:
+                    print(f"\n{ERROR}Version is not available:{RESET} {INPUT}{args.version}{RESET}")
+                    args.version, selected_docker_image = set_version(selected_framework, version_images)           
+        selected_version = args.version                       
+
+        # Set the container name and its validation        
+        validated_container_name, validated_container_tag = get_container_name(args.container_name, user_name, args.command, args.script)
+
+
+    # Select Workspace directory:
+    default_workspace_dir = os.path.expanduser('~/workspace') 
+    workspace_dir_updated = False
+
+    # If the -w option is provided, check the user-provided path
+    if args.workspace_dir:
+
+        provided_workspace_dir = os.path.expanduser(args.workspace_dir)                                  
+        while True:
+            # Check if the provided workspace directory exists:
+            if os.path.isdir(provided_workspace_dir):
+                break
+            else:
+                if args.script:
+                    workspace_dir = default_workspace_dir
+                    print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}\n")
+                    exit(0)
+                print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}")
+                provided_workspace_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the WORKSPACE directory: {RESET}").strip())
+        workspace_dir = provided_workspace_dir
+        workspace_dir_updated = True
+        workspace_dir_be_asked = False
+
+    else:
+        workspace_dir = default_workspace_dir
+
+    if not args.script:         
+        if workspace_dir_be_asked:
+            workspace_message = (
+                f"\n{NEUTRAL}The workspace directory would be mounted by default as /workspace in the container.{RESET}"
+                f"\n{NEUTRAL}It is the directory where your project data should be stored to be accessed inside the container.{RESET}"
+                f"\n{HINT}HINT: It can be set to an existing directory with the option '-w /your_workspace'{RESET}"
+            )
+            print(f"{workspace_message}")
+
+            # Define a variable to control breaking out of both loops
+            break_inner_loop = False
+
+            while True:
+
+                keep_workspace_dir = input(f"\n{REQUEST}Current workspace location:{default_workspace_dir}. Keep it (Y/n)?: {RESET}").strip().lower()
+
+                if keep_workspace_dir in ["y","yes",""]:
+                    workspace_dir = default_workspace_dir
+                    break
+                elif keep_workspace_dir in ["n","no"]:
+                    while True:
+                        provided_workspace_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the WORKSPACE directory: {RESET}").strip())  # Expand '~' to full path
+                        # Check if the provided workspace directory exist:
+                        if os.path.isdir(provided_workspace_dir):
+                            workspace_dir = provided_workspace_dir
+                            break_inner_loop = True
+                            break
+                        else:
+                            print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}") 
+                    if break_inner_loop:
+                        break                           
+                else:
+                    print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
+
+        else:
+            if not workspace_dir_updated:
+                workspace_dir = default_workspace_dir    
+
+    # Select Data directory:     
+    default_data_dir = "-"
+    data_dir_updated = False
+
+    # Check if the provided data directory exists:
+    if args.data_dir:
+        provided_data_dir = os.path.expanduser(args.data_dir)
+        while True:
+            # Check if the provided data directory exists:
+            if os.path.isdir(provided_data_dir):
+                break
+            else:
+                if args.script:
+                    print(f"\n{ERROR}Data directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}\n")
+                    exit(0)
+                print(f"\n{ERROR}Data directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}")
+                provided_data_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the DATA directory: {RESET}").strip())
+        data_dir = provided_data_dir
+        data_dir_updated = True
+        data_dir_be_asked = False
+    else:
+        data_dir = default_data_dir                            
+
+    if not args.script:  
+        if data_dir_be_asked:
+            data_message = (
+                f"\n{NEUTRAL}The data directory would be mounted as /data in the container.{RESET}"
+                f"\n{NEUTRAL}It is the directory where data sets, for example, mounted from\nnetwork volumes can be accessed inside the container.{RESET}"
+                f"\n{HINT}HINT: It can be set to an existing directory with the option '-d /your_data_directory'{RESET}"
+            )
+            print(f"{data_message}")
+
+            # Define a variable to control breaking out of both loops
+            break_inner_loop = False
+            while True:                    
+                provide_data_dir = input(f"\n{REQUEST}Do you want to provide a DATA directory (y/N)?: {RESET}").strip().lower()
+
+                if provide_data_dir in ["n","no", ""]:
+                    break
+                elif provide_data_dir in ["y","yes"]:
+                    while True:
+                        provided_data_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the DATA directory: {RESET}").strip())  # Expand '~' to full path
+                        # Check if the provided data directory exists:
+                        if os.path.isdir(provided_data_dir):
+                            data_dir = provided_data_dir
+                            break_inner_loop = True
+                            break
+                        else:
+                            print(f"\n{ERROR}Provided directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}") 
+                    if break_inner_loop:
+                        break                           
+                else:
+                    print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
+
+        else:
+            if not data_dir_updated:
+                data_dir = default_data_dir  
+
+    # Select Models directory:     
+    default_models_dir = "-"
+    models_dir_updated = False
+
+    # Check if the provided models directory exists:
+    if args.models_dir:
+        provided_models_dir = os.path.expanduser(args.models_dir)
+        while True:
+            # Check if the provided models directory exists:
+            if os.path.isdir(provided_models_dir):
+                break
+            else:
+                if args.script:
+                    print(f"\n{ERROR}Models directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}\n")
+                    exit(0)
+                print(f"\n{ERROR}Models directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}")
+                provided_models_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the MODELS directory: {RESET}").strip())
+        models_dir = provided_models_dir
+        models_dir_updated = True
+        models_dir_be_asked = False
+    else:
+        models_dir = default_models_dir                            
+
+    if not args.script:                    
+        if models_dir_be_asked:
+            models_message = (
+                f"\n{NEUTRAL}The models directory would be mounted as /models in the container.{RESET}"
+                f"\n{NEUTRAL}It is the directory where weight models are download and saved.{RESET}"
+                f"\n{HINT}HINT: It can be set to an existing directory with the option '-d /your_models_directory'{RESET}"
+            )
+            print(f"{models_message}")
+
+            # Define a variable to control breaking out of both loops
+            break_inner_loop = False
+            while True:
+
+                provide_models_dir = input(f"\n{REQUEST}Do you want to provide a MODELS directory (y/N)?: {RESET}").strip().lower()
+
+                if provide_models_dir in ["n","no", ""]:
+                    break
+                elif provide_models_dir in ["y","yes"]:
+                    while True:
+                        provided_models_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the MODELS directory: {RESET}").strip())  # Expand '~' to full path
+                        # Check if the provided models directory exists:
+                        if os.path.isdir(provided_models_dir):
+                            models_dir = provided_models_dir
+                            break_inner_loop = True
+                            break
+                        else:
+                            print(f"\n{ERROR}Provided directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}") 
+                    if break_inner_loop:
+                        break                           
+                else:
+                    print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
+
+        else:
+            if not models_dir_updated:
+                models_dir = default_models_dir  
+
+    if args.data_cache and data_dir == "-":
+        print(f"\n{ERROR}The data cache needs a data directory, set with -d.{RESET}\n")
+        exit(1)
+
+    # Print a setup summary 
+    set_up_summary = (
+        f"\n{INFO_HEADER}{'_'*50}{RESET}"   
+        f"\n{INFO_HEADER}Summary of the selected setup:{RESET}"
+        f"\nGPU architecture: {INPUT}{architecture}{RESET} (host: {host_gpu_architecture}-{host_gpu_driver_version})"
+        f"\nContainer name: {INPUT}{validated_container_name}{RESET}"
+        f"\nFramework and Version: {INPUT}{selected_framework} {selected_version}{RESET}"
+        f"\nWorkspace directory: {INPUT}{workspace_dir}{RESET}"
+        f"\nData directory: {INPUT}{data_dir}{RESET}{f' (cached in {args.data_cache}, {args.data_cache_size})' if args.data_cache else ''}"
+        f"\nModels directory: {INPUT}{models_dir}{RESET}"
+        f"\nGPUs: {INPUT}{args.num_gpus}{RESET}{' (free GPUs assigned on creation)' if args.allocate_gpus else ''}"
+        f"\nResources: {INPUT}{format_container_resources({container_resource_options[key][1]: value for key, value in resources.items()})}{RESET}"
+        f"\n{INFO_HEADER}{'_'*50}{RESET}"                 
+    )
+
+    print(f"{set_up_summary}")
+
+    # Confirm the user's inputs:
+    are_you_sure(validated_container_name, args.command, args.script)
+
+    # Generate a unique container tag
+    container_tag = validated_container_tag
+
+    # Check if a container with the generated tag already exists
+    if container_tag == check_container_exists(container_tag):
+        print(f"\n{ERROR}Error:{RESET} \n {INPUT}[{validated_container_name}]{RESET} already exists.{RESET}")
+        show_container_info()
+        exit(0)
+    else:
+        print(f"\n{NEUTRAL}The container will be created:{RESET} {INPUT}{validated_container_name}{RESET} ")
+
+
+    # Pull the required image from aime-hub: 
+    print(f"\n{NEUTRAL}Acquiring container image ... {RESET}\n")
+    docker_command_pull_image = ['docker', 'pull', selected_docker_image]         
+    run_docker_pull_image(docker_command_pull_image)     
+
+    # Assign specific GPUs after the pull, which can take longer than the reservation. --cpuset auto follows the assigned GPUs,
+    # the reservation is renewed until the container exists.
+    num_gpus = args.num_gpus
+    if args.allocate_gpus:
+        try:
+            num_gpus = allocate_gpus(architecture, args.num_gpus, container_tag)
+            if args.cpuset == "auto":
+                resources["cpuset_cpus"], resources["cpuset_mems"] = numa_local_cpuset(architecture, num_gpus)
+        except (ValueError, OSError) as e:
+            release_gpus(container_tag)
+            print(f"\n{ERROR}{e}{RESET}\n")
+            exit(1)
+        print(f"\n{NEUTRAL}Assigned GPUs:{RESET} {INPUT}{num_gpus}{RESET}")
+        gpu_reservation_held = hold_gpu_reservation(container_tag)
+
+    # Mirror the data directory into the view of the data cache
+    data_cache = None
+    if args.data_cache:
+        print(f"\n{NEUTRAL}Preparing the data cache ... {RESET}")
+        try:
+            data_cache = (prepare_data_cache(os.path.expanduser(args.data_cache), data_dir, data_cache_size), args.data_cache_size)
+        except OSError as e:
+            release_gpus(container_tag)
+            print(f"\n{ERROR}Preparing the data cache failed: {e}{RESET}\n")
+            exit(1)
+
+    print(f"\n{NEUTRAL}Setting up container ... {RESET}")
+    try:
+        setup_container(
+            architecture,
+            selected_docker_image,
+            selected_framework,
+            selected_version,
+            validated_container_name,
+            container_tag,
+            workspace_dir,
+            data_dir,
+            models_dir,
+            num_gpus,
+            args.rebuild_layer,
+            labels={"aime.mlc.WATCHDOG": "off"} if args.no_watchdog else None,
+            resources=resources,
+            data_cache=data_cache
+        )
+    except ContainerSetupError as e:
+        release_gpus(container_tag)
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+    if args.allocate_gpus:
+        gpu_reservation_held.set()
+    invalidate_container_inventory()
+
+    print(f"\n{INPUT}[{validated_container_name}]{RESET} ready.{INFO}\n\nOpen the container with:{RESET}\nmlc open {INPUT}{validated_container_name}{RESET}\n")
+
+
+def command_data(args):
+    """Run the mlc data command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+
+    if args.container_name in available_user_containers:
+        selected_container_name = args.container_name
+        selected_container_position = available_user_containers.index(args.container_name) + 1
+    elif args.script:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+        else:
+            print(f"\n{ERROR}Container name is missing.{RESET}\n")
+        exit(1)
+    else:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
+        else:
+            print_info_header(args.command)
+        print(f"\n{INFO}Available containers of the current user:{RESET}")
+        selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers)
+    container = get_container_inventory().get(available_user_container_tags[selected_container_position-1])
+
+    cache_dir = container.labels.get("aime.mlc.DATA_CACHE")
+    if not cache_dir or read_data_cache_stats(cache_dir) is None:
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}has no data cache, create the container with --data-cache.{RESET}\n")
+        exit(1)
+
+    try:
+        relative_paths = list_data_cache_files(cache_dir, args.files)
+    except OSError as e:
+        print(f"\n{ERROR}The file list can not be read: {e}{RESET}\n")
+        exit(1)
+
+    interactive = not args.script and sys.stdout.isatty()
+    start_time = time.time()
+
+    def show_progress(copied_files, copied_size):
+        if interactive:
+            rate = copied_size / max(time.time() - start_time, 1e-3)
+            print(f"\r{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}warmed {copied_files} files, "
+                  f"{format_size(copied_size)} ({format_size(rate)}/s){RESET}\033[K", end="", flush=True)
+
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}warming the data cache with {len(relative_paths)} files and {args.jobs} readers...{RESET}")
+    result = warm_data_cache(cache_dir, relative_paths, max(1, args.jobs), show_progress)
+    if interactive:
+        print("")
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}warmed {result['copied']} files ({format_size(result['bytes'])}) in {result['seconds']:.1f} s, "
+          f"{format_size(result['bytes'] / max(result['seconds'], 1e-3))}/s. {result['cached']} files were cached already, "
+          f"{result['skipped']} skipped (missing or not fitting into the cache).{RESET}\n")
+
+
+def command_export(args):
+    """Run the mlc export command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+
+    if args.container_name in available_user_containers:
+        selected_container_name = args.container_name
+        selected_container_position = available_user_containers.index(args.container_name) + 1
+    elif args.script:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+        else:
+            print(f"\n{ERROR}Container name is missing.{RESET}\n")
+        exit(1)
+    else:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
+        else:
+            print_info_header(args.command)
+        print(f"\n{INFO}Available containers of the current user:{RESET}")
+        selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers)
+    container = get_container_inventory().get(available_user_container_tags[selected_container_position-1])
+
+    archive_name = args.output or f"{selected_container_name}.mlc.tar.gz"
+    if os.path.exists(archive_name) and not args.force:
+        print(f"\n{ERROR}The archive {archive_name} already exists, use -f to overwrite it.{RESET}\n")
+        exit(1)
+
+    interactive = not args.script and sys.stdout.isatty()
+    start_time = time.time()
+
+    def show_progress(read_size, written_size):
+        if interactive:
+            rate = read_size / max(time.time() - start_time, 1e-3)
+            print(f"\r{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}exported {format_size(read_size)}, "
+                  f"archive {format_size(written_size)} ({format_size(rate)}/s){RESET}\033[K", end="", flush=True)
+
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}exporting container to {archive_name} with {args.jobs} compression threads...{RESET}")
+    try:
+        read_size, written_size, checksum, base = export_container(container, archive_name, max(1, args.jobs), args.level, show_progress, args.delta)
+    except ContainerArchiveError as e:
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}{e}{RESET}\n")
+        exit(1)
+    if interactive:
+        print("")
+    seconds = time.time() - start_time
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}exported {format_size(read_size)} into {archive_name} "
+          f"({format_size(written_size)}) in {seconds:.0f} s, {format_size(read_size / max(seconds, 1e-3))}/s.{RESET}")
+    if base is not None:
+        print(f"{NEUTRAL}Base image {base['image']} ({base['digest'] or base['id']}): "
+              f"{len(base['omitted_layers'])} of {len(base['layers'])} layers left out.{RESET}")
+        if len(base["omitted_layers"]) < len(base["layers"]):
+            print(f"{WARNING}docker image save did not provide the base layers by their diff id, the archive contains them.{RESET}")
+    print(f"{NEUTRAL}sha256: {checksum} (stored in {archive_name}.sha256){RESET}\n")
+
+
+def command_gc(args):
+    """Run the mlc gc command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    import pathlib
+
+    if args.older_than < 0 or args.keep_latest < 0:
+        print(f"\n{ERROR}--older-than and --keep-latest can not be negative.{RESET}\n")
+        exit(1)
+    catalog = load_image_catalog(pathlib.Path(__file__).parent / "ml_images.repo")
+    catalog_images = {
+        image
+        for architecture in catalog.architectures()
+        for version_images in catalog.frameworks(architecture).values()
+        for image in version_images.values()
+    }
+    garbage, reclaimable_size = find_garbage(
+        catalog_images,
+        args.older_than,
+        args.keep_latest,
+        args.bases,
+        None if args.all_users else user_name,
+        None if args.all_users else user_id
+    )
+    if not garbage:
+        print(f"\n{NEUTRAL}Nothing to be removed.{RESET}\n")
+        exit(0)
+
+    now = time.time()
+    print(f"\n{INFO_HEADER}{'KIND':<17}{'NAME':<60}{'SIZE':<10}{'CREATED':<14}REASON{RESET}")
+    for item in garbage:
+        print(f"{item.kind:<17}{item.name:<60}{format_size(item.size) if item.size else '-':<10}{format_age(now - item.created):<14}{item.reason}")
+    print(f"\n{INFO}Reclaimable: {format_size(reclaimable_size)} (layers shared by several images counted once){RESET}")
+    if args.dry_run:
+        print("")
+        exit(0)
+    are_you_sure(f"{len(garbage)} containers and images", args.command, args.script)
+
+    print("")
+    results = remove_garbage(garbage, max(1, args.jobs))
+    failed = sum(1 for removed in results.values() if not removed)
+    print(f"\n{INFO}{len(results) - failed} of {len(results)} removed.{RESET}\n")
+    if failed:
+        exit(1)
+
+
+def command_import(args):
+    """Run the mlc import command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    try:
+        metadata = read_export_metadata(args.archive)
+    except ContainerArchiveError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+    labels = metadata.get("labels") or {}
+
+    validated_container_name, container_tag = get_container_name(args.container_name or metadata.get("name"), user_name, args.command, args.script)
+
+    # The mounts of the exported container are used unless other directories are provided
+    try:
+        workspace_dir = check_directory(args.workspace_dir or labels.get("aime.mlc.WORK_MOUNT", ""), "Workspace")
+        data_dir = args.data_dir or labels.get("aime.mlc.DATA_MOUNT", "-")
+        data_dir = check_directory(data_dir, "Data") if data_dir != "-" else "-"
+        models_dir = args.models_dir or labels.get("aime.mlc.MODELS_MOUNT", "-")
+        models_dir = check_directory(models_dir, "Models") if models_dir != "-" else "-"
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n{HINT}Provide the directory on this machine with -w, -d or -m.{RESET}\n")
+        exit(1)
+
+    if metadata.get("user_id") != user_id or metadata.get("group_id") != group_id:
+        print(f"\n{WARNING}The container was exported by the user with ID {metadata.get('user_id')} and group {metadata.get('group_id')}, "
+              f"its home directory and sudo rights belong to this user.{RESET}")
+
+    interactive = not args.script and sys.stdout.isatty()
+    archive_size = os.path.getsize(args.archive)
+    start_time = time.time()
+
+    def show_progress(read_size):
+        if interactive:
+            print(f"\r{INPUT}[{validated_container_name}]{RESET} {NEUTRAL}loaded {format_size(read_size)} of {format_size(archive_size)} "
+                  f"({read_size * 100 // max(archive_size, 1)}%){RESET}\033[K", end="", flush=True)
+
+    print(f"\n{INPUT}[{validated_container_name}]{RESET} {NEUTRAL}importing {args.archive}...{RESET}")
+    if read_archive_checksum(args.archive) is None:
+        print(f"{WARNING}{args.archive}.sha256 not found, the archive is not verified.{RESET}")
+    if metadata.get("base"):
+        print(f"{NEUTRAL}Delta archive based on {metadata['base']['image']}, the base image is pulled if it is not available.{RESET}")
+    try:
+        resumed = import_container(args.archive, metadata, validated_container_name, container_tag, workspace_dir, data_dir, models_dir, show_progress)
+    except ContainerArchiveError as e:
+        print(f"\n\n{INPUT}[{validated_container_name}]{RESET} {ERROR}{e}{RESET}\n")
+        exit(1)
+    if interactive and not resumed:
+        print("")
+    if resumed:
+        print(f"{NEUTRAL}The image had been loaded by an interrupted import already.{RESET}")
+    print(f"\n{INPUT}[{validated_container_name}]{RESET} {NEUTRAL}imported in {time.time() - start_time:.0f} s, "
+          f"open it with: mlc open {validated_container_name}{RESET}\n")
+
+
+def command_list(args):
+    """Run the mlc list command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    if args.format == "table":
+        show_container_info(**vars(args))
+    else:
+        fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+        try:
+            write_container_list(args.format, fields, args.all_users, args.all or args.size or args.fresh, args.fresh)
+        except ValueError as e:
+            print(f"\n{ERROR}{e}{RESET}\n", file=sys.stderr)
+            exit(1)
+
+
+def command_models(args):
+    """Run the mlc models command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    import sqlite3
+
+    try:
+        min_size = parse_size(args.min_size) if args.min_size else models_min_file_size
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+    if args.models_dirs:
+        missing_dirs = [models_dir for models_dir in args.models_dirs if not os.path.isdir(models_dir)]
+        if missing_dirs:
+            print(f"\n{ERROR}Not a directory: {', '.join(missing_dirs)}{RESET}\n")
+            exit(1)
+        models_dirs = list(dict.fromkeys(os.path.realpath(models_dir) for models_dir in args.models_dirs))
+    else:
+        models_dirs = list_models_dirs(args.all_users)
+    if not models_dirs:
+        print(f"\n{NEUTRAL}No models directories found.{RESET}\n")
+        exit(0)
+
+    try:
+        connection = open_models_index()
+    except (OSError, sqlite3.Error) as e:
+        print(f"\n{ERROR}The model store {models_store_dir} can not be opened: {e}{RESET}"
+              f"\n{HINT}Create it as root with: mkdir -p -m 1777 {models_store_dir} (on the file system of the models directories){RESET}\n")
+        exit(1)
+
+    interactive = not args.script and sys.stdout.isatty()
+    start_time = time.time()
+
+    def show_progress(hashed_files, hashed_size):
+        if interactive:
+            rate = hashed_size / max(time.time() - start_time, 1e-3)
+            print(f"\r{NEUTRAL}hashed {hashed_files} files, {format_size(hashed_size)} ({format_size(rate)}/s){RESET}\033[K", end="", flush=True)
+
+    files = scan_model_files(models_dirs, min_size)
+    print(f"\n{NEUTRAL}{len(files)} model files in {len(models_dirs)} models directories.{RESET}")
+
+    if args.models_command == "verify":
+        verified_files, problems = verify_models_store(files, connection, max(1, args.jobs), show_progress)
+        if interactive:
+            print("")
+        for path, problem in problems:
+            print(f"{ERROR}{path}: {problem}{RESET}")
+        print(f"\n{INFO}{verified_files} files and store objects verified in {time.time() - start_time:.1f} s, {len(problems)} problems.{RESET}\n")
+        exit(1 if problems else 0)
+
+    hashed_files, failed_files = hash_model_files(files, connection, max(1, args.jobs), progress=show_progress)
+    if interactive:
+        print("")
+    for model_file, error in failed_files:
+        print(f"{WARNING}{model_file.path} skipped: {error}{RESET}")
+
+    if args.models_command == "du":
+        print(f"\n{INFO_HEADER}{'MODELS DIRECTORY':<50}{'FILES':>8}{'SIZE':>10}{'ON DISK':>10}{'SAVED':>10}{'RECLAIMABLE':>13}{RESET}")
+        for models_dir in models_dirs + ["total"]:
+            dir_files = hashed_files if models_dir == "total" else [
+                model_file for model_file in hashed_files if model_file.path.startswith(models_dir.rstrip(os.sep) + os.sep)
+            ]
+            summary = summarize_model_files(dir_files)
+            print(f"{models_dir:<50}{len(dir_files):>8}{format_size(summary['size']):>10}{format_size(summary['used']):>10}"
+                  f"{format_size(summary['saved']):>10}{format_size(summary['reclaimable']):>13}")
+        if summarize_model_files(hashed_files)["reclaimable"]:
+            print(f"\n{HINT}Run mlc models dedup to share the duplicated files.{RESET}")
+        print("")
+        exit(0)
+
+    summary = summarize_model_files(hashed_files)
+    if args.dry_run:
+        result = dedup_model_files(hashed_files, connection, args.link, dry_run=True)
+        removed, removed_size = prune_models_store(connection, dry_run=True)
+        print(f"\n{INFO}{result['linked']} files would be linked, freeing {format_size(result['freed'])}, "
+              f"{removed} unused store objects ({format_size(removed_size)}) would be removed.{RESET}\n")
+        exit(0)
+    result = dedup_model_files(hashed_files, connection, args.link)
+    for path, error in result["failed"]:
+        print(f"{WARNING}{path} not linked: {error}{RESET}")
+    removed, removed_size = prune_models_store(connection)
+    print(f"\n{INFO}{result['linked']} files linked, {format_size(result['freed'])} freed, "
+          f"{removed} unused store objects ({format_size(removed_size)}) removed in {time.time() - start_time:.1f} s. "
+          f"Saved in total: {format_size(summary['saved'] + result['freed'])}.{RESET}\n")
+
+
+def command_open(args):
+    """Run the mlc open command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    open_start_time = get_process_start_time()
+    timings = [("python start", time.time())]
+
+    # Fast path: the tag of a named container is known, a single inspect provides its state
+    container = inspect_container(f"{args.container_name}._.{user_id}") if args.container_name else None
+    if container is not None and (container.get("Config", {}).get("Labels") or {}).get("aime.mlc.USER") == user_name:
+        selected_container_name = args.container_name
+        selected_container_tag = f"{args.container_name}._.{user_id}"
+        print(f'\n{INPUT}[{args.container_name}]{RESET}{NEUTRAL} exists and will be opened.{RESET}')
+
+    else:
+        # List existing containers of the current user
+        available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+
+        if args.container_name:                
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+                exit(1)                        
+            else:                                                
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
+                print(f"\n{INFO}Available containers of the current user:{RESET}")
+                selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers)                                          
+        else:              
+            if args.script:                
+                print(f"{ERROR}Container name is missing.{RESET}")
+                print_info_header(args.command) 
+                exit(1)                
+            else:                                      
+                print_info_header(args.command)
+                print(f"\n{INFO}Available containers of the current user:{RESET}")
+                selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers) 
+
+        # Obtain container_tag from the selected container name
+        selected_container_tag = available_user_container_tags[selected_container_position-1]
+        container = inspect_container(selected_container_tag)
+        if container is None:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+            exit(1)
+    timings.append(("inspect", time.time()))
+
+    # Start the existing selected container, a container paused by mlc watchdog is resumed
+    container_state = container.get("State", {})
+    if container_state.get("Paused"):
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}resuming paused container...{RESET}")
+        status, _ = docker_api_request("POST", f"/containers/{container['Id']}/unpause")
+        if status is None:
+            run_docker_command(f"docker container unpause {selected_container_tag}")
+        timings.append(("unpause", time.time()))
+    elif not container_state.get("Running"):
+        conflicts = gpu_conflicts(selected_container_tag, container.get("Config", {}).get("Labels") or {})
+        if conflicts:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}The assigned GPUs are used by running containers:{RESET} {conflicts}")
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}starting container...{RESET}")
+        started, message = start_container_and_wait(container["Id"])
+        if not started:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}could not be started: {message}{RESET}\n")
+            exit(1)
+        invalidate_container_inventory()
+        start_data_cache(container.get("Config", {}).get("Labels"))
+        timings.append(("start", time.time()))
+    else:                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container already running.{RESET}")
+        start_data_cache(container.get("Config", {}).get("Labels"))
+
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}opening shell to container...{RESET}")
+    if args.timing:
+        phases = [f"{phase} {(end - start) * 1000:.0f} ms" for (_, start), (phase, end) in zip([("", open_start_time)] + timings, timings)]
+        print(f"{NEUTRAL}Timing: {', '.join(phases)}, exec after {(time.time() - open_start_time) * 1000:.0f} ms{RESET}")
+
+    # Open an interactive shell session in the running container as the current user
+    docker_command_open_shell = build_open_shell_command(selected_container_tag, open_start_time if args.timing else None)
+
+    #ToDo: capture possible errors and treat them
+    error_mesage, exit_code = run_docker_command_popen(docker_command_open_shell)
+
+    if exit_code == 1:                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}detached from container, container keeps running.{RESET}")                
+    elif exit_code == 0:                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container shell closed successfully..{RESET}")  
+
+    # Check the status of the opened container     
+    active_status = is_container_active(selected_container_tag)
+
+    if active_status == "True":                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container is active, kept running.{RESET}")                
+    else:                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container is inactive, stopping container ...{RESET}")
+        docker_command_stop_container = f"docker container stop {selected_container_tag}"
+        _, _, _ = run_docker_command(docker_command_stop_container)
+        print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container stopped.{RESET}\n")  
+
+
+def command_prefetch(args):
+    """Run the mlc prefetch command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    import pathlib
+    import fcntl
+
+    repo_file = pathlib.Path(__file__).parent / "ml_images.repo"
+    catalog = load_image_catalog(repo_file)
+
+    # Set the gpu architecture based on a flag, an environment variable or the gpu architecture of the host
+    architecture = args.architecture or os.environ.get('MLC_ARCH') or get_host_gpu_architecture()[1]
+    if architecture not in catalog.architectures():
+        print(f"\n{ERROR}Unknown gpu architecture:{RESET} {INPUT}{architecture}{RESET} \n\n{INFO}Available gpu architectures:{RESET}\n{', '.join(catalog.architectures())}\n")
+        exit(1)
+
+    try:
+        disk_budget = parse_size(args.disk_budget) if args.disk_budget else None
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+
+    images = select_prefetch_images(catalog, architecture, args.framework, args.version)
+    if not images:
+        print(f"\n{ERROR}No images found for{RESET} {INPUT}{architecture} {args.framework or '*'} {args.version or '*'}{RESET}\n")
+        exit(1)
+
+    print(f"\n{INFO}Images of {architecture} to be prefetched:{RESET}")
+    print("\n".join(images))
+    if args.dry_run:
+        exit(0)
+    are_you_sure(f"{len(images)} images", args.command, args.script)
+
+    # Only one prefetch at a time, overlapping cron jobs are skipped
+    os.makedirs(get_mlc_cache_dir(), exist_ok=True)
+    lock_file = open(os.path.join(get_mlc_cache_dir(), "prefetch.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"\n{NEUTRAL}Another mlc prefetch is already running.{RESET}\n")
+        exit(0)
+
+    print("")
+    results = prefetch_images(images, args.jobs, disk_budget, interactive=not args.script and sys.stdout.isatty())
+    summary = defaultdict(int)
+    for result, _ in results.values():
+        summary[result] += 1
+    print(f"\n{INFO}Prefetch finished:{RESET} " + ", ".join(f"{count} {result}" for result, count in sorted(summary.items())) + "\n")
+    if summary["failed"]:
+        exit(1)
+
+
+def command_prune_layers(args):
+    """Run the mlc prune-layers command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    stale_layers = find_stale_user_layers(args.older_than, args.all, None if args.all_users else user_name)
+    if not stale_layers:
+        print(f"\n{NEUTRAL}No stale user setup layers found.{RESET}\n")
+        exit(0)
+
+    print(f"\n{INFO}Stale user setup layers:{RESET}")
+    for layer, reason in stale_layers:
+        layer_name = (layer["RepoTags"] or [layer["Id"]])[0]
+        print(f"{layer_name}  {format_size(layer['Size'])}  ({reason})")
+    if args.dry_run:
+        exit(0)
+    are_you_sure(f"{len(stale_layers)} layers", args.command, args.script)
+
+    failed_layers = 0
+    for layer, _ in stale_layers:
+        layer_name = (layer["RepoTags"] or [layer["Id"]])[0]
+        if remove_image(layer["Id"]):
+            print(f"{INPUT}[{layer_name}]{RESET} {NEUTRAL}removed.{RESET}")
+        else:
+            print(f"{INPUT}[{layer_name}]{RESET} {ERROR}could not be removed.{RESET}")
+            failed_layers += 1
+    print("")
+    if failed_layers:
+        exit(1)
+
+
+def command_remove(args):
+    """Run the mlc remove command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    # Several containers, --all and --filter are processed in parallel
+    if len(args.container_name) > 1 or args.all or args.filter:
+        run_bulk_command(args, args.container_name)
+    args.container_name = args.container_name[0] if args.container_name else None
+
+    # List existing containers of the current user
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+    containers_state = get_container_inventory().running_states(available_user_container_tags)
+
+    no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
+        containers_state, 
+        available_user_containers, 
+        available_user_container_tags
+    )
+    ask_are_you_sure = True
+    if args.container_name:                 
+        if no_running_container_number == 0:                    
+            print(f"\n{ERROR}All containers are running.\nIf you want to remove a container, stop it before using:{RESET}{HINT}\nmlc stop container_name{RESET}")
+            show_container_info()
+            exit(0)                    
+        if args.container_name in running_containers:                    
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists and is running. Not possible to be removed.{RESET}\n")
+                exit(1)                    
+            else:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists and is running. Not possible to be removed.{RESET}")                        
+                print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET} ")
+                selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
+
+        elif args.container_name in no_running_containers:                    
+            selected_container_name = args.container_name
+            selected_container_position = no_running_containers.index(args.container_name) + 1
+            print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is not running and will be removed.{RESET}')                    
+            if not args.script:                         
+                if not args.force:                            
+                    print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
+                else:                            
+                    ask_are_you_sure = False
+            else:
+                ask_are_you_sure = False                        
+        else:                    
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.\n")
+                exit(1)                    
+            else:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.")     
+
+                # all containers are running
+                if no_running_container_number == 0:
+                    show_container_info()
+                    exit(0) 
+
+                while True:
+                    print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET} ")
+                    selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
+                    break                                                               
+    else:                  
+
+        # Check that at least 1 container is no running
+        if no_running_container_number == 0:                    
+            print(f"\n{ERROR}All containers are running.\nIf you want to remove a container, stop it before using:{RESET}{HINT}\nmlc stop container_name{RESET}")
+            show_container_info()
+            exit(0)                
+        if args.script:                
+            print(f"\n{ERROR}Container name is missing.{RESET}")
+            print_info_header(args.command)
+            exit(1)                
+        else:                     
+            print_info_header(args.command)                    
+            print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET}")
+            selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
+
+    # Obtain container_tag from the selected container name
+    selected_container_tag = no_running_container_tags[selected_container_position-1]
+
+    if ask_are_you_sure:                
+        are_you_sure(selected_container_name, args.command, args.script)
+
+    # Delete the container and its image, user setup layers are shared and kept for the next mlc create
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}deleting container ...{RESET}")
+    exit_status, details = delete_container(get_container_inventory().get(selected_container_tag))
+    invalidate_container_inventory()
+    if exit_status != 0:
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}could not be removed: {details}{RESET}\n")
+        exit(1)
+    if details:
+        print(f"\n{WARNING}The {details}, mlc gc removes it later.{RESET}")
 
-    # Assemble full command
-    if 'CUDA' in architecture:
-        docker_cmd = base_docker_cmd + cuda_extras + [
-            f'{selected_docker_image}:{container_tag}', 'bash', '-c', bash_command
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container removed.{RESET}\n") 
+
+
+def command_start(args):
+    """Run the mlc start command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    # Several containers, --all and --filter are processed in parallel
+    container_names = args.container_name.split(",") if args.container_name else []
+    if len(container_names) > 1 or args.all or args.filter:
+        if args.execute_command:
+            print(f"\n{ERROR}A command can only be executed when a single container is started.{RESET}\n")
+            exit(1)
+        if args.warm and not warm_on_start_default:
+            print(f"\n{ERROR}--warm is only supported when a single container is started.{RESET}\n")
+            exit(1)
+        run_bulk_command(args, container_names)
+
+    # List existing containers of the current user
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+    containers_state = get_container_inventory().running_states(available_user_container_tags)
+
+    no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
+        containers_state, 
+        available_user_containers, 
+        available_user_container_tags
+    )           
+
+    if args.container_name: 
+        if args.container_name in running_containers:                    
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}Can not be started, container is already running.{RESET}\n")
+            exit(1)                                                                      
+        elif args.container_name in no_running_containers:
+            selected_container_name = args.container_name
+            selected_container_position = no_running_containers.index(args.container_name) + 1
+            print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is not running and will be started.{RESET}')                    
+        else:                    
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+                exit(1)                    
+            else:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")                    
+                if no_running_container_number == 0:                            
+                    show_container_info()
+                    exit(1)
+
+                while True:                            
+                    print(f"\n{INFO}The following no running containers of the current user can be started:{RESET} ")
+                    selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
+                    break                                    
+    else:             
+        if no_running_container_number == 0:
+            print(
+                f"{ERROR}\nAt the moment all containers are running.\nCreate a new one and start it using:{RESET}\n{HINT}mlc start container_name{RESET}"
+            )
+            show_container_info() 
+            exit(0)  
+
+        if args.script:                
+            print(f"\n{ERROR}Container name is missing.{RESET}")
+            print_info_header(args.command)
+            exit(1)                    
+        else:                    
+            print_info_header(args.command)                    
+            print(f"\n{INFO}The following no running containers of the current user can be started:{RESET}")
+            selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
+
+    # Obtain container_tag from the selected container name
+    selected_container_tag = no_running_container_tags[selected_container_position-1]
+
+    # Start the existing selected container:
+    if selected_container_tag != check_container_running(selected_container_tag):
+        container = get_container_inventory().get(selected_container_tag)
+        conflicts = gpu_conflicts(selected_container_tag, container.labels) if container else ""
+        if conflicts:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}The assigned GPUs are used by running containers:{RESET} {conflicts}")
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}starting container...{RESET}")
+        docker_command_start = [
+            "docker",
+            "container",
+            "start",
+            selected_container_tag
         ]
-    elif 'ROCM' in architecture:
-        docker_cmd = base_docker_cmd + rocm_extras + [
-            f'{selected_docker_image}:{container_tag}', 'bash', '-c', bash_command
+        process = subprocess.Popen(
+            docker_command_start, 
+            shell=False,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        invalidate_container_inventory()
+        start_data_cache(container.labels if container else None)
+
+        # The files are read while docker starts the container
+        if args.warm and container:
+            try:
+                result = warm_page_cache(resolve_warm_files(container.labels), get_warm_budget())
+                print_warm_result(selected_container_name, result)
+            except ValueError as e:
+                print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}not warmed: {e}{RESET}")
+
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}could not be started: {(stderr or stdout).strip()}{RESET}\n")
+            exit(1)
+
+        # Without a command to execute the container is started once docker start succeeded
+        if not args.execute_command:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container started.{RESET}")
+            return
+
+        set_env = get_docker_env()
+        show_output = '-t'
+        if(args.detach):
+            show_output = '-d'
+
+        ## Execute Command!
+        docker_command_open_shell=[
+            "docker", "exec", 
+            show_output,       
+            *set_env,  
+            "--user", f"{user_id}:{group_id}", f"{selected_container_tag}",                   
+            args.execute_command  
         ]
+
+        #ToDo: capture possible errors and treat them
+        error_mesage, exit_code = run_docker_command_popen(docker_command_open_shell)
+
+        if exit_code == 0 or exit_code == 1:            
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container started.{RESET}")
+        else:
+            print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}error starting container, stopping container...{RESET}")
+            docker_command_stop_container = f"docker container stop {selected_container_tag}"
+            _, _, _ = run_docker_command(docker_command_stop_container)
+
+    else:                
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container already running.{RESET}\n")
+        exit(0)
+
+
+def command_stats(args):
+    """Run the mlc stats command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    if args.watch:
+        watch_container_stats(args.interval or 1.0, args.backend)
     else:
-        raise ValueError(f"Unsupported architecture: {architecture}")
+        show_container_stats(args.backend, args.interval or 0.5)            
 
-    return docker_cmd
 
-###############################################################################################################################################################################################
-def main():
-    try: 
-        # Arguments parsing
-        args = get_flags()
-           
-        if not args.command:
-            print(f"\nUse {INPUT}mlc -h{RESET} or {INPUT}mlc --help{RESET} to get more informations about the AIME MLC tool.\n")
-            
-   
-        if args.command == 'create':
-            
-            # Set the file with frameworks, versions, gpu architectures and images
-            repo_name = "ml_images.repo" 
-            
-            # Read and save content of ml_images.repo
-            repo_file = pathlib.Path(__file__).parent / repo_name
-            
-            #Get the existing gpu architecture    
-            architectures = sorted(get_gpu_architectures(repo_file))
-            
-            # Get the MLC_ARCH environment variable:
-            mlc_repo_env_var = os.environ.get('MLC_ARCH')  
-            
-            cuda_or_rocm, host_gpu_architecture, host_gpu_driver_version = get_host_gpu_architecture()
-         
-            # Set the gpu architecture based on a flag, an environment variable or the gpu architecture of the host (default value detected automatically)
-            architecture = args.architecture or mlc_repo_env_var or host_gpu_architecture
-            available_host_gpu_architectures = [architecture for architecture in architectures if cuda_or_rocm in architecture]
-            
-            # Check gpu architecture
-            if args.script:
-                if architecture not in available_host_gpu_architectures:
-                    print(f"\n{ERROR}Unknown gpu architecture:{RESET} {INPUT}{architecture}{RESET} \n\n{INFO}Available gpu architectures:{RESET}\n{', '.join(available_host_gpu_architectures)}\n")
-                    exit(1)
+def command_stop(args):
+    """Run the mlc stop command.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    # Several containers, --all and --filter are processed in parallel
+    if len(args.container_name) > 1 or args.all or args.filter:
+        run_bulk_command(args, args.container_name)
+    args.container_name = args.container_name[0] if args.container_name else None
+
+    # List existing containers of the current user
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+    containers_state = get_container_inventory().running_states(available_user_container_tags)
+
+    no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
+        containers_state, 
+        available_user_containers, 
+        available_user_container_tags
+    )
+
+    ask_are_you_sure = True     
+
+    if args.container_name:                
+        if running_container_number == 0:                    
+            print(                        
+                f"{ERROR}\nAll containers are stopped. You cannot stop no running containers.{RESET}"
+            )
+            show_container_info() 
+            exit(0)
+
+        if args.container_name in no_running_containers: 
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists but is not running. Not possible to be stopped.{RESET}\n")
+                exit(1)
+            else:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists but is not running. Not possible to be stopped.{RESET}")
+                print(f"\n{INFO}The following running containers of the current user can be stopped:{RESET} ")
+                selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
+        elif args.container_name in running_containers:                    
+            selected_container_name = args.container_name
+            selected_container_position = running_containers.index(args.container_name) + 1
+            print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is running and will be stopped.{RESET}')                    
+            if not args.script:                        
+                if not args.force:                            
+                    print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
+                else:                            
+                    ask_are_you_sure = False                    
             else:
-                while architecture not in available_host_gpu_architectures:
-                    print(f"\n{ERROR}Unknown gpu architecture:{RESET} {INPUT}{architecture}{RESET}")
-                    display_gpu_architectures(available_host_gpu_architectures)
-                    architecture_number = get_user_selection(f"{REQUEST}Enter the number of the desired architecture: {RESET}", len(available_host_gpu_architectures))
-                    architecture = available_host_gpu_architectures[architecture_number - 1]            
-            
-            # Extract framework, version and docker image from the ml_images.repo file
-            framework_version_docker = extract_from_ml_images(repo_file, architecture)
-            framework_version_docker_sorted = dict(sorted(framework_version_docker.items()))
-            
-            # Check if the user requests more info about available gpu architecture, framework and version 
-            if args.info:
-                print(f"\n{INFO}Available gpu architectures ({INPUT}currently used{RESET}{INFO}):{RESET}\n" + ', '.join(f"{INPUT}{arch}{RESET}" if arch == architecture else arch for arch in available_host_gpu_architectures))
-                show_frameworks_versions(framework_version_docker_sorted)
-                
-            # List existing containers/container_tags of the current user
-            available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
-            
-            # Set the variables to know if the workspace, data and models directories should be asked 
-            workspace_dir_be_asked = data_dir_be_asked = models_dir_be_asked = False
+                ask_are_you_sure = False                
+        else:                    
+            if args.script:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+                exit(1)                        
+            else:                        
+                print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
 
-            # Print an info header only when the positional arguments (container name, frameworl and version) are not provided 
-            if args.container_name is None and args.framework is None and args.version is None:
-                print_info_header(args.command)
-                workspace_dir_be_asked = data_dir_be_asked = models_dir_be_asked = True            
-                        
-            if args.script:
-                # Set the container name and its validation        
-                validated_container_name, validated_container_tag = get_container_name(args.container_name, user_name, args.command, args.script)
-
-                # Set the framework:
-                if args.framework is None: 
-                    print(f"\n{ERROR}Framework is needed.{RESET}\n")
-                    exit(1)
-                else:
-                    if not framework_version_docker_sorted.get(args.framework):
-                        print(f"\n{ERROR}Unknown framework:{RESET} {INPUT}{args.framework}{RESET}\n\n{REQUEST}Available AI frameworks:{RESET}\n{', '.join(framework_version_docker_sorted.keys())}\n")
-                        exit(1)
-                    else:
-                        selected_framework = args.framework
-                
-                # Set the version:
-                version_images = framework_version_docker_sorted[selected_framework]
-                
-                if args.version is None:
-                    print(f"\n{ERROR}Version is needed.{RESET}\n")
-                    exit(1)
-                else:                     
-                    available_versions = [version[0] for version in version_images]
-                    if args.version in available_versions:
-                        selected_docker_image = get_docker_image(args.version, version_images)
-                        selected_version = args.version
-                    else:
-                        print(f"\n{ERROR}Version is not available:{RESET} {INPUT}{args.version}{RESET}\n")
-                        exit(1)                      
-            else:                
-                if args.framework is None:    
-                    while args.framework is None:
-                        args.framework = set_framework(framework_version_docker_sorted)
-                else:
-                    while True:                    
-                        if not framework_version_docker_sorted.get(args.framework):
-                            print(f"\n{ERROR}Unknown framework:{RESET} {INPUT}{args.framework}{RESET}")
-                            args.framework = set_framework(framework_version_docker_sorted) 
-                        else:
-                            break
-                selected_framework = args.framework 
-                
-                # Set the version:
-                version_images = framework_version_docker_sorted[selected_framework] 
-                
-                if args.version is None:
-                    #print(f"\n{ERROR}Version is needed.{RESET}")                    
-                    while args.version is None:
-                        args.version, selected_docker_image = set_version(selected_framework, version_images)                        
-                else:                                   
-                    available_versions = [version[0] for version in version_images]
-                    while True:
-                        if args.version in available_versions:
-                            selected_docker_image = get_docker_image(args.version, version_images)
-                            break
-                        else:
-                            print(f"\n{ERROR}Version is not available:{RESET} {INPUT}{args.version}{RESET}")
-                            args.version, selected_docker_image = set_version(selected_framework, version_images)           
-                selected_version = args.version                       
-                        
-                # Set the container name and its validation        
-                validated_container_name, validated_container_tag = get_container_name(args.container_name, user_name, args.command, args.script)
-               
-            
-            # Select Workspace directory:
-            default_workspace_dir = os.path.expanduser('~/workspace') 
-            workspace_dir_updated = False
-          
-            # If the -w option is provided, check the user-provided path
-            if args.workspace_dir:
-                
-                provided_workspace_dir = os.path.expanduser(args.workspace_dir)                                  
                 while True:
-                    # Check if the provided workspace directory exists:
-                    if os.path.isdir(provided_workspace_dir):
-                        break
-                    else:
-                        if args.script:
-                            workspace_dir = default_workspace_dir
-                            print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}\n")
-                            exit(0)
-                        print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}")
-                        provided_workspace_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the WORKSPACE directory: {RESET}").strip())
-                workspace_dir = provided_workspace_dir
-                workspace_dir_updated = True
-                workspace_dir_be_asked = False
-                
-            else:
-                workspace_dir = default_workspace_dir
-            
-            if not args.script:         
-                if workspace_dir_be_asked:
-                    workspace_message = (
-                        f"\n{NEUTRAL}The workspace directory would be mounted by default as /workspace in the container.{RESET}"
-                        f"\n{NEUTRAL}It is the directory where your project data should be stored to be accessed inside the container.{RESET}"
-                        f"\n{HINT}HINT: It can be set to an existing directory with the option '-w /your_workspace'{RESET}"
-                    )
-                    print(f"{workspace_message}")
-                    
-                    # Define a variable to control breaking out of both loops
-                    break_inner_loop = False
-                    
-                    while True:
-                        
-                        keep_workspace_dir = input(f"\n{REQUEST}Current workspace location:{default_workspace_dir}. Keep it (Y/n)?: {RESET}").strip().lower()
+                    print(f"\n{INFO}The following running containers of the current user can be stopped:{RESET} ")
+                    selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
+                    break                     
+    else:    
+        # Check that at least 1 container is running
+        if not running_container_tags:                
+            print(f"\n{ERROR}All containers are stopped. Therefore there are no one to be stopped.{RESET}")
+            show_container_info()
+            exit(0)
 
-                        if keep_workspace_dir in ["y","yes",""]:
-                            workspace_dir = default_workspace_dir
-                            break
-                        elif keep_workspace_dir in ["n","no"]:
-                            while True:
-                                provided_workspace_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the WORKSPACE directory: {RESET}").strip())  # Expand '~' to full path
-                                # Check if the provided workspace directory exist:
-                                if os.path.isdir(provided_workspace_dir):
-                                    workspace_dir = provided_workspace_dir
-                                    break_inner_loop = True
-                                    break
-                                else:
-                                    print(f"\n{ERROR}Workspace directory does not exist:{RESET} {INPUT}{provided_workspace_dir}{RESET}") 
-                            if break_inner_loop:
-                                break                           
-                        else:
-                            print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
+        if args.script:                
+            print(f"\n{ERROR}Container name is missing.{RESET}")
+            print_info_header(args.command)
+            exit(1)                
+        else:                
+            print_info_header(args.command)
+            print(f"\n{INFO}Running containers of the current user:{RESET}")
+            selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
 
-                else:
-                    if not workspace_dir_updated:
-                        workspace_dir = default_workspace_dir    
-               
-            # Select Data directory:     
-            default_data_dir = "-"
-            data_dir_updated = False
+    # Obtain container_tag from the selected container name
+    selected_container_tag = running_container_tags[selected_container_position-1]   
 
-            # Check if the provided data directory exists:
-            if args.data_dir:
-                provided_data_dir = os.path.expanduser(args.data_dir)
-                while True:
-                    # Check if the provided data directory exists:
-                    if os.path.isdir(provided_data_dir):
-                        break
-                    else:
-                        if args.script:
-                            print(f"\n{ERROR}Data directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}\n")
-                            exit(0)
-                        print(f"\n{ERROR}Data directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}")
-                        provided_data_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the DATA directory: {RESET}").strip())
-                data_dir = provided_data_dir
-                data_dir_updated = True
-                data_dir_be_asked = False
-            else:
-                data_dir = default_data_dir                            
-            
-            if not args.script:  
-                if data_dir_be_asked:
-                    data_message = (
-                        f"\n{NEUTRAL}The data directory would be mounted as /data in the container.{RESET}"
-                        f"\n{NEUTRAL}It is the directory where data sets, for example, mounted from\nnetwork volumes can be accessed inside the container.{RESET}"
-                        f"\n{HINT}HINT: It can be set to an existing directory with the option '-d /your_data_directory'{RESET}"
-                    )
-                    print(f"{data_message}")
+    if ask_are_you_sure:                 
+        are_you_sure(selected_container_name, args.command, args.script)
 
-                    # Define a variable to control breaking out of both loops
-                    break_inner_loop = False
-                    while True:                    
-                        provide_data_dir = input(f"\n{REQUEST}Do you want to provide a DATA directory (y/N)?: {RESET}").strip().lower()
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}stopping container ...{RESET}")
 
-                        if provide_data_dir in ["n","no", ""]:
-                            break
-                        elif provide_data_dir in ["y","yes"]:
-                            while True:
-                                provided_data_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the DATA directory: {RESET}").strip())  # Expand '~' to full path
-                                # Check if the provided data directory exists:
-                                if os.path.isdir(provided_data_dir):
-                                    data_dir = provided_data_dir
-                                    break_inner_loop = True
-                                    break
-                                else:
-                                    print(f"\n{ERROR}Provided directory does not exist:{RESET} {INPUT}{provided_data_dir}{RESET}") 
-                            if break_inner_loop:
-                                break                           
-                        else:
-                            print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
-                            
-                else:
-                    if not data_dir_updated:
-                        data_dir = default_data_dir  
+    # Attempt to stop the container and store the result.
+    docker_command_stop = f"docker container stop {selected_container_tag}"
+    _, _, _ = run_docker_command(docker_command_stop)
+    invalidate_container_inventory()
 
-            # Select Models directory:     
-            default_models_dir = "-"
-            models_dir_updated = False
+    # Print a message indicating the container has been stopped.
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container stopped.{RESET}\n")
 
-            # Check if the provided models directory exists:
-            if args.models_dir:
-                provided_models_dir = os.path.expanduser(args.models_dir)
-                while True:
-                    # Check if the provided models directory exists:
-                    if os.path.isdir(provided_models_dir):
-                        break
-                    else:
-                        if args.script:
-                            print(f"\n{ERROR}Models directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}\n")
-                            exit(0)
-                        print(f"\n{ERROR}Models directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}")
-                        provided_models_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the MODELS directory: {RESET}").strip())
-                models_dir = provided_models_dir
-                models_dir_updated = True
-                models_dir_be_asked = False
-            else:
-                models_dir = default_models_dir                            
-              
-            if not args.script:                    
-                if models_dir_be_asked:
-                    models_message = (
-                        f"\n{NEUTRAL}The models directory would be mounted as /models in the container.{RESET}"
-                        f"\n{NEUTRAL}It is the directory where weight models are download and saved.{RESET}"
-                        f"\n{HINT}HINT: It can be set to an existing directory with the option '-d /your_models_directory'{RESET}"
-                    )
-                    print(f"{models_message}")
 
-                    # Define a variable to control breaking out of both loops
-                    break_inner_loop = False
-                    while True:
-                        
-                        provide_models_dir = input(f"\n{REQUEST}Do you want to provide a MODELS directory (y/N)?: {RESET}").strip().lower()
+def command_update_sys(args):
+    """Run the mlc update-sys command.
 
-                        if provide_models_dir in ["n","no", ""]:
-                            break
-                        elif provide_models_dir in ["y","yes"]:
-                            while True:
-                                provided_models_dir = os.path.expanduser(input(f"\n{REQUEST}Provide the new location of the MODELS directory: {RESET}").strip())  # Expand '~' to full path
-                                # Check if the provided models directory exists:
-                                if os.path.isdir(provided_models_dir):
-                                    models_dir = provided_models_dir
-                                    break_inner_loop = True
-                                    break
-                                else:
-                                    print(f"\n{ERROR}Provided directory does not exist:{RESET} {INPUT}{provided_models_dir}{RESET}") 
-                            if break_inner_loop:
-                                break                           
-                        else:
-                            print(f"{ERROR}\nInvalid input. Please use y(yes) or n(no).{RESET}")
-                            
-                else:
-                    if not models_dir_updated:
-                        models_dir = default_models_dir  
-          
-            # Print a setup summary 
-            set_up_summary = (
-                f"\n{INFO_HEADER}{'_'*50}{RESET}"   
-                f"\n{INFO_HEADER}Summary of the selected setup:{RESET}"
-                f"\nGPU architecture: {INPUT}{architecture}{RESET} (host: {host_gpu_architecture}-{host_gpu_driver_version})"
-                f"\nContainer name: {INPUT}{validated_container_name}{RESET}"
-                f"\nFramework and Version: {INPUT}{selected_framework} {selected_version}{RESET}"
-                f"\nWorkspace directory: {INPUT}{workspace_dir}{RESET}"
-                f"\nData directory: {INPUT}{data_dir}{RESET}"
-                f"\nModels directory: {INPUT}{models_dir}{RESET}"
-                f"\n{INFO_HEADER}{'_'*50}{RESET}"                 
-            )
-            
-            print(f"{set_up_summary}")
-           
-            # Confirm the user's inputs:
-            are_you_sure(validated_container_name, args.command, args.script)
-            
-            # Generate a unique container tag
-            container_tag = validated_container_tag
-                       
-            # Check if a container with the generated tag already exists
-            if container_tag == check_container_exists(container_tag):
-                print(f"\n{ERROR}Error:{RESET} \n {INPUT}[{validated_container_name}]{RESET} already exists.{RESET}")
-                show_container_info()
-                exit(0)
-            else:
-                print(f"\n{NEUTRAL}The container will be created:{RESET} {INPUT}{validated_container_name}{RESET} ")
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    # Get the directory of the current script
+    mlc_path = os.path.dirname(os.path.abspath(__file__))
 
+    # Change the current directory to MLC_PATH
+    os.chdir(mlc_path)
 
-            # Pull the required image from aime-hub: 
-            print(f"\n{NEUTRAL}Acquiring container image ... {RESET}\n")
-            docker_command_pull_image = ['docker', 'pull', selected_docker_image]         
-            run_docker_pull_image(docker_command_pull_image)     
-        
-            print(f"\n{NEUTRAL}Setting up container ... {RESET}")
-                         
-            container_label = "aime.mlc"
-            workspace = "/workspace"
-            data = "/data"
-            models = "/models"
-            dir_to_be_added = f'/home/{user_name}/.local/bin'
-
-            # Generating the Docker command for running
-            docker_prepare_container = build_docker_run_command(
-                architecture,
-                workspace_dir,
-                workspace,
-                container_tag,
-                args.num_gpus,
-                selected_docker_image,
-                validated_container_name,
-                user_name,
-                user_id,
-                group_id,
-                dir_to_be_added
-            )
-            
-            # ToDo: compare subprocess.Popen with subprocess.run  
-            result_run_cmd = subprocess.run(docker_prepare_container, capture_output=True, text=True )
+    # Check if the .git directory exists
+    if not os.path.isdir(f"{mlc_path}/.git"):
+        print(f"{ERROR}Failed: ML container system not installed as updatable git repo.\nAdd the AIME MLC's location to ~/.bashrc or change to the location of the AIME MLC. {RESET}")
+        sys.exit(-1)  
 
-            # Commit the container: saves the current state of the container as a new image.
-            # ToDo: compare subprocess.Popen with subprocess.run  
-            bash_command_commit = [
-                'docker', 'commit', container_tag, f'{selected_docker_image}:{container_tag}'
-            ]
-            # ToDo: capture possible errors and treat them  
-            result_commit = subprocess.run(bash_command_commit, capture_output=True, text=True)
-            
-            # Remove the container: cleans up the initial container to free up ressources.
-            # ToDo: compare subprocess.Popen with subprocess.run  
-            result_remove = subprocess.run(['docker', 'rm', container_tag], capture_output=True, text=True)
-            
-            # Add the workspace volume
-            volumes = ['-v', f'{workspace_dir}:{workspace}'] 
-            
-            # Add the data volume mapping if data_dir is set
-            if data_dir != default_data_dir:
-                volumes +=  ['-v', f'{data_dir}:{data}']
-                
-            # Add the models volume mapping if models_dir is set
-            if models_dir != default_models_dir:
-                volumes +=  ['-v', f'{models_dir}:{models}'] 
-                
-            docker_create_cmd = build_docker_create_command(
-                user_name, 
-                user_id, 
-                group_id,   
-                architecture,
-                selected_docker_image,
-                selected_framework,
-                selected_version,
-                mlc_container_version,
-                validated_container_name,
-                container_label,
-                container_tag,
-                workspace,
-                workspace_dir, 
-                data_dir,
-                models_dir,
-                dir_to_be_added,
-                args.num_gpus,
-                volumes 
-            )
-            
-            # ToDo: compare subprocess.Popen with subprocess.run  
-            result_create_cmd = subprocess.run(docker_create_cmd, capture_output= True, text=True)
+    # Determine if sudo is required for git operations
+    sudo = "sudo"
 
-            print(f"\n{INPUT}[{validated_container_name}]{RESET} ready.{INFO}\n\nOpen the container with:{RESET}\nmlc open {INPUT}{validated_container_name}{RESET}\n")
+    if os.access(f"{mlc_path}/.git", os.W_OK):
+        sudo = ""  # No sudo if the git directory is writable
 
-                     
-        if args.command == 'list':
- 
-            show_container_info(**vars(args))                    
+    # Fix for "unsafe repository" warning in Git adding the mlc-directory to the list of safe directories
+    docker_command_git_config = ["git", "config", "--global", "--add", "safe.directory", mlc_path]
+    subprocess.run(docker_command_git_config)
 
-            
-        if args.command == 'open':           
-            
-            # List existing containers of the current user
-            available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
-            
-            if args.container_name:                
-                if args.container_name not in available_user_containers:                    
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
-                        exit(1)                        
-                    else:                                                
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
-                        print(f"\n{INFO}Available containers of the current user:{RESET}")
-                        selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers)                                          
-                else:                    
-                    selected_container_name = args.container_name
-                    selected_container_position = available_user_containers.index(args.container_name) + 1
-                    print(f'\n{INPUT}[{args.container_name}]{RESET}{NEUTRAL} exists and will be opened.{RESET}')     
-                                  
-            else:              
-                if args.script:                
-                    print(f"{ERROR}Container name is missing.{RESET}")
-                    print_info_header(args.command) 
-                    exit(1)                
-                else:                                      
-                    print_info_header(args.command)
-                    print(f"\n{INFO}Available containers of the current user:{RESET}")
-                    selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers) 
-                              
-            # Obtain container_tag from the selected container name
-            selected_container_tag = available_user_container_tags[selected_container_position-1]
-            
-            # Start the existing selected container:
-            if selected_container_tag != check_container_running(selected_container_tag):                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}starting container...{RESET}")
-                docker_command = f"docker container start {selected_container_tag}"
-                _, _, _ = run_docker_command(docker_command)                
-            else:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container already running.{RESET}")
-                
-            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}opening shell to container...{RESET}")
+    # Get the current branch name
+    docker_command_current_branch = ["git", "symbolic-ref", "HEAD"]
+    branch = subprocess.check_output(docker_command_current_branch, universal_newlines=True).strip().split("/")[-1]
+    print(f"branch update-sys: {branch}")
 
-            set_env = get_docker_env()
+    if not args.force:
 
-            # Open an interactive shell session in the running container as the current user
-            docker_command_open_shell=[
-                "docker", "exec", 
-                "-it",                                  
-                set_env,  
-                "--user", f"{user_id}:{group_id}", f"{selected_container_tag}",                   
-                "bash"  
-            ]
-            
-            #ToDo: capture possible errors and treat them
-            error_mesage, exit_code = run_docker_command_popen(docker_command_open_shell)
-            
-            if exit_code == 1:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}detached from container, container keeps running.{RESET}")                
-            elif exit_code == 0:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container shell closed successfully..{RESET}")  
-            
-            # Check the status of the opened container     
-            active_status = is_container_active(selected_container_tag)
+        print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
 
-            if active_status == "True":                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container is active, kept running.{RESET}")                
-            else:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container is inactive, stopping container ...{RESET}")
-                docker_command_stop_container = f"docker container stop {selected_container_tag}"
-                _, _, _ = run_docker_command(docker_command_stop_container)
-                print(f"\n{INPUT}[{selected_container_name}]{RESET}{NEUTRAL} container stopped.{RESET}\n")  
+        print(f"\n{NEUTRAL}This will update the ML container system to the latest version.{RESET}")
 
+        # If sudo is required, ask if the user wants to check for updates
+        if sudo == "":
+            reply = input(f"\n{REQUEST}Check for available updates (Y/n)?: {RESET}").strip().lower()
+            if reply not in ["y", "yes", "Y", ""]:
+                exit(0)  
 
-        if args.command == 'remove':
-            
-            # List existing containers of the current user
-            available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
-            containers_state = [True if container_tag == check_container_running(container_tag) else False for container_tag in available_user_container_tags]
-                        
-            no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
-                containers_state, 
-                available_user_containers, 
-                available_user_container_tags
-            )
-            ask_are_you_sure = True
-            if args.container_name:                 
-                if no_running_container_number == 0:                    
-                    print(f"\n{ERROR}All containers are running.\nIf you want to remove a container, stop it before using:{RESET}{HINT}\nmlc stop container_name{RESET}")
-                    show_container_info()
-                    exit(0)                    
-                if args.container_name in running_containers:                    
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists and is running. Not possible to be removed.{RESET}\n")
-                        exit(1)                    
-                    else:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists and is running. Not possible to be removed.{RESET}")                        
-                        print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET} ")
-                        selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
-                                          
-                elif args.container_name in no_running_containers:                    
-                    selected_container_name = args.container_name
-                    selected_container_position = no_running_containers.index(args.container_name) + 1
-                    print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is not running and will be removed.{RESET}')                    
-                    if not args.script:                         
-                        if not args.force:                            
-                            print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
-                        else:                            
-                            ask_are_you_sure = False
-                    else:
-                        ask_are_you_sure = False                        
-                else:                    
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.\n")
-                        exit(1)                    
-                    else:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.")     
-                    
-                        # all containers are running
-                        if no_running_container_number == 0:
-                            show_container_info()
-                            exit(0) 
-                                                        
-                        while True:
-                            print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET} ")
-                            selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
-                            break                                                               
-            else:                  
-                                
-                # Check that at least 1 container is no running
-                if no_running_container_number == 0:                    
-                    print(f"\n{ERROR}All containers are running.\nIf you want to remove a container, stop it before using:{RESET}{HINT}\nmlc stop container_name{RESET}")
-                    show_container_info()
-                    exit(0)                
-                if args.script:                
-                    print(f"\n{ERROR}Container name is missing.{RESET}")
-                    print_info_header(args.command)
-                    exit(1)                
-                else:                     
-                    print_info_header(args.command)                    
-                    print(f"\n{INFO}The following no running containers of the current user can be removed:{RESET}")
-                    selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
-            
-            # Obtain container_tag from the selected container name
-            selected_container_tag = no_running_container_tags[selected_container_position-1]
-            
-            if ask_are_you_sure:                
-                are_you_sure(selected_container_name, args.command, args.script)
-            
-            docker_command_get_image = [
-                'docker', 
-                'container', 
-                'ps', 
-                '-a', 
-                '--filter', f'name={selected_container_tag}', 
-                '--filter', 'label=aime.mlc', 
-                '--format', '{{.Image}}'
-            ]
-            process = subprocess.Popen(
-                    docker_command_get_image, 
-                    shell=False,
-                    text=True,
-                    stdout=subprocess.PIPE, 
-            )
-            # Communicate handles interactive input/output
-            stdout, _ = process.communicate()  
-            container_image = stdout.strip()
+        # Fetch the latest updates from remote repo
+        docker_command_git_remote = ["git", "remote", "update"]
+        sudo and docker_command_git_remote.insert(0, sudo)
+        subprocess.run(docker_command_git_remote)
 
-            # Delete the container
-            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}deleting container ...{RESET}")
-            docker_command_delete_container = f"docker container rm {selected_container_tag}"
-            subprocess.Popen(docker_command_delete_container, shell=True, text=True, stdout=subprocess.PIPE).wait()
+        # Get the update log for commits that are new in the remote repo
+        docker_command_git_log = ["git", "log", f"HEAD..origin/{branch}", "--pretty=format:%s"]
+        sudo and docker_command_git_log.insert(0, sudo)
+        update_log = subprocess.check_output(docker_command_git_log, text=True).strip()
 
-            # Delete the container's image
-            print(f"\n{NEUTRAL}Deleting related image ...{RESET}")
-            docker_command_rm_image = f"docker image rm {container_image}"            
-            subprocess.Popen(docker_command_rm_image, shell=True).wait()
+        if update_log == "":
+            print(f"\n{NEUTRAL}ML container system is up to date.\n{RESET}")
+            exit(0)  
 
-            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container removed.{RESET}\n") 
-            
-            
-        if args.command == 'start':
-            
-            # List existing containers of the current user
-            available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
-            containers_state = [True if container_tag == check_container_running(container_tag) else False for container_tag in available_user_container_tags]
-                        
-            no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
-                containers_state, 
-                available_user_containers, 
-                available_user_container_tags
-            )           
-            
-            if args.container_name: 
-                if args.container_name in running_containers:                    
-                    print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}Can not be started, container is already running.{RESET}\n")
-                    exit(1)                                                                      
-                elif args.container_name in no_running_containers:
-                    selected_container_name = args.container_name
-                    selected_container_position = no_running_containers.index(args.container_name) + 1
-                    print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is not running and will be started.{RESET}')                    
-                else:                    
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
-                        exit(1)                    
-                    else:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")                    
-                        if no_running_container_number == 0:                            
-                            show_container_info()
-                            exit(1)
-                        
-                        while True:                            
-                            print(f"\n{INFO}The following no running containers of the current user can be started:{RESET} ")
-                            selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
-                            break                                    
-            else:             
-                if no_running_container_number == 0:
-                    print(
-                        f"{ERROR}\nAt the moment all containers are running.\nCreate a new one and start it using:{RESET}\n{HINT}mlc start container_name{RESET}"
-                    )
-                    show_container_info() 
-                    exit(0)  
-
-                if args.script:                
-                    print(f"\n{ERROR}Container name is missing.{RESET}")
-                    print_info_header(args.command)
-                    exit(1)                    
-                else:                    
-                    print_info_header(args.command)                    
-                    print(f"\n{INFO}The following no running containers of the current user can be started:{RESET}")
-                    selected_container_name, selected_container_position = select_container_to_be_ed(no_running_containers) 
-            
-            # Obtain container_tag from the selected container name
-            selected_container_tag = no_running_container_tags[selected_container_position-1]
-            
-            # Start the existing selected container:
-            if selected_container_tag != check_container_running(selected_container_tag):
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}starting container...{RESET}")
-                docker_command_start = [
-                    "docker",
-                    "container",
-                    "start",
-                    selected_container_tag
-                ]
-                process = subprocess.Popen(
-                    docker_command_start, 
-                    shell=False,
-                    text=True,
-                    stdout=subprocess.PIPE, 
-                )
+        # Print the update log and prompt the user to confirm update
+        print(f"\n{INFO}Update(s) available.\n\nChange Log:{RESET}\n{update_log}")
+        reply = input(f"\n{REQUEST}Update ML container system (Y/n)?: {RESET}").strip().lower()
+        if reply in ["y", "yes", "Y", ""]:
+            args.update_directly = True  
+        else:
+            exit(0)  
 
-                set_env = get_docker_env()
+   # If confirmed, proceed with the update
+    try:
+        print(f"\n{NEUTRAL}Updating ML container system...{RESET}\n")
 
-                if args.execute_command:
-                    show_output = '-t'
-                    if(args.detach):
-                        show_output = '-d'
+        # Pull the latest changes from the remote repo
+        docker_command_git_pull = ["git", "pull", "origin", branch]
+        sudo and docker_command_git_pull.insert(0, sudo)          
+        subprocess.run(docker_command_git_pull)
+        exit(0)
+    except Exception as e:
+        print(f"\n{ERROR}Error during update: {e}")
+        exit(-1)  
 
-                    ## Execute Command!
-                    docker_command_open_shell=[
-                        "docker", "exec", 
-                        show_output,       
-                        set_env,  
-                        "--user", f"{user_id}:{group_id}", f"{selected_container_tag}",                   
-                        args.execute_command  
-                    ]
 
-                #ToDo: capture possible errors and treat them
-                error_mesage, exit_code = run_docker_command_popen(docker_command_open_shell)
-                
-                if exit_code == 0 or exit_code == 1:            
-                    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container started.{RESET}")
-                else:
-                    print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}error starting container, stopping container...{RESET}")
-                    docker_command_stop_container = f"docker container stop {selected_container_tag}"
-                    _, _, _ = run_docker_command(docker_command_stop_container)
-                
-            else:                
-                print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container already running.{RESET}\n")
-                exit(0)
+def command_warm(args):
+    """Run the mlc warm command.
 
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    try:
+        budget = get_warm_budget(args.budget)
+    except ValueError as e:
+        print(f"\n{ERROR}{e}{RESET}\n")
+        exit(1)
+    available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
+
+    if args.container_name in available_user_containers:
+        selected_container_name = args.container_name
+        selected_container_position = available_user_containers.index(args.container_name) + 1
+    elif args.script:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
+        else:
+            print(f"\n{ERROR}Container name is missing.{RESET}\n")
+        exit(1)
+    else:
+        if args.container_name:
+            print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
+        else:
+            print_info_header(args.command)
+        print(f"\n{INFO}Available containers of the current user:{RESET}")
+        selected_container_name, selected_container_position = select_container_to_be_ed(available_user_containers)
+    container = get_container_inventory().get(available_user_container_tags[selected_container_position-1])
+
+    paths = resolve_warm_files(container.labels, args.patterns)
+    if not paths:
+        print(f"\n{INPUT}[{selected_container_name}]{RESET} {ERROR}no files match {' '.join(args.patterns) or '/models and /data'}.{RESET}\n")
+        exit(1)
 
-        if args.command == 'stats':
-            
-            # ToDo: add the stream mode
-            show_container_stats()            
-            
-        if args.command == 'stop':
-
-            # List existing containers of the current user
-            available_user_containers, available_user_container_tags = existing_user_containers(user_name, args.command)
-            containers_state = [True if container_tag == check_container_running(container_tag) else False for container_tag in available_user_container_tags]
-                        
-            no_running_containers, no_running_container_tags, no_running_container_number, running_containers, running_container_tags, running_container_number = filter_running_containers(
-                containers_state, 
-                available_user_containers, 
-                available_user_container_tags
-            )
-                       
-            ask_are_you_sure = True     
-                   
-            if args.container_name:                
-                if running_container_number == 0:                    
-                    print(                        
-                        f"{ERROR}\nAll containers are stopped. You cannot stop no running containers.{RESET}"
-                    )
-                    show_container_info() 
-                    exit(0)
+    interactive = not args.script and sys.stdout.isatty()
+    start_time = time.monotonic()
 
-                if args.container_name in no_running_containers: 
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists but is not running. Not possible to be stopped.{RESET}\n")
-                        exit(1)
-                    else:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}exists but is not running. Not possible to be stopped.{RESET}")
-                        print(f"\n{INFO}The following running containers of the current user can be stopped:{RESET} ")
-                        selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
-                elif args.container_name in running_containers:                    
-                    selected_container_name = args.container_name
-                    selected_container_position = running_containers.index(args.container_name) + 1
-                    print(f'\n{INPUT}[{args.container_name}]{RESET} {NEUTRAL}is running and will be stopped.{RESET}')                    
-                    if not args.script:                        
-                        if not args.force:                            
-                            print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
-                        else:                            
-                            ask_are_you_sure = False                    
-                    else:
-                        ask_are_you_sure = False                
-                else:                    
-                    if args.script:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}\n")
-                        exit(1)                        
-                    else:                        
-                        print(f"\n{INPUT}[{args.container_name}]{RESET} {ERROR}does not exist.{RESET}")
-                                       
-                        while True:
-                            print(f"\n{INFO}The following running containers of the current user can be stopped:{RESET} ")
-                            selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
-                            break                     
-            else:    
-                # Check that at least 1 container is running
-                if not running_container_tags:                
-                    print(f"\n{ERROR}All containers are stopped. Therefore there are no one to be stopped.{RESET}")
-                    show_container_info()
-                    exit(0)
-                
-                if args.script:                
-                    print(f"\n{ERROR}Container name is missing.{RESET}")
-                    print_info_header(args.command)
-                    exit(1)                
-                else:                
-                    print_info_header(args.command)
-                    print(f"\n{INFO}Running containers of the current user:{RESET}")
-                    selected_container_name, selected_container_position = select_container_to_be_ed(running_containers) 
+    def show_progress(warmed_files, warmed_size):
+        if interactive:
+            rate = warmed_size / max(time.monotonic() - start_time, 1e-3)
+            print(f"\r{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}warmed {warmed_files} files, "
+                  f"{format_size(warmed_size)} ({format_size(rate)}/s){RESET}\033[K", end="", flush=True)
 
-            # Obtain container_tag from the selected container name
-            selected_container_tag = running_container_tags[selected_container_position-1]   
-            
-            if ask_are_you_sure:                 
-                are_you_sure(selected_container_name, args.command, args.script)
+    print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}reading {len(paths)} files into the page cache with {args.jobs} readers, budget {format_size(budget)}...{RESET}")
+    result = warm_page_cache(paths, budget, max(1, args.jobs), show_progress)
+    if interactive:
+        print("")
+    print_warm_result(selected_container_name, result)
+    print("")
 
-            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}stopping container ...{RESET}")
-            
-            # Attempt to stop the container and store the result.
-            docker_command_stop = f"docker container stop {selected_container_tag}"
-            _, _, _ = run_docker_command(docker_command_stop)
-            
-            # Print a message indicating the container has been stopped.
-            print(f"\n{INPUT}[{selected_container_name}]{RESET} {NEUTRAL}container stopped.{RESET}\n")
 
+def command_watchdog(args):
+    """Run the mlc watchdog command.
 
-        if args.command == 'update-sys':
+    Args:
+        args (argparse.Namespace): parsed command line arguments.
+    """
+    if args.idle < 0 or args.interval <= 0:
+        print(f"\n{ERROR}--idle and --interval have to be positive.{RESET}\n")
+        exit(1)
+    run_watchdog(args.idle, args.action, args.cpu_threshold, args.all_users, args.dry_run, args.watch, args.interval, args.log)
+
+
+command_handlers = {
+    'create': command_create,
+    'data': command_data,
+    'export': command_export,
+    'gc': command_gc,
+    'import': command_import,
+    'list': command_list,
+    'models': command_models,
+    'open': command_open,
+    'prefetch': command_prefetch,
+    'prune-layers': command_prune_layers,
+    'remove': command_remove,
+    'start': command_start,
+    'stats': command_stats,
+    'stop': command_stop,
+    'update-sys': command_update_sys,
+    'warm': command_warm,
+    'watchdog': command_watchdog,
+}
 
-            # Get the directory of the current script
-            mlc_path = os.path.dirname(os.path.abspath(__file__))
-            
-            # Change the current directory to MLC_PATH
-            os.chdir(mlc_path)
-            
-            # Check if the .git directory exists
-            if not os.path.isdir(f"{mlc_path}/.git"):
-                print(f"{ERROR}Failed: ML container system not installed as updatable git repo.\nAdd the AIME MLC's location to ~/.bashrc or change to the location of the AIME MLC. {RESET}")
-                sys.exit(-1)  
-                        
-            # Determine if sudo is required for git operations
-            sudo = "sudo"
-            
-            if os.access(f"{mlc_path}/.git", os.W_OK):
-                sudo = ""  # No sudo if the git directory is writable
-                
-            # Fix for "unsafe repository" warning in Git adding the mlc-directory to the list of safe directories
-            docker_command_git_config = ["git", "config", "--global", "--add", "safe.directory", mlc_path]
-            subprocess.run(docker_command_git_config)
-
-            # Get the current branch name
-            docker_command_current_branch = ["git", "symbolic-ref", "HEAD"]
-            branch = subprocess.check_output(docker_command_current_branch, universal_newlines=True).strip().split("/")[-1]
-            print(f"branch update-sys: {branch}")
-            
-            if not args.force:
-                        
-                print(f"\n{HINT}Hint: Use the flag -f or --force to avoid be asked.{RESET}")
-                
-                print(f"\n{NEUTRAL}This will update the ML container system to the latest version.{RESET}")
-
-                # If sudo is required, ask if the user wants to check for updates
-                if sudo == "":
-                    reply = input(f"\n{REQUEST}Check for available updates (Y/n)?: {RESET}").strip().lower()
-                    if reply not in ["y", "yes", "Y", ""]:
-                        exit(0)  
-
-                # Fetch the latest updates from remote repo
-                docker_command_git_remote = ["git", "remote", "update"]
-                sudo and docker_command_git_remote.insert(0, sudo)
-                subprocess.run(docker_command_git_remote)
-                
-                # Get the update log for commits that are new in the remote repo
-                docker_command_git_log = ["git", "log", f"HEAD..origin/{branch}", "--pretty=format:%s"]
-                sudo and docker_command_git_log.insert(0, sudo)
-                update_log = subprocess.check_output(docker_command_git_log, text=True).strip()
-                
-                if update_log == "":
-                    print(f"\n{NEUTRAL}ML container system is up to date.\n{RESET}")
-                    exit(0)  
-                
-                # Print the update log and prompt the user to confirm update
-                print(f"\n{INFO}Update(s) available.\n\nChange Log:{RESET}\n{update_log}")
-                reply = input(f"\n{REQUEST}Update ML container system (Y/n)?: {RESET}").strip().lower()
-                if reply in ["y", "yes", "Y", ""]:
-                    args.update_directly = True  
-                else:
-                    exit(0)  
-                
-           # If confirmed, proceed with the update
-            try:
-                print(f"\n{NEUTRAL}Updating ML container system...{RESET}\n")
-                
-                # Pull the latest changes from the remote repo
-                docker_command_git_pull = ["git", "pull", "origin", branch]
-                sudo and docker_command_git_pull.insert(0, sudo)          
-                subprocess.run(docker_command_git_pull)
-                exit(0)
-            except Exception as e:
-                print(f"\n{ERROR}Error during update: {e}")
-                exit(-1)  
+
+###############################################################################################################################################################################################
+def main():
+    try: 
+        # Tracing starts before the first docker call, --trace is accepted at any position of the command line
+        if trace_file or "--trace" in sys.argv[1:]:
+            if "--trace" in sys.argv[1:]:
+                sys.argv.remove("--trace")
+            enable_tracing()
+
+        # Arguments parsing
+        args = get_flags()
+           
+        if not args.command:
+            print(f"\nUse {INPUT}mlc -h{RESET} or {INPUT}mlc --help{RESET} to get more informations about the AIME MLC tool.\n")
+        else:
+            command_handlers[args.command](args)
 
     except KeyboardInterrupt:
         print(f"\n{ERROR}\nRunning process exited by the user.{RESET}\n")
@@ -0,0 +1,46 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""Fixtures of the MLC tests: mlc loaded with a clean environment, the stub docker daemon and CLI of the benchmarks."""
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import mlc as mlc_module
+
+
+@pytest.fixture
+def mlc(monkeypatch, tmp_path):
+    """mlc reloaded without the MLC_* settings of the caller and with its own cache directory, so tests do not share state."""
+    for name in list(os.environ):
+        if name.startswith("MLC_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return importlib.reload(mlc_module)
+
+
+@pytest.fixture
+def run_mlc(mlc, monkeypatch):
+    """Run mlc.main() in-process with the given arguments and return its standard output, the exit code is kept in run_mlc.exit_code."""
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["mlc.py", *argv])
+        output = io.StringIO()
+        run.exit_code = 0
+        with contextlib.redirect_stdout(output):
+            try:
+                mlc.main()
+            except SystemExit as e:
+                run.exit_code = e.code or 0
+        return output.getvalue()
+    return run
@@ -0,0 +1,91 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""The cgroup stats backend of mlc stats reads a fake cgroup v2 tree set with MLC_CGROUP_ROOT."""
+
+import importlib
+
+import pytest
+
+CONTAINER_ID = "ab" * 32
+
+
+def write_cgroup(cgroup_dir, usage_usec=5000000, memory_max="8589934592"):
+    cgroup_dir.mkdir(parents=True)
+    files = {
+        "cpu.stat": f"usage_usec {usage_usec}\nuser_usec 4000000\nsystem_usec 1000000\n",
+        "memory.current": "2147483648\n",
+        "memory.stat": "anon 1073741824\nfile 1073741824\ninactive_file 536870912\n",
+        "memory.max": f"{memory_max}\n",
+        "pids.current": "12\n",
+        "io.stat": "8:0 rbytes=1000000 wbytes=2000000 rios=10 wios=20\n259:0 rbytes=500000 wbytes=0 rios=5 wios=0\n",
+    }
+    for name, content in files.items():
+        (cgroup_dir / name).write_text(content)
+
+
+@pytest.fixture
+def cgroup_root(mlc, monkeypatch, tmp_path):
+    root = tmp_path / "cgroup"
+    root.mkdir()
+    (root / "cgroup.controllers").write_text("cpu io memory pids\n")
+    monkeypatch.setenv("MLC_CGROUP_ROOT", str(root))
+    importlib.reload(mlc)
+    return root
+
+
+@pytest.mark.parametrize("relative_dir", [
+    f"system.slice/docker-{CONTAINER_ID}.scope",
+    f"docker/{CONTAINER_ID}",
+    f"user.slice/user-1000.slice/user@1000.service/app.slice/docker.service/docker-{CONTAINER_ID}.scope",
+])
+def test_find_container_cgroup(mlc, cgroup_root, relative_dir):
+    write_cgroup(cgroup_root / relative_dir)
+    assert mlc.cgroup_v2_available()
+    assert mlc.find_container_cgroup(CONTAINER_ID) == str(cgroup_root / relative_dir)
+    assert mlc.find_container_cgroup("cd" * 32) is None
+
+
+def test_read_container_cgroup_sample(mlc, cgroup_root):
+    write_cgroup(cgroup_root / "docker" / CONTAINER_ID)
+    sample = mlc.read_container_cgroup_sample(mlc.find_container_cgroup(CONTAINER_ID))
+    assert sample == {
+        "cpu_usec": 5000000,
+        # memory.current without the inactive page cache
+        "memory": 2147483648 - 536870912,
+        "memory_limit": 8589934592,
+        "pids": 12,
+        "io_read": 1500000,
+        "io_write": 2000000,
+    }
+
+
+def test_unlimited_memory(mlc, cgroup_root):
+    write_cgroup(cgroup_root / "docker" / CONTAINER_ID, memory_max="max")
+    assert mlc.read_container_cgroup_sample(str(cgroup_root / "docker" / CONTAINER_ID))["memory_limit"] is None
+
+
+def test_missing_cgroup_files(mlc, cgroup_root):
+    (cgroup_root / "docker" / CONTAINER_ID).mkdir(parents=True)
+    sample = mlc.read_container_cgroup_sample(str(cgroup_root / "docker" / CONTAINER_ID))
+    assert sample == {"cpu_usec": 0, "memory": 0, "memory_limit": None, "pids": 0, "io_read": 0, "io_write": 0}
+
+
+def test_cgroup_stats_in_docker_format(mlc, cgroup_root):
+    write_cgroup(cgroup_root / "docker" / CONTAINER_ID)
+    cgroup_dir = mlc.find_container_cgroup(CONTAINER_ID)
+    previous_sample = mlc.read_container_cgroup_sample(cgroup_dir)
+    (cgroup_root / "docker" / CONTAINER_ID / "cpu.stat").write_text("usage_usec 6500000\n")
+    sample = mlc.read_container_cgroup_sample(cgroup_dir)
+    container = mlc.ContainerInfo(CONTAINER_ID, "bench0", "bench0._.1000", "running", "Up 2 hours", "aimehub/pytorch", 0, {})
+
+    stats = mlc.cgroup_stats_to_docker_format(container, sample, previous_sample, 2.0)
+    assert stats["Name"] == "bench0._.1000"
+    assert stats["CPUPerc"] == "75.00%"
+    assert stats["MemUsage"] == "1.5GiB / 8GiB"
+    assert stats["MemPerc"] == "18.75%"
+    assert stats["PIDs"] == "12"
+    assert mlc.cgroup_stats_to_docker_format(container, sample, None, 2.0)["CPUPerc"] == "--"
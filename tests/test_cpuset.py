@@ -0,0 +1,117 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""--cpuset auto selects the cores of the NUMA nodes of the GPUs of a container, read from a fake sysfs tree."""
+
+import importlib
+
+import pytest
+
+# Two NVIDIA and two AMD GPUs on two NUMA nodes, a NVIDIA audio function and a host bridge which are no GPUs
+PCI_DEVICES = {
+    "0000:00:00.0": ("0x8086", "0x060000", "0"),
+    "0000:01:00.0": ("0x10de", "0x030000", "0"),
+    "0000:01:00.1": ("0x10de", "0x040300", "0"),
+    "0000:41:00.0": ("0x10de", "0x030200", "1"),
+    "0000:81:00.0": ("0x1002", "0x038000", "0"),
+    "0000:c1:00.0": ("0x1002", "0x038000", "1"),
+}
+NODE_CPUS = {0: "0-7,16-23", 1: "8-15,24-31"}
+
+
+@pytest.fixture
+def sysfs(mlc, monkeypatch, tmp_path):
+    root = tmp_path / "sys"
+    for address, (vendor, device_class, numa_node) in PCI_DEVICES.items():
+        device_dir = root / "bus" / "pci" / "devices" / address
+        device_dir.mkdir(parents=True)
+        (device_dir / "vendor").write_text(vendor + "\n")
+        (device_dir / "class").write_text(device_class + "\n")
+        (device_dir / "numa_node").write_text(numa_node + "\n")
+    for numa_node, cpu_list in NODE_CPUS.items():
+        node_dir = root / "devices" / "system" / "node" / f"node{numa_node}"
+        node_dir.mkdir(parents=True)
+        (node_dir / "cpulist").write_text(cpu_list + "\n")
+    monkeypatch.setenv("MLC_SYSFS_ROOT", str(root))
+    importlib.reload(mlc)
+    return root
+
+
+def test_cpu_list_round_trip(mlc):
+    assert mlc.parse_cpu_list("8-11,0-3,5") == [0, 1, 2, 3, 5, 8, 9, 10, 11]
+    assert mlc.format_cpu_list([0, 1, 2, 3, 5, 8, 9, 10, 11]) == "0-3,5,8-11"
+    for cpu_list in ("", "3-1", "a", "1,,x"):
+        with pytest.raises(ValueError):
+            mlc.parse_cpu_list(cpu_list)
+
+
+def test_list_gpu_numa_nodes(mlc, sysfs):
+    assert mlc.list_gpu_numa_nodes("CUDA_ADA") == [("0000:01:00.0", 0), ("0000:41:00.0", 1)]
+    assert mlc.list_gpu_numa_nodes("ROCM6") == [("0000:81:00.0", 0), ("0000:c1:00.0", 1)]
+    assert mlc.list_gpu_numa_nodes("CPU") == []
+
+
+@pytest.mark.parametrize("architecture, num_gpus, cpuset", [
+    ("CUDA_ADA", "1", ("0-7,16-23", "0")),
+    ("CUDA_ADA", "device=1", ("8-15,24-31", "1")),
+    ("CUDA_ADA", '"device=0,1"', ("0-31", "0-1")),
+    ("CUDA_ADA", "all", ("0-31", "0-1")),
+    # Without --allocate-gpus a ROCm container sees all GPUs, whatever the number of GPUs
+    ("ROCM6", "1", ("0-31", "0-1")),
+    ("ROCM6", "device=1", ("8-15,24-31", "1")),
+    ("ROCM6", "device=0", ("0-7,16-23", "0")),
+])
+def test_numa_local_cpuset(mlc, sysfs, architecture, num_gpus, cpuset):
+    assert mlc.numa_local_cpuset(architecture, num_gpus) == cpuset
+
+
+def test_resolve_cpuset_auto(mlc, sysfs):
+    resources = mlc.resolve_container_resources(cpus="8", memory="64G", cpuset="auto", architecture="ROCM6", num_gpus="device=1")
+    assert resources == {"cpus": "8", "memory": "64g", "cpuset_cpus": "8-15,24-31", "cpuset_mems": "1"}
+    assert mlc.resolve_container_resources(cpuset="3,0-2") == {"cpuset_cpus": "0-3"}
+
+
+def test_numa_local_cpuset_without_numa_information(mlc, sysfs):
+    (sysfs / "bus" / "pci" / "devices" / "0000:41:00.0" / "numa_node").write_text("-1\n")
+    assert mlc.numa_local_cpuset("CUDA_ADA", "device=0") == ("0-7,16-23", "0")
+    with pytest.raises(ValueError):
+        mlc.numa_local_cpuset("CUDA_ADA", "all")
+    with pytest.raises(ValueError):
+        mlc.numa_local_cpuset("CUDA_AMPERE", "all", root=str(sysfs / "missing"))
+
+
+def build_create_command(mlc, architecture="CUDA_ADA", num_gpus="all", resources=None):
+    return mlc.build_docker_create_command(
+        "user", 1000, 1000, architecture, "aimehub/pytorch", "Pytorch", "2.6.0", "4", "bench0", "aime.mlc", "bench0._.1000",
+        "/workspace", "/home/user/workspace", "-", "-", "", num_gpus, [], "bench0:image", resources=resources
+    )
+
+
+def option_values(command, flag):
+    return [value for option, value in zip(command, command[1:]) if option == flag]
+
+
+def test_shm_size_needs_private_ipc(mlc):
+    with pytest.raises(ValueError):
+        mlc.resolve_container_resources(shm_size="16g")
+    with pytest.raises(ValueError):
+        mlc.resolve_container_resources(shm_size="16g", ipc="host")
+    with pytest.raises(ValueError):
+        mlc.resolve_container_resources(ipc="none")
+    assert mlc.resolve_container_resources(ipc="host") == {}
+    assert mlc.resolve_container_resources(shm_size="16G", ipc="private") == {"shm_size": "16g", "ipc": "private"}
+
+
+def test_create_command_keeps_host_ipc(mlc):
+    command = build_create_command(mlc, resources=mlc.resolve_container_resources(cpus="8", memory="64g"))
+    assert option_values(command, "--ipc") == ["host"]
+    assert option_values(command, "--cpus") == ["8"] and "aime.mlc.CPUS=8" in option_values(command, "--label")
+
+    command = build_create_command(mlc, resources=mlc.resolve_container_resources(shm_size="16g", ipc="private"))
+    assert option_values(command, "--ipc") == ["private"]
+    assert option_values(command, "--shm-size") == ["16g"]
+    assert {"aime.mlc.IPC=private", "aime.mlc.SHM_SIZE=16g"} <= set(option_values(command, "--label"))
+    assert mlc.format_container_resources({"aime.mlc.IPC": "private", "aime.mlc.SHM_SIZE": "16g"}) == "ipc=private shm=16g"
@@ -0,0 +1,136 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""The data cache of mlc create --data-cache: the view of the data directory, copies into the cache, warming and eviction."""
+
+import os
+import shutil
+import time
+
+import pytest
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Data directory with three files of 1000 bytes in nested directories, aged so that the view sync trusts their mtimes."""
+    data_dir = tmp_path / "data"
+    for relative_path in ["train.bin", "images/a.jpg", "images/labels/a.txt"]:
+        (data_dir / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (data_dir / relative_path).write_bytes(relative_path.encode().ljust(1000, b"."))
+    age_dirs(data_dir)
+    return data_dir
+
+
+@pytest.fixture
+def cache_dir(mlc, data_dir, tmp_path):
+    (tmp_path / "cache").mkdir()
+    return mlc.prepare_data_cache(str(tmp_path / "cache"), str(data_dir), 2500)
+
+
+def age_dirs(data_dir, mtime=1700000000):
+    for directory, _, _ in os.walk(data_dir):
+        os.utime(directory, (mtime, mtime))
+
+
+def view(cache_dir):
+    """The entries of the view, 'link' for symlinks to the data directory and 'copy' for cached files."""
+    view_dir = os.path.join(cache_dir, "view")
+    entries = {}
+    for directory, _, file_names in os.walk(view_dir):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            entries[os.path.relpath(path, view_dir)] = "link" if os.path.islink(path) else "copy"
+    return entries
+
+
+def cache(mlc, cache_dir, data_dir, relative_path):
+    copied = mlc.copy_into_data_cache(cache_dir, str(data_dir), relative_path)
+    connection = mlc.open_data_cache_index(cache_dir)
+    mlc.record_data_cache_files(connection, [(relative_path, *copied)])
+    return connection
+
+
+def test_view(mlc, cache_dir):
+    assert view(cache_dir) == {"train.bin": "link", "images/a.jpg": "link", "images/labels/a.txt": "link"}
+    assert os.readlink(os.path.join(cache_dir, "view", "images/a.jpg")) == os.path.join(mlc.data_cache_origin, "images/a.jpg")
+
+
+def test_copy(mlc, cache_dir, data_dir):
+    assert mlc.copy_into_data_cache(cache_dir, str(data_dir), "images/a.jpg") == (1000, os.stat(data_dir / "images/a.jpg").st_mtime)
+    assert view(cache_dir)["images/a.jpg"] == "copy"
+    assert open(os.path.join(cache_dir, "view", "images/a.jpg"), "rb").read() == (data_dir / "images/a.jpg").read_bytes()
+    # A cached file is not copied again
+    assert mlc.copy_into_data_cache(cache_dir, str(data_dir), "images/a.jpg") is None
+
+
+def test_copy_with_tmp_file(mlc, cache_dir, data_dir):
+    tmp_file = os.path.join(cache_dir, "view", "train.bin" + mlc.data_cache_tmp_suffix)
+    open(tmp_file, "w").close()
+    # Another copier is at work
+    assert mlc.copy_into_data_cache(cache_dir, str(data_dir), "train.bin") is None
+    assert view(cache_dir)["train.bin"] == "link"
+    # The copier was interrupted long ago
+    old = time.time() - mlc.data_cache_stale_tmp_seconds - 10
+    os.utime(tmp_file, (old, old))
+    assert mlc.copy_into_data_cache(cache_dir, str(data_dir), "train.bin") is not None
+    assert view(cache_dir)["train.bin"] == "copy"
+    assert not os.path.exists(tmp_file)
+
+
+def test_sync_lists_only_changed_dirs(mlc, cache_dir, data_dir, monkeypatch):
+    connection = mlc.open_data_cache_index(cache_dir)
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or scandir(path))
+    assert sorted(mlc.sync_data_cache_view(cache_dir, str(data_dir), connection)) == ["", "images", "images/labels"]
+    assert listed == []
+
+    (data_dir / "images/b.jpg").write_bytes(b"b")
+    os.utime(data_dir / "images", (1700000100, 1700000100))
+    mlc.sync_data_cache_view(cache_dir, str(data_dir), connection)
+    # The data directory and the view of the changed directory
+    assert listed == [str(data_dir / "images"), os.path.join(cache_dir, "view", "images")]
+    assert view(cache_dir)["images/b.jpg"] == "link"
+
+
+def test_sync_drops_changed_and_removed_files(mlc, cache_dir, data_dir):
+    connection = cache(mlc, cache_dir, data_dir, "train.bin")
+    cache(mlc, cache_dir, data_dir, "images/labels/a.txt").close()
+    (data_dir / "train.bin").write_bytes(b"changed")
+    shutil.rmtree(data_dir / "images/labels")
+    age_dirs(data_dir, 1700000100)
+    mlc.sync_data_cache_view(cache_dir, str(data_dir), connection)
+    assert view(cache_dir) == {"train.bin": "link", "images/a.jpg": "link"}
+    assert connection.execute("SELECT path FROM files").fetchall() == []
+
+
+def test_sync_removes_stale_tmp_files(mlc, cache_dir, data_dir):
+    stale_file = os.path.join(cache_dir, "view", "images", "a.jpg" + mlc.data_cache_tmp_suffix)
+    fresh_file = os.path.join(cache_dir, "view", "images", "b.jpg" + mlc.data_cache_tmp_suffix)
+    open(stale_file, "w").close()
+    open(fresh_file, "w").close()
+    old = time.time() - mlc.data_cache_stale_tmp_seconds - 10
+    os.utime(stale_file, (old, old))
+    (data_dir / "images/c.jpg").write_bytes(b"c")
+    age_dirs(data_dir, 1700000100)
+    mlc.sync_data_cache_view(cache_dir, str(data_dir), mlc.open_data_cache_index(cache_dir))
+    assert not os.path.exists(stale_file) and os.path.exists(fresh_file)
+
+
+def test_warm_and_evict(mlc, cache_dir, data_dir):
+    result = mlc.warm_data_cache(cache_dir, ["train.bin", "missing.bin", "images/a.jpg", "images/labels/a.txt"], jobs=2)
+    # The third file does not fit into the 2500 bytes of the cache
+    assert (result["copied"], result["cached"], result["skipped"], result["bytes"]) == (2, 0, 2, 2000)
+    assert view(cache_dir) == {"train.bin": "copy", "images/a.jpg": "copy", "images/labels/a.txt": "link"}
+    assert mlc.warm_data_cache(cache_dir, ["train.bin"])["cached"] == 1
+
+    connection = mlc.open_data_cache_index(cache_dir)
+    connection.execute("UPDATE files SET access = 0 WHERE path = 'images/a.jpg'")
+    connection.execute("UPDATE meta SET value = 1500 WHERE key = 'size_limit'")
+    assert mlc.evict_data_cache(cache_dir, connection) == 1
+    assert view(cache_dir)["images/a.jpg"] == "link" and view(cache_dir)["train.bin"] == "copy"
+    stats = mlc.read_data_cache_stats(cache_dir)
+    assert (stats["files"], stats["used"], stats["warmed"], stats["evictions"]) == (1, 1000, 2, 1)
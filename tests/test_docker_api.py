@@ -0,0 +1,195 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""DockerAPIClient against a fake daemon socket: kept-alive, chunked and streamed replies, error statuses and the CLI fallback."""
+
+import json
+import socketserver
+import threading
+
+import pytest
+
+from docker_stub import FakeDockerDaemon, make_containers
+
+
+class _ScriptedHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        daemon = self.server.daemon
+        while True:
+            request_line = self.rfile.readline().decode()
+            if not request_line:
+                return
+            headers = {}
+            for line in iter(self.rfile.readline, b"\r\n"):
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = self.rfile.read(int(headers.get("content-length", 0)))
+            method, url, _ = request_line.split(" ", 2)
+            daemon.requests.append((method, url, body))
+            reply = daemon.replies.get(url.partition("?")[0], b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            if reply is None:
+                # Close the connection without a reply, like a daemon dropping an idle connection
+                return
+            self.wfile.write(reply)
+            self.wfile.flush()
+            if b"Connection: close" in reply:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ScriptedDaemon:
+    """Unix socket server answering each path with a fixed raw HTTP reply."""
+
+    def __init__(self, socket_path, replies):
+        self.replies = replies
+        self.requests = []
+        self.server = _UnixServer(socket_path, _ScriptedHandler)
+        self.server.daemon = self
+        self.docker_host = f"unix://{socket_path}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def http_reply(status, body=b"", headers=()):
+    head = [f"HTTP/1.1 {status}", f"Content-Length: {len(body)}", *headers]
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+def chunked_reply(status, chunks, headers=()):
+    head = [f"HTTP/1.1 {status}", "Transfer-Encoding: chunked", "Content-Type: application/json", *headers]
+    body = b"".join(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n" for chunk in chunks) + b"0\r\n\r\n"
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+@pytest.fixture
+def scripted_daemon(tmp_path):
+    def start(replies):
+        return ScriptedDaemon(str(tmp_path / "docker.sock"), replies)
+    return start
+
+
+def test_docker_host_schemes(mlc, monkeypatch):
+    monkeypatch.delenv("DOCKER_TLS_VERIFY", raising=False)
+    assert mlc.DockerAPIClient("unix:///run/docker.sock").socket_path == "/run/docker.sock"
+    assert mlc.DockerAPIClient("tcp://10.0.0.1:2376").address == ("10.0.0.1", 2376)
+    assert mlc.DockerAPIClient("tcp://10.0.0.1").address == ("10.0.0.1", 2375)
+    with pytest.raises(mlc.DockerAPIError):
+        mlc.DockerAPIClient("ssh://user@host")
+    monkeypatch.setenv("DOCKER_TLS_VERIFY", "1")
+    with pytest.raises(mlc.DockerAPIError):
+        mlc.DockerAPIClient("tcp://10.0.0.1:2376")
+
+
+def test_build_url(mlc):
+    url = mlc.DockerAPIClient.build_url("/containers/json", {"all": True, "size": None, "filters": {"label": ["aime.mlc"]}})
+    assert url == "/containers/json?all=1&filters=%7B%22label%22%3A+%5B%22aime.mlc%22%5D%7D"
+    assert mlc.DockerAPIClient.build_url("/info", {"size": None}) == "/info"
+
+
+def test_kept_alive_connection_and_json_body(mlc, scripted_daemon):
+    replies = {
+        "/info": http_reply("200 OK", b'{"DockerRootDir": "/var/lib/docker"}'),
+        "/containers/create": http_reply("201 Created", b'{"Id": "abc"}'),
+    }
+    with scripted_daemon(replies) as daemon:
+        client = mlc.DockerAPIClient(daemon.docker_host)
+        assert client.request("GET", "/info") == (200, {"DockerRootDir": "/var/lib/docker"})
+        connection = client.connection
+        assert client.request("POST", "/containers/create", {"name": "bench0"}, {"Image": "ubuntu"}) == (201, {"Id": "abc"})
+        assert client.connection is connection
+        client.close()
+    assert daemon.requests[1] == ("POST", "/containers/create?name=bench0", json.dumps({"Image": "ubuntu"}).encode())
+
+
+def test_chunked_reply(mlc, scripted_daemon):
+    containers = json.dumps([{"Id": str(index)} for index in range(50)]).encode()
+    replies = {"/containers/json": chunked_reply("200 OK", [containers[index:index + 100] for index in range(0, len(containers), 100)])}
+    with scripted_daemon(replies) as daemon:
+        client = mlc.DockerAPIClient(daemon.docker_host)
+        status, reply = client.request("GET", "/containers/json")
+        assert status == 200 and [container["Id"] for container in reply] == [str(index) for index in range(50)]
+
+        # The streamed array provides the elements while the chunks are read
+        response = client.open_stream("GET", "/containers/json")
+        assert [container["Id"] for container in mlc.iter_json_array(response, chunk_size=16)] == [str(index) for index in range(50)]
+
+
+def test_incomplete_streamed_array(mlc, scripted_daemon):
+    with scripted_daemon({"/containers/json": chunked_reply("200 OK", [b'[{"Id": "0"}, {"Id": '])}) as daemon:
+        elements = mlc.iter_json_array(mlc.DockerAPIClient(daemon.docker_host).open_stream("GET", "/containers/json"))
+        assert next(elements) == {"Id": "0"}
+        with pytest.raises(ValueError):
+            next(elements)
+
+
+def test_error_statuses(mlc, scripted_daemon):
+    replies = {
+        "/containers/missing/json": http_reply("404 Not Found", b'{"message": "No such container: missing"}'),
+        "/containers/abc/start": http_reply("304 Not Modified"),
+        "/containers/abc/stop": http_reply("500 Internal Server Error", b"driver failed\n", ["Connection: close"]),
+    }
+    with scripted_daemon(replies) as daemon:
+        client = mlc.DockerAPIClient(daemon.docker_host)
+        assert client.request("GET", "/containers/missing/json") == (404, {"message": "No such container: missing"})
+        assert client.request("POST", "/containers/abc/start") == (304, None)
+        # A reply which is no JSON is returned as text, the connection closed by the daemon is dropped
+        assert client.request("POST", "/containers/abc/stop") == (500, "driver failed")
+        assert client.connection is None
+
+
+def test_reconnect_once_after_dropped_connection(mlc, scripted_daemon):
+    with scripted_daemon({"/_ping": http_reply("200 OK", b"OK"), "/info": None}) as daemon:
+        client = mlc.DockerAPIClient(daemon.docker_host)
+        assert client.request("GET", "/_ping") == (200, "OK")
+        with pytest.raises(mlc.DockerAPIError):
+            client.request("GET", "/info")
+    # The dropped request is sent again on a new connection once
+    assert [url for _, url, _ in daemon.requests] == ["/_ping", "/info", "/info"]
+
+
+def test_unreachable_daemon_falls_back_to_cli(mlc, monkeypatch, tmp_path):
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{tmp_path / 'missing.sock'}")
+    with pytest.raises(mlc.DockerAPIError):
+        mlc.DockerAPIClient().request("GET", "/_ping")
+    assert mlc.get_docker_api_client() is None
+    assert mlc.docker_api_request("GET", "/containers/json") == (None, None)
+    assert mlc.docker_api_list_containers({"label": ["aime.mlc"]}) is None
+
+
+def test_disabled_api(mlc, monkeypatch):
+    with FakeDockerDaemon([]) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.docker_host)
+        monkeypatch.setenv("MLC_DOCKER_API", "0")
+        assert mlc.get_docker_api_client() is None
+        assert daemon.requests == []
+
+
+def test_list_and_event_stream_of_stub_daemon(mlc, monkeypatch):
+    containers = make_containers(3, mlc.user_name, mlc.user_id)
+    with FakeDockerDaemon(containers) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.docker_host)
+        running = mlc.docker_api_list_containers({"label": ["aime.mlc"]}, all_containers=False)
+        assert [mlc.docker_api_container_name(container) for container in running] == [f"bench0._.{mlc.user_id}", f"bench2._.{mlc.user_id}"]
+        assert len(list(mlc.docker_api_stream_containers({"label": ["aime.mlc"]}))) == 3
+
+        # The start is reported on the event stream opened before the request
+        assert mlc.start_container_and_wait(containers[1]["Id"], timeout=5) == (True, "")
+        assert mlc.start_container_and_wait(containers[1]["Id"], timeout=5) == (True, "")
+        status, reply = mlc.docker_api_request("POST", "/containers/missing/start")
+        assert status == 404 and "No such container" in reply["message"]
+    assert daemon.requests[0] == "GET /_ping"
+    assert daemon.requests.count("POST /containers/" + containers[1]["Id"] + "/start") == 2
+
@@ -0,0 +1,143 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""mlc export and mlc import against the stub docker daemon: the archive round-trip and the resume record of an interrupted import."""
+
+import gzip
+import hashlib
+import importlib
+import io
+import os
+import tarfile
+
+import pytest
+
+from docker_stub import FakeDockerDaemon, make_containers, write_stub_docker_cli
+
+
+@pytest.fixture
+def docker(mlc, monkeypatch, tmp_path):
+    """Stub daemon with two containers of the user for the API calls, the stub CLI for docker create."""
+    containers = make_containers(2, mlc.user_name, mlc.user_id)
+    stub_dir, _ = write_stub_docker_cli(containers)
+    with FakeDockerDaemon(containers) as daemon:
+        daemon.save_size = 256 * 1024
+        monkeypatch.setenv("DOCKER_HOST", daemon.docker_host)
+        monkeypatch.setenv("PATH", stub_dir + os.pathsep + os.environ["PATH"])
+        importlib.reload(mlc)
+        daemon.stub_dir = stub_dir
+        yield daemon
+
+
+@pytest.fixture
+def archive(mlc, docker, tmp_path):
+    """Archive of mlc export of the container bench0."""
+    archive_name = str(tmp_path / "bench0.tar.gz")
+    container = next(container for container in mlc.get_container_inventory() if container.name == "bench0")
+    mlc.export_container(container, archive_name, jobs=2)
+    return archive_name
+
+
+def fail_docker_create(monkeypatch, stub_dir, tmp_path):
+    """Put a docker in front of the stub CLI which fails docker create."""
+    failing_dir = tmp_path / "failing-docker"
+    failing_dir.mkdir()
+    (failing_dir / "docker").write_text(
+        "#!/bin/sh\n"
+        'if [ "$1" = "create" ]; then echo "Error response from daemon: no space left on device" >&2; exit 1; fi\n'
+        f'exec {os.path.join(stub_dir, "docker")} "$@"\n'
+    )
+    (failing_dir / "docker").chmod(0o755)
+    monkeypatch.setenv("PATH", str(failing_dir) + os.pathsep + os.environ["PATH"])
+
+
+def import_archive(mlc, archive_name, container_name="imported"):
+    metadata = mlc.read_export_metadata(archive_name)
+    return mlc.import_container(archive_name, metadata, container_name, f"{container_name}._.{mlc.user_id}", "/tmp", "-", "-")
+
+
+def test_compressed_archive_round_trip(mlc, tmp_path):
+    chunks = [os.urandom(1000) * (index + 1) for index in range(10)]
+    archive_file = io.BytesIO()
+    read_size, written_size, checksum = mlc.write_compressed_archive(iter(chunks), archive_file, jobs=3)
+    assert read_size == sum(len(chunk) for chunk in chunks)
+    assert written_size == len(archive_file.getvalue())
+    assert checksum == hashlib.sha256(archive_file.getvalue()).hexdigest()
+    # Every chunk is a gzip member of its own, gzip reads the concatenation
+    assert gzip.decompress(archive_file.getvalue()) == b"".join(chunks)
+
+    (tmp_path / "archive.gz").write_bytes(archive_file.getvalue())
+    read_checksum = hashlib.sha256()
+    data = b"".join(mlc.iter_decompressed_archive(str(tmp_path / "archive.gz"), read_checksum, chunk_size=777))
+    assert data == b"".join(chunks) and read_checksum.hexdigest() == checksum
+
+    (tmp_path / "archive.gz").write_bytes(archive_file.getvalue()[:-10])
+    with pytest.raises(mlc.ContainerArchiveError, match="truncated"):
+        b"".join(mlc.iter_decompressed_archive(str(tmp_path / "archive.gz"), hashlib.sha256()))
+
+
+def test_export(mlc, docker, archive):
+    metadata = mlc.read_export_metadata(archive)
+    assert metadata["name"] == "bench0" and metadata["image"].endswith(mlc.export_image_tag_suffix)
+    assert metadata["labels"]["aime.mlc.NAME"] == "bench0"
+    assert all(label.startswith("aime.mlc") for label in metadata["labels"])
+    with open(archive, "rb") as archive_file:
+        assert mlc.read_archive_checksum(archive) == hashlib.sha256(archive_file.read()).hexdigest()
+    with tarfile.open(archive) as tar:
+        assert "manifest.json" in tar.getnames()
+    # The committed image is removed again, no partial archive is left behind
+    assert metadata["image"] not in docker.images
+    assert not os.path.exists(f"{archive}.part")
+
+
+def test_import(mlc, docker, archive):
+    assert import_archive(mlc, archive) is False
+    assert not os.path.exists(mlc.get_import_state_file(archive))
+    assert any(reference.endswith(f":imported._.{mlc.user_id}") for reference in docker.images)
+
+
+def test_interrupted_import_is_resumed(mlc, docker, archive, monkeypatch, tmp_path):
+    fail_docker_create(monkeypatch, docker.stub_dir, tmp_path)
+    with pytest.raises(mlc.ContainerArchiveError, match="no space left on device"):
+        import_archive(mlc, archive)
+    # The loaded image is recorded, the next run skips loading the archive
+    state = mlc.read_import_state(archive)
+    assert state["image"] in docker.images
+
+    monkeypatch.setenv("PATH", docker.stub_dir + os.pathsep + os.environ["PATH"])
+    monkeypatch.setattr(mlc, "load_image_archive", lambda *args: pytest.fail("archive loaded again"))
+    assert import_archive(mlc, archive) is True
+    assert not os.path.exists(mlc.get_import_state_file(archive))
+
+
+def test_resume_record_of_a_replaced_archive(mlc, docker, archive):
+    mlc.write_import_state(archive, {"image": "bench:loaded"})
+    docker.images["bench:loaded"] = {"Id": "sha256:" + "1" * 64}
+    assert mlc.read_import_state(archive) == {"image": "bench:loaded"}
+    # A new archive under the same name has a record of its own
+    archive_stat = os.stat(archive)
+    os.utime(archive, ns=(archive_stat.st_atime_ns, archive_stat.st_mtime_ns + 1))
+    assert mlc.read_import_state(archive) == {}
+
+
+def test_resume_record_of_a_removed_image(mlc, docker, archive, monkeypatch):
+    # The image of the record was removed meanwhile, the archive is loaded again
+    mlc.write_import_state(archive, {"image": "bench:removed"})
+    loaded = []
+    load_image_archive = mlc.load_image_archive
+    monkeypatch.setattr(mlc, "load_image_archive", lambda *args: loaded.append(args) or load_image_archive(*args))
+    assert import_archive(mlc, archive) is False
+    assert len(loaded) == 1
+
+
+def test_damaged_archive(mlc, docker, archive):
+    with open(f"{archive}.sha256", "w") as checksum_file:
+        checksum_file.write(f"{'0' * 64}  {os.path.basename(archive)}\n")
+    with pytest.raises(mlc.ContainerArchiveError, match="checksum"):
+        import_archive(mlc, archive)
+    # Neither the loaded image nor a resume record is kept
+    assert not os.path.exists(mlc.get_import_state_file(archive))
+    assert not any(reference.endswith(mlc.export_image_tag_suffix) for reference in docker.images)
@@ -0,0 +1,185 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""mlc create --allocate-gpus with the topology fixture files (MLC_GPU_TOPOLOGY) and a temporary ledger (MLC_GPU_LEDGER)."""
+
+import importlib
+import json
+import os
+import time
+
+import pytest
+
+from test_cpuset import build_create_command, option_values
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+NVIDIA_TOPOLOGY = os.path.join(FIXTURES_DIR, "nvidia-smi-topo-4gpu.txt")
+ROCM_TOPOLOGY = os.path.join(FIXTURES_DIR, "rocm-smi-topotype-4gpu.txt")
+
+
+@pytest.fixture
+def allocator(mlc, monkeypatch, tmp_path):
+    """mlc with the NVLink topology fixture, an empty ledger and no containers."""
+    monkeypatch.setenv("MLC_GPU_TOPOLOGY", NVIDIA_TOPOLOGY)
+    monkeypatch.setenv("MLC_GPU_LEDGER", str(tmp_path / "ledger" / "gpu-ledger.json"))
+    importlib.reload(mlc)
+    monkeypatch.setattr(mlc, "get_container_inventory", lambda: [])
+    return mlc
+
+
+@pytest.fixture
+def inventory(allocator, monkeypatch):
+    """The containers seen by the allocator, to be filled by the test."""
+    containers = []
+    monkeypatch.setattr(allocator, "get_container_inventory", lambda: containers)
+    return containers
+
+
+def make_container(mlc, name, gpus, state="running", architecture="CUDA_ADA"):
+    labels = {"aime.mlc.GPUS": gpus, "aime.mlc.ARCH": architecture, "aime.mlc.USER": "alice"}
+    return mlc.ContainerInfo(name, name, f"{name}._.1000", state, "Up 2 hours", "aimehub/pytorch", 0, labels)
+
+
+def read_ledger(mlc):
+    with open(mlc.gpu_ledger_file) as ledger:
+        return json.load(ledger)
+
+
+def write_ledger(mlc, assignments):
+    os.makedirs(os.path.dirname(mlc.gpu_ledger_file), exist_ok=True)
+    with open(mlc.gpu_ledger_file, "w") as ledger:
+        json.dump(assignments, ledger)
+
+
+def test_parse_nvidia_topology(mlc):
+    with open(NVIDIA_TOPOLOGY) as topology_file:
+        gpu_count, links = mlc.parse_gpu_topology(topology_file.read())
+    assert gpu_count == 4
+    assert links[(0, 1)] == links[(1, 0)] == "NV4"
+    assert links[(0, 2)] == "SYS"
+    assert (0, 0) not in links and len(links) == 12
+
+
+def test_parse_rocm_topology(mlc):
+    with open(ROCM_TOPOLOGY) as topology_file:
+        gpu_count, links = mlc.parse_gpu_topology(topology_file.read())
+    assert gpu_count == 4
+    assert links[(2, 3)] == "XGMI"
+    assert links[(1, 2)] == "PCIE"
+
+
+def test_parse_missing_topology(mlc):
+    assert mlc.parse_gpu_topology(None) == (0, {})
+    assert mlc.parse_gpu_topology("NVIDIA-SMI has failed") == (0, {})
+
+
+def test_select_gpu_group_by_links(mlc):
+    with open(NVIDIA_TOPOLOGY) as topology_file:
+        _, links = mlc.parse_gpu_topology(topology_file.read())
+    assert mlc.select_gpu_group([0, 1, 2, 3], 2, links) == [0, 1]
+    # GPU0 is taken, the NVLink pair GPU2/GPU3 beats GPU1 with a PCIe link to either of them
+    assert mlc.select_gpu_group([1, 2, 3], 2, links) == [2, 3]
+    # Assignments to other containers count before the links
+    assert mlc.select_gpu_group([0, 1, 2, 3], 2, links, {0: 1}) == [2, 3]
+    assert mlc.select_gpu_group([0, 1, 2, 3], 1, links, {0: 1, 1: 1, 2: 2}) == [3]
+
+
+def test_select_gpu_group_ties(mlc):
+    # Without topology the lowest device indices win, equal loads and equal links as well
+    assert mlc.select_gpu_group([3, 1, 2, 0], 2, {}) == [0, 1]
+    links = {(gpu, other_gpu): "PIX" for gpu in range(4) for other_gpu in range(4) if gpu != other_gpu}
+    assert mlc.select_gpu_group([0, 1, 2, 3], 3, links, {0: 1, 1: 1, 2: 1, 3: 1}) == [0, 1, 2]
+    assert mlc.select_gpu_group([1, 2, 3], 2, {}, {1: 1}) == [2, 3]
+
+
+def test_allocate_gpus(allocator):
+    assert allocator.allocate_gpus("CUDA_ADA", "2", "train._.1000") == "device=0,1"
+    # The reservation of a container being created counts as load, the next container gets the other NVLink pair
+    assert allocator.allocate_gpus("CUDA_ADA", "2", "eval._.1000") == "device=2,3"
+    assert read_ledger(allocator)["train._.1000"]["devices"] == [0, 1]
+    assert read_ledger(allocator)["train._.1000"]["user"] == allocator.user_name
+
+
+def test_allocate_skips_held_gpus(allocator, inventory):
+    inventory.append(make_container(allocator, "busy", "device=0,1"))
+    inventory.append(make_container(allocator, "stopped", "device=2", state="exited"))
+    assert allocator.allocate_gpus("CUDA_ADA", "all", "train._.1000") == "device=2,3"
+    with pytest.raises(ValueError, match="2 of 4 GPUs are free"):
+        allocator.allocate_gpus("CUDA_ADA", "3", "eval._.1000")
+    with pytest.raises(ValueError):
+        allocator.allocate_gpus("CUDA_ADA", "0", "eval._.1000")
+
+
+def test_allocate_without_topology(allocator, monkeypatch, tmp_path):
+    # Without topology output the GPUs are counted in sysfs and the least assigned GPUs with the lowest indices are selected
+    monkeypatch.setattr(allocator, "gpu_topology_file", str(tmp_path / "missing.txt"))
+    monkeypatch.setattr(allocator, "list_gpu_numa_nodes", lambda architecture, root=None: [("0000:01:00.0", 0), ("0000:41:00.0", 1)])
+    assert allocator.allocate_gpus("CUDA_ADA", "1", "train._.1000") == "device=0"
+    assert allocator.allocate_gpus("CUDA_ADA", "1", "eval._.1000") == "device=1"
+    monkeypatch.setattr(allocator, "list_gpu_numa_nodes", lambda architecture, root=None: [])
+    with pytest.raises(ValueError, match="No CUDA_ADA GPUs"):
+        allocator.allocate_gpus("CUDA_ADA", "1", "test._.1000")
+
+
+def test_reservation_expiry(allocator, inventory):
+    now = time.time()
+    write_ledger(allocator, {
+        "expired._.1000": {"devices": [0, 1], "user": "alice", "time": now - allocator.gpu_reservation_seconds - 1},
+        "creating._.1000": {"devices": [2], "user": "bob", "time": now - 10},
+        "existing._.1000": {"devices": [3], "user": "carol", "time": now - 86400},
+    })
+    inventory.append(make_container(allocator, "existing", "device=3", state="exited"))
+    assert allocator.allocate_gpus("CUDA_ADA", "2", "train._.1000") == "device=0,1"
+    assert set(read_ledger(allocator)) == {"creating._.1000", "existing._.1000", "train._.1000"}
+
+
+def test_hold_gpu_reservation(allocator, monkeypatch):
+    monkeypatch.setattr(allocator, "gpu_reservation_refresh_seconds", 0.05)
+    allocator.allocate_gpus("CUDA_ADA", "1", "train._.1000")
+    reserved = read_ledger(allocator)["train._.1000"]["time"]
+    created = allocator.hold_gpu_reservation("train._.1000")
+    time.sleep(0.3)
+    created.set()
+    renewed = read_ledger(allocator)["train._.1000"]["time"]
+    assert renewed > reserved
+    time.sleep(0.2)
+    assert read_ledger(allocator)["train._.1000"]["time"] == renewed
+
+    # A released reservation is not brought back
+    created = allocator.hold_gpu_reservation("train._.1000")
+    allocator.release_gpus("train._.1000")
+    time.sleep(0.2)
+    created.set()
+    assert read_ledger(allocator) == {}
+
+
+def test_gpu_conflicts(allocator, inventory):
+    inventory.append(make_container(allocator, "busy", "device=1"))
+    assert allocator.gpu_conflicts("train._.1000", {"aime.mlc.GPUS": "all", "aime.mlc.ARCH": "CUDA_ADA"}) == ""
+    assert allocator.gpu_conflicts("train._.1000", {"aime.mlc.GPUS": "device=0", "aime.mlc.ARCH": "CUDA_ADA"}) == ""
+    assert allocator.gpu_conflicts("train._.1000", {"aime.mlc.GPUS": "device=0,1", "aime.mlc.ARCH": "CUDA_ADA"}) == "GPU1: busy (alice)"
+
+
+def test_rocm_containers_without_assignment_hold_all_gpus(allocator, inventory):
+    inventory.append(make_container(allocator, "rocm", "1", architecture="ROCM6"))
+    assert sorted(allocator.held_gpu_devices(4)) == [0, 1, 2, 3]
+
+
+def test_cuda_create_command_skips_rocm_devices(allocator, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("ROCm device lookup for a CUDA container")
+
+    monkeypatch.setattr(allocator, "rocm_device_nodes", fail)
+    monkeypatch.setattr(allocator, "list_gpu_numa_nodes", fail)
+    command = build_create_command(allocator, "CUDA_ADA", "device=2,3")
+    assert option_values(command, "--gpus") == ['"device=2,3"']
+    assert not any(option.startswith("ROCR_VISIBLE_DEVICES") for option in command)
+
+    monkeypatch.setattr(allocator, "list_gpu_numa_nodes", lambda architecture, root=None: [(str(index), 0) for index in range(4)])
+    monkeypatch.setattr(allocator, "rocm_device_nodes", lambda devices, root=None: [f"/dev/dri/renderD{128 + device}" for device in devices])
+    command = build_create_command(allocator, "ROCM6", "device=2,3")
+    assert option_values(command, "--device") == ["/dev/snd", "/dev/kfd", "/dev/dri/renderD130", "/dev/dri/renderD131"]
+    assert "ROCR_VISIBLE_DEVICES=2,3" in option_values(command, "--env")
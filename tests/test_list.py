@@ -0,0 +1,67 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""mlc list shows the same containers through the Docker Engine API and through the docker CLI fallback."""
+
+import importlib
+import os
+
+import pytest
+
+from docker_stub import FakeDockerDaemon, make_containers, write_stub_docker_cli
+
+
+def make_test_containers(mlc):
+    containers = make_containers(4, mlc.user_name, mlc.user_id)
+    containers[0]["Labels"].update({
+        "aime.mlc.CPUS": "4", "aime.mlc.MEMORY": "16g", "aime.mlc.SHM_SIZE": "8g",
+        "aime.mlc.CPUSET": "0-3", "aime.mlc.CPUSET_MEMS": "0",
+    })
+    containers[1]["Labels"]["aime.mlc.DATA_MOUNT"] = "/mnt/data"
+    # Containers of other users are only listed with -au
+    containers += make_containers(1, "other-user", 4242)
+    return containers
+
+
+def list_through_api(mlc, run_mlc, monkeypatch, containers, argv):
+    with FakeDockerDaemon(containers) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.docker_host)
+        importlib.reload(mlc)
+        output = run_mlc(*argv)
+        assert any(request.startswith("GET /containers/json") for request in daemon.requests)
+    return output
+
+
+def list_through_cli(mlc, run_mlc, monkeypatch, containers, argv):
+    stub_dir, log_file = write_stub_docker_cli(containers)
+    monkeypatch.setenv("MLC_DOCKER_API", "0")
+    monkeypatch.setenv("PATH", stub_dir + os.pathsep + os.environ["PATH"])
+    importlib.reload(mlc)
+    output = run_mlc(*argv)
+    with open(log_file) as f:
+        assert f.read(), "the docker CLI was not called"
+    return output
+
+
+@pytest.mark.parametrize("argv", [
+    ["list"],
+    ["list", "-a"],
+    ["list", "-r"],
+    ["list", "-w", "-d", "-m", "-arch"],
+    ["list", "-au"],
+    ["list", "--format", "json"],
+])
+def test_list_api_and_cli_agree(mlc, run_mlc, monkeypatch, argv):
+    containers = make_test_containers(mlc)
+    api_output = list_through_api(mlc, run_mlc, monkeypatch, containers, argv)
+    cli_output = list_through_cli(mlc, run_mlc, monkeypatch, containers, argv)
+    assert api_output == cli_output
+    assert "bench0" in api_output
+
+
+def test_list_resources_of_cli_fallback(mlc, run_mlc, monkeypatch):
+    output = list_through_cli(mlc, run_mlc, monkeypatch, make_test_containers(mlc), ["list", "-r"])
+    assert "cpus=4 mem=16g shm=8g cpuset=0-3/0" in output
@@ -0,0 +1,129 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""mlc models dedup, du and verify on temporary models directories and a temporary store (MLC_MODELS_STORE)."""
+
+import hashlib
+import importlib
+import os
+import stat
+
+import pytest
+
+WEIGHTS = os.urandom(64 * 1024)
+ADAPTER = os.urandom(32 * 1024)
+
+
+@pytest.fixture
+def models(mlc, monkeypatch, tmp_path):
+    """Two models directories sharing a weights file, each with a small config and a file of its own."""
+    monkeypatch.setenv("MLC_MODELS_STORE", str(tmp_path / "store"))
+    importlib.reload(mlc)
+    files = {
+        "llama/model.safetensors": WEIGHTS,
+        "llama/config.json": b"{}",
+        "llama-finetune/base/model.safetensors": WEIGHTS,
+        "llama-finetune/adapter.safetensors": ADAPTER,
+        "llama-finetune/config.json": b"{}",
+    }
+    for path, content in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(content)
+    return tmp_path
+
+
+def run_models(run_mlc, models, command, *options):
+    return run_mlc("models", command, str(models / "llama"), str(models / "llama-finetune"), "--min-size", "16k", "-s", *options)
+
+
+def store_object(mlc, content):
+    return mlc.get_models_store_object(hashlib.sha256(content).hexdigest())
+
+
+def test_scan_and_hash(mlc, models):
+    files = mlc.scan_model_files([str(models / "llama"), str(models / "llama-finetune")], 16 * 1024)
+    assert sorted(os.path.relpath(model_file.path, models) for model_file in files) == [
+        "llama-finetune/adapter.safetensors", "llama-finetune/base/model.safetensors", "llama/model.safetensors"
+    ]
+    connection = mlc.open_models_index()
+    hashed_files, failed_files = mlc.hash_model_files(files, connection)
+    assert failed_files == []
+    assert {model_file.hash for model_file in hashed_files} == {hashlib.sha256(WEIGHTS).hexdigest(), hashlib.sha256(ADAPTER).hexdigest()}
+    # The hashes are cached in the index, unchanged files are not read again
+    assert mlc.hash_model_files(files, connection, progress=lambda *hashed: pytest.fail("file hashed again"))[0]
+    summary = mlc.summarize_model_files(hashed_files)
+    assert summary == {"size": 2 * len(WEIGHTS) + len(ADAPTER), "used": 2 * len(WEIGHTS) + len(ADAPTER), "saved": 0, "reclaimable": len(WEIGHTS)}
+
+
+def test_dedup(mlc, run_mlc, models):
+    assert "Run mlc models dedup" in run_models(run_mlc, models, "du")
+    assert "1 files would be linked" in run_models(run_mlc, models, "dedup", "--dry-run")
+    assert os.stat(models / "llama/model.safetensors").st_nlink == 1
+
+    output = run_models(run_mlc, models, "dedup", "--link", "hardlink")
+    assert "1 files linked" in output and run_mlc.exit_code == 0
+    first, second = os.stat(models / "llama/model.safetensors"), os.stat(models / "llama-finetune/base/model.safetensors")
+    object_stat = os.stat(store_object(mlc, WEIGHTS))
+    assert first.st_ino == second.st_ino == object_stat.st_ino and object_stat.st_nlink == 3
+    assert stat.S_IMODE(object_stat.st_mode) == 0o444
+    assert (models / "llama-finetune/base/model.safetensors").read_bytes() == WEIGHTS
+    # Files with a content of their own and small files stay as they are
+    assert os.stat(models / "llama-finetune/adapter.safetensors").st_nlink == 1
+    assert not os.path.exists(store_object(mlc, ADAPTER))
+
+    # A second dedup has nothing left to do
+    assert "0 files linked" in run_models(run_mlc, models, "dedup", "--link", "hardlink")
+    assert "Run mlc models dedup" not in run_models(run_mlc, models, "du")
+
+
+def test_prune_unused_objects(mlc, run_mlc, models):
+    run_models(run_mlc, models, "dedup", "--link", "hardlink")
+    os.remove(models / "llama/model.safetensors")
+    os.remove(models / "llama-finetune/base/model.safetensors")
+    assert "1 unused store objects" in run_models(run_mlc, models, "dedup", "--link", "hardlink")
+    assert not os.path.exists(store_object(mlc, WEIGHTS))
+
+
+def test_verify(mlc, run_mlc, models):
+    run_models(run_mlc, models, "dedup", "--link", "hardlink")
+    output = run_models(run_mlc, models, "verify")
+    assert "0 problems" in output and run_mlc.exit_code == 0
+
+    # A file changed in place without a change of size and mtime keeps its cached hash, only verify notices it
+    adapter = models / "llama-finetune/adapter.safetensors"
+    adapter_stat = os.stat(adapter)
+    adapter.write_bytes(bytes(len(ADAPTER)))
+    os.utime(adapter, ns=(adapter_stat.st_atime_ns, adapter_stat.st_mtime_ns))
+    # The store object is corrupted, all its hardlinks with it
+    object_path = store_object(mlc, WEIGHTS)
+    object_stat = os.stat(object_path)
+    os.chmod(object_path, 0o644)
+    with open(object_path, "r+b") as object_file:
+        object_file.write(b"\0" * 16)
+    os.chmod(object_path, 0o444)
+    os.utime(object_path, ns=(object_stat.st_atime_ns, object_stat.st_mtime_ns))
+
+    output = run_models(run_mlc, models, "verify")
+    assert run_mlc.exit_code == 1
+    assert f"{adapter}: content changed without a change of size and mtime" in output
+    assert f"{object_path}: store object does not match its hash" in output
+    assert "2 problems" in output
+
+
+@pytest.mark.parametrize("changed", ["llama/model.safetensors", "llama-finetune/base/model.safetensors"])
+def test_files_changed_since_hashing_are_not_linked(mlc, models, changed):
+    files = mlc.scan_model_files([str(models / "llama"), str(models / "llama-finetune")], 16 * 1024)
+    connection = mlc.open_models_index()
+    hashed_files, _ = mlc.hash_model_files(files, connection)
+    (models / changed).write_bytes(ADAPTER + ADAPTER)
+    result = mlc.dedup_model_files(hashed_files, connection, "hardlink")
+    assert result["linked"] == 0
+    assert [os.path.relpath(path, models) for path, _ in result["failed"]] == [changed]
+    assert (models / changed).read_bytes() == ADAPTER + ADAPTER
+    assert (models / "llama/model.safetensors").read_bytes() in (WEIGHTS, ADAPTER + ADAPTER)
+    # No store object holds a content other than its hash
+    object_path = store_object(mlc, WEIGHTS)
+    assert not os.path.exists(object_path) or open(object_path, "rb").read() == WEIGHTS
@@ -0,0 +1,63 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""mlc start of a single container with the stub docker CLI."""
+
+import importlib
+import os
+
+import pytest
+
+from docker_stub import make_containers, write_stub_docker_cli
+
+
+@pytest.fixture
+def docker_cli(mlc, monkeypatch):
+    """Stub docker CLI serving two containers of the user, bench0 is running and bench1 stopped. Provides the log of the calls."""
+    stub_dir, log_file = write_stub_docker_cli(make_containers(2, mlc.user_name, mlc.user_id))
+    monkeypatch.setenv("MLC_DOCKER_API", "0")
+    monkeypatch.setenv("PATH", stub_dir + os.pathsep + os.environ["PATH"])
+    importlib.reload(mlc)
+
+    def calls():
+        with open(log_file) as f:
+            return [line.split()[:2] for line in f]
+    calls.stub_dir = stub_dir
+    return calls
+
+
+def test_start_without_command(run_mlc, docker_cli):
+    output = run_mlc("start", "bench1", "-s")
+    assert "container started." in output
+    assert ["container", "start"] in docker_cli()
+    assert ["exec"] not in [call[:1] for call in docker_cli()]
+
+
+def test_start_with_command(run_mlc, docker_cli):
+    output = run_mlc("start", "bench1", "nvidia-smi", "-s", "-d")
+    assert "container started." in output
+    assert ["exec", "-d"] in docker_cli()
+
+
+def test_failed_start(run_mlc, docker_cli, monkeypatch, tmp_path):
+    # docker container start fails, all other calls are answered by the stub
+    failing_dir = tmp_path / "failing-docker"
+    failing_dir.mkdir()
+    (failing_dir / "docker").write_text(
+        "#!/bin/sh\n"
+        'if [ "$1 $2" = "container start" ]; then echo "Error response from daemon: driver failed" >&2; exit 1; fi\n'
+        f'exec {os.path.join(docker_cli.stub_dir, "docker")} "$@"\n'
+    )
+    (failing_dir / "docker").chmod(0o755)
+    monkeypatch.setenv("PATH", str(failing_dir) + os.pathsep + os.environ["PATH"])
+    output = run_mlc("start", "bench1", "nvidia-smi", "-s")
+    assert "could not be started: Error response from daemon: driver failed" in output
+    assert "container started." not in output
+
+
+def test_start_running_container(run_mlc, docker_cli):
+    assert "already running." in run_mlc("start", "bench0", "-s")
+    assert ["container", "start"] not in docker_cli()
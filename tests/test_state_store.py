@@ -0,0 +1,158 @@
+# AIME MLC - Machine Learning Container Management 
+# 
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/mlc 
+# 
+# This software may be used and distributed according to the terms of the MIT LICENSE 
+
+"""The container state store (MLC_STATE_STORE=1): reads of a fresh store, fallback to docker while it is stale, rebuild after a gap."""
+
+import importlib
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from docker_stub import FakeDockerDaemon, make_containers
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def state_store(mlc, monkeypatch):
+    """Stub daemon with three containers, mlc with the state store enabled against it."""
+    containers = make_containers(3, mlc.user_name, mlc.user_id)
+    with FakeDockerDaemon(containers) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.docker_host)
+        monkeypatch.setenv("MLC_STATE_STORE", "1")
+        importlib.reload(mlc)
+        yield daemon
+
+
+@pytest.fixture
+def follower_starts(mlc, state_store, monkeypatch):
+    """The follower processes reads of a stale store would start, they are recorded instead."""
+    starts = []
+    monkeypatch.setattr(mlc, "start_state_store_follower", starts.append)
+    return starts
+
+
+def set_heartbeat(mlc, age):
+    connection = mlc.open_state_store(mlc.get_state_store_file())
+    with connection:
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('heartbeat', ?)", (time.time() - age,))
+    connection.close()
+
+
+def inventory_states(mlc):
+    mlc.container_inventory = None
+    return {container.name: container.state for container in mlc.get_container_inventory()}
+
+
+def inventory_names(mlc):
+    return sorted(inventory_states(mlc))
+
+
+def list_requests(daemon):
+    return [request for request in daemon.requests if request.startswith("GET /containers/json")]
+
+
+def test_disabled_without_docker_api(mlc, monkeypatch):
+    monkeypatch.setenv("MLC_STATE_STORE", "1")
+    monkeypatch.setenv("MLC_DOCKER_API", "0")
+    assert not mlc.state_store_enabled()
+    assert mlc.read_state_store() is None
+
+
+def test_fresh_store_answers_without_docker(mlc, state_store, follower_starts):
+    connection = mlc.open_state_store(mlc.get_state_store_file())
+    mlc.rebuild_state_store(connection)
+    set_heartbeat(mlc, 0)
+    state_store.requests.clear()
+
+    assert inventory_names(mlc) == ["bench0", "bench1", "bench2"]
+    assert list_requests(state_store) == []
+    assert follower_starts == []
+    stored = {container.name: container for container in mlc.get_container_inventory()}
+    assert stored["bench0"].state == "running" and stored["bench0"].status.startswith("Up ")
+    assert stored["bench1"].labels["aime.mlc.FRAMEWORK"] == "Pytorch-2.5.0"
+
+
+def test_stale_store_falls_back_to_docker(mlc, state_store, follower_starts):
+    connection = mlc.open_state_store(mlc.get_state_store_file())
+    mlc.rebuild_state_store(connection)
+    # A container removed while the follower was not in sync
+    state_store.containers.pop()
+    set_heartbeat(mlc, mlc.state_store_max_age + 1)
+    state_store.requests.clear()
+
+    assert inventory_names(mlc) == ["bench0", "bench1"]
+    assert len(list_requests(state_store)) == 1
+    assert follower_starts == [mlc.get_state_store_file()]
+
+
+def test_changed_container_falls_back_to_docker(mlc, state_store, follower_starts):
+    connection = mlc.open_state_store(mlc.get_state_store_file())
+    mlc.rebuild_state_store(connection)
+    set_heartbeat(mlc, 0)
+    # After this command changed a container, the store may not have seen the event yet
+    mlc.invalidate_container_inventory()
+    assert mlc.read_state_store() is None
+
+
+def test_store_container_applies_events(mlc, state_store, follower_starts):
+    connection = mlc.open_state_store(mlc.get_state_store_file())
+    mlc.rebuild_state_store(connection)
+    set_heartbeat(mlc, 0)
+    container = state_store.containers[1]
+    container["State"] = "running"
+    mlc.store_container(connection, container["Id"])
+    assert inventory_states(mlc)["bench1"] == "running"
+
+    # The inspect of a removed container fails, its entry is deleted
+    state_store.containers.remove(container)
+    mlc.store_container(connection, container["Id"])
+    assert inventory_names(mlc) == ["bench0", "bench2"]
+
+
+def test_follower_rebuilds_after_gap(mlc, state_store, follower_starts, monkeypatch):
+    monkeypatch.setattr(mlc, "state_store_heartbeat", 0.05)
+    file_name = mlc.get_state_store_file()
+    follower = threading.Thread(target=mlc.run_state_store_follower, daemon=True)
+    follower.start()
+    try:
+        assert wait_for(lambda: mlc.read_state_store() is not None)
+        assert inventory_names(mlc) == ["bench0", "bench1", "bench2"]
+
+        # Events of the stream are applied to the store
+        assert mlc.docker_api_request("POST", f"/containers/{state_store.containers[1]['Id']}/start")[0] == 204
+        assert wait_for(lambda: inventory_states(mlc)["bench1"] == "running")
+
+        # The event stream ends and a container is removed during the gap, without an event
+        state_store.stopped = True
+        assert wait_for(lambda: mlc.read_state_store() is None)
+        state_store.containers.pop()
+        state_store.stopped = False
+        # While the store is stale, commands query docker
+        assert inventory_names(mlc) == ["bench0", "bench1"]
+
+        # The follower subscribes again and rebuilds the store, the removed container is gone
+        assert wait_for(lambda: mlc.read_state_store() is not None)
+        state_store.requests.clear()
+        assert inventory_names(mlc) == ["bench0", "bench1"]
+        assert list_requests(state_store) == []
+    finally:
+        # The follower exits once the store has not been read for state_store_idle_exit seconds
+        os.utime(f"{file_name}.lock", (0, 0))
+        follower.join(5)
+    assert not follower.is_alive()
+    heartbeat = sqlite3.connect(file_name).execute("SELECT value FROM meta WHERE key = 'heartbeat'").fetchone()
+    assert heartbeat is None